@@ -115,6 +115,50 @@ else:
     }
 
 
+# ============================================
+# CACHE COMPARTILHADO ENTRE PROCESSOS
+# ============================================
+# O cache precisa ser visível por todos os workers do gunicorn e pelo worker
+# de importação. Ordem de escolha:
+#   1. REDIS_URL definido            → Redis
+#   2. MEMCACHED_LOCATION definido   → Memcached (pymemcache)
+#   3. CACHE_BACKEND=file            → FileBasedCache em MEDIA (volume compartilhado)
+#   4. Padrão                        → DatabaseCache (requer `manage.py createcachetable`)
+CACHE_KEY_PREFIX = os.environ.get('CACHE_KEY_PREFIX', 'siga')
+CACHE_TIMEOUT_PADRAO = int(os.environ.get('CACHE_TIMEOUT_PADRAO', 300))
+# Contadores de acerto/erro por namespace (cache_status): uma escrita extra por leitura
+CACHE_ESTATISTICAS = os.environ.get('CACHE_ESTATISTICAS', 'False') == 'True'
+
+if os.environ.get('REDIS_URL'):
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ.get('REDIS_URL'),
+    }
+elif os.environ.get('MEMCACHED_LOCATION'):
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+        'LOCATION': os.environ.get('MEMCACHED_LOCATION'),
+    }
+elif os.environ.get('CACHE_BACKEND', 'db') == 'file':
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', os.path.join(BASE_DIR, 'media', 'cache')),
+    }
+else:
+    _cache_default = {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'siga_cache'),
+    }
+
+CACHES = {
+    'default': {
+        **_cache_default,
+        'KEY_PREFIX': CACHE_KEY_PREFIX,
+        'TIMEOUT': CACHE_TIMEOUT_PADRAO,
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -198,12 +242,40 @@ DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER)
 # IMPORTANTE: Altere este valor em produção e mantenha secreto
 API_ROBO_SECRET_HASH = os.environ.get('API_ROBO_SECRET_HASH', 'hash_secreto_padrao_trocar_em_producao')
 
+# Long-poll dos endpoints de pendentes (?aguardar=N): espera máxima e intervalo
+# entre as verificações da geração da fila no cache (segundos)
+API_ROBO_AGUARDAR_MAXIMO = int(os.environ.get('API_ROBO_AGUARDAR_MAXIMO', 30))
+API_ROBO_AGUARDAR_INTERVALO = float(os.environ.get('API_ROBO_AGUARDAR_INTERVALO', 1))
+
+# Importação parada em PENDING/PROCESSING por mais que isso é marcada como
+# FAILED (RegistroImportacao.marcar_abandonadas), liberando o feed de alterações
+IMPORTACAO_ABANDONADA_HORAS = int(os.environ.get('IMPORTACAO_ABANDONADA_HORAS', 6))
+# Exportação parada em PENDING/PROCESSING por mais que isso é marcada como
+# FAILED (ExportJob.marcar_abandonadas) e um novo pedido agenda outra
+EXPORTACAO_ABANDONADA_HORAS = int(os.environ.get('EXPORTACAO_ABANDONADA_HORAS', 2))
+
 # Configurações do Azure AD para envio de emails
 AZURE_AD_CLIENT_ID = os.environ.get('AZURE_AD_CLIENT_ID', '')
 AZURE_AD_CLIENT_SECRET = os.environ.get('AZURE_AD_CLIENT_SECRET', '')
 AZURE_AD_TENANT_ID = os.environ.get('AZURE_AD_TENANT_ID', '')
 SENDER_EMAIL = os.environ.get('SENDER_EMAIL', '')
 
+# Microsoft Graph: conexões reaproveitadas e novas tentativas em 429/5xx
+GRAPH_API_URL = os.environ.get('GRAPH_API_URL', 'https://graph.microsoft.com/v1.0')
+GRAPH_HTTP_TIMEOUT = int(os.environ.get('GRAPH_HTTP_TIMEOUT', 30))
+GRAPH_HTTP_TENTATIVAS = int(os.environ.get('GRAPH_HTTP_TENTATIVAS', 3))
+GRAPH_HTTP_BACKOFF = float(os.environ.get('GRAPH_HTTP_BACKOFF', 1.0))
+GRAPH_HTTP_POOL = int(os.environ.get('GRAPH_HTTP_POOL', 10))
+# Campanhas de email: threads enviando $batch e teto global de requisições/s (0 = sem limite)
+GRAPH_LOTE_THREADS = int(os.environ.get('GRAPH_LOTE_THREADS', 4))
+GRAPH_REQUISICOES_POR_SEGUNDO = float(os.environ.get('GRAPH_REQUISICOES_POR_SEGUNDO', 4))
+# Caixa de saída de emails (worker): emails por lote, tentativas e backoff inicial (dobra a cada falha)
+EMAIL_LOTE_WORKER = int(os.environ.get('EMAIL_LOTE_WORKER', 100))
+EMAIL_MAX_TENTATIVAS = int(os.environ.get('EMAIL_MAX_TENTATIVAS', 5))
+EMAIL_BACKOFF_SEGUNDOS = int(os.environ.get('EMAIL_BACKOFF_SEGUNDOS', 60))
+# Segundos que um lote fica reservado para o worker (o envio para antes de a reserva vencer)
+EMAIL_RESERVA_SEGUNDOS = int(os.environ.get('EMAIL_RESERVA_SEGUNDOS', 300))
+
 # ============================================
 # CONFIGURAÇÕES DO DJANGO DEBUG TOOLBAR
 # ============================================
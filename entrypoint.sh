@@ -22,6 +22,9 @@ echo "✓ Banco de dados disponível!"
 echo "[2/5] Executando migrações do banco de dados..."
 python manage.py migrate --noinput
 
+# Tabela do cache compartilhado (usada quando não há Redis/Memcached)
+python manage.py createcachetable
+
 # Coleta arquivos estáticos
 echo "[3/5] Coletando arquivos estáticos..."
 python manage.py collectstatic --noinput --clear
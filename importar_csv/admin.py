@@ -1,6 +1,11 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import RegistroImportacao, HistoricoTarefa
+
+from tarefas.management.commands.aplicar_retencao import formatar_bytes
+from .models import (
+    RegistroImportacao, HistoricoTarefa, AlteracaoTarefa,
+    PoliticaRetencao, ExecucaoRetencao, ResumoMensalHistorico
+)
 
 
 @admin.register(RegistroImportacao)
@@ -65,7 +70,8 @@ class RegistroImportacaoAdmin(admin.ModelAdmin):
         'usuarios_criados',
         'total_processado',
         'duracao_display',
-        'arquivo_info_display'              # ← NOVO: Informações do arquivo
+        'arquivo_info_display',             # ← NOVO: Informações do arquivo
+        'historico_expurgado_em'
     )
     
     # Organização dos campos
@@ -97,7 +103,8 @@ class RegistroImportacaoAdmin(admin.ModelAdmin):
             'fields': (
                 'data_inicio_processamento',
                 'data_fim_processamento',
-                'duracao_display'
+                'duracao_display',
+                'historico_expurgado_em'
             )
         }),
         ('❌ Erros', {
@@ -475,4 +482,123 @@ class HistoricoTarefaAdmin(admin.ModelAdmin):
     
     def has_delete_permission(self, request, obj=None):
         """Permite deletar apenas para superusuários"""
-        return request.user.is_superuser
\ No newline at end of file
+        return request.user.is_superuser
+
+
+# ============================================
+# RETENÇÃO DO HISTÓRICO
+# ============================================
+
+@admin.register(PoliticaRetencao)
+class PoliticaRetencaoAdmin(admin.ModelAdmin):
+    """Política de retenção do HistoricoTarefa e dos CSVs (ver importar_csv/retencao.py)."""
+
+    list_display = (
+        'nome',
+        'ativa',
+        'dias_detalhe',
+        'manter_resumo_mensal',
+        'dias_arquivo_csv',
+        'tamanho_lote',
+        'data_atualizacao'
+    )
+    list_editable = ('ativa',)
+    actions = ['executar_retencao', 'simular_retencao']
+
+    def _agendar(self, request, queryset, simulacao):
+        from .tasks import executar_retencao_async
+
+        for politica in queryset:
+            execucao = ExecucaoRetencao.objects.create(politica=politica, simulacao=simulacao)
+            executar_retencao_async(execucao.id)
+            self.message_user(
+                request,
+                f'✓ Execução #{execucao.id} agendada para "{politica.nome}". '
+                f'Acompanhe em "Execuções de Retenção".',
+                level='success'
+            )
+
+    @admin.action(description='🧹 Executar retenção agora (em segundo plano)')
+    def executar_retencao(self, request, queryset):
+        self._agendar(request, queryset, simulacao=False)
+
+    @admin.action(description='🔍 Simular retenção (não remove nada)')
+    def simular_retencao(self, request, queryset):
+        self._agendar(request, queryset, simulacao=True)
+
+
+@admin.register(ExecucaoRetencao)
+class ExecucaoRetencaoAdmin(admin.ModelAdmin):
+    """Relatório das execuções de retenção (linhas e bytes recuperados)."""
+
+    list_display = (
+        'id',
+        'politica',
+        'status',
+        'simulacao',
+        'data_inicio',
+        'data_fim',
+        'importacoes_expurgadas',
+        'linhas_removidas',
+        'linhas_resumo',
+        'alteracoes_removidas',
+        'particoes_removidas',
+        'espaco_banco_display',
+        'espaco_arquivos_display'
+    )
+    list_filter = ('status', 'simulacao')
+
+    def espaco_banco_display(self, obj):
+        return formatar_bytes(obj.bytes_banco_estimados)
+    espaco_banco_display.short_description = 'Banco (estimado)'
+
+    def espaco_arquivos_display(self, obj):
+        return f"{obj.arquivos_removidos} CSV(s) / {formatar_bytes(obj.bytes_arquivos)}"
+    espaco_arquivos_display.short_description = 'Arquivos'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ResumoMensalHistorico)
+class ResumoMensalHistoricoAdmin(admin.ModelAdmin):
+    """Resumos mensais gerados pela retenção (somente leitura)."""
+
+    list_display = (
+        'numero_protocolo_tarefa',
+        'mes',
+        'quantidade_importacoes',
+        'status_tarefa',
+        'siape_responsavel',
+        'tempo_em_pendencia_max',
+        'ultima_importacao'
+    )
+    search_fields = ('numero_protocolo_tarefa',)
+    date_hierarchy = 'mes'
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(AlteracaoTarefa)
+class AlteracaoTarefaAdmin(admin.ModelAdmin):
+    """Feed de alterações gravado pelas importações (somente leitura)."""
+
+    list_display = ('id', 'registro_importacao', 'numero_protocolo_tarefa', 'tipo')
+    list_filter = ('tipo',)
+    search_fields = ('numero_protocolo_tarefa',)
+    raw_id_fields = ('registro_importacao',)
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
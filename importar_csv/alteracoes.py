@@ -0,0 +1,105 @@
+"""
+Feed de alterações das tarefas por importação (AlteracaoTarefa).
+
+Integrações (extração do BI, robô) baixavam a base inteira a cada
+importação. Aqui a própria importação registra só o que mudou:
+
+    - CRIADA: protocolo novo no CSV;
+    - ALTERADA: campos do CSV que mudaram, como {campo: [antes, depois]}
+      (uma tarefa arquivada que volta ao CSV traz "ativa": [false, true]);
+    - ARQUIVADA: tarefa ativa ausente do CSV (só na importação assíncrona,
+      que é a que arquiva).
+
+A comparação usa os objetos que processar_lote já carrega para o
+bulk_update: nenhuma consulta extra por tarefa.
+
+O feed é lido por /api/tarefas/alteracoes/?desde=<registro_id> (tarefas/api/views.py)
+e expurgado junto com o histórico pela retenção (importar_csv/retencao.py).
+"""
+from django.db import transaction
+
+from .models import AlteracaoTarefa
+
+TAMANHO_LOTE = 2000
+
+# Campos vindos do CSV comparados a cada importação. Ficam de fora os que
+# mudam sozinhos a cada extração (data_processamento_tarefa e os tempo_*_em_dias,
+# que contam dias) e os calculados, como a criticidade: com eles quase toda
+# tarefa ativa seria ALTERADA em toda importação.
+CAMPOS_ALTERACAO = [
+    'indicador_subtarefas_pendentes',
+    'codigo_unidade_tarefa',
+    'nome_servico',
+    'status_tarefa',
+    'descricao_cumprimento_exigencia_tarefa',
+    'siape_responsavel_id',
+    'cpf_responsavel',
+    'nome_profissional_responsavel',
+    'codigo_gex_responsavel',
+    'nome_gex_responsavel',
+    'data_distribuicao_tarefa',
+    'data_ultima_atualizacao',
+    'data_prazo',
+    'data_inicio_ultima_exigencia',
+    'data_fim_ultima_exigencia',
+    'indicador_tarefa_reaberta',
+]
+
+
+def valores_alteracao(tarefa):
+    """Fotografia dos campos comparados (antes de aplicar a linha do CSV)"""
+    return tuple(getattr(tarefa, campo) for campo in CAMPOS_ALTERACAO) + (tarefa.ativa,)
+
+
+def diferencas(antes, tarefa):
+    """
+    Campos que mudaram desde `antes` (valores_alteracao).
+
+    A tarefa presente no CSV fica ativa (processar_lote marca depois, em massa).
+
+    Returns:
+        dict: {campo: [antes, depois]} (vazio se nada mudou)
+    """
+    depois = tuple(getattr(tarefa, campo) for campo in CAMPOS_ALTERACAO) + (True,)
+    return {
+        campo.removesuffix('_id'): [valor_antes, valor_depois]
+        for campo, valor_antes, valor_depois in zip(CAMPOS_ALTERACAO + ['ativa'], antes, depois)
+        if valor_antes != valor_depois
+    }
+
+
+def arquivar_tarefas(registro_importacao, tarefas):
+    """
+    Arquiva (ativa=False) as tarefas do queryset registrando ARQUIVADA para
+    cada uma, na mesma transação.
+
+    Os protocolos são lidos em lotes pela chave primária, sem carregar
+    todos em memória.
+
+    Returns:
+        int: Quantidade de tarefas arquivadas
+    """
+    total = 0
+    ultimo = ''
+    with transaction.atomic():
+        while True:
+            protocolos = list(
+                tarefas.filter(numero_protocolo_tarefa__gt=ultimo)
+                .order_by('numero_protocolo_tarefa')
+                .values_list('numero_protocolo_tarefa', flat=True)[:TAMANHO_LOTE]
+            )
+            if not protocolos:
+                break
+            AlteracaoTarefa.objects.bulk_create([
+                AlteracaoTarefa(
+                    registro_importacao=registro_importacao,
+                    numero_protocolo_tarefa=protocolo,
+                    tipo=AlteracaoTarefa.TIPO_ARQUIVADA,
+                )
+                for protocolo in protocolos
+            ])
+            total += len(protocolos)
+            ultimo = protocolos[-1]
+        if total:
+            tarefas.update(ativa=False)
+    return total
@@ -0,0 +1,83 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importar_csv', '0005_registroimportacao_caminho_arquivo_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PoliticaRetencao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nome', models.CharField(default='Padrão', max_length=100, verbose_name='Nome')),
+                ('ativa', models.BooleanField(default=True, verbose_name='Ativa')),
+                ('dias_detalhe', models.PositiveIntegerField(default=180, help_text='Importações mais antigas que isso têm o histórico resumido e removido', verbose_name='Dias com Histórico Completo')),
+                ('manter_resumo_mensal', models.BooleanField(default=True, help_text='Antes de remover, consolida o histórico em uma linha por tarefa por mês', verbose_name='Manter Resumo Mensal')),
+                ('dias_arquivo_csv', models.PositiveIntegerField(blank=True, default=30, help_text='Arquivos CSV de importações mais antigas são removidos do disco (vazio = nunca)', null=True, verbose_name='Dias com CSV no Disco')),
+                ('tamanho_lote', models.PositiveIntegerField(default=5000, help_text='Linhas removidas por transação', verbose_name='Tamanho do Lote')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Política de Retenção',
+                'verbose_name_plural': 'Políticas de Retenção',
+                'ordering': ['-ativa', '-data_atualizacao'],
+            },
+        ),
+        migrations.AddField(
+            model_name='registroimportacao',
+            name='historico_expurgado_em',
+            field=models.DateTimeField(blank=True, help_text='Preenchido quando os HistoricoTarefa desta importação foram resumidos e removidos', null=True, verbose_name='Histórico Expurgado em'),
+        ),
+        migrations.CreateModel(
+            name='ExecucaoRetencao',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendente'), ('PROCESSING', 'Processando'), ('COMPLETED', 'Concluída'), ('FAILED', 'Falhou')], default='PENDING', max_length=20, verbose_name='Status')),
+                ('simulacao', models.BooleanField(default=False, verbose_name='Simulação (sem remover)')),
+                ('data_inicio', models.DateTimeField(blank=True, null=True, verbose_name='Início')),
+                ('data_fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+                ('importacoes_expurgadas', models.PositiveIntegerField(default=0, verbose_name='Importações Expurgadas')),
+                ('linhas_removidas', models.PositiveBigIntegerField(default=0, verbose_name='Linhas de Histórico Removidas')),
+                ('linhas_resumo', models.PositiveBigIntegerField(default=0, verbose_name='Linhas de Resumo Gravadas')),
+                ('particoes_removidas', models.PositiveIntegerField(default=0, verbose_name='Partições Removidas')),
+                ('bytes_banco_estimados', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recuperados no Banco (estimado)')),
+                ('arquivos_removidos', models.PositiveIntegerField(default=0, verbose_name='Arquivos CSV Removidos')),
+                ('bytes_arquivos', models.PositiveBigIntegerField(default=0, verbose_name='Bytes Recuperados em Disco')),
+                ('mensagem_erro', models.TextField(blank=True, null=True, verbose_name='Mensagem de Erro')),
+                ('politica', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='execucoes', to='importar_csv.politicaretencao', verbose_name='Política')),
+            ],
+            options={
+                'verbose_name': 'Execução de Retenção',
+                'verbose_name_plural': 'Execuções de Retenção',
+                'ordering': ['-id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumoMensalHistorico',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primeiro dia do mês', verbose_name='Mês')),
+                ('numero_protocolo_tarefa', models.CharField(max_length=50, verbose_name='Protocolo')),
+                ('quantidade_importacoes', models.PositiveIntegerField(default=0, verbose_name='Importações no Mês')),
+                ('primeira_importacao', models.DateTimeField(verbose_name='Primeira Importação no Mês')),
+                ('ultima_importacao', models.DateTimeField(verbose_name='Última Importação no Mês')),
+                ('status_tarefa', models.CharField(blank=True, max_length=100, null=True, verbose_name='Último Status')),
+                ('siape_responsavel', models.CharField(blank=True, max_length=20, null=True, verbose_name='Último Responsável')),
+                ('nome_gex_responsavel', models.CharField(blank=True, max_length=255, null=True, verbose_name='Última GEX')),
+                ('tempo_em_pendencia_max', models.IntegerField(default=0, verbose_name='Maior Tempo em Pendência (dias)')),
+            ],
+            options={
+                'verbose_name': 'Resumo Mensal de Histórico',
+                'verbose_name_plural': 'Resumos Mensais de Histórico',
+                'ordering': ['-mes', 'numero_protocolo_tarefa'],
+                'indexes': [models.Index(fields=['numero_protocolo_tarefa', 'mes'], name='resumo_mensal_protocolo_idx')],
+                'constraints': [models.UniqueConstraint(fields=('mes', 'numero_protocolo_tarefa'), name='resumo_mensal_mes_protocolo_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importar_csv', '0006_retencao_historico'),
+        ('tarefas', '0021_snapshot_kpi'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicotarefa',
+            index=models.Index(fields=['tarefa_original', 'registro_importacao'], name='historico_tarefa_import_idx'),
+        ),
+    ]
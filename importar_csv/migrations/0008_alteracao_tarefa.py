@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:13
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importar_csv', '0007_indice_linha_tempo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AlteracaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('numero_protocolo_tarefa', models.CharField(max_length=20, verbose_name='Número do Protocolo')),
+                ('tipo', models.CharField(choices=[('CRIADA', 'Criada'), ('ALTERADA', 'Alterada'), ('ARQUIVADA', 'Arquivada')], max_length=10, verbose_name='Tipo')),
+                ('campos', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='{campo: [antes, depois]} (só em ALTERADA)', null=True, verbose_name='Campos Alterados')),
+                ('registro_importacao', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='alteracoes', to='importar_csv.registroimportacao', verbose_name='Registro de Importação')),
+            ],
+            options={
+                'verbose_name': 'Alteração de Tarefa',
+                'verbose_name_plural': 'Alterações de Tarefas',
+                'ordering': ['registro_importacao', 'id'],
+                'indexes': [models.Index(fields=['registro_importacao', 'id'], name='alteracao_tarefa_feed_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importar_csv', '0008_alteracao_tarefa'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='execucaoretencao',
+            name='alteracoes_removidas',
+            field=models.PositiveBigIntegerField(default=0, verbose_name='Alterações do Feed Removidas'),
+        ),
+    ]
@@ -1,4 +1,5 @@
 from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
 from usuarios.models import CustomUser
 from tarefas.models import Tarefa
 
@@ -86,11 +87,51 @@ class RegistroImportacao(models.Model):
         verbose_name="Mensagem de Erro"
     )
 
+    # Retenção (ver importar_csv/retencao.py)
+    historico_expurgado_em = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Histórico Expurgado em",
+        help_text="Preenchido quando os HistoricoTarefa desta importação foram resumidos e removidos"
+    )
+
     def __str__(self):
         data_formatada = self.data_importacao.strftime('%d/%m/%Y às %H:%M')
         nome_usuario = self.usuario.nome_completo if self.usuario else "Usuário Desconhecido"
         return f"Importação em {data_formatada} por {nome_usuario} - {self.get_status_display()}"
 
+    @classmethod
+    def marcar_abandonadas(cls, agora=None):
+        """
+        Marca como FAILED as importações paradas em PENDING/PROCESSING há mais
+        de IMPORTACAO_ABANDONADA_HORAS (worker ou requisição morta no meio).
+
+        Sem isso o feed de alterações, que para na primeira importação em
+        andamento, ficaria parado para sempre. O prazo precisa ser maior que
+        o tempo de uma importação e que o MAX_RUN_TIME do background_task
+        (quando o worker reexecuta a tarefa travada).
+
+        Returns:
+            int: Importações marcadas
+        """
+        from datetime import timedelta
+
+        from django.conf import settings
+        from django.db.models import Q
+        from django.utils import timezone
+
+        agora = agora or timezone.now()
+        corte = agora - timedelta(hours=getattr(settings, 'IMPORTACAO_ABANDONADA_HORAS', 6))
+        return cls.objects.filter(
+            Q(status='PENDING', data_importacao__lt=corte)
+            | Q(status='PROCESSING', data_inicio_processamento__lt=corte)
+            | Q(status='PROCESSING', data_inicio_processamento__isnull=True, data_importacao__lt=corte)
+        ).update(
+            status='FAILED',
+            mensagem_erro='Importação abandonada: não concluiu dentro do prazo',
+            data_fim_processamento=agora,
+        )
+
     def calcular_progresso(self):
         """Calcula e atualiza o percentual de progresso"""
         if self.total_linhas > 0:
@@ -185,4 +226,180 @@ class HistoricoTarefa(models.Model):
     class Meta:
         verbose_name = "Histórico de Tarefa"
         verbose_name_plural = "Históricos de Tarefas"
-        ordering = ['-registro_importacao__data_importacao']
\ No newline at end of file
+        ordering = ['-registro_importacao__data_importacao']
+        indexes = [
+            # OTIMIZAÇÃO: linha do tempo da tarefa (tarefas/linha_tempo.py)
+            models.Index(fields=['tarefa_original', 'registro_importacao'], name='historico_tarefa_import_idx'),
+        ]
+
+
+class AlteracaoTarefa(models.Model):
+    """
+    Feed de alterações por importação (importar_csv/alteracoes.py).
+
+    Só protocolos que mudaram geram linha: CRIADA (novo no CSV), ALTERADA
+    (campos com [antes, depois]) ou ARQUIVADA (ausente do CSV). Integrações
+    sincronizam por /api/tarefas/alteracoes/?desde=<registro_id>.
+    """
+    TIPO_CRIADA = 'CRIADA'
+    TIPO_ALTERADA = 'ALTERADA'
+    TIPO_ARQUIVADA = 'ARQUIVADA'
+    TIPO_CHOICES = [
+        (TIPO_CRIADA, 'Criada'),
+        (TIPO_ALTERADA, 'Alterada'),
+        (TIPO_ARQUIVADA, 'Arquivada'),
+    ]
+
+    registro_importacao = models.ForeignKey(
+        RegistroImportacao,
+        on_delete=models.CASCADE,
+        related_name="alteracoes",
+        verbose_name="Registro de Importação"
+    )
+    # Sem FK: o feed sobrevive à remoção da tarefa
+    numero_protocolo_tarefa = models.CharField(max_length=20, verbose_name="Número do Protocolo")
+    tipo = models.CharField(max_length=10, choices=TIPO_CHOICES, verbose_name="Tipo")
+    campos = models.JSONField(
+        null=True,
+        blank=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Campos Alterados",
+        help_text="{campo: [antes, depois]} (só em ALTERADA)"
+    )
+
+    class Meta:
+        verbose_name = "Alteração de Tarefa"
+        verbose_name_plural = "Alterações de Tarefas"
+        ordering = ['registro_importacao', 'id']
+        indexes = [
+            # OTIMIZAÇÃO: leitura do feed em ordem (importação, id) sem filesort
+            models.Index(fields=['registro_importacao', 'id'], name='alteracao_tarefa_feed_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.numero_protocolo_tarefa} {self.get_tipo_display()} (importação {self.registro_importacao_id})"
+
+
+# ============================================
+# RETENÇÃO DO HISTÓRICO
+# ============================================
+
+class PoliticaRetencao(models.Model):
+    """
+    Política de retenção do HistoricoTarefa e dos CSVs importados.
+
+    O histórico completo (uma linha por tarefa por importação) é mantido por
+    `dias_detalhe`; depois disso as importações são resumidas em
+    ResumoMensalHistorico (uma linha por tarefa por mês) e removidas em lotes.
+    Apenas a política ativa mais recente é aplicada.
+    """
+    nome = models.CharField(max_length=100, default='Padrão', verbose_name="Nome")
+    ativa = models.BooleanField(default=True, verbose_name="Ativa")
+    dias_detalhe = models.PositiveIntegerField(
+        default=180,
+        verbose_name="Dias com Histórico Completo",
+        help_text="Importações mais antigas que isso têm o histórico resumido e removido"
+    )
+    manter_resumo_mensal = models.BooleanField(
+        default=True,
+        verbose_name="Manter Resumo Mensal",
+        help_text="Antes de remover, consolida o histórico em uma linha por tarefa por mês"
+    )
+    dias_arquivo_csv = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        default=30,
+        verbose_name="Dias com CSV no Disco",
+        help_text="Arquivos CSV de importações mais antigas são removidos do disco (vazio = nunca)"
+    )
+    tamanho_lote = models.PositiveIntegerField(
+        default=5000,
+        verbose_name="Tamanho do Lote",
+        help_text="Linhas removidas por transação"
+    )
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name="Atualizado em")
+
+    class Meta:
+        verbose_name = "Política de Retenção"
+        verbose_name_plural = "Políticas de Retenção"
+        ordering = ['-ativa', '-data_atualizacao']
+
+    def __str__(self):
+        return f"{self.nome} ({self.dias_detalhe} dias de detalhe)"
+
+    @classmethod
+    def obter_ativa(cls):
+        """Retorna a política ativa mais recente (ou None)"""
+        return cls.objects.filter(ativa=True).order_by('-data_atualizacao').first()
+
+
+class ResumoMensalHistorico(models.Model):
+    """
+    Resumo mensal do HistoricoTarefa de um protocolo (gerado pela retenção).
+
+    Guarda a quantidade de importações em que a tarefa apareceu no mês e o
+    último estado visto (status, responsável, GEX).
+    """
+    mes = models.DateField(verbose_name="Mês", help_text="Primeiro dia do mês")
+    numero_protocolo_tarefa = models.CharField(max_length=50, verbose_name="Protocolo")
+    quantidade_importacoes = models.PositiveIntegerField(default=0, verbose_name="Importações no Mês")
+    primeira_importacao = models.DateTimeField(verbose_name="Primeira Importação no Mês")
+    ultima_importacao = models.DateTimeField(verbose_name="Última Importação no Mês")
+    status_tarefa = models.CharField(max_length=100, blank=True, null=True, verbose_name="Último Status")
+    siape_responsavel = models.CharField(max_length=20, blank=True, null=True, verbose_name="Último Responsável")
+    nome_gex_responsavel = models.CharField(max_length=255, blank=True, null=True, verbose_name="Última GEX")
+    tempo_em_pendencia_max = models.IntegerField(default=0, verbose_name="Maior Tempo em Pendência (dias)")
+
+    class Meta:
+        verbose_name = "Resumo Mensal de Histórico"
+        verbose_name_plural = "Resumos Mensais de Histórico"
+        ordering = ['-mes', 'numero_protocolo_tarefa']
+        constraints = [
+            models.UniqueConstraint(fields=['mes', 'numero_protocolo_tarefa'], name='resumo_mensal_mes_protocolo_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['numero_protocolo_tarefa', 'mes'], name='resumo_mensal_protocolo_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.numero_protocolo_tarefa} - {self.mes:%m/%Y} ({self.quantidade_importacoes} importações)"
+
+
+class ExecucaoRetencao(models.Model):
+    """Registro de cada execução da retenção, com o espaço recuperado."""
+    STATUS_CHOICES = [
+        ('PENDING', 'Pendente'),
+        ('PROCESSING', 'Processando'),
+        ('COMPLETED', 'Concluída'),
+        ('FAILED', 'Falhou'),
+    ]
+
+    politica = models.ForeignKey(
+        PoliticaRetencao,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='execucoes',
+        verbose_name="Política"
+    )
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='PENDING', verbose_name="Status")
+    simulacao = models.BooleanField(default=False, verbose_name="Simulação (sem remover)")
+    data_inicio = models.DateTimeField(null=True, blank=True, verbose_name="Início")
+    data_fim = models.DateTimeField(null=True, blank=True, verbose_name="Fim")
+
+    importacoes_expurgadas = models.PositiveIntegerField(default=0, verbose_name="Importações Expurgadas")
+    linhas_removidas = models.PositiveBigIntegerField(default=0, verbose_name="Linhas de Histórico Removidas")
+    linhas_resumo = models.PositiveBigIntegerField(default=0, verbose_name="Linhas de Resumo Gravadas")
+    alteracoes_removidas = models.PositiveBigIntegerField(default=0, verbose_name="Alterações do Feed Removidas")
+    particoes_removidas = models.PositiveIntegerField(default=0, verbose_name="Partições Removidas")
+    bytes_banco_estimados = models.PositiveBigIntegerField(default=0, verbose_name="Bytes Recuperados no Banco (estimado)")
+    arquivos_removidos = models.PositiveIntegerField(default=0, verbose_name="Arquivos CSV Removidos")
+    bytes_arquivos = models.PositiveBigIntegerField(default=0, verbose_name="Bytes Recuperados em Disco")
+    mensagem_erro = models.TextField(blank=True, null=True, verbose_name="Mensagem de Erro")
+
+    class Meta:
+        verbose_name = "Execução de Retenção"
+        verbose_name_plural = "Execuções de Retenção"
+        ordering = ['-id']
+
+    def __str__(self):
+        return f"Retenção #{self.id} - {self.get_status_display()} - {self.linhas_removidas} linhas"
@@ -0,0 +1,387 @@
+"""
+Retenção do HistoricoTarefa e dos CSVs importados.
+
+O HistoricoTarefa recebe uma linha por tarefa a cada importação e nunca era
+podado. A política ativa (PoliticaRetencao) define:
+
+    - dias_detalhe: por quanto tempo o histórico completo é mantido
+    - manter_resumo_mensal: consolidar em ResumoMensalHistorico antes de remover
+    - dias_arquivo_csv: por quanto tempo o CSV bruto fica no disco
+
+O feed de alterações (AlteracaoTarefa) de uma importação é removido junto
+com o histórico dela: integrações precisam sincronizar dentro de dias_detalhe.
+
+O expurgo é feito por importação (registro_importacao), da mais antiga para a
+mais nova, em lotes de `tamanho_lote` linhas. Cada lote é resumido e removido
+na mesma transação curta: uma interrupção no meio não duplica o resumo nem
+perde linhas.
+
+Com a tabela particionada por RANGE(registro_importacao_id) no MySQL (ver o
+comando particionar_historico), as partições cujas importações já foram todas
+expurgadas são descartadas com DROP PARTITION, que devolve o espaço ao disco
+(DELETE no InnoDB não reduz o arquivo). Sem resumo mensal, a partição é
+descartada diretamente, sem ler nem apagar as linhas.
+
+Uso:
+    python manage.py aplicar_retencao [--simular] [--sincrono]
+"""
+import os
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import (
+    AlteracaoTarefa,
+    ExecucaoRetencao,
+    HistoricoTarefa,
+    PoliticaRetencao,
+    RegistroImportacao,
+    ResumoMensalHistorico,
+)
+
+STATUS_FINALIZADOS = ['COMPLETED', 'FAILED']
+
+
+# ============================================
+# INFORMAÇÕES DO BANCO (MySQL)
+# ============================================
+
+def _tabela_historico():
+    return HistoricoTarefa._meta.db_table
+
+
+def tamanho_medio_linha_historico():
+    """
+    Bytes médios por linha do HistoricoTarefa (dados + índices).
+
+    Usa information_schema no MySQL; em outros bancos retorna 0 (sem estimativa).
+    """
+    if connection.vendor != 'mysql':
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [_tabela_historico()]
+        )
+        linha = cursor.fetchone()
+    if not linha or not linha[0]:
+        return 0
+    return int(linha[1] / linha[0])
+
+
+def particoes_historico():
+    """
+    Partições RANGE do HistoricoTarefa (somente MySQL).
+
+    Returns:
+        list: [{'nome', 'limite' (int ou None para MAXVALUE), 'linhas', 'bytes'}]
+              em ordem; lista vazia se a tabela não é particionada.
+    """
+    if connection.vendor != 'mysql':
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT PARTITION_NAME, PARTITION_DESCRIPTION, TABLE_ROWS, DATA_LENGTH + INDEX_LENGTH "
+            "FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_METHOD = 'RANGE' "
+            "ORDER BY PARTITION_ORDINAL_POSITION",
+            [_tabela_historico()]
+        )
+        linhas = cursor.fetchall()
+    return [
+        {
+            'nome': nome,
+            'limite': None if descricao == 'MAXVALUE' else int(descricao),
+            'linhas': linhas_particao or 0,
+            'bytes': tamanho or 0,
+        }
+        for nome, descricao, linhas_particao, tamanho in linhas
+    ]
+
+
+# ============================================
+# RESUMO MENSAL
+# ============================================
+
+def _mes_referencia(registro):
+    return timezone.localtime(registro.data_importacao).date().replace(day=1)
+
+
+def _resumir_lote(registro, linhas):
+    """
+    Acumula um lote de linhas do histórico no ResumoMensalHistorico.
+
+    Args:
+        registro (RegistroImportacao): Importação de origem das linhas
+        linhas (list): Tuplas (id, protocolo, status, siape, gex, tempo_pendencia)
+
+    Returns:
+        int: Quantidade de resumos criados ou atualizados
+    """
+    mes = _mes_referencia(registro)
+    data = registro.data_importacao
+    protocolos = {linha[1] for linha in linhas}
+
+    existentes = {
+        resumo.numero_protocolo_tarefa: resumo
+        for resumo in ResumoMensalHistorico.objects.filter(mes=mes, numero_protocolo_tarefa__in=protocolos)
+    }
+    novos = {}
+
+    for _, protocolo, status, siape, gex, tempo in linhas:
+        resumo = existentes.get(protocolo) or novos.get(protocolo)
+        if resumo is None:
+            novos[protocolo] = ResumoMensalHistorico(
+                mes=mes,
+                numero_protocolo_tarefa=protocolo,
+                quantidade_importacoes=1,
+                primeira_importacao=data,
+                ultima_importacao=data,
+                status_tarefa=status,
+                siape_responsavel=siape,
+                nome_gex_responsavel=gex,
+                tempo_em_pendencia_max=tempo or 0,
+            )
+            continue
+
+        resumo.quantidade_importacoes += 1
+        resumo.primeira_importacao = min(resumo.primeira_importacao, data)
+        resumo.tempo_em_pendencia_max = max(resumo.tempo_em_pendencia_max, tempo or 0)
+        if data >= resumo.ultima_importacao:
+            resumo.ultima_importacao = data
+            resumo.status_tarefa = status
+            resumo.siape_responsavel = siape
+            resumo.nome_gex_responsavel = gex
+
+    if existentes:
+        ResumoMensalHistorico.objects.bulk_update(
+            existentes.values(),
+            ['quantidade_importacoes', 'primeira_importacao', 'ultima_importacao', 'status_tarefa',
+             'siape_responsavel', 'nome_gex_responsavel', 'tempo_em_pendencia_max'],
+            batch_size=1000
+        )
+    if novos:
+        ResumoMensalHistorico.objects.bulk_create(novos.values(), batch_size=1000)
+
+    return len(existentes) + len(novos)
+
+
+# ============================================
+# EXPURGO
+# ============================================
+
+def registros_elegiveis(politica, agora=None):
+    """Importações finalizadas, mais antigas que dias_detalhe e ainda não expurgadas"""
+    agora = agora or timezone.now()
+    corte = agora - timedelta(days=politica.dias_detalhe)
+    return RegistroImportacao.objects.filter(
+        data_importacao__lt=corte,
+        status__in=STATUS_FINALIZADOS,
+        historico_expurgado_em__isnull=True,
+    ).order_by('id')
+
+
+def expurgar_registro(registro, politica, execucao, bytes_por_linha=0):
+    """
+    Resume e remove o histórico de uma importação em transações limitadas.
+
+    Returns:
+        int: Linhas processadas
+    """
+    processadas = 0
+    ultimo_id = 0
+
+    while True:
+        with transaction.atomic():
+            linhas = list(
+                HistoricoTarefa.objects
+                .filter(registro_importacao=registro, id__gt=ultimo_id)
+                .order_by('id')
+                .values_list(
+                    'id', 'tarefa_original_id', 'status_tarefa', 'siape_responsavel',
+                    'nome_gex_responsavel', 'tempo_em_pendencia_em_dias'
+                )[:politica.tamanho_lote]
+            )
+            if not linhas:
+                break
+            ultimo_id = linhas[-1][0]
+
+            if execucao.simulacao:
+                processadas += len(linhas)
+                continue
+
+            if politica.manter_resumo_mensal:
+                execucao.linhas_resumo += _resumir_lote(registro, linhas)
+            HistoricoTarefa.objects.filter(id__in=[linha[0] for linha in linhas]).delete()
+            execucao.bytes_banco_estimados += len(linhas) * bytes_por_linha
+            processadas += len(linhas)
+
+    expurgar_alteracoes(registro, politica, execucao)
+
+    if not execucao.simulacao:
+        registro.historico_expurgado_em = timezone.now()
+        registro.save(update_fields=['historico_expurgado_em'])
+
+    execucao.importacoes_expurgadas += 1
+    execucao.linhas_removidas += processadas
+    return processadas
+
+
+def expurgar_alteracoes(registro, politica, execucao):
+    """
+    Remove o feed de alterações de uma importação em lotes de `tamanho_lote`.
+
+    Returns:
+        int: Alterações removidas (ou que seriam, na simulação)
+    """
+    alteracoes = AlteracaoTarefa.objects.filter(registro_importacao=registro)
+    if execucao.simulacao:
+        removidas = alteracoes.count()
+    else:
+        removidas = 0
+        while True:
+            ids = list(alteracoes.order_by('id').values_list('id', flat=True)[:politica.tamanho_lote])
+            if not ids:
+                break
+            AlteracaoTarefa.objects.filter(id__in=ids).delete()
+            removidas += len(ids)
+
+    execucao.alteracoes_removidas += removidas
+    return removidas
+
+
+def _particoes_descartaveis(ids_elegiveis):
+    """
+    Partições cujas importações estão todas expurgadas ou elegíveis.
+
+    Returns:
+        list: Partições (dicts de particoes_historico) na ordem da tabela
+    """
+    particoes = particoes_historico()
+    if not particoes:
+        return []
+
+    ids_pendentes = set(
+        RegistroImportacao.objects.filter(historico_expurgado_em__isnull=True)
+        .values_list('id', flat=True)
+    ) - set(ids_elegiveis)
+    ids_expurgados = RegistroImportacao.objects.filter(
+        historico_expurgado_em__isnull=False
+    ).values_list('id', flat=True)
+    # Partições acima da última importação antiga recebem as próximas importações
+    maior_id_antigo = max([*ids_elegiveis, *ids_expurgados], default=0)
+
+    descartaveis = []
+    inicio = 0
+    for particao in particoes:
+        if particao['limite'] is None or particao['limite'] > maior_id_antigo + 1:
+            break
+        if any(inicio <= pk < particao['limite'] for pk in ids_pendentes):
+            break
+        descartaveis.append(particao)
+        inicio = particao['limite']
+    return descartaveis
+
+
+def remover_arquivos_csv(politica, execucao, agora=None):
+    """Remove do disco os CSVs de importações mais antigas que dias_arquivo_csv"""
+    if politica.dias_arquivo_csv is None:
+        return
+    agora = agora or timezone.now()
+    corte = agora - timedelta(days=politica.dias_arquivo_csv)
+
+    registros = RegistroImportacao.objects.filter(
+        data_importacao__lt=corte,
+        status__in=STATUS_FINALIZADOS,
+    ).exclude(caminho_arquivo__isnull=True).exclude(caminho_arquivo='')
+
+    for registro in registros.iterator():
+        if not registro.arquivo_existe():
+            continue
+        tamanho = os.path.getsize(registro.caminho_arquivo)
+        if execucao.simulacao:
+            sucesso = True
+        else:
+            sucesso, _ = registro.deletar_arquivo()
+        if sucesso:
+            execucao.arquivos_removidos += 1
+            execucao.bytes_arquivos += tamanho
+
+
+def aplicar_retencao(execucao):
+    """
+    Executa a retenção conforme a política da execução.
+
+    Atualiza e salva a ExecucaoRetencao com os totais recuperados.
+    """
+    politica = execucao.politica or PoliticaRetencao.obter_ativa()
+    execucao.politica = politica
+    execucao.status = 'PROCESSING'
+    execucao.data_inicio = timezone.now()
+    execucao.save()
+
+    try:
+        if politica is None:
+            raise ValueError("Nenhuma política de retenção ativa")
+
+        agora = timezone.now()
+        registros = list(registros_elegiveis(politica, agora))
+        bytes_por_linha = tamanho_medio_linha_historico()
+
+        # Partições inteiramente cobertas por importações elegíveis/expurgadas
+        particoes = _particoes_descartaveis([r.id for r in registros])
+        limite_particoes = particoes[-1]['limite'] if particoes else 0
+
+        for registro in registros:
+            dentro_de_particao = registro.id < limite_particoes
+            if dentro_de_particao and not politica.manter_resumo_mensal:
+                # Sem resumo: a partição será descartada inteira, nada a ler
+                expurgar_alteracoes(registro, politica, execucao)
+                if not execucao.simulacao:
+                    registro.historico_expurgado_em = timezone.now()
+                    registro.save(update_fields=['historico_expurgado_em'])
+                execucao.importacoes_expurgadas += 1
+                continue
+
+            # Dentro de partição descartável o espaço é contado no DROP PARTITION
+            expurgar_registro(
+                registro, politica, execucao,
+                bytes_por_linha=0 if dentro_de_particao else bytes_por_linha,
+            )
+            execucao.save()
+
+        for particao in particoes:
+            if not politica.manter_resumo_mensal:
+                execucao.linhas_removidas += particao['linhas']
+            execucao.bytes_banco_estimados += particao['bytes']
+            execucao.particoes_removidas += 1
+            if not execucao.simulacao:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        f"ALTER TABLE `{_tabela_historico()}` DROP PARTITION `{particao['nome']}`"
+                    )
+
+        remover_arquivos_csv(politica, execucao, agora)
+
+        execucao.status = 'COMPLETED'
+
+    except Exception as e:
+        execucao.status = 'FAILED'
+        execucao.mensagem_erro = str(e)
+
+    execucao.data_fim = timezone.now()
+    execucao.save()
+    return execucao
+
+
+def ha_retencao_pendente():
+    """
+    Indica se vale agendar uma execução: a política ativa tem importações a
+    expurgar e não há outra execução na fila.
+    """
+    politica = PoliticaRetencao.obter_ativa()
+    if politica is None or ExecucaoRetencao.objects.filter(status__in=['PENDING', 'PROCESSING']).exists():
+        return False
+    return registros_elegiveis(politica).exists()
@@ -28,6 +28,12 @@ def processar_importacao_async(registro_id):
         # Buscar o registro de importa��o
         registro = RegistroImportacao.objects.get(id=registro_id)
 
+        # Marcada como abandonada (RegistroImportacao.marcar_abandonadas): o feed
+        # de alterações já passou dela, reprocessar agora geraria alterações fora de ordem
+        if registro.status == 'FAILED':
+            print(f"Importação {registro_id} marcada como abandonada; não será processada")
+            return
+
         # Marcar como processando
         registro.status = 'PROCESSING'
         registro.data_inicio_processamento = timezone.now()
@@ -149,11 +155,11 @@ def processar_importacao_async(registro_id):
                 numero_protocolo_tarefa__in=todos_protocolos_csv
             )
 
-            qtd_arquivadas = tarefas_para_arquivar.count()
+            # Marcar como inativas (arquivadas), registrando no feed de alterações
+            from .alteracoes import arquivar_tarefas
+            qtd_arquivadas = arquivar_tarefas(registro, tarefas_para_arquivar)
 
             if qtd_arquivadas > 0:
-                # Marcar como inativas (arquivadas)
-                tarefas_para_arquivar.update(ativa=False)
                 print(f"\n✓ {qtd_arquivadas} tarefas foram arquivadas (marcadas como inativas)")
                 print(f"  Motivo: Não constam no arquivo CSV importado")
             else:
@@ -180,6 +186,17 @@ def processar_importacao_async(registro_id):
             registro.progresso_percentual = 100
             registro.save()
 
+            # Invalidar caches derivados dos dados importados (todos os processos)
+            # logo após a gravação: as etapas abaixo podem falhar sem deixar cache velho
+            from tarefas.cache import invalidar_namespace, NAMESPACE_PROCESSAMENTO
+            from tarefas.models import GeracaoDados
+            invalidar_namespace(NAMESPACE_PROCESSAMENTO)
+            GeracaoDados.incrementar()
+
+            # Etapas pós-importação: os dados já estão gravados e a importação
+            # está COMPLETED; uma falha aqui só é registrada no log
+            _executar_etapas_pos_importacao(registro)
+
             # Arquivo CSV mantido no disco para auditoria
             # Pode ser removido manualmente através do Django Admin se necessário
             if os.path.exists(registro.caminho_arquivo):
@@ -221,3 +238,94 @@ def processar_importacao_async(registro_id):
                 print(f"\n📁 Arquivo CSV mantido para análise do erro: {registro.caminho_arquivo}")
         except:
             pass
+
+
+def _atualizar_indice_busca(registro):
+    """Índice de busca (serviços, servidores e GEX novos/removidos)"""
+    from tarefas.busca import atualizar_indice_busca
+    return f"Índice de busca atualizado: {atualizar_indice_busca()}"
+
+
+def _atualizar_dimensoes(registro):
+    """Opções de status, serviço, GEX e unidade"""
+    from tarefas.dimensoes import atualizar_dimensoes
+    return f"Dimensões atualizadas: {atualizar_dimensoes()}"
+
+
+def _registrar_snapshot_kpi(registro):
+    """Snapshot dos KPIs para a série histórica do dashboard"""
+    from tarefas.snapshots import registrar_snapshot_kpi
+    return f"Snapshot de KPIs gravado: {registrar_snapshot_kpi(registro)} linhas"
+
+
+def _agendar_retencao(registro):
+    """Agenda a retenção do histórico se houver importações antigas a expurgar"""
+    from .models import ExecucaoRetencao
+    from .retencao import ha_retencao_pendente
+    if not ha_retencao_pendente():
+        return "Nenhuma retenção pendente"
+    execucao = ExecucaoRetencao.objects.create()
+    executar_retencao_async(execucao.id)
+    return f"Retenção do histórico agendada (execução #{execucao.id})"
+
+
+ETAPAS_POS_IMPORTACAO = [
+    _atualizar_indice_busca,
+    _atualizar_dimensoes,
+    _registrar_snapshot_kpi,
+    _agendar_retencao,
+]
+
+
+def _executar_etapas_pos_importacao(registro):
+    """
+    Executa cada etapa pós-importação isoladamente: uma falha é registrada
+    no log e as demais etapas seguem, sem alterar o status da importação.
+
+    Returns:
+        list: Nomes das etapas que falharam
+    """
+    falhas = []
+    for etapa in ETAPAS_POS_IMPORTACAO:
+        try:
+            print(etapa(registro))
+        except Exception:
+            falhas.append(etapa.__name__)
+            print(f"⚠️ Falha na etapa pós-importação {etapa.__name__} (importação {registro.id}):")
+            print(traceback.format_exc())
+    return falhas
+
+
+@background(schedule=0)
+def executar_retencao_async(execucao_id):
+    """
+    Tarefa assíncrona de retenção do histórico (ver importar_csv/retencao.py).
+
+    Args:
+        execucao_id: ID da ExecucaoRetencao a ser processada
+    """
+    from .models import ExecucaoRetencao
+    from .retencao import aplicar_retencao
+
+    try:
+        execucao = ExecucaoRetencao.objects.get(id=execucao_id)
+    except ExecucaoRetencao.DoesNotExist:
+        print(f"\nExecução de retenção {execucao_id} não encontrada!")
+        return
+
+    print(f"\n{'='*80}")
+    print(f"RETENÇÃO DO HISTÓRICO - Execução #{execucao_id}")
+    print(f"{'='*80}")
+
+    execucao = aplicar_retencao(execucao)
+
+    print(f"Status: {execucao.get_status_display()}")
+    print(f"Importações expurgadas: {execucao.importacoes_expurgadas}")
+    print(f"Linhas removidas: {execucao.linhas_removidas}")
+    print(f"Linhas de resumo: {execucao.linhas_resumo}")
+    print(f"Partições removidas: {execucao.particoes_removidas}")
+    print(f"Bytes recuperados (banco, estimado): {execucao.bytes_banco_estimados}")
+    print(f"Arquivos CSV removidos: {execucao.arquivos_removidos} ({execucao.bytes_arquivos} bytes)")
+    if execucao.mensagem_erro:
+        print(f"Erro: {execucao.mensagem_erro}")
+    print(f"{'='*80}\n")
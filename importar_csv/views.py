@@ -8,8 +8,10 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.db import transaction
 from django.contrib.auth.models import Group
 from .forms import CSVImportForm
-from .models import RegistroImportacao, HistoricoTarefa
+from .alteracoes import diferencas, valores_alteracao
+from .models import AlteracaoTarefa, RegistroImportacao, HistoricoTarefa
 from tarefas.models import Tarefa
+from tarefas.atribuicoes import registrar_mudancas_responsavel
 from usuarios.models import CustomUser, EmailServidor
 
 
@@ -183,8 +185,13 @@ class ImportarCSVView(LoginRequiredMixin, CoordenadorRequiredMixin, View):
             registro_importacao.registros_criados = total_criados
             registro_importacao.registros_atualizados = total_atualizados
             registro_importacao.usuarios_criados = usuarios_criados
+            registro_importacao.status = 'COMPLETED'
             registro_importacao.save()
 
+            # Nova geração dos dados (ETag da API de estado das tarefas)
+            from tarefas.models import GeracaoDados
+            GeracaoDados.incrementar()
+
             # Mensagem de sucesso com informação de usuários criados
             msg = (
                 f"Importação concluída com sucesso! "
@@ -506,6 +513,8 @@ class ImportarCSVView(LoginRequiredMixin, CoordenadorRequiredMixin, View):
             # ETAPA 6: Atualiza TODOS os registros com os dados do CSV (incluindo os 3 novos campos)
             tarefas_para_atualizar = []
             protocolos_nao_encontrados = []
+            mudancas_responsavel = []
+            alteracoes = []
             
             for protocolo, row in lote_dados_csv.items():
                 if protocolo not in todas_tarefas_do_lote:
@@ -515,6 +524,12 @@ class ImportarCSVView(LoginRequiredMixin, CoordenadorRequiredMixin, View):
                     
                 tarefa = todas_tarefas_do_lote[protocolo]
                 siape = row[6].strip() if len(row) > 6 and row[6] else None
+
+                # Troca de responsável (ou tarefa ainda sem atribuição rastreada)
+                if tarefa.data_atribuicao_atual is None or tarefa.siape_responsavel_id != siape:
+                    mudancas_responsavel.append(tarefa)
+
+                antes = valores_alteracao(tarefa) if protocolo in protocolos_existentes else None
                 
                 # Atualiza TODOS os campos (incluindo os 3 novos)
                 tarefa.indicador_subtarefas_pendentes = self.safe_int(row[1])
@@ -541,6 +556,35 @@ class ImportarCSVView(LoginRequiredMixin, CoordenadorRequiredMixin, View):
                 
                 tarefas_para_atualizar.append(tarefa)
 
+                # Feed de alterações: só o que mudou desde a importação anterior
+                if antes is None:
+                    alteracoes.append(AlteracaoTarefa(
+                        registro_importacao=registro_importacao,
+                        numero_protocolo_tarefa=protocolo,
+                        tipo=AlteracaoTarefa.TIPO_CRIADA,
+                    ))
+                else:
+                    campos = diferencas(antes, tarefa)
+                    if campos:
+                        alteracoes.append(AlteracaoTarefa(
+                            registro_importacao=registro_importacao,
+                            numero_protocolo_tarefa=protocolo,
+                            tipo=AlteracaoTarefa.TIPO_ALTERADA,
+                            campos=campos,
+                        ))
+
+            if alteracoes:
+                AlteracaoTarefa.objects.bulk_create(alteracoes)
+                print(f"  → {len(alteracoes)} alterações registradas no feed")
+
+            # OTIMIZAÇÃO: só as trocas de responsável geram escrita em AtribuicaoTarefa
+            qtd_atribuicoes = registrar_mudancas_responsavel(
+                mudancas_responsavel,
+                registro_importacao.data_importacao
+            )
+            if qtd_atribuicoes:
+                print(f"  → {qtd_atribuicoes} atribuições de responsável registradas")
+
             # Atualiza em massa COM TODOS OS CAMPOS (incluindo os 3 novos)
             if tarefas_para_atualizar:
                 Tarefa.objects.bulk_update(
@@ -567,6 +611,7 @@ class ImportarCSVView(LoginRequiredMixin, CoordenadorRequiredMixin, View):
                         'tempo_em_exigencia_em_dias',
                         'tempo_ate_ultima_distribuicao_tarefa_em_dias',
                         'data_processamento_tarefa',
+                        'data_atribuicao_atual',
                     ]
                 )
                 print(f"  → {len(tarefas_para_atualizar)} tarefas atualizadas")
@@ -0,0 +1,271 @@
+"""
+Arquivos do robô para ações em lote (REMOVER / TRANSFERIR) em vários servidores.
+
+gerar_arquivo_acao_lote (views) atende um servidor e uma fila por
+requisição. Para rebalancear a fila inteira, a seleção aqui é feita por
+política, em uma única passada:
+
+    - resumo_servidores(): um GROUP BY por servidor na fila (total e
+      críticas) decide quais servidores entram ("acima de X tarefas") e
+      quantas tarefas de cada um serão incluídas, sem ler as tarefas;
+    - escrever_arquivo_acao_lote(): percorre as tarefas selecionadas com
+      values_list(...).iterator(), ordenadas por (servidor, dias pendentes),
+      aplicando o limite "N por servidor" durante a leitura, e grava um arquivo
+      combinado (CSV) ou um CSV por servidor (ZIP);
+    - um HistoricoAcaoLote por servidor, gravados com bulk_create.
+
+Seleções grandes vão para o worker como ExportJob (RELATORIOS
+'acao_lote_csv' / 'acao_lote_zip'), e o arquivo fica na página de Exportações.
+
+Uso:
+    parametros = normalizar_parametros({'fila': 'PGB', 'tipo_acao': 'REMOVER',
+                                        'escopo': 'CRITICAS', 'acima_de': 40})
+    servidores = resumo_servidores(parametros)
+    resumo = escrever_arquivo_acao_lote(destino, parametros, servidores, usuario)
+"""
+import zipfile
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, Q
+
+from tarefas.models import HistoricoAcaoLote, Tarefa
+
+TAMANHO_LOTE = 2000
+
+# Seleções acima deste número de tarefas são geradas pelo worker
+LIMITE_ACAO_LOTE_DIRETA = 5000
+
+# tipo_acao → (tipo no histórico, código do arquivo do robô, nome no arquivo)
+TIPOS_ACAO = {
+    'REMOVER': (HistoricoAcaoLote.TIPO_REMOVER, '14', 'remover'),
+    'TRANSFERIR': (HistoricoAcaoLote.TIPO_TRANSFERIR, '12', 'transferir'),
+}
+
+ESCOPOS = {
+    'CRITICAS': 'Somente tarefas CRÍTICAS',
+    'TODAS': 'Todas as tarefas',
+}
+
+AGRUPAMENTOS = {
+    'COMBINADO': 'acao_lote_csv',
+    'POR_SERVIDOR': 'acao_lote_zip',
+}
+
+TAMANHO_MINIMO_DESPACHO = 30
+
+
+def cabecalho_arquivo(tipo_acao):
+    """Duas primeiras linhas do arquivo do robô (código do tipo e cabeçalho)"""
+    if tipo_acao == 'REMOVER':
+        return '14\n"Protocolo da Tarefa"\n'
+    return '12\n"Protocolo da Tarefa;UO de Destino da Tarefa;Despacho"\n'
+
+
+def linha_arquivo(tipo_acao, protocolo, uo_destino='', despacho=''):
+    """Linha de uma tarefa no arquivo do robô (aspas do despacho duplicadas)"""
+    if tipo_acao == 'REMOVER':
+        return f'"{protocolo}"\n'
+    despacho_escapado = despacho.replace('"', '""')
+    return f'"{protocolo};{uo_destino};{despacho_escapado}"\n'
+
+
+def normalizar_parametros(dados):
+    """
+    Valida os parâmetros da ação em lote por fila.
+
+    Args:
+        dados (dict): fila, tipo_acao, escopo, acima_de, por_servidor,
+            agrupamento, uo_destino, despacho
+
+    Returns:
+        dict: Parâmetros normalizados (serializáveis em JSON)
+
+    Raises:
+        ValueError: Parâmetro ausente ou inválido (mensagem para o usuário)
+    """
+    fila = (dados.get('fila') or '').strip()
+    if not fila:
+        raise ValueError('Fila não informada')
+
+    tipo_acao = dados.get('tipo_acao')
+    if tipo_acao not in TIPOS_ACAO:
+        raise ValueError('Tipo de ação inválido')
+
+    escopo = dados.get('escopo') or 'CRITICAS'
+    if escopo not in ESCOPOS:
+        raise ValueError('Escopo de seleção inválido')
+
+    agrupamento = dados.get('agrupamento') or 'COMBINADO'
+    if agrupamento not in AGRUPAMENTOS:
+        raise ValueError('Agrupamento inválido')
+
+    try:
+        acima_de = int(dados.get('acima_de') or 0)
+        por_servidor = int(dados.get('por_servidor') or 0)
+    except (TypeError, ValueError):
+        raise ValueError('Quantidades devem ser números')
+    if acima_de < 0 or por_servidor < 0:
+        raise ValueError('Quantidades não podem ser negativas')
+
+    parametros = {
+        'fila': fila,
+        'tipo_acao': tipo_acao,
+        'escopo': escopo,
+        'acima_de': acima_de,
+        'por_servidor': por_servidor,
+        'agrupamento': agrupamento,
+    }
+
+    if tipo_acao == 'TRANSFERIR':
+        uo_destino = (dados.get('uo_destino') or '').strip()
+        despacho = (dados.get('despacho') or '').strip()
+        if not uo_destino:
+            raise ValueError('UO de destino é obrigatória para transferência')
+        if len(despacho) < TAMANHO_MINIMO_DESPACHO:
+            raise ValueError(f'Despacho deve ter no mínimo {TAMANHO_MINIMO_DESPACHO} caracteres')
+        parametros.update(uo_destino=uo_destino, despacho=despacho)
+
+    return parametros
+
+
+def _tarefas_fila(parametros):
+    return Tarefa.objects.filter(
+        tipo_fila=parametros['fila'], ativa=True, siape_responsavel__isnull=False
+    )
+
+
+def resumo_servidores(parametros):
+    """
+    Servidores incluídos e quantas tarefas de cada um entram no arquivo.
+
+    Uma única consulta agregada: servidores com mais de `acima_de` tarefas
+    ativas na fila; de cada um, as críticas (ou todas), limitadas a
+    `por_servidor` quando informado.
+
+    Returns:
+        list: [(siape, quantidade)] ordenada por SIAPE (ordem do arquivo)
+    """
+    agregado = (
+        _tarefas_fila(parametros)
+        .values('siape_responsavel_id')
+        .annotate(
+            total=Count('numero_protocolo_tarefa'),
+            criticas=Count('numero_protocolo_tarefa', filter=Q(nivel_criticidade_calculado='CRÍTICA')),
+        )
+        .filter(total__gt=parametros['acima_de'])
+        .order_by('siape_responsavel_id')
+    )
+
+    servidores = []
+    for linha in agregado:
+        quantidade = linha['criticas'] if parametros['escopo'] == 'CRITICAS' else linha['total']
+        if parametros['por_servidor']:
+            quantidade = min(quantidade, parametros['por_servidor'])
+        if quantidade:
+            servidores.append((linha['siape_responsavel_id'], quantidade))
+    return servidores
+
+
+def nome_arquivo_acao_lote(parametros, siape=None, extensao=None):
+    tipo_arquivo = TIPOS_ACAO[parametros['tipo_acao']][2]
+    extensao = extensao or ('zip' if parametros['agrupamento'] == 'POR_SERVIDOR' else 'csv')
+    partes = ['acao_lote', tipo_arquivo, siape or 'servidores', parametros['fila'],
+              datetime.now().strftime('%Y%m%d_%H%M%S')]
+    return f"{'_'.join(partes)}.{extensao}"
+
+
+def escrever_arquivo_acao_lote(destino, parametros, servidores, usuario=None, ao_progredir=None):
+    """
+    Grava o arquivo do robô em uma única passada pelas tarefas selecionadas.
+
+    Args:
+        destino: Arquivo binário aberto para escrita
+        parametros (dict): Saída de normalizar_parametros
+        servidores (list): Saída de resumo_servidores
+        usuario: Quem gerou (HistoricoAcaoLote.gerado_por)
+        ao_progredir (callable): Opcional, recebe o total de linhas já escritas
+
+    Returns:
+        dict: {'servidores': n, 'tarefas': n, 'nome_arquivo': str}
+    """
+    tipo_acao = parametros['tipo_acao']
+    uo_destino = parametros.get('uo_destino', '')
+    despacho = parametros.get('despacho', '')
+    limites = dict(servidores)
+    nome_arquivo = nome_arquivo_acao_lote(parametros)
+
+    tarefas = _tarefas_fila(parametros).filter(siape_responsavel_id__in=list(limites))
+    if parametros['escopo'] == 'CRITICAS':
+        tarefas = tarefas.filter(nivel_criticidade_calculado='CRÍTICA')
+    tarefas = tarefas.order_by(
+        'siape_responsavel_id', '-dias_pendente_criticidade_calculado', 'numero_protocolo_tarefa'
+    ).values_list('numero_protocolo_tarefa', 'siape_responsavel_id')
+
+    por_servidor = parametros['agrupamento'] == 'POR_SERVIDOR'
+    pacote = zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED) if por_servidor else None
+    saida = None if por_servidor else destino
+    if saida:
+        saida.write(cabecalho_arquivo(tipo_acao).encode('utf-8'))
+
+    protocolos = {}
+    siape_atual = None
+    total = 0
+    try:
+        for protocolo, siape in tarefas.iterator(chunk_size=TAMANHO_LOTE):
+            if siape != siape_atual:
+                siape_atual = siape
+                protocolos[siape] = []
+                if por_servidor:
+                    if saida:
+                        saida.close()
+                    saida = pacote.open(nome_arquivo_acao_lote(parametros, siape, 'csv'), 'w')
+                    saida.write(cabecalho_arquivo(tipo_acao).encode('utf-8'))
+
+            incluidos = protocolos[siape]
+            if len(incluidos) >= limites[siape]:
+                continue
+            incluidos.append(protocolo)
+            saida.write(linha_arquivo(tipo_acao, protocolo, uo_destino, despacho).encode('utf-8'))
+
+            total += 1
+            if ao_progredir and total % TAMANHO_LOTE == 0:
+                ao_progredir(total)
+    finally:
+        if por_servidor:
+            if saida:
+                saida.close()
+            pacote.close()
+
+    ids_usuarios = dict(
+        get_user_model().objects.filter(siape__in=list(protocolos)).values_list('siape', 'id')
+    )
+    tipo_historico = TIPOS_ACAO[tipo_acao][0]
+    HistoricoAcaoLote.objects.bulk_create([
+        HistoricoAcaoLote(
+            servidor_id=ids_usuarios[siape],
+            codigo_fila=parametros['fila'],
+            tipo_acao=tipo_historico,
+            criterio_selecao=f"FILA_{parametros['escopo']}",
+            quantidade_tarefas=len(lista),
+            uo_destino=uo_destino,
+            despacho=despacho,
+            gerado_por=usuario,
+            nome_arquivo=nome_arquivo,
+            protocolos_incluidos=','.join(lista),
+        )
+        for siape, lista in protocolos.items()
+        if lista and siape in ids_usuarios
+    ], batch_size=TAMANHO_LOTE)
+
+    return {'servidores': len(protocolos), 'tarefas': total, 'nome_arquivo': nome_arquivo}
+
+
+def gerar_arquivo_exportacao(caminho, parametros, usuario=None, ao_iniciar=None, ao_progredir=None):
+    """Gerador de ExportJob ('acao_lote_csv' / 'acao_lote_zip'); retorna o total de tarefas"""
+    servidores = resumo_servidores(parametros)
+    if ao_iniciar:
+        ao_iniciar(sum(quantidade for _, quantidade in servidores))
+    with open(caminho, 'wb') as arquivo:
+        resumo = escrever_arquivo_acao_lote(arquivo, parametros, servidores, usuario, ao_progredir)
+    return resumo['tarefas']
@@ -1,3 +1,5 @@
+import logging
+
 from django.contrib import admin
 from django.utils.html import format_html
 from django.db.models import Count, Q
@@ -8,14 +10,61 @@ from .models import (
     Fila, ConfiguracaoFila,
     BloqueioServidor, SolicitacaoNotificacao,
     HistoricoBloqueio, HistoricoNotificacao,
-    HistoricoEmail, TemplateEmail, HistoricoAcaoLote
+    HistoricoEmail, TemplateEmail, HistoricoAcaoLote,
+    DimensaoTarefa, ExportJob
 )
+from .dimensoes import CAMPOS_DIMENSAO, opcoes_dimensao
 from .parametros import ParametrosAnalise, HistoricoAlteracaoPrazos
 from .parametros_admin import ParametrosAnaliseAdmin, HistoricoAlteracaoPrazosAdmin
 
+logger = logging.getLogger(__name__)
+
 # NOTA: Os 'admin.site.register' foram removidos daqui
 # pois já estão sendo registrados dentro de 'parametros_admin.py'
 
+# ============================================
+# FILTROS LATERAIS BASEADOS NAS TABELAS DE DIMENSÃO
+# ============================================
+
+class DimensaoListFilter(admin.SimpleListFilter):
+    """
+    Filtro lateral cujas opções vêm de DimensaoTarefa (com contagem de ativas).
+
+    O filtro padrão de um CharField faz DISTINCT na tabela inteira a cada
+    carregamento da listagem; aqui as opções são lidas da tabela de dimensão.
+    """
+    tipo_dimensao = None
+
+    def lookups(self, request, model_admin):
+        return [
+            (valor, f"{valor} ({total:,})")
+            for valor, total in opcoes_dimensao(self.tipo_dimensao, com_contagem=True)
+        ]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{CAMPOS_DIMENSAO[self.tipo_dimensao]: self.value()})
+        return queryset
+
+
+class StatusTarefaFilter(DimensaoListFilter):
+    title = 'status'
+    parameter_name = 'status_tarefa'
+    tipo_dimensao = DimensaoTarefa.TIPO_STATUS
+
+
+class ServicoTarefaFilter(DimensaoListFilter):
+    title = 'serviço'
+    parameter_name = 'nome_servico'
+    tipo_dimensao = DimensaoTarefa.TIPO_SERVICO
+
+
+class GexTarefaFilter(DimensaoListFilter):
+    title = 'GEX'
+    parameter_name = 'nome_gex_responsavel'
+    tipo_dimensao = DimensaoTarefa.TIPO_GEX
+
+
 # ============================================
 # ADMINISTRAÇÃO DO MODEL TAREFA
 # ============================================
@@ -58,11 +107,12 @@ class TarefaAdmin(admin.ModelAdmin):
         'tipo_fila',                    # ← NOVO FILTRO: Filtrar por fila
         'nivel_criticidade_calculado',
         'regra_aplicada_calculado',
-        'status_tarefa',
+        StatusTarefaFilter,         # Opções da tabela de dimensão
+        ServicoTarefaFilter,
         'tem_justificativa_ativa',  # ← NOVO FILTRO
         'tem_solicitacao_ajuda',    # ← NOVO FILTRO
         'servico_excluido_criticidade', # ← NOVO FILTRO
-        'nome_gex_responsavel',
+        GexTarefaFilter,
         'indicador_subtarefas_pendentes',
         'indicador_tarefa_reaberta',
         'data_distribuicao_tarefa',
@@ -430,65 +480,59 @@ class TarefaAdmin(admin.ModelAdmin):
     # AÇÕES EM MASSA (AJUSTADAS)
     # ============================================
     
+    def _exportar_em_segundo_plano(self, request, queryset, tipo):
+        """Seleções grandes viram ExportJob (evita estourar o timeout do worker web)"""
+        from django.urls import reverse
+        from .exportacao import solicitar_exportacao
+
+        protocolos = list(queryset.values_list('numero_protocolo_tarefa', flat=True))
+        job, reaproveitado = solicitar_exportacao(tipo, {'protocolos': protocolos}, request.user)
+        self.message_user(
+            request,
+            format_html(
+                '{} tarefas: exportação #{} {} em segundo plano. Baixe em <a href="{}">Exportações</a>.',
+                len(protocolos),
+                job.id,
+                'já disponível' if reaproveitado else 'agendada',
+                reverse('tarefas:exportacoes'),
+            ),
+            level='success'
+        )
+
     @admin.action(description='📊 Exportar tarefas com prazo vencido para CSV')
     def exportar_tarefas_com_prazo_vencido(self, request, queryset):
-        import csv
-        from django.http import HttpResponse
-        
-        tarefas_prazo_vencido = [t for t in queryset if t.prazo_vencido]
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="tarefas_prazo_vencido.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow(['Protocolo', 'Serviço', 'Status', 'Responsável', 'SIAPE', 'Data do Prazo', 'Dias de Atraso', 'Reaberta', 'Criticidade'])
-        
-        for tarefa in tarefas_prazo_vencido:
-            writer.writerow([
-                tarefa.numero_protocolo_tarefa, tarefa.nome_servico, tarefa.status_tarefa,
-                tarefa.nome_profissional_responsavel, tarefa.siape_responsavel.siape if tarefa.siape_responsavel else '',
-                tarefa.data_prazo.strftime('%d/%m/%Y') if tarefa.data_prazo else '',
-                abs(tarefa.dias_ate_prazo) if tarefa.dias_ate_prazo else 0,
-                'Sim' if tarefa.foi_reaberta else 'Não', tarefa.nivel_criticidade_calculado
-            ])
-        
-        self.message_user(request, f'{len(tarefas_prazo_vencido)} tarefas com prazo vencido exportadas.')
-        return response
-    
+        """Filtra o prazo no banco e envia o CSV em streaming (seleções grandes viram ExportJob)"""
+        from datetime import date
+        from .exportacao import COLUNAS_CSV_PRAZO_VENCIDO, excede_limite_direto, resposta_csv_streaming
+
+        vencidas = queryset.filter(data_prazo__lt=date.today()).order_by('data_prazo', 'numero_protocolo_tarefa')
+        if excede_limite_direto(vencidas):
+            return self._exportar_em_segundo_plano(request, vencidas, 'prazo_vencido_csv')
+
+        return resposta_csv_streaming(
+            vencidas, COLUNAS_CSV_PRAZO_VENCIDO, 'tarefas_prazo_vencido.csv',
+            ao_concluir=lambda total: logger.info(
+                f"{request.user}: {total} tarefas com prazo vencido exportadas."
+            ),
+        )
+
     @admin.action(description='🔴 Exportar tarefas CRÍTICAS para CSV')
     def exportar_tarefas_criticas(self, request, queryset):
-        """← CORRIGIDO: Exporta apenas tarefas com criticidade CRÍTICA"""
-        import csv
-        from django.http import HttpResponse
-        
-        # Filtro simples para 'CRÍTICA'
+        """Exporta apenas tarefas com criticidade CRÍTICA, em streaming (seleções grandes viram ExportJob)"""
+        from .exportacao import COLUNAS_CSV_CRITICAS, excede_limite_direto, resposta_csv_streaming
+
         tarefas_criticas = queryset.filter(
             nivel_criticidade_calculado='CRÍTICA'
-        ).order_by('-pontuacao_criticidade')
-        
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="tarefas_criticas.csv"'
-        
-        writer = csv.writer(response)
-        writer.writerow([
-            'Protocolo', 'Serviço', 'Status', 'Responsável', 'SIAPE', 'GEX',
-            'Criticidade', 'Regra', 'Pontuação', 'Dias Pendente', 'Prazo Limite',
-            'Alerta', 'Data Distribuição'
-        ])
-        
-        for tarefa in tarefas_criticas:
-            writer.writerow([
-                tarefa.numero_protocolo_tarefa, tarefa.nome_servico, tarefa.status_tarefa,
-                tarefa.nome_profissional_responsavel, tarefa.siape_responsavel.siape if tarefa.siape_responsavel else '',
-                tarefa.nome_gex_responsavel, tarefa.nivel_criticidade_calculado,
-                tarefa.regra_aplicada_calculado, tarefa.pontuacao_criticidade,
-                tarefa.dias_pendente_criticidade_calculado, tarefa.prazo_limite_criticidade_calculado,
-                tarefa.alerta_criticidade_calculado,
-                tarefa.data_distribuicao_tarefa.strftime('%d/%m/%Y') if tarefa.data_distribuicao_tarefa else ''
-            ])
-        
-        self.message_user(request, f'{tarefas_criticas.count()} tarefas críticas exportadas com sucesso.', level='success')
-        return response
+        ).order_by('-pontuacao_criticidade', 'numero_protocolo_tarefa')
+        if excede_limite_direto(tarefas_criticas):
+            return self._exportar_em_segundo_plano(request, tarefas_criticas, 'criticas_csv')
+
+        return resposta_csv_streaming(
+            tarefas_criticas, COLUNAS_CSV_CRITICAS, 'tarefas_criticas.csv',
+            ao_concluir=lambda total: logger.info(
+                f"{request.user}: {total} tarefas críticas exportadas."
+            ),
+        )
 
 
 # ============================================
@@ -1185,3 +1229,25 @@ class HistoricoAcaoLoteAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         """Permite deletar apenas para superusuários"""
         return request.user.is_superuser
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    """Exportações geradas em segundo plano (somente leitura)"""
+
+    list_display = (
+        'id', 'tipo', 'status', 'solicitante', 'total_linhas',
+        'tamanho_bytes', 'downloads', 'data_criacao', 'data_conclusao', 'expira_em'
+    )
+    list_filter = ('status', 'tipo')
+    readonly_fields = [field.name for field in ExportJob._meta.fields]
+    actions = ['limpar_expiradas']
+
+    @admin.action(description='🧹 Remover exportações expiradas')
+    def limpar_expiradas(self, request, queryset):
+        from .exportacao import limpar_exportacoes_expiradas
+        removidas, liberados = limpar_exportacoes_expiradas()
+        self.message_user(request, f'{removidas} exportação(ões) removida(s), {liberados} bytes liberados.')
+
+    def has_add_permission(self, request):
+        return False
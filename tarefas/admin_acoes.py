@@ -1,14 +1,14 @@
 """
 Administração Django para modelos de ações automatizadas.
 
-Gerencia bloqueios, notificações, históricos e templates de email.
+Gerencia bloqueios, notificações, históricos, templates e campanhas de email.
 """
 from django.contrib import admin
 from django.utils.html import format_html
 from .models import (
-    BloqueioServidor, SolicitacaoNotificacao,
+    BloqueioServidor, EstadoBloqueio, SolicitacaoNotificacao,
     HistoricoBloqueio, HistoricoNotificacao,
-    HistoricoEmail, TemplateEmail
+    HistoricoEmail, TemplateEmail, CampanhaEmail
 )
 
 
@@ -50,6 +50,8 @@ class BloqueioServidorAdmin(admin.ModelAdmin):
         'data_solicitacao',
         'data_processamento',
         'data_conclusao',
+        'robo_id',
+        'reservado_ate',
     )
 
     ordering = ('-data_solicitacao',)
@@ -70,6 +72,8 @@ class BloqueioServidorAdmin(admin.ModelAdmin):
                 'data_solicitacao',
                 'data_processamento',
                 'data_conclusao',
+                'robo_id',
+                'reservado_ate',
             )
         }),
         ('Auditoria e Resposta', {
@@ -121,6 +125,47 @@ class BloqueioServidorAdmin(admin.ModelAdmin):
     data_solicitacao_display.short_description = 'Solicitado em'
     data_solicitacao_display.admin_order_field = 'data_solicitacao'
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        # Status alterado à mão: refaz o estado materializado do par (servidor, fila)
+        if 'status' in form.changed_data or 'tipo_acao' in form.changed_data:
+            EstadoBloqueio.recalcular(servidor=obj.servidor, codigo_fila=obj.codigo_fila)
+
+
+@admin.register(EstadoBloqueio)
+class EstadoBloqueioAdmin(admin.ModelAdmin):
+    """Estado atual de bloqueio por servidor e fila (somente leitura; mantido pelo AcoesService)"""
+
+    list_display = (
+        'servidor',
+        'codigo_fila',
+        'bloqueado',
+        'data_alteracao',
+        'ultima_acao',
+    )
+
+    list_filter = (
+        'bloqueado',
+        'codigo_fila',
+    )
+
+    search_fields = (
+        'servidor__siape',
+        'servidor__nome_completo',
+    )
+
+    list_select_related = ('servidor', 'ultima_acao__servidor')
+
+    ordering = ('-data_alteracao',)
+
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
 # ============================================
 # SOLICITAÇÃO DE NOTIFICAÇÃO PGB
@@ -159,6 +204,8 @@ class SolicitacaoNotificacaoAdmin(admin.ModelAdmin):
         'data_solicitacao',
         'data_processamento',
         'data_conclusao',
+        'robo_id',
+        'reservado_ate',
     )
 
     ordering = ('-data_solicitacao',)
@@ -183,6 +230,8 @@ class SolicitacaoNotificacaoAdmin(admin.ModelAdmin):
                 'data_solicitacao',
                 'data_processamento',
                 'data_conclusao',
+                'robo_id',
+                'reservado_ate',
             )
         }),
         ('Auditoria e Resposta', {
@@ -362,6 +411,8 @@ class HistoricoEmailAdmin(admin.ModelAdmin):
     readonly_fields = (
         'data_solicitacao',
         'data_envio',
+        'tentativas',
+        'proxima_tentativa',
     )
 
     ordering = ('-data_solicitacao',)
@@ -387,6 +438,8 @@ class HistoricoEmailAdmin(admin.ModelAdmin):
                 'data_solicitacao',
                 'data_envio',
                 'enviado_por',
+                'tentativas',
+                'proxima_tentativa',
             )
         }),
         ('Resposta', {
@@ -524,3 +577,41 @@ class TemplateEmailAdmin(admin.ModelAdmin):
         if not change:
             obj.criado_por = request.user
         super().save_model(request, obj, form, change)
+
+
+# ============================================
+# CAMPANHAS DE EMAIL
+# ============================================
+
+@admin.register(CampanhaEmail)
+class CampanhaEmailAdmin(admin.ModelAdmin):
+    """Campanhas de email (somente leitura; criadas pela tela de campanhas)"""
+
+    list_display = (
+        'id',
+        'template',
+        'status',
+        'total_destinatarios',
+        'enviados',
+        'erros',
+        'duracao_segundos',
+        'data_criacao',
+        'criado_por',
+    )
+
+    list_filter = (
+        'status',
+        'data_criacao',
+    )
+
+    list_select_related = ('template', 'criado_por')
+
+    ordering = ('-data_criacao',)
+
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -532,7 +532,10 @@ class AnalisadorCriticidade:
             ])
             
             atualizadas += 1
-        
+
+        from .models import GeracaoDados
+        GeracaoDados.incrementar()
+
         return {
             'total': total,
             'atualizadas': atualizadas,
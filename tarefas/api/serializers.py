@@ -3,6 +3,7 @@ Serializers para a API REST.
 
 Converte os modelos Django em JSON para comunicação com o robô externo.
 """
+from django.conf import settings
 from rest_framework import serializers
 from tarefas.models import BloqueioServidor, SolicitacaoNotificacao
 
@@ -31,12 +32,14 @@ class BloqueioServidorSerializer(serializers.ModelSerializer):
             'data_processamento',
             'data_conclusao',
             'observacoes',
+            'robo_id',
+            'reservado_ate',
         ]
         read_only_fields = ['id', 'data_solicitacao']
 
     def get_nome_servidor(self, obj):
         """Retorna o nome completo do servidor."""
-        return obj.servidor.get_full_name() or obj.servidor.username
+        return obj.servidor.nome_completo
 
 
 class BloqueioRespostaSerializer(serializers.Serializer):
@@ -45,6 +48,8 @@ class BloqueioRespostaSerializer(serializers.Serializer):
     """
     bloqueio_id = serializers.IntegerField()
     sucesso = serializers.BooleanField()
+    # Robô que reservou (/reservar/); se outro robô tiver a reserva, a resposta é recusada
+    robo_id = serializers.CharField(required=False, allow_blank=True, max_length=50)
     resposta_robo = serializers.CharField(required=False, allow_blank=True)
     mensagem_erro = serializers.CharField(required=False, allow_blank=True)
 
@@ -75,12 +80,14 @@ class SolicitacaoNotificacaoSerializer(serializers.ModelSerializer):
             'data_conclusao',
             'numero_protocolo_criado',
             'observacoes',
+            'robo_id',
+            'reservado_ate',
         ]
         read_only_fields = ['id', 'data_solicitacao']
 
     def get_nome_servidor(self, obj):
         """Retorna o nome completo do servidor."""
-        return obj.servidor.get_full_name() or obj.servidor.username
+        return obj.servidor.nome_completo
 
 
 class NotificacaoRespostaSerializer(serializers.Serializer):
@@ -89,6 +96,45 @@ class NotificacaoRespostaSerializer(serializers.Serializer):
     """
     notificacao_id = serializers.IntegerField()
     sucesso = serializers.BooleanField()
+    # Robô que reservou (/reservar/); se outro robô tiver a reserva, a resposta é recusada
+    robo_id = serializers.CharField(required=False, allow_blank=True, max_length=50)
     numero_protocolo = serializers.CharField(required=False, allow_blank=True)
     resposta_robo = serializers.CharField(required=False, allow_blank=True)
     mensagem_erro = serializers.CharField(required=False, allow_blank=True)
+
+
+class PendentesSerializer(serializers.Serializer):
+    """
+    Parâmetros da consulta de pendentes: cursor e long-poll.
+    """
+    desde_id = serializers.IntegerField(min_value=0, required=False)
+    aguardar = serializers.IntegerField(min_value=0, default=0)
+
+    def validate_aguardar(self, valor):
+        return min(valor, getattr(settings, 'API_ROBO_AGUARDAR_MAXIMO', 30))
+
+
+class ReservaSerializer(serializers.Serializer):
+    """
+    Serializer do pedido de reserva (lease) de solicitações por um robô.
+    """
+    robo_id = serializers.CharField(max_length=50)
+    limite = serializers.IntegerField(min_value=1, max_value=500, default=50)
+    ttl_segundos = serializers.IntegerField(min_value=30, max_value=3600, default=300)
+
+
+class EstadoTarefasSerializer(serializers.Serializer):
+    """
+    Consulta do estado atual de uma lista de protocolos.
+    """
+    protocolos = serializers.ListField(
+        child=serializers.CharField(max_length=20), allow_empty=False, max_length=5000
+    )
+    formato = serializers.ChoiceField(choices=['json', 'ndjson'], default='json')
+
+
+class AlteracoesTarefasSerializer(serializers.Serializer):
+    """
+    Cursor do feed de alterações: último registro de importação já consumido.
+    """
+    desde = serializers.IntegerField(min_value=0, default=0)
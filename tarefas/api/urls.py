@@ -16,11 +16,21 @@ urlpatterns = [
         views.listar_bloqueios_pendentes,
         name='bloqueios_pendentes'
     ),
+    path(
+        'solicitacoes/bloqueios/reservar/',
+        views.reservar_bloqueios,
+        name='bloqueios_reservar'
+    ),
     path(
         'solicitacoes/bloqueios/resposta/',
         views.processar_resposta_bloqueio,
         name='bloqueios_resposta'
     ),
+    path(
+        'solicitacoes/bloqueios/respostas/',
+        views.processar_respostas_bloqueio_lote,
+        name='bloqueios_respostas'
+    ),
 
     # Notificações
     path(
@@ -28,9 +38,31 @@ urlpatterns = [
         views.listar_notificacoes_pendentes,
         name='notificacoes_pendentes'
     ),
+    path(
+        'solicitacoes/notificacoes/reservar/',
+        views.reservar_notificacoes,
+        name='notificacoes_reservar'
+    ),
     path(
         'solicitacoes/notificacoes/resposta/',
         views.processar_resposta_notificacao,
         name='notificacoes_resposta'
     ),
+    path(
+        'solicitacoes/notificacoes/respostas/',
+        views.processar_respostas_notificacao_lote,
+        name='notificacoes_respostas'
+    ),
+
+    # Tarefas
+    path(
+        'tarefas/estado/',
+        views.estado_tarefas,
+        name='tarefas_estado'
+    ),
+    path(
+        'tarefas/alteracoes/',
+        views.alteracoes_tarefas,
+        name='tarefas_alteracoes'
+    ),
 ]
@@ -3,20 +3,36 @@ Views da API REST para integração com robô externo.
 
 Endpoints para o robô consultar solicitações pendentes e enviar respostas.
 """
+import hashlib
+import json
+
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
 
-from tarefas.models import BloqueioServidor, SolicitacaoNotificacao
-from tarefas.services.acoes_service import AcoesService
+from tarefas.cache import (
+    NAMESPACE_FILA_BLOQUEIOS,
+    NAMESPACE_FILA_NOTIFICACOES,
+    aguardar_nova_versao,
+    long_poll_disponivel,
+    versao_namespace
+)
+from tarefas.models import BloqueioServidor, GeracaoDados, SolicitacaoNotificacao, Tarefa
+from tarefas.services.acoes_service import AcoesService, ReservaPerdida
 from .serializers import (
+    AlteracoesTarefasSerializer,
     BloqueioServidorSerializer,
     BloqueioRespostaSerializer,
+    EstadoTarefasSerializer,
+    PendentesSerializer,
     SolicitacaoNotificacaoSerializer,
-    NotificacaoRespostaSerializer
+    NotificacaoRespostaSerializer,
+    ReservaSerializer
 )
 
 
@@ -38,34 +54,154 @@ def validar_autenticacao(request):
     return hash_fornecido == API_SECRET_HASH
 
 
-@csrf_exempt
-@api_view(['GET'])
-@permission_classes([AllowAny])
-def listar_bloqueios_pendentes(request):
+def _responder_pendentes(request, obter_pendentes, namespace, serializer_classe):
     """
-    GET /api/solicitacoes/bloqueios/pendentes/
-
-    Retorna todas as solicitações de bloqueio/desbloqueio pendentes.
+    Lista as pendentes a partir do cursor `desde_id`; sem novidades e com
+    `aguardar`, espera a geração da fila mudar no cache antes de consultar
+    o banco de novo.
     """
-    # Validar autenticação
     if not validar_autenticacao(request):
         return Response(
             {'erro': 'Autenticação inválida'},
             status=status.HTTP_401_UNAUTHORIZED
         )
 
-    # Buscar solicitações pendentes
-    solicitacoes = AcoesService.obter_solicitacoes_bloqueio_pendentes()
+    parametros = PendentesSerializer(data=request.query_params)
+    if not parametros.is_valid():
+        return Response(
+            {'erro': 'Parâmetros inválidos', 'detalhes': parametros.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    desde_id = parametros.validated_data.get('desde_id')
+    aguardar = parametros.validated_data['aguardar']
+
+    # Geração lida ANTES da consulta: o que for criado depois acorda a espera.
+    # Sem Redis/Memcached não há long-poll (a resposta volta na hora)
+    if aguardar and not long_poll_disponivel():
+        aguardar = 0
+    geracao = versao_namespace(namespace) if aguardar else None
+    solicitacoes = list(obter_pendentes(desde_id))
+    if not solicitacoes and aguardar and aguardar_nova_versao(
+        namespace, geracao, aguardar, getattr(settings, 'API_ROBO_AGUARDAR_INTERVALO', 1)
+    ):
+        solicitacoes = list(obter_pendentes(desde_id))
+
+    return Response({
+        'total': len(solicitacoes),
+        'cursor': max((solicitacao.id for solicitacao in solicitacoes), default=desde_id or 0),
+        'solicitacoes': serializer_classe(solicitacoes, many=True).data
+    })
+
+
+def _responder_reserva(request, reservar, serializer_classe):
+    """Valida o pedido de reserva, reserva e serializa as solicitações"""
+    if not validar_autenticacao(request):
+        return Response(
+            {'erro': 'Autenticação inválida'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    pedido = ReservaSerializer(data=request.data)
+    if not pedido.is_valid():
+        return Response(
+            {'erro': 'Dados inválidos', 'detalhes': pedido.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    solicitacoes = list(reservar(**pedido.validated_data))
+    return Response({
+        'total': len(solicitacoes),
+        'robo_id': pedido.validated_data['robo_id'],
+        'solicitacoes': serializer_classe(solicitacoes, many=True).data
+    })
+
+
+# Máximo de respostas aceitas em um único POST de lote
+MAX_RESPOSTAS_LOTE = 1000
+
+
+def _responder_lote(request, processar, serializer_classe):
+    """Valida um lote de respostas do robô (lista ou {"respostas": [...]}) e aplica"""
+    if not validar_autenticacao(request):
+        return Response(
+            {'erro': 'Autenticação inválida'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    itens = request.data.get('respostas') if isinstance(request.data, dict) else request.data
+    if not isinstance(itens, list) or not itens:
+        return Response(
+            {'erro': 'Envie uma lista de respostas (ou {"respostas": [...]})'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    if len(itens) > MAX_RESPOSTAS_LOTE:
+        return Response(
+            {'erro': f'Máximo de {MAX_RESPOSTAS_LOTE} respostas por lote'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-    # Serializar
-    serializer = BloqueioServidorSerializer(solicitacoes, many=True)
+    serializer = serializer_classe(data=itens, many=True)
+    if not serializer.is_valid():
+        return Response(
+            {'erro': 'Dados inválidos', 'detalhes': serializer.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
+    resultados = processar(serializer.validated_data)
     return Response({
-        'total': solicitacoes.count(),
-        'solicitacoes': serializer.data
+        'total': len(resultados),
+        'aplicadas': sum(1 for resultado in resultados if resultado['resultado'] == 'APLICADA'),
+        'resultados': resultados
     })
 
 
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def listar_bloqueios_pendentes(request):
+    """
+    GET /api/solicitacoes/bloqueios/pendentes/
+
+    Retorna todas as solicitações de bloqueio/desbloqueio pendentes.
+    Com mais de um robô, use /api/solicitacoes/bloqueios/reservar/.
+
+    Query params (opcionais):
+        desde_id: cursor; só solicitações com id maior (use o `cursor` da
+            resposta anterior)
+        aguardar: long-poll; se não houver nada, segura a requisição até N
+            segundos (máx. API_ROBO_AGUARDAR_MAXIMO) esperando uma nova
+            solicitação. A espera consulta só a geração da fila no cache e
+            só existe com Redis/Memcached; nos demais backends é ignorado.
+
+    Resposta: {"total", "cursor", "solicitacoes": [...]}
+    """
+    return _responder_pendentes(
+        request, AcoesService.obter_solicitacoes_bloqueio_pendentes, NAMESPACE_FILA_BLOQUEIOS,
+        BloqueioServidorSerializer
+    )
+
+
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def reservar_bloqueios(request):
+    """
+    POST /api/solicitacoes/bloqueios/reservar/
+
+    Reserva até `limite` solicitações de bloqueio/desbloqueio para o robô
+    (status PROCESSANDO). Robôs em paralelo recebem solicitações distintas;
+    reservas não respondidas em `ttl_segundos` voltam a ser entregues.
+
+    Body JSON:
+    {
+        "robo_id": "robo-01",
+        "limite": 50,
+        "ttl_segundos": 300
+    }
+    """
+    return _responder_reserva(request, AcoesService.reservar_bloqueios, BloqueioServidorSerializer)
+
+
 @csrf_exempt
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -80,8 +216,12 @@ def processar_resposta_bloqueio(request):
         "bloqueio_id": 1,
         "sucesso": true,
         "resposta_robo": "Bloqueio realizado com sucesso",
-        "mensagem_erro": ""
+        "mensagem_erro": "",
+        "robo_id": "robo-01"
     }
+
+    `robo_id` (de quem usou /reservar/): se a reserva venceu e a solicitação
+    foi entregue a outro robô, a resposta é recusada com 409.
     """
     # Validar autenticação
     if not validar_autenticacao(request):
@@ -104,7 +244,8 @@ def processar_resposta_bloqueio(request):
             bloqueio_id=serializer.validated_data['bloqueio_id'],
             sucesso=serializer.validated_data['sucesso'],
             resposta_robo=serializer.validated_data.get('resposta_robo', ''),
-            mensagem_erro=serializer.validated_data.get('mensagem_erro', '')
+            mensagem_erro=serializer.validated_data.get('mensagem_erro', ''),
+            robo_id=serializer.validated_data.get('robo_id', '')
         )
 
         return Response({
@@ -118,6 +259,11 @@ def processar_resposta_bloqueio(request):
             {'erro': 'Bloqueio não encontrado'},
             status=status.HTTP_404_NOT_FOUND
         )
+    except ReservaPerdida as e:
+        return Response(
+            {'erro': f'Reserva perdida: {e}'},
+            status=status.HTTP_409_CONFLICT
+        )
     except Exception as e:
         return Response(
             {'erro': f'Erro ao processar resposta: {str(e)}'},
@@ -125,6 +271,31 @@ def processar_resposta_bloqueio(request):
         )
 
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def processar_respostas_bloqueio_lote(request):
+    """
+    POST /api/solicitacoes/bloqueios/respostas/
+
+    Recebe várias respostas do robô de uma vez e aplica todas em uma única
+    transação. Cada item tem o formato de /api/solicitacoes/bloqueios/resposta/.
+
+    Body JSON:
+    {
+        "respostas": [
+            {"bloqueio_id": 1, "sucesso": true, "resposta_robo": "OK"},
+            {"bloqueio_id": 2, "sucesso": false, "mensagem_erro": "Timeout"}
+        ]
+    }
+
+    Resposta: {"total", "aplicadas", "resultados": [{"bloqueio_id", "resultado", "status"}]},
+    com resultado APLICADA, NAO_ENCONTRADO, DUPLICADO, JA_FINALIZADO ou
+    RESERVA_PERDIDA (robo_id informado e a solicitação reservada para outro robô).
+    """
+    return _responder_lote(request, AcoesService.processar_respostas_bloqueio, BloqueioRespostaSerializer)
+
+
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -133,24 +304,28 @@ def listar_notificacoes_pendentes(request):
     GET /api/solicitacoes/notificacoes/pendentes/
 
     Retorna todas as solicitações de notificação PGB pendentes.
+    Com mais de um robô, use /api/solicitacoes/notificacoes/reservar/.
+
+    Aceita `desde_id` e `aguardar` (mesmas regras de
+    /api/solicitacoes/bloqueios/pendentes/).
     """
-    # Validar autenticação
-    if not validar_autenticacao(request):
-        return Response(
-            {'erro': 'Autenticação inválida'},
-            status=status.HTTP_401_UNAUTHORIZED
-        )
+    return _responder_pendentes(
+        request, AcoesService.obter_solicitacoes_notificacao_pendentes, NAMESPACE_FILA_NOTIFICACOES,
+        SolicitacaoNotificacaoSerializer
+    )
 
-    # Buscar solicitações pendentes
-    solicitacoes = AcoesService.obter_solicitacoes_notificacao_pendentes()
 
-    # Serializar
-    serializer = SolicitacaoNotificacaoSerializer(solicitacoes, many=True)
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def reservar_notificacoes(request):
+    """
+    POST /api/solicitacoes/notificacoes/reservar/
 
-    return Response({
-        'total': solicitacoes.count(),
-        'solicitacoes': serializer.data
-    })
+    Reserva até `limite` solicitações de notificação PGB para o robô
+    (mesmas regras de /api/solicitacoes/bloqueios/reservar/).
+    """
+    return _responder_reserva(request, AcoesService.reservar_notificacoes, SolicitacaoNotificacaoSerializer)
 
 
 @csrf_exempt
@@ -168,8 +343,11 @@ def processar_resposta_notificacao(request):
         "sucesso": true,
         "numero_protocolo": "12345678901234567890",
         "resposta_robo": "Tarefa criada com sucesso",
-        "mensagem_erro": ""
+        "mensagem_erro": "",
+        "robo_id": "robo-01"
     }
+
+    `robo_id`: mesmas regras de /api/solicitacoes/bloqueios/resposta/.
     """
     # Validar autenticação
     if not validar_autenticacao(request):
@@ -193,7 +371,8 @@ def processar_resposta_notificacao(request):
             sucesso=serializer.validated_data['sucesso'],
             numero_protocolo=serializer.validated_data.get('numero_protocolo', ''),
             resposta_robo=serializer.validated_data.get('resposta_robo', ''),
-            mensagem_erro=serializer.validated_data.get('mensagem_erro', '')
+            mensagem_erro=serializer.validated_data.get('mensagem_erro', ''),
+            robo_id=serializer.validated_data.get('robo_id', '')
         )
 
         return Response({
@@ -208,6 +387,11 @@ def processar_resposta_notificacao(request):
             {'erro': 'Notificação não encontrada'},
             status=status.HTTP_404_NOT_FOUND
         )
+    except ReservaPerdida as e:
+        return Response(
+            {'erro': f'Reserva perdida: {e}'},
+            status=status.HTTP_409_CONFLICT
+        )
     except Exception as e:
         return Response(
             {'erro': f'Erro ao processar resposta: {str(e)}'},
@@ -215,6 +399,208 @@ def processar_resposta_notificacao(request):
         )
 
 
+@csrf_exempt
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def processar_respostas_notificacao_lote(request):
+    """
+    POST /api/solicitacoes/notificacoes/respostas/
+
+    Recebe várias respostas do robô sobre notificações de uma vez (mesmas
+    regras de /api/solicitacoes/bloqueios/respostas/).
+    """
+    return _responder_lote(request, AcoesService.processar_respostas_notificacao, NotificacaoRespostaSerializer)
+
+
+# Campos devolvidos por /api/tarefas/estado/ (siape_responsavel é a própria FK: sem JOIN)
+CAMPOS_ESTADO_TAREFA = [
+    'numero_protocolo_tarefa',
+    'ativa',
+    'status_tarefa',
+    'nivel_criticidade_calculado',
+    'tipo_fila',
+    'siape_responsavel',
+    'nome_profissional_responsavel',
+    'data_prazo',
+    'dias_pendente_criticidade_calculado',
+    'prazo_limite_criticidade_calculado',
+    'tempo_em_pendencia_em_dias',
+    'tempo_em_exigencia_em_dias',
+]
+
+
+@csrf_exempt
+@api_view(['GET', 'POST'])
+@permission_classes([AllowAny])
+def estado_tarefas(request):
+    """
+    POST /api/tarefas/estado/
+    GET  /api/tarefas/estado/?protocolos=123,456&formato=ndjson
+
+    Estado atual (criticidade, fila, responsável e prazos) de até 5000
+    protocolos em uma única consulta `IN` pela chave primária.
+
+    Body JSON (POST):
+    {
+        "protocolos": ["123", "456"],
+        "formato": "json"
+    }
+
+    formato=json (padrão) devolve linhas compactas:
+        {"geracao": 7, "campos": [...], "tarefas": [[...], ...], "nao_encontrados": [...]}
+    formato=ndjson devolve um objeto por linha (application/x-ndjson).
+
+    O ETag depende da geração dos dados (GeracaoDados, no banco: incrementada
+    a cada importação, recálculo de criticidade ou justificativa) e dos
+    protocolos pedidos: com If-None-Match igual, a resposta é 304 sem
+    consultar as tarefas.
+    """
+    if not validar_autenticacao(request):
+        return Response(
+            {'erro': 'Autenticação inválida'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    if request.method == 'GET':
+        dados = {
+            'protocolos': [p for p in request.query_params.get('protocolos', '').split(',') if p.strip()],
+            'formato': request.query_params.get('formato', 'json'),
+        }
+    else:
+        dados = request.data
+
+    pedido = EstadoTarefasSerializer(data=dados)
+    if not pedido.is_valid():
+        return Response(
+            {'erro': 'Dados inválidos', 'detalhes': pedido.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    protocolos = sorted({protocolo.strip() for protocolo in pedido.validated_data['protocolos']})
+    formato = pedido.validated_data['formato']
+
+    geracao = GeracaoDados.atual()
+    resumo = hashlib.md5(f"{formato}:{','.join(protocolos)}".encode('utf-8'), usedforsecurity=False).hexdigest()
+    etag = f'"{geracao}-{resumo}"'
+    if etag in request.headers.get('If-None-Match', ''):
+        resposta = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+        resposta['ETag'] = etag
+        return resposta
+
+    linhas = list(
+        Tarefa.objects.filter(numero_protocolo_tarefa__in=protocolos)
+        .order_by()
+        .values_list(*CAMPOS_ESTADO_TAREFA)
+    )
+    encontrados = {linha[0] for linha in linhas}
+    nao_encontrados = [protocolo for protocolo in protocolos if protocolo not in encontrados]
+
+    if formato == 'ndjson':
+        corpo = ''.join(
+            json.dumps(dict(zip(CAMPOS_ESTADO_TAREFA, linha)), cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+            for linha in linhas
+        )
+        resposta = HttpResponse(corpo, content_type='application/x-ndjson; charset=utf-8')
+        resposta['X-Nao-Encontrados'] = str(len(nao_encontrados))
+    else:
+        resposta = Response({
+            'geracao': geracao,
+            'campos': CAMPOS_ESTADO_TAREFA,
+            'tarefas': linhas,
+            'nao_encontrados': nao_encontrados,
+        })
+    resposta['ETag'] = etag
+    return resposta
+
+
+# Linhas lidas por consulta no feed de alterações
+LOTE_ALTERACOES = 2000
+
+
+def _linhas_alteracoes(registros):
+    """
+    Gera o NDJSON do feed, importação por importação, em lotes por
+    (registro_importacao, id) — ordem do índice alteracao_tarefa_feed_idx.
+
+    OTIMIZAÇÃO: paginação por chave em vez de .iterator(): o MySQL (mysqlclient)
+    não tem cursor do lado do servidor no Django e traria o resultado inteiro
+    para a memória; aqui cada consulta lê no máximo LOTE_ALTERACOES linhas.
+    """
+    from importar_csv.models import AlteracaoTarefa
+
+    for registro_id in registros:
+        ultimo_id = 0
+        while True:
+            lote = list(
+                AlteracaoTarefa.objects
+                .filter(registro_importacao_id=registro_id, id__gt=ultimo_id)
+                .order_by('id')
+                .values_list('id', 'numero_protocolo_tarefa', 'tipo', 'campos')[:LOTE_ALTERACOES]
+            )
+            if not lote:
+                break
+            yield ''.join(
+                json.dumps(
+                    {'registro': registro_id, 'protocolo': protocolo, 'tipo': tipo, 'campos': campos},
+                    ensure_ascii=False
+                ) + '\n'
+                for _, protocolo, tipo, campos in lote
+            )
+            ultimo_id = lote[-1][0]
+
+
+@csrf_exempt
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def alteracoes_tarefas(request):
+    """
+    GET /api/tarefas/alteracoes/?desde=<registro_id>
+
+    Feed das tarefas criadas, alteradas (campo a campo) ou arquivadas pelas
+    importações posteriores a `desde`, em NDJSON (um objeto por linha):
+
+        {"registro": 12, "protocolo": "123", "tipo": "ALTERADA",
+         "campos": {"status_tarefa": ["Pendente", "Exigência"]}}
+
+    Só entram importações finalizadas, e o feed para antes da primeira que
+    ainda está em andamento. Importações paradas há mais de
+    IMPORTACAO_ABANDONADA_HORAS são antes marcadas como FAILED (as alterações
+    já gravadas por elas entram no feed). O header X-Ultimo-Registro traz o
+    `desde` da próxima chamada (mesmo sem nenhuma alteração no intervalo).
+    """
+    from importar_csv.models import RegistroImportacao
+    from importar_csv.retencao import STATUS_FINALIZADOS
+
+    if not validar_autenticacao(request):
+        return Response(
+            {'erro': 'Autenticação inválida'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
+
+    pedido = AlteracoesTarefasSerializer(data=request.query_params)
+    if not pedido.is_valid():
+        return Response(
+            {'erro': 'Dados inválidos', 'detalhes': pedido.errors},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    desde = pedido.validated_data['desde']
+
+    RegistroImportacao.marcar_abandonadas()
+    posteriores = RegistroImportacao.objects.filter(id__gt=desde)
+    em_andamento = (
+        posteriores.exclude(status__in=STATUS_FINALIZADOS)
+        .order_by('id').values_list('id', flat=True).first()
+    )
+    if em_andamento is not None:
+        posteriores = posteriores.filter(id__lt=em_andamento)
+    registros = list(posteriores.order_by('id').values_list('id', flat=True))
+
+    resposta = StreamingHttpResponse(
+        _linhas_alteracoes(registros), content_type='application/x-ndjson; charset=utf-8'
+    )
+    resposta['X-Ultimo-Registro'] = str(registros[-1] if registros else desde)
+    return resposta
+
+
 @csrf_exempt
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -0,0 +1,140 @@
+"""
+Tempo com o responsável atual (AtribuicaoTarefa).
+
+`dias_com_servidor` é derivado dos campos do CSV e zera/erra quando a tarefa
+é redistribuída. Aqui a própria importação registra as trocas de SIAPE:
+
+    - se o responsável do CSV é o mesmo já gravado, nada é escrito;
+    - se mudou (ou a tarefa é nova), o período aberto é fechado, um novo
+      AtribuicaoTarefa é criado e Tarefa.data_atribuicao_atual recebe o
+      início do novo período.
+
+O tempo com o responsável vira uma coluna indexada (data_atribuicao_atual),
+usada para ordenar e filtrar o detalhe_fila sem varrer histórico.
+
+Para bases existentes, reconstruir_atribuicoes() monta tudo a partir do
+HistoricoTarefa, em lotes de tarefas com uma transação por lote.
+
+Uso:
+    python manage.py reconstruir_atribuicoes
+"""
+from django.db import transaction
+
+from tarefas.models import AtribuicaoTarefa, Tarefa
+
+TAMANHO_LOTE = 5000
+
+# Tarefas por lote (e transação) em reconstruir_atribuicoes
+TAMANHO_LOTE_TAREFAS = 1000
+
+
+def registrar_mudancas_responsavel(mudancas, data):
+    """
+    Registra as trocas de responsável detectadas num lote da importação.
+
+    Deve ser chamada dentro da transação do lote, antes do bulk_update das
+    tarefas (os objetos recebem data_atribuicao_atual).
+
+    Args:
+        mudancas (list): Tarefas (objetos) cujo siape_responsavel_id mudou
+        data (datetime): Data da importação (início das novas atribuições)
+
+    Returns:
+        int: Quantidade de atribuições criadas
+    """
+    if not mudancas:
+        return 0
+
+    AtribuicaoTarefa.objects.filter(
+        tarefa_id__in=[tarefa.pk for tarefa in mudancas],
+        fim__isnull=True,
+    ).update(fim=data)
+
+    AtribuicaoTarefa.objects.bulk_create(
+        [AtribuicaoTarefa(tarefa_id=tarefa.pk, siape=tarefa.siape_responsavel_id, inicio=data)
+         for tarefa in mudancas],
+        batch_size=TAMANHO_LOTE,
+    )
+    for tarefa in mudancas:
+        tarefa.data_atribuicao_atual = data
+
+    return len(mudancas)
+
+
+def reconstruir_atribuicoes(stdout=None):
+    """
+    Recria AtribuicaoTarefa e Tarefa.data_atribuicao_atual a partir do
+    HistoricoTarefa (histórico já expurgado pela retenção não é considerado).
+
+    Percorre as tarefas em lotes pela chave primária (keyset) e, de cada
+    lote, lê o histórico na ordem (tarefa, importação) do índice
+    historico_tarefa_import_idx. Cada lote é gravado na própria transação:
+    sem cursor no servidor (MySQL) nada além do lote fica em memória e
+    nenhuma transação segura a base inteira. Interrompido, basta rodar de
+    novo (cada lote apaga e recria as atribuições das suas tarefas).
+
+    Returns:
+        dict: {'tarefas': n, 'atribuicoes': n}
+    """
+    from importar_csv.models import HistoricoTarefa, RegistroImportacao
+
+    datas = dict(RegistroImportacao.objects.values_list('id', 'data_importacao'))
+
+    total_tarefas = 0
+    total_atribuicoes = 0
+    ultimo = ''
+    while True:
+        protocolos = list(
+            Tarefa.objects.filter(numero_protocolo_tarefa__gt=ultimo)
+            .order_by('numero_protocolo_tarefa')
+            .values_list('numero_protocolo_tarefa', flat=True)[:TAMANHO_LOTE_TAREFAS]
+        )
+        if not protocolos:
+            break
+        faixa = {'gte': protocolos[0], 'lte': protocolos[-1]}
+
+        historico = (
+            HistoricoTarefa.objects
+            .filter(tarefa_original_id__gte=faixa['gte'], tarefa_original_id__lte=faixa['lte'])
+            .order_by('tarefa_original_id', 'registro_importacao_id')
+            .values_list('tarefa_original_id', 'registro_importacao_id', 'siape_responsavel')
+        )
+
+        atribuicoes = []
+        inicios_atuais = {}
+        tarefa_anterior = None
+        siape_anterior = None
+        aberta = None
+        for protocolo, registro_id, siape in historico:
+            data = datas[registro_id]
+            siape = siape or None
+
+            if protocolo == tarefa_anterior and siape == siape_anterior:
+                continue
+
+            if protocolo == tarefa_anterior:
+                aberta.fim = data
+            else:
+                tarefa_anterior = protocolo
+
+            aberta = AtribuicaoTarefa(tarefa_id=protocolo, siape=siape, inicio=data)
+            atribuicoes.append(aberta)
+            inicios_atuais[protocolo] = data
+            siape_anterior = siape
+
+        with transaction.atomic():
+            AtribuicaoTarefa.objects.filter(tarefa_id__gte=faixa['gte'], tarefa_id__lte=faixa['lte']).delete()
+            AtribuicaoTarefa.objects.bulk_create(atribuicoes, batch_size=TAMANHO_LOTE)
+            Tarefa.objects.bulk_update(
+                [Tarefa(numero_protocolo_tarefa=p, data_atribuicao_atual=inicios_atuais.get(p)) for p in protocolos],
+                ['data_atribuicao_atual'],
+                batch_size=TAMANHO_LOTE,
+            )
+
+        total_tarefas += len(inicios_atuais)
+        total_atribuicoes += len(atribuicoes)
+        ultimo = protocolos[-1]
+        if stdout:
+            stdout.write(f"  {total_tarefas} tarefas, {total_atribuicoes} atribuições gravadas...")
+
+    return {'tarefas': total_tarefas, 'atribuicoes': total_atribuicoes}
@@ -0,0 +1,232 @@
+"""
+Índice de busca por substring (serviço, nome do servidor, GEX e nome do
+responsável na tarefa).
+
+Filtros com `__icontains` viram LIKE '%termo%', que não usa índice e varre a
+tabela inteira a cada busca. Aqui os valores DISTINTOS de cada campo (algumas
+centenas de serviços, alguns milhares de servidores) são decompostos em
+trigramas na tabela TrigramaBusca. A busca:
+
+    1. Normaliza o termo (minúsculo, sem acentos) e gera seus trigramas
+    2. Encontra pelo índice as entradas que contêm TODOS os trigramas
+    3. Confirma a substring em Python (conjunto pequeno)
+    4. Devolve as chaves, que filtram a tabela principal com IN (B-tree)
+
+Protocolo e SIAPE são buscados por prefixo com faixa no B-tree
+(>= prefixo AND < próximo prefixo), sem LIKE.
+
+O índice é atualizado ao final de cada importação (importar_csv/tasks.py) e
+pode ser reconstruído com:
+    python manage.py atualizar_indice_busca
+"""
+import unicodedata
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+
+from tarefas.models import EntradaBusca, Tarefa, TrigramaBusca
+
+TAMANHO_NGRAMA = 3
+TAMANHO_LOTE = 2000
+
+
+def normalizar_texto(texto):
+    """'Aposentadoria  por IDADE' → 'aposentadoria por idade' (sem acentos)"""
+    if not texto:
+        return ''
+    texto = unicodedata.normalize('NFKD', str(texto))
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.lower().split())
+
+
+def gerar_trigramas(texto_normalizado):
+    """Conjunto de trigramas do texto já normalizado"""
+    return {
+        texto_normalizado[i:i + TAMANHO_NGRAMA]
+        for i in range(len(texto_normalizado) - TAMANHO_NGRAMA + 1)
+    }
+
+
+def filtro_prefixo(campo, prefixo):
+    """
+    Filtro de prefixo como faixa no índice B-tree.
+
+    '1234' → campo >= '1234' AND campo < '1235'
+    """
+    prefixo = prefixo.strip()
+    if not prefixo:
+        return Q()
+    proximo = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return Q(**{f'{campo}__gte': prefixo, f'{campo}__lt': proximo})
+
+
+def indice_disponivel(campo):
+    """Indica se o índice do campo já foi construído"""
+    return EntradaBusca.objects.filter(campo=campo).exists()
+
+
+def buscar_chaves(campo, termo):
+    """
+    Retorna as chaves cujo texto contém o termo (substring, sem acento/caixa).
+
+    Args:
+        campo (str): EntradaBusca.CAMPO_SERVICO / CAMPO_SERVIDOR / CAMPO_GEX /
+                     CAMPO_RESPONSAVEL
+        termo (str): Texto digitado pelo usuário
+
+    Returns:
+        list or None: Chaves encontradas, ou None se o índice do campo
+                      ainda não foi construído (o chamador usa icontains)
+    """
+    termo_normalizado = normalizar_texto(termo)
+    if not termo_normalizado:
+        return None
+
+    entradas = EntradaBusca.objects.filter(campo=campo)
+
+    if len(termo_normalizado) < TAMANHO_NGRAMA:
+        # Termo curto: varre apenas a tabela de valores distintos (pequena)
+        candidatas = entradas.filter(texto_normalizado__contains=termo_normalizado)
+    else:
+        trigramas = gerar_trigramas(termo_normalizado)
+        ids_com_todos_trigramas = (
+            TrigramaBusca.objects
+            .filter(entrada__campo=campo, trigrama__in=trigramas)
+            .values('entrada')
+            .annotate(encontrados=Count('trigrama', distinct=True))
+            .filter(encontrados=len(trigramas))
+            .values('entrada')
+        )
+        candidatas = entradas.filter(id__in=ids_com_todos_trigramas)
+
+    chaves = [
+        chave
+        for chave, texto in candidatas.values_list('chave', 'texto_normalizado')
+        if termo_normalizado in texto
+    ]
+
+    if not chaves and not indice_disponivel(campo):
+        return None
+    return chaves
+
+
+def filtrar_por_busca(queryset, campo_modelo, campo_indice, termo, campo_texto=None):
+    """
+    Aplica a busca por substring ao queryset usando o índice.
+
+    Args:
+        queryset (QuerySet): Consulta a filtrar
+        campo_modelo (str): Campo comparado com as chaves (ex.: 'nome_servico')
+        campo_indice (str): Campo do índice (EntradaBusca.CAMPO_*)
+        termo (str): Texto digitado
+        campo_texto (str): Campo usado no icontains caso o índice não exista
+                           (padrão: campo_modelo)
+    """
+    chaves = buscar_chaves(campo_indice, termo)
+    if chaves is None:
+        return queryset.filter(**{f'{campo_texto or campo_modelo}__icontains': termo})
+    return queryset.filter(**{f'{campo_modelo}__in': chaves})
+
+
+# ============================================
+# MANUTENÇÃO DO ÍNDICE
+# ============================================
+
+def _valores_atuais():
+    """Valores distintos de cada campo indexado: {campo: {chave: texto}}"""
+    User = get_user_model()
+
+    servicos = (
+        Tarefa.objects.filter(ativa=True)
+        .values_list('nome_servico', flat=True)
+        .distinct()
+    )
+    servidores = User.objects.values_list('siape', 'nome_completo')
+    gexs = (
+        User.objects.exclude(gex__isnull=True).exclude(gex='')
+        .values_list('gex', flat=True)
+        .distinct()
+    )
+    # Nome do responsável como veio no CSV: alcança tarefas cujo SIAPE não
+    # tem usuário cadastrado
+    responsaveis = (
+        Tarefa.objects.filter(ativa=True)
+        .values_list('nome_profissional_responsavel', flat=True)
+        .distinct()
+    )
+
+    return {
+        EntradaBusca.CAMPO_SERVICO: {s: s for s in servicos if s},
+        EntradaBusca.CAMPO_SERVIDOR: {siape: nome for siape, nome in servidores if siape and nome},
+        EntradaBusca.CAMPO_GEX: {g: g for g in gexs},
+        EntradaBusca.CAMPO_RESPONSAVEL: {r: r for r in responsaveis if r},
+    }
+
+
+def atualizar_indice_busca():
+    """
+    Sincroniza o índice com os valores atuais (incremental).
+
+    Só insere/remove as entradas que mudaram; numa importação típica quase
+    nada muda e a atualização custa poucas consultas.
+
+    Returns:
+        dict: {campo: {'inseridas': n, 'removidas': n, 'total': n}}
+    """
+    resultado = {}
+
+    for campo, valores in _valores_atuais().items():
+        existentes = {
+            chave: (pk, texto)
+            for pk, chave, texto in EntradaBusca.objects.filter(campo=campo).values_list(
+                'id', 'chave', 'texto_normalizado'
+            )
+        }
+        normalizados = {chave: normalizar_texto(texto) for chave, texto in valores.items()}
+
+        ids_remover = [
+            pk for chave, (pk, texto) in existentes.items()
+            if normalizados.get(chave) != texto
+        ]
+        novas = {
+            chave: texto for chave, texto in normalizados.items()
+            if chave not in existentes or existentes[chave][1] != texto
+        }
+
+        with transaction.atomic():
+            if ids_remover:
+                for i in range(0, len(ids_remover), TAMANHO_LOTE):
+                    EntradaBusca.objects.filter(id__in=ids_remover[i:i + TAMANHO_LOTE]).delete()
+
+            if novas:
+                EntradaBusca.objects.bulk_create(
+                    [EntradaBusca(campo=campo, chave=chave[:255], texto_normalizado=texto[:255])
+                     for chave, texto in novas.items()],
+                    batch_size=TAMANHO_LOTE
+                )
+                # bulk_create não devolve os ids no MySQL: buscar pelas chaves
+                trigramas = []
+                chaves_novas = list(novas)
+                for i in range(0, len(chaves_novas), TAMANHO_LOTE):
+                    for pk, texto in EntradaBusca.objects.filter(
+                        campo=campo, chave__in=chaves_novas[i:i + TAMANHO_LOTE]
+                    ).values_list('id', 'texto_normalizado'):
+                        trigramas.extend(
+                            TrigramaBusca(entrada_id=pk, trigrama=t) for t in gerar_trigramas(texto)
+                        )
+                TrigramaBusca.objects.bulk_create(trigramas, batch_size=TAMANHO_LOTE)
+
+        resultado[campo] = {
+            'inseridas': len(novas),
+            'removidas': len(ids_remover),
+            'total': len(normalizados),
+        }
+
+    return resultado
+
+
+def reconstruir_indice_busca():
+    """Apaga e reconstrói todo o índice"""
+    EntradaBusca.objects.all().delete()
+    return atualizar_indice_busca()
@@ -0,0 +1,330 @@
+"""
+Helpers de cache compartilhado entre processos.
+
+O backend é configurado em settings.CACHES (Redis, Memcached, arquivo ou banco),
+portanto tudo que for gravado aqui é visto por todos os workers do gunicorn e
+pelo worker de importação.
+
+Cada namespace possui uma VERSÃO guardada no próprio cache. As chaves incluem a
+versão, então invalidar um namespace inteiro é só incrementar esse número
+(as chaves antigas expiram sozinhas pelo timeout). Se a chave de versão sumir
+(cull do DatabaseCache, eviction do Redis/Memcached), ela é recriada a partir
+do relógio em milissegundos, nunca voltando a um número já usado — senão
+chaves antigas ainda não expiradas voltariam a valer.
+
+A versão também serve de contador de geração para long-poll: quem cria
+solicitações para o robô incrementa a versão da fila (invalidar_namespace) e
+a API do robô espera a versão mudar (aguardar_nova_versao) em vez de
+consultar o banco a cada intervalo. Só com Redis/Memcached (long_poll_disponivel):
+no DatabaseCache cada verificação seria um SELECT e o LocMemCache não é visto
+pelos outros processos.
+
+Com CACHE_ESTATISTICAS=True também são mantidos contadores de acerto/erro por
+namespace, exibidos pelo comando `python manage.py cache_status`. Ficam
+desligados por padrão: cada leitura passaria a gravar um contador (no
+DatabaseCache, mais consultas por página).
+
+Uso:
+    from tarefas.cache import obter_ou_calcular, invalidar_namespace, NAMESPACE_PROCESSAMENTO
+
+    info = obter_ou_calcular(NAMESPACE_PROCESSAMENTO, ['info'], calcular_info, timeout=300)
+    invalidar_namespace(NAMESPACE_PROCESSAMENTO)  # ao final de cada importação
+"""
+import hashlib
+import logging
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Namespaces conhecidos (exibidos pelo comando cache_status)
+NAMESPACE_PROCESSAMENTO = 'processamento'
+NAMESPACE_FILA_BLOQUEIOS = 'fila_bloqueios'
+NAMESPACE_FILA_NOTIFICACOES = 'fila_notificacoes'
+
+NAMESPACES = {
+    NAMESPACE_PROCESSAMENTO: 'Data de processamento dos dados (context processor)',
+    NAMESPACE_FILA_BLOQUEIOS: 'Geração da fila de bloqueios do robô (long-poll)',
+    NAMESPACE_FILA_NOTIFICACOES: 'Geração da fila de notificações do robô (long-poll)',
+}
+
+_SEPARADOR = ':'
+_TAMANHO_MAXIMO_PARTES = 150
+
+
+def _chave_interna(namespace, sufixo):
+    """Monta chave de controle do namespace (versão e contadores)."""
+    return f"ns{_SEPARADOR}{namespace}{_SEPARADOR}{sufixo}"
+
+
+def _normalizar_partes(partes):
+    """
+    Converte as partes da chave em string segura para qualquer backend.
+
+    Memcached não aceita espaços nem chaves longas: nesses casos as partes
+    são substituídas por um hash MD5.
+    """
+    texto = _SEPARADOR.join(str(p) for p in partes)
+    if len(texto) > _TAMANHO_MAXIMO_PARTES or any(c.isspace() for c in texto):
+        return hashlib.md5(texto.encode('utf-8'), usedforsecurity=False).hexdigest()
+    return texto
+
+
+def _versao_inicial():
+    """
+    Versão para um namespace sem chave de versão (nunca criada ou removida
+    pelo backend): milissegundos do relógio, sempre acima das versões já
+    usadas (que só crescem de 1 em 1 a cada invalidação).
+    """
+    return int(time.time() * 1000)
+
+
+def versao_namespace(namespace):
+    """
+    Retorna a versão atual do namespace (cria se não existir).
+
+    Returns:
+        int or None: Versão atual (None se o cache estiver indisponível)
+    """
+    chave = _chave_interna(namespace, 'versao')
+    try:
+        versao = cache.get(chave)
+        if versao is None:
+            versao = _versao_inicial()
+            cache.add(chave, versao, timeout=None)
+            versao = cache.get(chave) or versao
+        return versao
+    except Exception as e:
+        logger.warning(f"Cache indisponível ao ler versão de '{namespace}': {e}")
+        return None
+
+
+def chave_versionada(namespace, *partes):
+    """
+    Retorna a chave completa (namespace + versão + partes).
+
+    Exemplo: chave_versionada('processamento', 'info') → 'processamento:v3:info'
+
+    Raises:
+        RuntimeError: Cache indisponível (sem versão não há chave segura)
+    """
+    versao = versao_namespace(namespace)
+    if versao is None:
+        raise RuntimeError(f"versão do namespace '{namespace}' indisponível")
+    return f"{namespace}{_SEPARADOR}v{versao}{_SEPARADOR}{_normalizar_partes(partes)}"
+
+
+def invalidar_namespace(namespace):
+    """
+    Invalida todas as chaves do namespace incrementando sua versão.
+
+    Returns:
+        int: Nova versão do namespace (None se o cache estiver indisponível)
+    """
+    chave = _chave_interna(namespace, 'versao')
+    try:
+        try:
+            return cache.incr(chave)
+        except ValueError:
+            # Chave de versão inexistente (ou removida pelo backend)
+            versao = _versao_inicial()
+            if cache.add(chave, versao, timeout=None):
+                return versao
+            return cache.incr(chave)
+    except Exception as e:
+        logger.warning(f"Falha ao invalidar namespace '{namespace}': {e}")
+        return None
+
+
+def long_poll_disponivel():
+    """Indica se o cache default é um backend em memória compartilhado (Redis ou Memcached)"""
+    backend = descrever_backend()['backend']
+    return '.redis.' in backend or '.memcached.' in backend
+
+
+def aguardar_nova_versao(namespace, versao, timeout, intervalo=1.0):
+    """
+    Espera a versão do namespace passar de `versao` (ou o timeout vencer).
+
+    Cada verificação é um cache.get da chave de versão, sem consultar as
+    tabelas da aplicação. Sem long_poll_disponivel() ou sem versão lida
+    (cache fora do ar) retorna na hora.
+
+    Args:
+        namespace (str): Namespace observado
+        versao (int or None): Versão lida antes de consultar o banco
+        timeout (float): Segundos máximos de espera
+        intervalo (float): Segundos entre verificações
+
+    Returns:
+        bool: True se a versão mudou
+    """
+    if versao is None or not long_poll_disponivel():
+        return False
+    limite = time.monotonic() + timeout
+    while True:
+        if versao_namespace(namespace) != versao:
+            return True
+        restante = limite - time.monotonic()
+        if restante <= 0:
+            return False
+        time.sleep(min(intervalo, restante))
+
+
+def _incrementar_contador(namespace, tipo):
+    """
+    Incrementa contador de hits/misses do namespace (falhas são ignoradas).
+
+    Só com CACHE_ESTATISTICAS: fora do Redis/Memcached o incr não é atômico
+    (get + set) e cada set do DatabaseCache ainda conta as linhas para o cull.
+    """
+    chave = _chave_interna(namespace, tipo)
+    try:
+        cache.incr(chave)
+    except ValueError:
+        # Contador ainda não existe
+        if not cache.add(chave, 1, timeout=None):
+            try:
+                cache.incr(chave)
+            except ValueError:
+                pass
+    except Exception:
+        pass
+
+
+def obter(namespace, partes, default=None):
+    """
+    Busca um valor no cache registrando acerto ou erro no namespace.
+
+    Args:
+        namespace (str): Namespace da chave
+        partes (list): Partes que identificam o valor dentro do namespace
+        default: Valor retornado quando a chave não existe
+
+    Returns:
+        Valor em cache ou default
+    """
+    try:
+        valor = cache.get(chave_versionada(namespace, *partes))
+    except Exception as e:
+        logger.warning(f"Cache indisponível ao ler '{namespace}': {e}")
+        return default
+
+    if getattr(settings, 'CACHE_ESTATISTICAS', False):
+        _incrementar_contador(namespace, 'hits' if valor is not None else 'misses')
+    return default if valor is None else valor
+
+
+def definir(namespace, partes, valor, timeout=None):
+    """
+    Grava um valor no namespace.
+
+    Args:
+        timeout (int): Segundos até expirar (None = CACHE_TIMEOUT_PADRAO)
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'CACHE_TIMEOUT_PADRAO', 300)
+    try:
+        cache.set(chave_versionada(namespace, *partes), valor, timeout)
+    except Exception as e:
+        logger.warning(f"Cache indisponível ao gravar '{namespace}': {e}")
+
+
+def obter_ou_calcular(namespace, partes, calcular, timeout=None):
+    """
+    Retorna o valor do cache ou calcula, grava e retorna.
+
+    Args:
+        namespace (str): Namespace da chave
+        partes (list): Partes que identificam o valor
+        calcular (callable): Função sem argumentos que produz o valor
+        timeout (int): Segundos até expirar
+
+    Returns:
+        Valor em cache ou recém-calculado
+    """
+    valor = obter(namespace, partes)
+    if valor is None:
+        valor = calcular()
+        if valor is not None:
+            definir(namespace, partes, valor, timeout)
+    return valor
+
+
+def estatisticas_namespace(namespace):
+    """
+    Retorna versão e contadores de acerto do namespace.
+
+    Returns:
+        dict: {'versao', 'hits', 'misses', 'taxa_acerto'} (contadores só
+        com CACHE_ESTATISTICAS)
+    """
+    try:
+        hits = cache.get(_chave_interna(namespace, 'hits')) or 0
+        misses = cache.get(_chave_interna(namespace, 'misses')) or 0
+    except Exception:
+        hits = misses = 0
+
+    total = hits + misses
+    return {
+        'versao': versao_namespace(namespace),
+        'hits': hits,
+        'misses': misses,
+        'taxa_acerto': round(hits / total * 100, 1) if total > 0 else 0,
+    }
+
+
+def zerar_estatisticas(namespace):
+    """Zera os contadores de acerto/erro do namespace."""
+    cache.delete_many([
+        _chave_interna(namespace, 'hits'),
+        _chave_interna(namespace, 'misses'),
+    ])
+
+
+def descrever_backend():
+    """Retorna o backend e a localização configurados para o cache default."""
+    config = settings.CACHES.get('default', {})
+    return {
+        'backend': config.get('BACKEND', ''),
+        'location': config.get('LOCATION', ''),
+    }
+
+
+def contar_chaves():
+    """
+    Conta as chaves armazenadas no backend atual.
+
+    Returns:
+        int or None: Total de chaves (None se o backend não permitir contar)
+    """
+    backend = descrever_backend()['backend']
+
+    try:
+        if backend.endswith('db.DatabaseCache'):
+            from django.db import connection
+            tabela = connection.ops.quote_name(cache._table)
+            with connection.cursor() as cursor:
+                cursor.execute(f"SELECT COUNT(*) FROM {tabela}")
+                return cursor.fetchone()[0]
+
+        if backend.endswith('filebased.FileBasedCache'):
+            return len(cache._list_cache_files())
+
+        if backend.endswith('redis.RedisCache'):
+            return cache._cache.get_client().dbsize()
+
+        if backend.endswith('PyMemcacheCache'):
+            total = 0
+            for _servidor, stats in cache._cache.stats().items():
+                total += int(stats.get(b'curr_items', stats.get('curr_items', 0)))
+            return total
+
+        if backend.endswith('locmem.LocMemCache'):
+            return len(cache._cache)
+    except Exception as e:
+        logger.warning(f"Não foi possível contar chaves do cache: {e}")
+
+    return None
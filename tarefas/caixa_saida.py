@@ -0,0 +1,169 @@
+"""
+Caixa de saída de emails (HistoricoEmail como outbox).
+
+As views só gravam o email PENDENTE (EmailService.enfileirar_email) e
+respondem; quem fala com o Graph é o worker:
+
+    - reservar_lote() trava os emails vencidos com SELECT ... FOR UPDATE
+      SKIP LOCKED, incrementa `tentativas` e empurra `proxima_tentativa`
+      (reserva). Dois workers nunca pegam o mesmo email e, se um worker
+      cair no meio do envio, os emails voltam quando a reserva expira;
+    - processar_caixa_saida() envia o lote com EmailService.enviar_em_lote
+      com prazo: nenhum $batch começa depois de prazo_envio(), que deixa
+      folga para a última requisição terminar antes de a reserva vencer
+      (senão outro worker reservaria e enviaria os mesmos emails). O que
+      não coube no prazo volta para a fila sem contar tentativa;
+      falhas temporárias (429/5xx/conexão) voltam com backoff exponencial
+      até EMAIL_MAX_TENTATIVAS (HistoricoEmail.marcar_como_erro);
+    - metricas_caixa_saida() informa a profundidade da fila e a latência de
+      envio (solicitação → envio) da última hora.
+
+Configuração (settings): EMAIL_LOTE_WORKER, EMAIL_MAX_TENTATIVAS,
+EMAIL_BACKOFF_SEGUNDOS e EMAIL_RESERVA_SEGUNDOS.
+
+Uso (o worker chama a cada ciclo):
+    processar_pendentes()
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min, Q
+from django.utils import timezone
+
+from tarefas.models import HistoricoEmail
+from tarefas.services.email_service import EmailService
+
+# Lotes por chamada de processar_pendentes (o worker volta às outras tarefas)
+MAX_LOTES_POR_CICLO = 10
+
+CAMPOS_ENVIO = [
+    'id', 'campanha_id', 'email_destinatario', 'assunto', 'corpo_email', 'anexo_nome', 'anexo_csv',
+    'status', 'tentativas',
+    'data_envio', 'resposta_api', 'mensagem_erro', 'proxima_tentativa',
+]
+
+
+def reserva_segundos():
+    """Tempo que um lote fica reservado para o worker que o pegou"""
+    return getattr(settings, 'EMAIL_RESERVA_SEGUNDOS', 300)
+
+
+def prazo_envio(inicio):
+    """
+    Instante (time.monotonic) a partir do qual nenhum $batch deve começar.
+
+    Desconta da reserva o pior caso de uma requisição já iniciada: o timeout
+    HTTP em cada tentativa da sessão (GRAPH_HTTP_TENTATIVAS).
+    """
+    requisicao = getattr(settings, 'GRAPH_HTTP_TIMEOUT', 30) * (getattr(settings, 'GRAPH_HTTP_TENTATIVAS', 3) + 1)
+    return inicio + max(reserva_segundos() - requisicao, 0)
+
+
+def reservar_lote(limite=None, campanha=None):
+    """
+    Reserva os próximos emails vencidos da caixa de saída.
+
+    Returns:
+        list: HistoricoEmail reservados (só os campos usados no envio)
+    """
+    limite = limite or getattr(settings, 'EMAIL_LOTE_WORKER', 100)
+    agora = timezone.now()
+    vencidos = HistoricoEmail.objects.filter(status=HistoricoEmail.STATUS_PENDENTE, proxima_tentativa__lte=agora)
+    if campanha is not None:
+        vencidos = vencidos.filter(campanha=campanha)
+
+    with transaction.atomic():
+        ids = list(
+            vencidos.select_for_update(skip_locked=True)
+            .order_by('proxima_tentativa', 'id')
+            .values_list('id', flat=True)[:limite]
+        )
+        if not ids:
+            return []
+        HistoricoEmail.objects.filter(id__in=ids).update(
+            tentativas=F('tentativas') + 1,
+            proxima_tentativa=agora + timedelta(seconds=reserva_segundos()),
+        )
+    return list(HistoricoEmail.objects.filter(id__in=ids).only(*CAMPOS_ENVIO))
+
+
+def processar_caixa_saida(limite=None, campanha=None):
+    """
+    Reserva e envia um lote.
+
+    Returns:
+        dict: {'reservados': n, 'enviados': n, 'erros': n, 'reagendados': n}
+    """
+    from tarefas.campanhas import atualizar_campanhas
+
+    inicio = time.monotonic()
+    historicos = reservar_lote(limite, campanha)
+    if not historicos:
+        return {'reservados': 0, 'enviados': 0, 'erros': 0, 'reagendados': 0}
+
+    resultado = EmailService().enviar_em_lote(historicos, prazo=prazo_envio(inicio))
+    campanhas = {historico.campanha_id for historico in historicos if historico.campanha_id}
+    if campanhas:
+        atualizar_campanhas(campanhas)
+    return {'reservados': len(historicos), **resultado}
+
+
+def processar_pendentes(max_lotes=MAX_LOTES_POR_CICLO, campanha=None):
+    """Processa lotes até a caixa de saída não ter emails vencidos (ou max_lotes)"""
+    totais = {'reservados': 0, 'enviados': 0, 'erros': 0, 'reagendados': 0}
+    for _ in range(max_lotes):
+        resultado = processar_caixa_saida(campanha=campanha)
+        for chave in totais:
+            totais[chave] += resultado[chave]
+        if not resultado['reservados']:
+            break
+    return totais
+
+
+def _percentil(valores, fracao):
+    return round(valores[min(int(len(valores) * fracao), len(valores) - 1)], 2) if valores else None
+
+
+def metricas_caixa_saida():
+    """
+    Profundidade da fila e latência de envio.
+
+    Returns:
+        dict: pendentes (total), prontos (vencidos), aguardando (reservados
+        ou em backoff), idade_mais_antigo_segundos, e da última hora:
+        enviados, erros, latencia_media/p50/p95_segundos
+    """
+    agora = timezone.now()
+    fila = HistoricoEmail.objects.filter(
+        status=HistoricoEmail.STATUS_PENDENTE, proxima_tentativa__isnull=False
+    ).aggregate(
+        pendentes=Count('id'),
+        prontos=Count('id', filter=Q(proxima_tentativa__lte=agora)),
+        mais_antigo=Min('data_solicitacao'),
+    )
+    ultima_hora = HistoricoEmail.objects.filter(data_envio__gte=agora - timedelta(hours=1))
+    totais = ultima_hora.aggregate(
+        enviados=Count('id', filter=Q(status=HistoricoEmail.STATUS_ENVIADO)),
+        erros=Count('id', filter=Q(status=HistoricoEmail.STATUS_ERRO)),
+    )
+    latencias = sorted(
+        (enviado - solicitado).total_seconds()
+        for solicitado, enviado in ultima_hora.filter(status=HistoricoEmail.STATUS_ENVIADO)
+        .order_by('-data_envio').values_list('data_solicitacao', 'data_envio')[:5000]
+    )
+
+    return {
+        'pendentes': fila['pendentes'],
+        'prontos': fila['prontos'],
+        'aguardando': fila['pendentes'] - fila['prontos'],
+        'idade_mais_antigo_segundos': (
+            round((agora - fila['mais_antigo']).total_seconds(), 1) if fila['mais_antigo'] else 0
+        ),
+        'enviados_ultima_hora': totais['enviados'],
+        'erros_ultima_hora': totais['erros'],
+        'latencia_media_segundos': round(sum(latencias) / len(latencias), 2) if latencias else None,
+        'latencia_p50_segundos': _percentil(latencias, 0.5),
+        'latencia_p95_segundos': _percentil(latencias, 0.95),
+    }
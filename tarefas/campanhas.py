@@ -0,0 +1,237 @@
+"""
+Campanhas de email (um template para vários servidores).
+
+enviar_email_servidor faz uma chamada síncrona ao Graph por servidor, dentro
+da requisição web. Aqui:
+
+    - criar_campanha() só grava a CampanhaEmail e agenda o worker: a
+      requisição não consulta tarefas nem renderiza nada;
+    - enviar_campanha_async (worker) chama executar_campanha(), que primeiro
+      prepara a campanha (preparar_campanha: destinatários com um GROUP BY
+      em Tarefa, lista de tarefas de todos em uma única passada, cada email
+      renderizado com o template compilado em cache, a lista completa em CSV
+      anexo quando não cabe no corpo, HistoricoEmail PENDENTE com
+      bulk_create) e depois esvazia os emails da campanha pela caixa de
+      saída (tarefas/caixa_saida.py:
+      reserva com SKIP LOCKED, $batch de 20, pool de threads, limitador de
+      taxa). Falhas temporárias ficam para o worker da caixa de saída, que
+      atualiza os totais (atualizar_campanhas) a cada lote.
+
+Uso:
+    campanha = criar_campanha(template, {'fila': 'PGB', 'minimo_criticas': 1}, request.user)
+    executar_campanha(campanha)  # no worker (enviar_campanha_async)
+"""
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Count, Q
+from django.template import Context
+from django.utils import timezone
+
+from tarefas.caixa_saida import processar_pendentes
+from tarefas.models import CampanhaEmail, HistoricoEmail, Tarefa
+from tarefas.services.email_service import (
+    CAMPOS_LISTA_EMAIL, LIMITE_TAREFAS_ANEXO, EmailService, obter_templates_compilados,
+)
+
+TAMANHO_LOTE = 500
+
+
+def normalizar_filtros(filtros):
+    """fila (opcional) e minimo_criticas / minimo_tarefas (inteiros >= 0)"""
+    filtros = filtros or {}
+    normalizados = {}
+    if filtros.get('fila'):
+        normalizados['fila'] = str(filtros['fila'])
+    for chave in ('minimo_criticas', 'minimo_tarefas'):
+        try:
+            valor = int(filtros.get(chave) or 0)
+        except (TypeError, ValueError):
+            raise ValueError(f'{chave} deve ser um número')
+        if valor > 0:
+            normalizados[chave] = valor
+    return normalizados
+
+
+def _tarefas(filtros):
+    tarefas = Tarefa.objects.filter(ativa=True, siape_responsavel__isnull=False)
+    if filtros.get('fila'):
+        tarefas = tarefas.filter(tipo_fila=filtros['fila'])
+    return tarefas
+
+
+def selecionar_destinatarios(filtros):
+    """
+    Servidores com email real que atendem aos filtros.
+
+    Returns:
+        list: [(servidor, {'total_tarefas': n, 'tarefas_criticas': n})] por SIAPE
+    """
+    contagens = (
+        _tarefas(filtros)
+        .values('siape_responsavel_id')
+        .annotate(
+            total_tarefas=Count('numero_protocolo_tarefa'),
+            tarefas_criticas=Count('numero_protocolo_tarefa', filter=Q(nivel_criticidade_calculado='CRÍTICA')),
+        )
+        .filter(
+            total_tarefas__gte=filtros.get('minimo_tarefas', 1),
+            tarefas_criticas__gte=filtros.get('minimo_criticas', 0),
+        )
+        .order_by()
+    )
+    contagens = {
+        linha['siape_responsavel_id']: {'total_tarefas': linha['total_tarefas'],
+                                        'tarefas_criticas': linha['tarefas_criticas']}
+        for linha in contagens
+    }
+
+    servidores = (
+        get_user_model().objects
+        .filter(siape__in=list(contagens), is_active=True)
+        .exclude(email='')
+        .exclude(email__startswith='sem.email.')
+        .exclude(email__endswith='@temporario.inss.gov.br')
+        .only('id', 'siape', 'email', 'nome_completo')
+        .order_by('siape')
+    )
+    return [(servidor, contagens[servidor.siape]) for servidor in servidores]
+
+
+def _listas_tarefas(filtros, siapes):
+    """Até LIMITE_TAREFAS_ANEXO tarefas de cada servidor, em uma única passada"""
+    listas = {siape: [] for siape in siapes}
+    linhas = (
+        _tarefas(filtros).filter(siape_responsavel_id__in=siapes)
+        .order_by('siape_responsavel_id', '-pontuacao_criticidade', 'numero_protocolo_tarefa')
+        .values_list('siape_responsavel_id', *CAMPOS_LISTA_EMAIL, named=True)
+    )
+    for linha in linhas.iterator(chunk_size=2000):
+        lista = listas[linha.siape_responsavel_id]
+        if len(lista) < LIMITE_TAREFAS_ANEXO:
+            lista.append(linha)
+    return listas
+
+
+def criar_campanha(template_email, filtros, usuario=None):
+    """
+    Registra a campanha (PENDENTE) e agenda a preparação e o envio no worker.
+
+    Returns:
+        CampanhaEmail
+    """
+    from tarefas.tasks import enviar_campanha_async
+
+    filtros = normalizar_filtros(filtros)
+    with transaction.atomic():
+        campanha = CampanhaEmail.objects.create(template=template_email, filtros=filtros, criado_por=usuario)
+        transaction.on_commit(lambda: enviar_campanha_async(campanha.id))
+    return campanha
+
+
+def preparar_campanha(campanha):
+    """
+    Seleciona os destinatários e grava os emails já renderizados (PENDENTE).
+
+    Emails e status PROCESSANDO são gravados na mesma transação: se o worker
+    repetir a tarefa, uma campanha já preparada não é preparada de novo.
+    Sem destinatários, a campanha é concluída.
+
+    Returns:
+        int: Emails gravados
+    """
+    filtros = campanha.filtros
+    destinatarios = selecionar_destinatarios(filtros)
+    listas = _listas_tarefas(filtros, [servidor.siape for servidor, _ in destinatarios])
+
+    servico = EmailService()
+    template_assunto, template_corpo = obter_templates_compilados(campanha.template)
+
+    agora = timezone.now()
+    emails = []
+    for servidor, contagem in destinatarios:
+        lista_tarefas, anexo = servico.tarefas_para_email(
+            listas[servidor.siape], servidor.siape, contagem['total_tarefas']
+        )
+        contexto = Context({
+            **EmailService.contexto_base(servidor),
+            **contagem,
+            'lista_tarefas': lista_tarefas,
+        })
+        emails.append(HistoricoEmail(
+            servidor=servidor,
+            email_destinatario=servidor.email,
+            assunto=template_assunto.render(contexto)[:255],
+            corpo_email=template_corpo.render(contexto),
+            enviado_por=campanha.criado_por,
+            campanha=campanha,
+            proxima_tentativa=agora,
+            **EmailService.campos_anexo(anexo),
+        ))
+
+    campanha.total_destinatarios = len(emails)
+    if emails:
+        campanha.status = CampanhaEmail.STATUS_PROCESSANDO
+    else:
+        campanha.status = CampanhaEmail.STATUS_CONCLUIDA
+        campanha.data_conclusao = timezone.now()
+    with transaction.atomic():
+        HistoricoEmail.objects.bulk_create(emails, batch_size=TAMANHO_LOTE)
+        campanha.save(update_fields=['total_destinatarios', 'status', 'data_conclusao'])
+    return len(emails)
+
+
+def executar_campanha(campanha):
+    """
+    Prepara a campanha (se ainda PENDENTE), envia os emails vencidos e
+    atualiza os totais.
+
+    Returns:
+        dict: {'reservados': n, 'enviados': n, 'erros': n, 'reagendados': n} desta execução
+    """
+    inicio = time.monotonic()
+    try:
+        if campanha.status == CampanhaEmail.STATUS_PENDENTE:
+            preparar_campanha(campanha)
+        else:
+            campanha.status = CampanhaEmail.STATUS_PROCESSANDO
+            campanha.save(update_fields=['status'])
+        if campanha.status == CampanhaEmail.STATUS_CONCLUIDA:
+            return {'reservados': 0, 'enviados': 0, 'erros': 0, 'reagendados': 0}
+        resultado = processar_pendentes(max_lotes=sys.maxsize, campanha=campanha)
+    except Exception as e:
+        campanha.status = CampanhaEmail.STATUS_ERRO
+        campanha.mensagem_erro = str(e)
+        campanha.data_conclusao = timezone.now()
+        campanha.save(update_fields=['status', 'mensagem_erro', 'data_conclusao'])
+        raise
+
+    CampanhaEmail.objects.filter(id=campanha.id).update(duracao_segundos=round(time.monotonic() - inicio, 2))
+    atualizar_campanhas([campanha.id])
+    campanha.refresh_from_db()
+    return resultado
+
+
+def atualizar_campanhas(ids):
+    """
+    Recalcula enviados/erros das campanhas (um GROUP BY) e conclui as que
+    não têm mais emails pendentes.
+    """
+    totais = (
+        HistoricoEmail.objects.filter(campanha_id__in=ids)
+        .values('campanha_id')
+        .annotate(
+            enviados=Count('id', filter=Q(status=HistoricoEmail.STATUS_ENVIADO)),
+            erros=Count('id', filter=Q(status=HistoricoEmail.STATUS_ERRO)),
+            pendentes=Count('id', filter=Q(status=HistoricoEmail.STATUS_PENDENTE)),
+        )
+        .order_by()
+    )
+    agora = timezone.now()
+    for linha in totais:
+        campos = {'enviados': linha['enviados'], 'erros': linha['erros']}
+        if not linha['pendentes']:
+            campos.update(status=CampanhaEmail.STATUS_CONCLUIDA, data_conclusao=agora)
+        CampanhaEmail.objects.filter(id=linha['campanha_id']).exclude(status=CampanhaEmail.STATUS_ERRO).update(**campos)
@@ -56,52 +56,18 @@ def data_processamento_context(request):
     Adiciona informações sobre a data de processamento dos dados
     ao contexto do template.
 
-    OTIMIZAÇÃO: Cache de 5 minutos para evitar query pesada em toda requisição
+    OTIMIZAÇÃO: Cache compartilhado de 5 minutos (namespace 'processamento'),
+    visível por todos os processos e invalidado ao final de cada importação.
     """
-    from django.core.cache import cache
-    from tarefas.models import Tarefa
+    from tarefas.cache import obter_ou_calcular, NAMESPACE_PROCESSAMENTO
 
     try:
-        # OTIMIZAÇÃO: Tentar obter do cache primeiro (5 minutos)
-        cache_key = 'data_processamento_info'
-        cached_data = cache.get(cache_key)
-
-        if cached_data is not None:
-            return cached_data
-
-        # Buscar a data de processamento mais recente (query apenas se não houver cache)
-        # OTIMIZAÇÃO: Usar values_list para buscar apenas o campo necessário
-        data_processamento = Tarefa.objects.filter(
-            data_processamento_tarefa__isnull=False
-        ).values_list('data_processamento_tarefa', flat=True).order_by('-data_processamento_tarefa').first()
-
-        if not data_processamento:
-            result = {
-                'data_processamento': None,
-                'cor_status_processamento': 'secondary',
-                'dados_atualizados': False
-            }
-            # Cachear por 5 minutos
-            cache.set(cache_key, result, 300)
-            return result
-
-        # Calcular se está dentro do prazo (3 dias)
-        hoje = timezone.now()
-        diferenca_dias = (hoje.date() - data_processamento.date()).days
-
-        # Definir cor: verde se <= 3 dias, amarelo se > 3 dias
-        cor_status = 'success' if diferenca_dias <= 3 else 'warning'
-
-        result = {
-            'data_processamento': data_processamento,
-            'cor_status_processamento': cor_status,
-            'dados_atualizados': True
-        }
-
-        # OTIMIZAÇÃO: Cachear resultado por 5 minutos (300 segundos)
-        cache.set(cache_key, result, 300)
-
-        return result
+        return obter_ou_calcular(
+            NAMESPACE_PROCESSAMENTO,
+            ['info'],
+            _calcular_info_processamento,
+            timeout=300
+        )
 
     except Exception:
         # Se houver erro (ex: tabelas não existem), retorna valores padrão
@@ -110,4 +76,34 @@ def data_processamento_context(request):
             'data_processamento': None,
             'cor_status_processamento': 'secondary',
             'dados_atualizados': False
-        }
\ No newline at end of file
+        }
+
+
+def _calcular_info_processamento():
+    """Consulta a data de processamento mais recente e monta o contexto."""
+    from tarefas.models import Tarefa
+
+    # OTIMIZAÇÃO: Usar values_list para buscar apenas o campo necessário
+    data_processamento = Tarefa.objects.filter(
+        data_processamento_tarefa__isnull=False
+    ).values_list('data_processamento_tarefa', flat=True).order_by('-data_processamento_tarefa').first()
+
+    if not data_processamento:
+        return {
+            'data_processamento': None,
+            'cor_status_processamento': 'secondary',
+            'dados_atualizados': False
+        }
+
+    # Calcular se está dentro do prazo (3 dias)
+    hoje = timezone.now()
+    diferenca_dias = (hoje.date() - data_processamento.date()).days
+
+    # Definir cor: verde se <= 3 dias, amarelo se > 3 dias
+    cor_status = 'success' if diferenca_dias <= 3 else 'warning'
+
+    return {
+        'data_processamento': data_processamento,
+        'cor_status_processamento': cor_status,
+        'dados_atualizados': True
+    }
@@ -0,0 +1,161 @@
+"""
+Tabelas de dimensão com as opções dos filtros de tarefas.
+
+Status, serviço, GEX e unidade das tarefas ativas são agregados uma vez ao
+final de cada importação (um GROUP BY por dimensão) e gravados em
+DimensaoTarefa. Dropdowns das views e filtros laterais do admin leem dessas
+tabelas pequenas em vez de fazer DISTINCT sobre toda a base a cada acesso.
+
+Enquanto as tabelas estiverem vazias (antes da primeira importação), as
+funções de leitura recorrem à consulta DISTINCT original.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from tarefas.models import DimensaoServicoServidor, DimensaoTarefa, Tarefa
+
+# Dimensão → campo correspondente em Tarefa
+CAMPOS_DIMENSAO = {
+    DimensaoTarefa.TIPO_STATUS: 'status_tarefa',
+    DimensaoTarefa.TIPO_SERVICO: 'nome_servico',
+    DimensaoTarefa.TIPO_GEX: 'nome_gex_responsavel',
+    DimensaoTarefa.TIPO_UNIDADE: 'codigo_unidade_tarefa',
+}
+
+TAMANHO_LOTE = 2000
+
+
+def atualizar_dimensoes():
+    """
+    Recalcula todas as dimensões a partir das tarefas ativas.
+
+    Returns:
+        dict: {tipo: quantidade de valores distintos, 'servico_servidor': n}
+    """
+    ativas = Tarefa.objects.filter(ativa=True)
+
+    registros = []
+    resultado = {}
+    for tipo, campo in CAMPOS_DIMENSAO.items():
+        linhas = (
+            ativas.exclude(**{f'{campo}__isnull': True})
+            .values(campo)
+            .annotate(total=Count('numero_protocolo_tarefa'))
+            .order_by()
+        )
+        valores = [
+            DimensaoTarefa(tipo=tipo, valor=str(linha[campo])[:255], total_ativas=linha['total'])
+            for linha in linhas
+            if linha[campo] != ''
+        ]
+        registros.extend(valores)
+        resultado[tipo] = len(valores)
+
+    servicos_servidor = [
+        DimensaoServicoServidor(
+            siape=linha['siape_responsavel'],
+            tipo_fila=linha['tipo_fila'],
+            nome_servico=linha['nome_servico'],
+            total_ativas=linha['total'],
+            total_criticas=linha['criticas'],
+        )
+        for linha in (
+            ativas.exclude(siape_responsavel__isnull=True)
+            .values('siape_responsavel', 'tipo_fila', 'nome_servico')
+            .annotate(
+                total=Count('numero_protocolo_tarefa'),
+                criticas=Count('numero_protocolo_tarefa', filter=Q(nivel_criticidade_calculado='CRÍTICA')),
+            )
+            .order_by()
+        )
+    ]
+    resultado['servico_servidor'] = len(servicos_servidor)
+
+    # Troca completa numa transação: leitores veem a versão antiga ou a nova
+    with transaction.atomic():
+        DimensaoTarefa.objects.all().delete()
+        DimensaoTarefa.objects.bulk_create(registros, batch_size=TAMANHO_LOTE)
+        DimensaoServicoServidor.objects.all().delete()
+        DimensaoServicoServidor.objects.bulk_create(servicos_servidor, batch_size=TAMANHO_LOTE)
+
+    return resultado
+
+
+def opcoes_dimensao(tipo, com_contagem=False):
+    """
+    Valores disponíveis de uma dimensão, em ordem alfabética.
+
+    Args:
+        tipo (str): DimensaoTarefa.TIPO_*
+        com_contagem (bool): Se True, retorna tuplas (valor, total_ativas)
+
+    Returns:
+        list
+    """
+    linhas = list(
+        DimensaoTarefa.objects.filter(tipo=tipo)
+        .order_by('valor')
+        .values_list('valor', 'total_ativas')
+    )
+
+    if not linhas:
+        # Dimensões ainda não calculadas: consulta direta
+        campo = CAMPOS_DIMENSAO[tipo]
+        linhas = [
+            (str(linha[campo]), linha['total'])
+            for linha in (
+                Tarefa.objects.filter(ativa=True)
+                .exclude(**{f'{campo}__isnull': True})
+                .values(campo)
+                .annotate(total=Count('numero_protocolo_tarefa'))
+                .order_by(campo)
+            )
+        ]
+
+    if com_contagem:
+        return linhas
+    return [valor for valor, _ in linhas]
+
+
+def servicos_servidor_fila(siape, tipo_fila):
+    """Serviços distintos das tarefas ativas do servidor na fila"""
+    servicos = list(
+        DimensaoServicoServidor.objects.filter(siape=siape, tipo_fila=tipo_fila)
+        .order_by('nome_servico')
+        .values_list('nome_servico', flat=True)
+    )
+    if servicos or DimensaoServicoServidor.objects.exists():
+        return servicos
+
+    return list(
+        Tarefa.objects.filter(siape_responsavel_id=siape, tipo_fila=tipo_fila, ativa=True)
+        .values_list('nome_servico', flat=True)
+        .distinct()
+        .order_by('nome_servico')
+    )
+
+
+def cargas_servidores_fila(tipo_fila):
+    """
+    Carga de cada servidor na fila: {siape: (críticas, total)} das tarefas ativas.
+
+    Soma as linhas de DimensaoServicoServidor (poucas centenas por fila);
+    antes da primeira importação, recorre a um GROUP BY em Tarefa.
+    """
+    linhas = (
+        DimensaoServicoServidor.objects.filter(tipo_fila=tipo_fila)
+        .values('siape')
+        .annotate(criticas=Sum('total_criticas'), total=Sum('total_ativas'))
+        .order_by()
+    )
+    if not linhas and not DimensaoServicoServidor.objects.exists():
+        linhas = (
+            Tarefa.objects.filter(tipo_fila=tipo_fila, ativa=True, siape_responsavel__isnull=False)
+            .values(siape=F('siape_responsavel_id'))
+            .annotate(
+                criticas=Count('numero_protocolo_tarefa', filter=Q(nivel_criticidade_calculado='CRÍTICA')),
+                total=Count('numero_protocolo_tarefa'),
+            )
+            .order_by()
+        )
+    return {linha['siape']: (linha['criticas'], linha['total']) for linha in linhas}
@@ -0,0 +1,584 @@
+"""
+Exportação de tarefas para Excel em modo streaming.
+
+O Workbook comum mantém todas as células (com estilo próprio) em memória e
+só grava no final. Aqui a planilha é escrita em modo write_only:
+
+    - as linhas vêm de values_list(...).iterator(), sem instanciar Tarefa;
+    - os estilos são NamedStyles registrados uma vez no workbook e as células
+      apenas referenciam o nome;
+    - os totais do rodapé são acumulados durante a mesma passada (sem COUNTs);
+    - o arquivo é gravado em um temporário em disco e enviado com
+      FileResponse, em blocos.
+
+Os CSVs das ações do admin até LIMITE_EXPORTACAO_DIRETA linhas vão direto
+para a resposta (resposta_csv_streaming): StreamingHttpResponse sobre o mesmo
+iterator, com memória constante e o total de linhas contado durante o envio.
+Seleções maiores viram ExportJob.
+
+Relatórios grandes (fila inteira, base inteira, críticas, prazo vencido)
+são gerados pelo worker em ExportJob (ver RELATORIOS e solicitar_exportacao):
+a chave (tipo, filtros, geração dos dados) permite reaproveitar o arquivo
+já gerado enquanto os dados (GeracaoDados) e a data não mudarem.
+
+Uso:
+    arquivo, totais = gerar_planilha_tarefas(tarefas, titulo, subtitulo)
+    return resposta_planilha(arquivo, 'Tarefas.xlsx')
+
+    return resposta_csv_streaming(tarefas, COLUNAS_CSV_CRITICAS, 'tarefas_criticas.csv')
+
+    job, reaproveitado = solicitar_exportacao('criticas_csv', {'fila': 'PGB'}, request.user)
+"""
+import csv
+import hashlib
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from django.utils.text import get_valid_filename
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Font, NamedStyle, PatternFill, Side
+from openpyxl.utils import get_column_letter
+
+TAMANHO_LOTE = 2000
+
+CONTENT_TYPE_XLSX = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+COR_CABECALHO = '366092'
+
+CORES_CRITICIDADE = {
+    'CRÍTICA': 'FFE6E6',
+    'REGULAR': 'E6FFE6',
+}
+
+_BORDA = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin'),
+)
+_CENTRO = Alignment(horizontal='center', vertical='center')
+_TEXTO = Alignment(wrap_text=True, vertical='top')
+
+# Campos lidos do banco (ordem = índice usado pelos extratores abaixo)
+CAMPOS = [
+    'numero_protocolo_tarefa',               # 0
+    'nome_servico',                          # 1
+    'status_tarefa',                         # 2
+    'data_distribuicao_tarefa',              # 3
+    'tempo_em_pendencia_em_dias',            # 4
+    'prazo_limite_criticidade_calculado',    # 5
+    'nivel_criticidade_calculado',           # 6
+    'pontuacao_criticidade',                 # 7
+    'codigo_unidade_tarefa',                 # 8
+    'data_ultima_atualizacao',               # 9
+    'siape_responsavel__nome_completo',      # 10
+    'siape_responsavel_id',                  # 11
+    'tipo_fila',                             # 12
+]
+
+
+def _data(valor):
+    return valor.strftime('%d/%m/%Y') if valor else ''
+
+
+def _responsavel(linha):
+    if not linha[11]:
+        return ''
+    return f"{linha[10]} ({linha[11]})"
+
+
+# (cabeçalho, largura, centralizada, extrator)
+COLUNAS = [
+    ('Protocolo', 18, True, lambda l: l[0] or ''),
+    ('Serviço', 40, False, lambda l: l[1] or ''),
+    ('Interessado', 30, False, lambda l: ''),  # campo removido
+    ('Status', 20, True, lambda l: l[2] or ''),
+    ('Data Entrada', 12, True, lambda l: _data(l[3])),
+    ('Dias Parado', 12, True, lambda l: l[4] or 0),
+    ('Prazo (dias)', 12, True, lambda l: l[5] or 0),
+    ('Criticidade', 12, True, lambda l: l[6] or ''),
+    ('Pontuação', 12, True, lambda l: l[7] or 0),
+    ('Unidade', 12, True, lambda l: l[8] or ''),
+    ('Última Movimentação', 15, True, lambda l: _data(l[9])),
+    ('Responsável', 30, False, _responsavel),
+    ('Observações', 40, False, lambda l: ''),  # campo removido
+]
+
+COLUNA_FILA = ('Fila', 16, True, lambda l: l[12] or '')
+
+
+def _registrar_estilos(wb):
+    """Registra os NamedStyles usados pela planilha (uma vez por workbook)"""
+    estilos = [
+        NamedStyle(name='exp_titulo', font=Font(bold=True, size=14, color=COR_CABECALHO), alignment=_CENTRO),
+        NamedStyle(name='exp_subtitulo', font=Font(bold=True, size=11), alignment=_CENTRO),
+        NamedStyle(name='exp_info', alignment=_CENTRO),
+        NamedStyle(
+            name='exp_cabecalho',
+            font=Font(bold=True, color='FFFFFF', size=11),
+            fill=PatternFill(start_color=COR_CABECALHO, end_color=COR_CABECALHO, fill_type='solid'),
+            alignment=_CENTRO,
+            border=_BORDA,
+        ),
+        NamedStyle(
+            name='exp_rodape',
+            font=Font(bold=True, size=11),
+            fill=PatternFill(start_color='E0E0E0', end_color='E0E0E0', fill_type='solid'),
+            alignment=_CENTRO,
+        ),
+    ]
+    for nivel, cor in [*CORES_CRITICIDADE.items(), ('OUTRA', None)]:
+        preenchimento = PatternFill(start_color=cor, end_color=cor, fill_type='solid') if cor else PatternFill()
+        for sufixo, alinhamento in (('centro', _CENTRO), ('texto', _TEXTO)):
+            estilos.append(NamedStyle(
+                name=f'exp_{nivel}_{sufixo}', fill=preenchimento, border=_BORDA, alignment=alinhamento
+            ))
+    for estilo in estilos:
+        wb.add_named_style(estilo)
+
+
+def _celula(ws, valor, estilo):
+    celula = WriteOnlyCell(ws, value=valor)
+    celula.style = estilo
+    return celula
+
+
+def escrever_planilha_tarefas(destino, tarefas, titulo, subtitulo='', incluir_fila=False, nome_aba='Tarefas',
+                              ao_progredir=None):
+    """
+    Escreve as tarefas do queryset em um arquivo .xlsx (modo write_only).
+
+    Args:
+        destino: Caminho ou arquivo binário aberto
+        tarefas (QuerySet): Tarefas já filtradas e ordenadas
+        titulo (str): Linha 1 da planilha
+        subtitulo (str): Linha 2 (ex.: servidor)
+        incluir_fila (bool): Acrescenta a coluna "Fila" (exportações da base)
+        nome_aba (str): Título da aba (até 31 caracteres)
+        ao_progredir (callable): Chamada com o número de linhas escritas a
+                                 cada TAMANHO_LOTE linhas (exportações em segundo plano)
+
+    Returns:
+        dict: {'total', 'criticas', 'regulares'} acumulados na passada
+    """
+    colunas = COLUNAS + [COLUNA_FILA] if incluir_fila else COLUNAS
+    ultima_coluna = get_column_letter(len(colunas))
+
+    wb = Workbook(write_only=True)
+    _registrar_estilos(wb)
+    ws = wb.create_sheet(title=nome_aba[:31])
+
+    # Larguras e painel congelado precisam ser definidos antes da primeira linha
+    for indice, (_, largura, _, _) in enumerate(colunas, 1):
+        ws.column_dimensions[get_column_letter(indice)].width = largura
+    ws.freeze_panes = 'A6'
+
+    ws.append([_celula(ws, titulo, 'exp_titulo')])
+    ws.merged_cells.add(f'A1:{ultima_coluna}1')
+    ws.append([_celula(ws, subtitulo, 'exp_subtitulo')])
+    ws.merged_cells.add(f'A2:{ultima_coluna}2')
+    ws.append([_celula(ws, f"Data de Geração: {date.today().strftime('%d/%m/%Y')}", 'exp_info')])
+    ws.merged_cells.add(f'A3:{ultima_coluna}3')
+    ws.append([])
+    ws.append([_celula(ws, cabecalho, 'exp_cabecalho') for cabecalho, _, _, _ in colunas])
+
+    # Nome do estilo por coluna, para cada nível (calculado uma vez)
+    estilos_linha = {
+        nivel: [f"exp_{nivel}_{'centro' if centralizada else 'texto'}" for _, _, centralizada, _ in colunas]
+        for nivel in [*CORES_CRITICIDADE, 'OUTRA']
+    }
+
+    totais = {'total': 0, 'criticas': 0, 'regulares': 0}
+    linhas = tarefas.values_list(*CAMPOS).iterator(chunk_size=TAMANHO_LOTE)
+    for linha in linhas:
+        nivel = linha[6] if linha[6] in CORES_CRITICIDADE else 'OUTRA'
+        estilos = estilos_linha[nivel]
+        ws.append([
+            _celula(ws, extrator(linha), estilos[i])
+            for i, (_, _, _, extrator) in enumerate(colunas)
+        ])
+
+        totais['total'] += 1
+        if linha[6] == 'CRÍTICA':
+            totais['criticas'] += 1
+        elif linha[6] == 'REGULAR':
+            totais['regulares'] += 1
+        if ao_progredir and totais['total'] % TAMANHO_LOTE == 0:
+            ao_progredir(totais['total'])
+
+    ws.append([])
+    linha_rodape = totais['total'] + 7
+    ws.append([_celula(
+        ws,
+        f"TOTAL DE TAREFAS: {totais['total']} | CRÍTICAS: {totais['criticas']} | REGULARES: {totais['regulares']}",
+        'exp_rodape'
+    )])
+    ws.merged_cells.add(f'A{linha_rodape}:{ultima_coluna}{linha_rodape}')
+
+    wb.save(destino)
+    return totais
+
+
+def gerar_planilha_tarefas(tarefas, titulo, subtitulo='', incluir_fila=False, nome_aba='Tarefas'):
+    """
+    Gera a planilha em um arquivo temporário (removido ao ser fechado).
+
+    Returns:
+        tuple: (arquivo posicionado no início, totais)
+    """
+    arquivo = tempfile.TemporaryFile(suffix='.xlsx')
+    try:
+        totais = escrever_planilha_tarefas(arquivo, tarefas, titulo, subtitulo, incluir_fila, nome_aba)
+    except Exception:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return arquivo, totais
+
+
+def resposta_planilha(arquivo, nome_arquivo):
+    """FileResponse que envia o arquivo em blocos e o fecha ao final"""
+    return FileResponse(
+        arquivo,
+        as_attachment=True,
+        filename=nome_arquivo,
+        content_type=CONTENT_TYPE_XLSX,
+    )
+
+
+# ============================================
+# RELATÓRIOS CSV
+# ============================================
+
+CAMPOS_CSV = [
+    'numero_protocolo_tarefa', 'nome_servico', 'status_tarefa', 'nome_profissional_responsavel',
+    'siape_responsavel_id', 'nome_gex_responsavel', 'nivel_criticidade_calculado',
+    'regra_aplicada_calculado', 'pontuacao_criticidade', 'dias_pendente_criticidade_calculado',
+    'prazo_limite_criticidade_calculado', 'alerta_criticidade_calculado', 'data_distribuicao_tarefa',
+    'data_prazo', 'indicador_tarefa_reaberta',
+]
+
+# (cabeçalho, extrator sobre a namedtuple de CAMPOS_CSV)
+COLUNAS_CSV_CRITICAS = [
+    ('Protocolo', lambda t: t.numero_protocolo_tarefa),
+    ('Serviço', lambda t: t.nome_servico),
+    ('Status', lambda t: t.status_tarefa),
+    ('Responsável', lambda t: t.nome_profissional_responsavel),
+    ('SIAPE', lambda t: t.siape_responsavel_id or ''),
+    ('GEX', lambda t: t.nome_gex_responsavel),
+    ('Criticidade', lambda t: t.nivel_criticidade_calculado),
+    ('Regra', lambda t: t.regra_aplicada_calculado),
+    ('Pontuação', lambda t: t.pontuacao_criticidade),
+    ('Dias Pendente', lambda t: t.dias_pendente_criticidade_calculado),
+    ('Prazo Limite', lambda t: t.prazo_limite_criticidade_calculado),
+    ('Alerta', lambda t: t.alerta_criticidade_calculado),
+    ('Data Distribuição', lambda t: _data(t.data_distribuicao_tarefa)),
+]
+
+COLUNAS_CSV_PRAZO_VENCIDO = [
+    ('Protocolo', lambda t: t.numero_protocolo_tarefa),
+    ('Serviço', lambda t: t.nome_servico),
+    ('Status', lambda t: t.status_tarefa),
+    ('Responsável', lambda t: t.nome_profissional_responsavel),
+    ('SIAPE', lambda t: t.siape_responsavel_id or ''),
+    ('Data do Prazo', lambda t: _data(t.data_prazo)),
+    ('Dias de Atraso', lambda t: (date.today() - t.data_prazo).days if t.data_prazo else 0),
+    ('Reaberta', lambda t: 'Sim' if t.indicador_tarefa_reaberta == 1 else 'Não'),
+    ('Criticidade', lambda t: t.nivel_criticidade_calculado),
+]
+
+
+def linhas_csv(tarefas, colunas):
+    """
+    Gera as linhas do CSV (cabeçalho primeiro) lendo o queryset em lotes.
+
+    Args:
+        tarefas (QuerySet): Tarefas já filtradas e ordenadas
+        colunas (list): COLUNAS_CSV_*
+    """
+    yield [cabecalho for cabecalho, _ in colunas]
+    for tarefa in tarefas.values_list(*CAMPOS_CSV, named=True).iterator(chunk_size=TAMANHO_LOTE):
+        yield [extrator(tarefa) for _, extrator in colunas]
+
+
+def escrever_csv_tarefas(destino, tarefas, colunas, ao_progredir=None):
+    """Escreve o CSV em um arquivo texto aberto; retorna o total de linhas de dados"""
+    writer = csv.writer(destino)
+    total = -1
+    for total, linha in enumerate(linhas_csv(tarefas, colunas)):
+        writer.writerow(linha)
+        if ao_progredir and total and total % TAMANHO_LOTE == 0:
+            ao_progredir(total)
+    return max(total, 0)
+
+
+class _Eco:
+    """Pseudo-arquivo para o csv.writer: devolve a linha formatada em vez de guardá-la"""
+
+    def write(self, valor):
+        return valor
+
+
+def excede_limite_direto(tarefas):
+    """Indica se o queryset passa de LIMITE_EXPORTACAO_DIRETA linhas (sem COUNT)"""
+    return tarefas[LIMITE_EXPORTACAO_DIRETA:LIMITE_EXPORTACAO_DIRETA + 1].exists()
+
+
+def resposta_csv_streaming(tarefas, colunas, nome_arquivo, ao_concluir=None):
+    """
+    Envia o CSV em streaming, linha a linha, sem montar o arquivo em memória.
+
+    Nenhum COUNT é feito: o total de linhas é contado durante o envio e
+    repassado a ao_concluir(total) quando a última linha sai.
+
+    Args:
+        tarefas (QuerySet): Tarefas já filtradas e ordenadas
+        colunas (list): COLUNAS_CSV_*
+        nome_arquivo (str): Nome sugerido para o download
+        ao_concluir (callable): Opcional, recebe o total de linhas de dados
+    """
+    writer = csv.writer(_Eco())
+
+    def gerar():
+        total = -1
+        for total, linha in enumerate(linhas_csv(tarefas, colunas)):
+            yield writer.writerow(linha)
+        if ao_concluir:
+            ao_concluir(max(total, 0))
+
+    response = StreamingHttpResponse(gerar(), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{get_valid_filename(nome_arquivo)}"'
+    return response
+
+
+# ============================================
+# EXPORTAÇÕES EM SEGUNDO PLANO (ExportJob)
+# ============================================
+
+RELATORIOS = {
+    'tarefas_xlsx': {'nome': 'Tarefas (Excel)', 'extensao': 'xlsx'},
+    'criticas_csv': {'nome': 'Tarefas críticas (CSV)', 'extensao': 'csv', 'colunas': COLUNAS_CSV_CRITICAS},
+    'prazo_vencido_csv': {'nome': 'Tarefas com prazo vencido (CSV)', 'extensao': 'csv',
+                          'colunas': COLUNAS_CSV_PRAZO_VENCIDO},
+    # Arquivos do robô gerados por política (tarefas/acoes_lote.py)
+    'acao_lote_csv': {'nome': 'Ação em lote por fila (CSV)', 'extensao': 'csv',
+                      'gerador': 'tarefas.acoes_lote.gerar_arquivo_exportacao',
+                      'parametros': ('tipo_acao', 'escopo', 'acima_de', 'por_servidor', 'agrupamento',
+                                     'uo_destino', 'despacho')},
+    'acao_lote_zip': {'nome': 'Ação em lote por servidor (ZIP)', 'extensao': 'zip',
+                      'gerador': 'tarefas.acoes_lote.gerar_arquivo_exportacao',
+                      'parametros': ('tipo_acao', 'escopo', 'acima_de', 'por_servidor', 'agrupamento',
+                                     'uo_destino', 'despacho')},
+}
+
+# Filtros aceitos (chave → campo de Tarefa)
+FILTROS_EXPORTACAO = {
+    'fila': 'tipo_fila',
+    'servidor': 'siape_responsavel_id',
+    'criticidade': 'nivel_criticidade_calculado',
+}
+
+VALIDADE_PADRAO_HORAS = 24
+
+# Ações do admin acima deste número de linhas viram ExportJob: mesmo em
+# streaming, uma resposta longa estoura o timeout do worker web
+LIMITE_EXPORTACAO_DIRETA = 5000
+
+
+def _diretorio_exportacoes():
+    diretorio = os.path.join(settings.MEDIA_ROOT, 'exportacoes')
+    os.makedirs(diretorio, exist_ok=True)
+    return diretorio
+
+
+def normalizar_filtros(filtros, tipo=None):
+    """
+    Mantém apenas filtros conhecidos e não vazios (protocolos ordenados) e os
+    parâmetros declarados pelo relatório, se houver
+    """
+    normalizados = {
+        chave: str(valor) for chave, valor in (filtros or {}).items()
+        if chave in FILTROS_EXPORTACAO and valor
+    }
+    if (filtros or {}).get('protocolos'):
+        normalizados['protocolos'] = sorted({str(p) for p in filtros['protocolos']})
+    for chave in RELATORIOS.get(tipo, {}).get('parametros', ()):
+        if (filtros or {}).get(chave) not in (None, ''):
+            normalizados[chave] = filtros[chave]
+    return normalizados
+
+
+def queryset_relatorio(tipo, filtros):
+    """Tarefas do relatório, na ordem de exportação"""
+    from tarefas.models import Tarefa
+
+    if filtros.get('protocolos'):
+        # Seleção explícita (ações do admin): respeita a seleção, ativa ou não
+        tarefas = Tarefa.objects.filter(numero_protocolo_tarefa__in=filtros['protocolos'])
+    else:
+        tarefas = Tarefa.objects.filter(ativa=True)
+
+    for chave, campo in FILTROS_EXPORTACAO.items():
+        if filtros.get(chave):
+            tarefas = tarefas.filter(**{campo: filtros[chave]})
+
+    if tipo == 'criticas_csv':
+        tarefas = tarefas.filter(nivel_criticidade_calculado='CRÍTICA')
+    elif tipo == 'prazo_vencido_csv':
+        tarefas = tarefas.filter(data_prazo__lt=date.today())
+
+    return tarefas.order_by('tipo_fila', '-pontuacao_criticidade', 'data_distribuicao_tarefa',
+                            'numero_protocolo_tarefa')
+
+
+def geracao_dados():
+    """
+    Identifica a versão dos dados: GeracaoDados (importações, recálculos e
+    justificativas) + data de hoje (relatórios dependem de date.today(),
+    ex.: prazo vencido).
+    """
+    from tarefas.models import GeracaoDados
+
+    return f"{GeracaoDados.atual()}:{date.today().isoformat()}"
+
+
+def chave_exportacao(tipo, filtros, geracao):
+    conteudo = json.dumps([tipo, filtros, geracao], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def solicitar_exportacao(tipo, filtros, usuario=None):
+    """
+    Retorna a exportação pronta/em andamento equivalente ou agenda uma nova.
+
+    Returns:
+        tuple: (ExportJob, reaproveitado: bool)
+    """
+    from tarefas.models import ExportJob
+    from tarefas.tasks import gerar_exportacao_async
+
+    if tipo not in RELATORIOS:
+        raise ValueError(f"Relatório desconhecido: {tipo}")
+
+    filtros = normalizar_filtros(filtros, tipo)
+    geracao = geracao_dados()
+    chave = chave_exportacao(tipo, filtros, geracao)
+
+    # Job travado (worker morto) não pode ser reaproveitado para sempre
+    ExportJob.marcar_abandonadas()
+    existentes = ExportJob.objects.filter(
+        chave=chave,
+        status__in=[ExportJob.STATUS_PENDENTE, ExportJob.STATUS_PROCESSANDO, ExportJob.STATUS_CONCLUIDO],
+    ).order_by('-id')
+    for job in existentes:
+        if job.status != ExportJob.STATUS_CONCLUIDO:
+            return job, True
+        if (job.expira_em is None or job.expira_em > timezone.now()) and job.arquivo_existe():
+            return job, True
+
+    job = ExportJob.objects.create(
+        tipo=tipo, filtros=filtros, geracao=geracao, chave=chave, solicitante=usuario
+    )
+    gerar_exportacao_async(job.id)
+    return job, False
+
+
+def gerar_exportacao(job):
+    """Gera o arquivo do ExportJob (executado pelo worker) e atualiza o progresso"""
+    from tarefas.models import ExportJob
+
+    relatorio = RELATORIOS[job.tipo]
+
+    def ao_iniciar(total):
+        job.status = ExportJob.STATUS_PROCESSANDO
+        job.total_linhas = total
+        job.save(update_fields=['status', 'total_linhas'])
+
+    def ao_progredir(linhas):
+        ExportJob.objects.filter(pk=job.pk).update(linhas_processadas=linhas)
+
+    partes = [job.tipo.rsplit('_', 1)[0]]
+    partes += [str(valor) for chave, valor in sorted(job.filtros.items()) if chave not in ('protocolos', 'despacho')]
+    partes.append(date.today().strftime('%Y%m%d'))
+    nome_arquivo = get_valid_filename(f"{'_'.join(partes)}.{relatorio['extensao']}")
+    caminho = os.path.join(_diretorio_exportacoes(), f"{job.pk}_{nome_arquivo}")
+
+    try:
+        if 'gerador' in relatorio:
+            total = import_string(relatorio['gerador'])(
+                caminho, job.filtros, usuario=job.solicitante, ao_iniciar=ao_iniciar, ao_progredir=ao_progredir
+            )
+        else:
+            tarefas = queryset_relatorio(job.tipo, job.filtros)
+            ao_iniciar(tarefas.count())
+            if relatorio['extensao'] == 'xlsx':
+                subtitulo = ' | '.join(
+                    f"{chave.capitalize()}: {valor}" for chave, valor in sorted(job.filtros.items())
+                    if chave != 'protocolos'
+                )
+                totais = escrever_planilha_tarefas(
+                    caminho, tarefas,
+                    titulo="RELATÓRIO DE TAREFAS",
+                    subtitulo=subtitulo or "Todas as tarefas ativas",
+                    incluir_fila=not job.filtros.get('fila'),
+                    ao_progredir=ao_progredir,
+                )
+                total = totais['total']
+            else:
+                with open(caminho, 'w', newline='', encoding='utf-8') as arquivo:
+                    total = escrever_csv_tarefas(arquivo, tarefas, relatorio['colunas'], ao_progredir)
+    except Exception as e:
+        if os.path.exists(caminho):
+            os.remove(caminho)
+        job.status = ExportJob.STATUS_ERRO
+        job.mensagem_erro = str(e)
+        job.data_conclusao = timezone.now()
+        job.save()
+        raise
+
+    validade = getattr(settings, 'EXPORTACAO_VALIDADE_HORAS', VALIDADE_PADRAO_HORAS)
+    job.status = ExportJob.STATUS_CONCLUIDO
+    job.caminho_arquivo = caminho
+    job.nome_arquivo = nome_arquivo
+    job.tamanho_bytes = os.path.getsize(caminho)
+    job.linhas_processadas = total
+    job.total_linhas = total
+    job.data_conclusao = timezone.now()
+    job.expira_em = job.data_conclusao + timedelta(hours=validade)
+    job.save()
+    return job
+
+
+def limpar_exportacoes_expiradas(agora=None):
+    """
+    Remove arquivos e registros de exportações expiradas (e registros com falha
+    mais antigos que a validade).
+
+    Returns:
+        tuple: (exportações removidas, bytes liberados)
+    """
+    from tarefas.models import ExportJob
+
+    agora = agora or timezone.now()
+    validade = getattr(settings, 'EXPORTACAO_VALIDADE_HORAS', VALIDADE_PADRAO_HORAS)
+
+    expiradas = ExportJob.objects.filter(expira_em__lt=agora) | ExportJob.objects.filter(
+        status=ExportJob.STATUS_ERRO, data_criacao__lt=agora - timedelta(hours=validade)
+    )
+
+    removidas = 0
+    liberados = 0
+    for job in expiradas:
+        if job.arquivo_existe():
+            liberados += os.path.getsize(job.caminho_arquivo)
+            os.remove(job.caminho_arquivo)
+        job.delete()
+        removidas += 1
+    return removidas, liberados
@@ -21,6 +21,13 @@ ORDEM_FILAS = [
     'OUTROS',
 ]
 
+# Serviços de Revisão de Ofício (alertas e filtros de servidores)
+SERVICOS_REVISAO_OFICIO = [
+    'Revisão de Ofício Identificada',
+    'Revisão de Ofício Identificada - Benefício por Incapacidade',
+    'Revisão de Ofício - Benefício por Incapacidade',
+]
+
 # Configurações detalhadas de cada fila
 FILAS_CONFIG = {
     'PGB': {
@@ -0,0 +1,105 @@
+"""
+Linha do tempo de uma tarefa a partir do HistoricoTarefa.
+
+Cada importação grava um retrato da tarefa; a maioria é idêntica ao anterior.
+A linha do tempo lê apenas as colunas relevantes pelo índice
+(tarefa_original, registro_importacao), em ordem de importação, e colapsa
+retratos consecutivos iguais numa única passada: cada entrada é um período
+em que status, exigência, responsável e prazo não mudaram.
+
+Períodos já expurgados pela retenção (ResumoMensalHistorico) aparecem antes,
+um por mês.
+
+Uso:
+    linha_do_tempo('123456789')
+"""
+from importar_csv.models import HistoricoTarefa, ResumoMensalHistorico
+
+# Campo do histórico → rótulo exibido quando muda
+CAMPOS_TRANSICAO = {
+    'status_tarefa': 'Status',
+    'descricao_cumprimento_exigencia_tarefa': 'Exigência',
+    'siape_responsavel': 'Responsável',
+    'nome_gex_responsavel': 'GEX',
+    'data_prazo': 'Prazo',
+    'data_inicio_ultima_exigencia': 'Início da exigência',
+    'data_fim_ultima_exigencia': 'Fim da exigência',
+}
+
+CAMPOS_LEITURA = [
+    *CAMPOS_TRANSICAO,
+    'nome_profissional_responsavel',
+    'tempo_em_pendencia_em_dias',
+    'registro_importacao__data_importacao',
+]
+
+
+def _periodos_resumidos(protocolo):
+    return [
+        {
+            'inicio': resumo.primeira_importacao,
+            'fim': resumo.ultima_importacao,
+            'importacoes': resumo.quantidade_importacoes,
+            'status_tarefa': resumo.status_tarefa,
+            'siape_responsavel': resumo.siape_responsavel,
+            'nome_gex_responsavel': resumo.nome_gex_responsavel,
+            'tempo_em_pendencia_em_dias': resumo.tempo_em_pendencia_max,
+            'mudancas': [],
+            'resumido': True,
+        }
+        for resumo in ResumoMensalHistorico.objects.filter(numero_protocolo_tarefa=protocolo).order_by('mes')
+    ]
+
+
+def linha_do_tempo(protocolo):
+    """
+    Transições de estado da tarefa em ordem cronológica.
+
+    Args:
+        protocolo (str): numero_protocolo_tarefa
+
+    Returns:
+        list: [{'inicio', 'fim', 'importacoes', <CAMPOS_TRANSICAO>,
+                'nome_profissional_responsavel', 'tempo_em_pendencia_em_dias',
+                'mudancas': [rótulos alterados em relação ao período anterior],
+                'resumido': bool}]
+    """
+    periodos = _periodos_resumidos(protocolo)
+
+    # OTIMIZAÇÃO: ordem pelo id da importação segue o índice composto
+    # (ids crescem com data_importacao), sem ordenar pela data no JOIN
+    retratos = (
+        HistoricoTarefa.objects
+        .filter(tarefa_original_id=protocolo)
+        .order_by('registro_importacao_id')
+        .values_list(*CAMPOS_LEITURA)
+    )
+
+    anterior = None
+    atual = None
+    for linha in retratos.iterator(chunk_size=500):
+        chave = linha[:len(CAMPOS_TRANSICAO)]
+        data = linha[-1]
+
+        if chave == anterior:
+            atual['fim'] = data
+            atual['importacoes'] += 1
+            atual['tempo_em_pendencia_em_dias'] = linha[-2]
+            continue
+
+        atual = dict(zip(CAMPOS_LEITURA[:-1], linha[:-1]))
+        atual.update({
+            'inicio': data,
+            'fim': data,
+            'importacoes': 1,
+            'mudancas': [
+                rotulo
+                for i, rotulo in enumerate(CAMPOS_TRANSICAO.values())
+                if anterior is not None and anterior[i] != chave[i]
+            ],
+            'resumido': False,
+        })
+        periodos.append(atual)
+        anterior = chave
+
+    return periodos
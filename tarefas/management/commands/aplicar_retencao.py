@@ -0,0 +1,79 @@
+"""
+Comando para aplicar a política de retenção do histórico de importações.
+
+Resume (mensalmente) e remove o HistoricoTarefa de importações mais antigas
+que o período de detalhe da política ativa, e remove CSVs antigos do disco.
+Ver importar_csv/retencao.py.
+
+Uso:
+    python manage.py aplicar_retencao               # Agenda no worker
+    python manage.py aplicar_retencao --sincrono    # Executa agora
+    python manage.py aplicar_retencao --simular     # Só conta o que seria removido
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from importar_csv.models import ExecucaoRetencao, PoliticaRetencao
+from importar_csv.retencao import aplicar_retencao, registros_elegiveis
+
+
+def formatar_bytes(valor):
+    for unidade in ('B', 'KB', 'MB', 'GB'):
+        if valor < 1024:
+            return f"{valor:.1f} {unidade}"
+        valor /= 1024
+    return f"{valor:.1f} TB"
+
+
+class Command(BaseCommand):
+    help = 'Aplica a política de retenção ao HistoricoTarefa e aos CSVs importados'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--simular',
+            action='store_true',
+            help='Não remove nada; apenas contabiliza o que seria removido (executa agora)'
+        )
+        parser.add_argument(
+            '--sincrono',
+            action='store_true',
+            help='Executa no processo atual em vez de agendar no worker'
+        )
+
+    def handle(self, *args, **options):
+        politica = PoliticaRetencao.obter_ativa()
+        if politica is None:
+            raise CommandError(
+                "Nenhuma política de retenção ativa. Cadastre uma no Django Admin "
+                "(Importar CSV > Políticas de Retenção)."
+            )
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write(f"POLÍTICA: {politica}")
+        self.stdout.write(f"Importações elegíveis: {registros_elegiveis(politica).count()}")
+        self.stdout.write("=" * 80)
+
+        execucao = ExecucaoRetencao.objects.create(politica=politica, simulacao=options['simular'])
+
+        if not (options['sincrono'] or options['simular']):
+            from importar_csv.tasks import executar_retencao_async
+            executar_retencao_async(execucao.id)
+            self.stdout.write(self.style.SUCCESS(f"Execução #{execucao.id} agendada no worker\n"))
+            return
+
+        execucao = aplicar_retencao(execucao)
+
+        titulo = "SIMULAÇÃO" if execucao.simulacao else "RESULTADO"
+        self.stdout.write(f"\n{titulo} (execução #{execucao.id}): {execucao.get_status_display()}")
+        self.stdout.write(f"  Importações expurgadas:   {execucao.importacoes_expurgadas:,}")
+        self.stdout.write(f"  Linhas removidas:         {execucao.linhas_removidas:,}")
+        self.stdout.write(f"  Linhas de resumo mensal:  {execucao.linhas_resumo:,}")
+        self.stdout.write(f"  Alterações do feed:       {execucao.alteracoes_removidas:,}")
+        self.stdout.write(f"  Partições removidas:      {execucao.particoes_removidas:,}")
+        self.stdout.write(f"  Espaço no banco (est.):   {formatar_bytes(execucao.bytes_banco_estimados)}")
+        self.stdout.write(
+            f"  CSVs removidos:           {execucao.arquivos_removidos:,} "
+            f"({formatar_bytes(execucao.bytes_arquivos)})"
+        )
+        if execucao.mensagem_erro:
+            raise CommandError(execucao.mensagem_erro)
+        self.stdout.write("=" * 80 + "\n")
@@ -0,0 +1,30 @@
+"""
+Comando para recalcular as tabelas de dimensão (opções de filtro).
+
+As dimensões são recalculadas automaticamente ao final de cada importação;
+use este comando na primeira implantação ou após alterações manuais na base.
+
+Uso:
+    python manage.py atualizar_dimensoes
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tarefas.dimensoes import atualizar_dimensoes
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as dimensões de status, serviço, GEX e unidade das tarefas ativas'
+
+    def handle(self, *args, **options):
+        inicio = time.time()
+        resultado = atualizar_dimensoes()
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write("DIMENSÕES DE TAREFAS")
+        self.stdout.write("=" * 80)
+        for tipo, quantidade in resultado.items():
+            self.stdout.write(f"{tipo:<20} {quantidade:>7,} valores")
+        self.stdout.write("=" * 80)
+        self.stdout.write(self.style.SUCCESS(f"Concluído em {time.time() - inicio:.2f}s\n"))
@@ -0,0 +1,45 @@
+"""
+Comando para atualizar (ou reconstruir) o índice de busca por substring.
+
+O índice é atualizado automaticamente ao final de cada importação; use este
+comando na primeira implantação ou se o índice ficar inconsistente.
+
+Uso:
+    python manage.py atualizar_indice_busca
+    python manage.py atualizar_indice_busca --reconstruir
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tarefas.busca import atualizar_indice_busca, reconstruir_indice_busca
+
+
+class Command(BaseCommand):
+    help = 'Atualiza o índice de trigramas usado nas buscas por serviço, servidor, GEX e responsável'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reconstruir',
+            action='store_true',
+            help='Apaga o índice e reconstrói do zero'
+        )
+
+    def handle(self, *args, **options):
+        inicio = time.time()
+
+        if options['reconstruir']:
+            resultado = reconstruir_indice_busca()
+        else:
+            resultado = atualizar_indice_busca()
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write("ÍNDICE DE BUSCA")
+        self.stdout.write("=" * 80)
+        for campo, stats in resultado.items():
+            self.stdout.write(
+                f"{campo:<12} total: {stats['total']:>7,}  "
+                f"inseridas: {stats['inseridas']:>7,}  removidas: {stats['removidas']:>7,}"
+            )
+        self.stdout.write("=" * 80)
+        self.stdout.write(self.style.SUCCESS(f"Concluído em {time.time() - inicio:.2f}s\n"))
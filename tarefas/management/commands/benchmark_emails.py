@@ -0,0 +1,143 @@
+"""
+Compara o envio sequencial (enviar_email, um sendMail por mensagem) com o
+envio em lote das campanhas (enviar_em_lote, $batch de 20 + pool de threads)
+contra o ServidorGraphLocal, que simula a latência do Graph.
+
+Antes mede a vazão da renderização (emails/s) com o template compilado a
+cada email e com o cache de templates compilados, incluindo a tabela de
+tarefas e o CSV anexo.
+
+Nada sai da máquina: o token é fixo e os registros de HistoricoEmail criados
+são desfeitos (rollback) no final.
+
+Uso:
+    python manage.py benchmark_emails
+    python manage.py benchmark_emails --mensagens 500 --latencia 0.2 --threads 8
+    python manage.py benchmark_emails --tarefas 300
+"""
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.template import Context, Template
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from tarefas.models import HistoricoEmail, TemplateEmail
+from tarefas.services import email_service
+from tarefas.services.email_service import CAMPOS_LISTA_EMAIL, EmailService, obter_templates_compilados
+from tarefas.services.graph_local import ServidorGraphLocal
+
+Linha = namedtuple('Linha', CAMPOS_LISTA_EMAIL)
+
+ASSUNTO = '{{ nome_servidor }}: {{ tarefas_criticas }} tarefa(s) crítica(s)'
+CORPO = (
+    '<p>Prezado(a) {{ nome_servidor }} ({{ siape }}),</p>'
+    '<p>Você tem {{ total_tarefas }} tarefas, {{ tarefas_criticas }} críticas, em {{ data_hoje }}.</p>'
+    '{{ lista_tarefas }}'
+)
+
+
+class Command(BaseCommand):
+    help = 'Mede a vazão do envio de emails sequencial x em lote ($batch) contra um Graph local'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mensagens', type=int, default=200, help='Emails em cada modo (padrão: 200)')
+        parser.add_argument('--latencia', type=float, default=0.1,
+                            help='Latência simulada por requisição, em segundos (padrão: 0.1)')
+        parser.add_argument('--threads', type=int, default=4, help='Threads do envio em lote (padrão: 4)')
+        parser.add_argument('--por-segundo', type=float, default=0,
+                            help='Limite de requisições $batch por segundo (padrão: 0 = sem limite)')
+        parser.add_argument('--tarefas', type=int, default=60,
+                            help='Tarefas por servidor na renderização (padrão: 60; acima de 20 gera anexo)')
+
+    def renderizar(self, total, tarefas):
+        """Vazão da renderização: template compilado a cada email x cache de templates compilados"""
+        servico = EmailService()
+        linhas = [
+            Linha(f'{i:09d}', 'Benefício Assistencial', date.today() + timedelta(days=i % 30), i % 90,
+                  'CRÍTICA' if i % 3 == 0 else 'REGULAR')
+            for i in range(tarefas)
+        ]
+        template_email = TemplateEmail(pk=0, nome='benchmark', assunto=ASSUNTO, corpo_html=CORPO,
+                                       data_alteracao=timezone.now())
+        servidor = get_user_model()(siape='BENCH01', nome_completo='Benchmark', email='benchmark@localhost')
+
+        def renderizar_todos(obter_templates):
+            inicio = time.perf_counter()
+            for _ in range(total):
+                template_assunto, template_corpo = obter_templates()
+                lista_tarefas, anexo = servico.tarefas_para_email(linhas, servidor.siape, tarefas)
+                contexto = Context({**EmailService.contexto_base(servidor), 'total_tarefas': tarefas,
+                                    'tarefas_criticas': tarefas // 3, 'lista_tarefas': lista_tarefas})
+                template_assunto.render(contexto)
+                template_corpo.render(contexto)
+            return time.perf_counter() - inicio
+
+        sem_cache = renderizar_todos(lambda: (Template(ASSUNTO), Template(CORPO)))
+        com_cache = renderizar_todos(lambda: obter_templates_compilados(template_email))
+        inicio = time.perf_counter()
+        for _ in range(total):
+            servico.tarefas_para_email(linhas, servidor.siape, tarefas)
+        so_lista = time.perf_counter() - inicio
+
+        self.stdout.write(f"Renderização: {total} emails, {tarefas} tarefas por servidor")
+        self.stdout.write(f"  compilando a cada email: {sem_cache:7.2f} s  {total / sem_cache:8.1f} emails/s")
+        self.stdout.write(f"  templates em cache:      {com_cache:7.2f} s  {total / com_cache:8.1f} emails/s")
+        self.stdout.write(f"  (tabela + CSV anexo:     {so_lista:7.2f} s  {total / so_lista:8.1f} emails/s)")
+
+    def handle(self, *args, **options):
+        total = options['mensagens']
+        email_service.redefinir_clientes()
+        self.renderizar(total, options['tarefas'])
+
+        with ServidorGraphLocal(latencia=options['latencia']) as graph, override_settings(
+            GRAPH_API_URL=graph.url,
+            GRAPH_REQUISICOES_POR_SEGUNDO=options['por_segundo'],
+            SENDER_EMAIL='benchmark@localhost',
+        ):
+            email_service.redefinir_clientes()
+            servico = EmailService()
+            servico.get_access_token = lambda: 'benchmark'
+            try:
+                with transaction.atomic():
+                    servidor = get_user_model().objects.create_user(
+                        siape='BENCH01', nome_completo='Benchmark', email='benchmark@localhost'
+                    )
+
+                    inicio = time.perf_counter()
+                    for i in range(total):
+                        servico.enviar_email(f'dest{i}@localhost', 'Benchmark', '<p>Corpo</p>', servidor, None)
+                    sequencial = time.perf_counter() - inicio
+                    requisicoes_sequencial = graph.requisicoes
+
+                    historicos = HistoricoEmail.objects.bulk_create([
+                        HistoricoEmail(servidor=servidor, email_destinatario=f'dest{i}@localhost',
+                                       assunto='Benchmark', corpo_email='<p>Corpo</p>')
+                        for i in range(total)
+                    ])
+                    inicio = time.perf_counter()
+                    resultado = servico.enviar_em_lote(historicos, max_threads=options['threads'])
+                    lote = time.perf_counter() - inicio
+                    requisicoes_lote = graph.requisicoes - requisicoes_sequencial
+
+                    transaction.set_rollback(True)
+            finally:
+                email_service.redefinir_clientes()
+
+        self.stdout.write(f"{total} mensagens, latência simulada de {options['latencia']:.3f} s")
+        self.stdout.write(
+            f"  sequencial: {sequencial:7.2f} s  {total / sequencial:8.1f} msg/s  "
+            f"{requisicoes_sequencial} requisições"
+        )
+        self.stdout.write(
+            f"  em lote:    {lote:7.2f} s  {total / lote:8.1f} msg/s  "
+            f"{requisicoes_lote} requisições ({options['threads']} threads)"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Em lote: {sequencial / lote:.1f}x mais rápido ({resultado['enviados']} enviados, "
+            f"{resultado['erros']} erros)"
+        ))
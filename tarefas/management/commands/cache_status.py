@@ -0,0 +1,85 @@
+"""
+Comando para inspecionar o cache compartilhado.
+
+Mostra o backend configurado, a quantidade de chaves armazenadas e a taxa
+de acerto de cada namespace registrado em tarefas/cache.py.
+
+Uso:
+    python manage.py cache_status
+    python manage.py cache_status --zerar                  # Zera contadores de acerto
+    python manage.py cache_status --invalidar processamento  # Invalida um namespace
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from tarefas.cache import (
+    NAMESPACES,
+    contar_chaves,
+    descrever_backend,
+    estatisticas_namespace,
+    invalidar_namespace,
+    zerar_estatisticas,
+)
+
+
+class Command(BaseCommand):
+    help = 'Exibe backend, quantidade de chaves e taxa de acerto do cache compartilhado'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--zerar',
+            action='store_true',
+            help='Zera os contadores de acerto/erro de todos os namespaces'
+        )
+        parser.add_argument(
+            '--invalidar',
+            metavar='NAMESPACE',
+            help='Invalida todas as chaves do namespace informado'
+        )
+
+    def handle(self, *args, **options):
+        if options['invalidar']:
+            namespace = options['invalidar']
+            if namespace not in NAMESPACES:
+                raise CommandError(
+                    f"Namespace desconhecido: {namespace}. "
+                    f"Disponíveis: {', '.join(NAMESPACES)}"
+                )
+            nova_versao = invalidar_namespace(namespace)
+            self.stdout.write(self.style.SUCCESS(
+                f"Namespace '{namespace}' invalidado (nova versão: {nova_versao})"
+            ))
+
+        if options['zerar']:
+            for namespace in NAMESPACES:
+                zerar_estatisticas(namespace)
+            self.stdout.write(self.style.SUCCESS("Contadores de acerto zerados"))
+
+        backend = descrever_backend()
+        total_chaves = contar_chaves()
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write("STATUS DO CACHE COMPARTILHADO")
+        self.stdout.write("=" * 80)
+        self.stdout.write(f"Backend:     {backend['backend']}")
+        self.stdout.write(f"Localização: {backend['location'] or '-'}")
+        self.stdout.write(
+            f"Chaves:      {total_chaves:,}" if total_chaves is not None
+            else "Chaves:      (não disponível para este backend)"
+        )
+
+        self.stdout.write("\n" + "-" * 80)
+        self.stdout.write(f"{'Namespace':<20} {'Versão':>14} {'Acertos':>10} {'Erros':>10} {'Taxa':>8}  Descrição")
+        self.stdout.write("-" * 80)
+
+        for namespace, descricao in NAMESPACES.items():
+            stats = estatisticas_namespace(namespace)
+            versao = '-' if stats['versao'] is None else stats['versao']
+            self.stdout.write(
+                f"{namespace:<20} {versao:>14} {stats['hits']:>10,} "
+                f"{stats['misses']:>10,} {stats['taxa_acerto']:>7}%  {descricao}"
+            )
+        if not getattr(settings, 'CACHE_ESTATISTICAS', False):
+            self.stdout.write("(Acertos/erros desligados: defina CACHE_ESTATISTICAS=True para contar)")
+
+        self.stdout.write("=" * 80 + "\n")
@@ -0,0 +1,22 @@
+"""
+Comando para remover exportações expiradas (arquivos e registros).
+
+A limpeza também é feita pelo worker antes de cada nova exportação; use
+este comando em um agendamento (cron) se houver poucas exportações.
+
+Uso:
+    python manage.py limpar_exportacoes
+"""
+from django.core.management.base import BaseCommand
+
+from tarefas.exportacao import limpar_exportacoes_expiradas
+
+
+class Command(BaseCommand):
+    help = 'Remove arquivos e registros de exportações expiradas'
+
+    def handle(self, *args, **options):
+        removidas, liberados = limpar_exportacoes_expiradas()
+        self.stdout.write(self.style.SUCCESS(
+            f"{removidas} exportação(ões) removida(s), {liberados / 1024 / 1024:.1f} MB liberados"
+        ))
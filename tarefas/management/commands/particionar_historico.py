@@ -0,0 +1,116 @@
+"""
+Comando para particionar o HistoricoTarefa por importação (somente MySQL).
+
+Com a tabela particionada por RANGE(registro_importacao_id), a retenção
+descarta partições inteiras (DROP PARTITION) em vez de apagar linha a linha,
+devolvendo o espaço ao disco imediatamente.
+
+Restrições do MySQL para tabelas particionadas:
+    - a chave de partição deve fazer parte da PRIMARY KEY
+      → a PK passa a ser (id, registro_importacao_id)
+    - tabelas particionadas não suportam FOREIGN KEY
+      → as FKs de banco do HistoricoTarefa são removidas (o Django continua
+        tratando as relações normalmente; a integridade passa a ser da aplicação)
+
+Por padrão apenas IMPRIME o SQL. Revise, faça backup e use --executar.
+
+Uso:
+    python manage.py particionar_historico                    # Mostra o SQL
+    python manage.py particionar_historico --intervalo 30     # 30 importações por partição
+    python manage.py particionar_historico --executar
+    python manage.py particionar_historico --estender --executar   # Cria partições futuras
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Max
+
+from importar_csv.models import HistoricoTarefa, RegistroImportacao
+from importar_csv.retencao import particoes_historico
+
+
+class Command(BaseCommand):
+    help = 'Gera (e opcionalmente executa) o particionamento RANGE do HistoricoTarefa por importação'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--intervalo',
+            type=int,
+            default=30,
+            help='Quantidade de importações (IDs) por partição (padrão: 30)'
+        )
+        parser.add_argument(
+            '--estender',
+            action='store_true',
+            help='Tabela já particionada: cria partições até o último ID + intervalo'
+        )
+        parser.add_argument(
+            '--executar',
+            action='store_true',
+            help='Executa o SQL (sem esta opção apenas imprime)'
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'mysql':
+            raise CommandError("Particionamento disponível apenas no MySQL")
+
+        intervalo = options['intervalo']
+        if intervalo < 1:
+            raise CommandError("--intervalo deve ser maior que zero")
+
+        tabela = HistoricoTarefa._meta.db_table
+        maior_id = RegistroImportacao.objects.aggregate(maior=Max('id'))['maior'] or 0
+        # Limites até uma partição além do último ID (próximas importações)
+        limite_final = (maior_id // intervalo + 2) * intervalo
+
+        particoes = particoes_historico()
+
+        if options['estender']:
+            if not particoes:
+                raise CommandError("A tabela ainda não é particionada (execute sem --estender)")
+            ultimo_limite = max((p['limite'] for p in particoes if p['limite'] is not None), default=0)
+            novos = list(range(ultimo_limite + intervalo, limite_final + 1, intervalo))
+            if not novos:
+                self.stdout.write(self.style.SUCCESS("Partições já cobrem as próximas importações"))
+                return
+            definicoes = ", ".join(f"PARTITION p{limite} VALUES LESS THAN ({limite})" for limite in novos)
+            comandos = [
+                f"ALTER TABLE `{tabela}` REORGANIZE PARTITION pmax INTO "
+                f"({definicoes}, PARTITION pmax VALUES LESS THAN MAXVALUE)"
+            ]
+        else:
+            if particoes:
+                raise CommandError("A tabela já é particionada (use --estender)")
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+                    "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                    [tabela]
+                )
+                fks = [linha[0] for linha in cursor.fetchall()]
+
+            limites = range(intervalo, limite_final + 1, intervalo)
+            definicoes = ", ".join(f"PARTITION p{limite} VALUES LESS THAN ({limite})" for limite in limites)
+            comandos = [f"ALTER TABLE `{tabela}` DROP FOREIGN KEY `{fk}`" for fk in fks]
+            comandos += [
+                f"ALTER TABLE `{tabela}` DROP PRIMARY KEY, ADD PRIMARY KEY (`id`, `registro_importacao_id`)",
+                f"ALTER TABLE `{tabela}` PARTITION BY RANGE (`registro_importacao_id`) "
+                f"({definicoes}, PARTITION pmax VALUES LESS THAN MAXVALUE)",
+            ]
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write("PARTICIONAMENTO DO HISTÓRICO DE TAREFAS")
+        self.stdout.write("=" * 80)
+        for comando in comandos:
+            self.stdout.write(comando + ";")
+        self.stdout.write("=" * 80)
+
+        if not options['executar']:
+            self.stdout.write(self.style.WARNING("Nada executado. Revise o SQL e use --executar.\n"))
+            return
+
+        with connection.cursor() as cursor:
+            for comando in comandos:
+                self.stdout.write(f"Executando: {comando[:100]}...")
+                cursor.execute(comando)
+
+        self.stdout.write(self.style.SUCCESS(f"Concluído. Partições: {len(particoes_historico())}\n"))
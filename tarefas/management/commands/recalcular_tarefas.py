@@ -1,5 +1,5 @@
 from django.core.management.base import BaseCommand
-from tarefas.models import Tarefa
+from tarefas.models import GeracaoDados, Tarefa
 from tarefas.analisador import obter_analisador
 from django.utils import timezone
 
@@ -32,6 +32,7 @@ class Command(BaseCommand):
             if contador % 1000 == 0:
                 self.stdout.write(f"  [OK] {contador}/{total} processadas...")
 
+        GeracaoDados.incrementar()
         self.stdout.write(f"\n[SUCESSO] {total} tarefas recalculadas com sucesso!\n")
 
         stats = Tarefa.estatisticas_criticidade()
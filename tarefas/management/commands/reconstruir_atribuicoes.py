@@ -0,0 +1,32 @@
+"""
+Comando para reconstruir o tempo com o responsável atual a partir do histórico.
+
+As atribuições são mantidas automaticamente pela importação; use este comando
+uma vez na implantação (ou após restaurar o HistoricoTarefa) para preencher
+AtribuicaoTarefa e Tarefa.data_atribuicao_atual das tarefas existentes.
+
+Uso:
+    python manage.py reconstruir_atribuicoes
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tarefas.atribuicoes import reconstruir_atribuicoes
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói AtribuicaoTarefa e o tempo com o responsável atual a partir do HistoricoTarefa'
+
+    def handle(self, *args, **options):
+        inicio = time.time()
+        self.stdout.write("Percorrendo o HistoricoTarefa em lotes de tarefas...")
+        resultado = reconstruir_atribuicoes(stdout=self.stdout)
+
+        self.stdout.write("\n" + "=" * 80)
+        self.stdout.write("ATRIBUIÇÕES RECONSTRUÍDAS")
+        self.stdout.write("=" * 80)
+        self.stdout.write(f"{'Tarefas':<20} {resultado['tarefas']:>9,}")
+        self.stdout.write(f"{'Atribuições':<20} {resultado['atribuicoes']:>9,}")
+        self.stdout.write("=" * 80)
+        self.stdout.write(self.style.SUCCESS(f"Concluído em {time.time() - inicio:.2f}s\n"))
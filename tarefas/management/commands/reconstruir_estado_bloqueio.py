@@ -0,0 +1,33 @@
+"""
+Comando para reconstruir o EstadoBloqueio a partir das ações concluídas.
+
+O estado é mantido automaticamente quando o robô conclui uma ação (e a
+migração 0029 preenche o estado inicial); use este comando após corrigir
+BloqueioServidor direto no banco ou restaurar um backup.
+
+Uso:
+    python manage.py reconstruir_estado_bloqueio
+    python manage.py reconstruir_estado_bloqueio --siape 1234567
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from tarefas.models import EstadoBloqueio
+
+
+class Command(BaseCommand):
+    help = 'Reconstrói o EstadoBloqueio (servidor x fila) a partir das ações de bloqueio concluídas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--siape', help='Reconstrói só os estados deste servidor')
+
+    def handle(self, *args, **options):
+        inicio = time.time()
+        filtros = {'servidor__siape': options['siape']} if options['siape'] else {}
+        total = EstadoBloqueio.recalcular(**filtros)
+        bloqueados = EstadoBloqueio.objects.filter(bloqueado=True, **filtros).count()
+
+        self.stdout.write(f"{'Estados':<20} {total:>9,}")
+        self.stdout.write(f"{'Bloqueados':<20} {bloqueados:>9,}")
+        self.stdout.write(self.style.SUCCESS(f"Concluído em {time.time() - inicio:.2f}s"))
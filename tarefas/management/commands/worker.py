@@ -2,6 +2,9 @@
 Comando customizado para executar o worker de tarefas em segundo plano
 com mensagens informativas e status visível.
 
+A cada ciclo também envia os emails vencidos da caixa de saída
+(tarefas/caixa_saida.py) antes de processar as tarefas agendadas.
+
 Uso:
     python manage.py worker
 """
@@ -51,6 +54,7 @@ class Command(BaseCommand):
 
         # Importar o processo de tasks
         from django.core.management import call_command
+        from tarefas.caixa_saida import processar_pendentes
 
         # Contador de verificações
         check_count = 0
@@ -83,6 +87,20 @@ class Command(BaseCommand):
 
                     last_task_count = pending_tasks
 
+                # Caixa de saída de emails (tarefas/caixa_saida.py)
+                try:
+                    emails = processar_pendentes()
+                    if emails['reservados']:
+                        self.stdout.write(
+                            f"[{timezone.now().strftime('%H:%M:%S')}] "
+                            f"{self.style.SUCCESS('[EMAILS]')}: "
+                            f"{emails['enviados']} enviados | "
+                            f"{emails['erros']} com erro | "
+                            f"{emails['reagendados']} reagendados"
+                        )
+                except Exception as e:
+                    self.stdout.write(self.style.ERROR(f"[ERRO] Caixa de saida de emails: {e}"))
+
                 # Processar tarefas
                 call_command('process_tasks', '--duration', str(sleep_time))
 
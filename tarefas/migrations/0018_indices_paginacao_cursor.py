@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0017_adicionar_historico_acao_lote'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'pontuacao_criticidade', 'tempo_em_pendencia_em_dias', 'numero_protocolo_tarefa'], name='tarefa_keyset_lista_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'tipo_fila', 'pontuacao_criticidade', 'tempo_em_pendencia_em_dias', 'numero_protocolo_tarefa'], name='tarefa_keyset_fila_idx'),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:11
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0018_indices_paginacao_cursor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EntradaBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('campo', models.CharField(choices=[('servico', 'Serviço'), ('servidor', 'Servidor (nome)'), ('gex', 'GEX')], max_length=20, verbose_name='Campo')),
+                ('chave', models.CharField(help_text='Valor usado no filtro da tabela principal (nome do serviço, SIAPE ou GEX)', max_length=255, verbose_name='Chave')),
+                ('texto_normalizado', models.CharField(max_length=255, verbose_name='Texto Normalizado')),
+            ],
+            options={
+                'verbose_name': 'Entrada do Índice de Busca',
+                'verbose_name_plural': 'Entradas do Índice de Busca',
+            },
+        ),
+        migrations.CreateModel(
+            name='TrigramaBusca',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigrama', models.CharField(max_length=3, verbose_name='Trigrama')),
+            ],
+            options={
+                'verbose_name': 'Trigrama de Busca',
+                'verbose_name_plural': 'Trigramas de Busca',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'nome_servico'], name='tarefa_ativa_servico_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='entradabusca',
+            constraint=models.UniqueConstraint(fields=('campo', 'chave'), name='entrada_busca_campo_chave_uniq'),
+        ),
+        migrations.AddField(
+            model_name='trigramabusca',
+            name='entrada',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='trigramas', to='tarefas.entradabusca', verbose_name='Entrada'),
+        ),
+        migrations.AddIndex(
+            model_name='trigramabusca',
+            index=models.Index(fields=['trigrama', 'entrada'], name='trigrama_busca_idx'),
+        ),
+    ]
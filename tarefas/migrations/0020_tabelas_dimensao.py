@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0019_indice_busca_trigramas'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DimensaoServicoServidor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('siape', models.CharField(max_length=15, verbose_name='SIAPE')),
+                ('tipo_fila', models.CharField(max_length=50, verbose_name='Fila')),
+                ('nome_servico', models.CharField(max_length=255, verbose_name='Serviço')),
+                ('total_ativas', models.IntegerField(default=0, verbose_name='Tarefas Ativas')),
+            ],
+            options={
+                'verbose_name': 'Serviço por Servidor e Fila',
+                'verbose_name_plural': 'Serviços por Servidor e Fila',
+                'indexes': [models.Index(fields=['siape', 'tipo_fila', 'nome_servico'], name='dim_servico_servidor_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DimensaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(choices=[('status', 'Status'), ('servico', 'Serviço'), ('gex', 'GEX'), ('unidade', 'Unidade')], max_length=20, verbose_name='Tipo')),
+                ('valor', models.CharField(max_length=255, verbose_name='Valor')),
+                ('total_ativas', models.IntegerField(default=0, verbose_name='Tarefas Ativas')),
+                ('data_atualizacao', models.DateTimeField(auto_now=True, verbose_name='Atualizado em')),
+            ],
+            options={
+                'verbose_name': 'Dimensão de Tarefa',
+                'verbose_name_plural': 'Dimensões de Tarefas',
+                'ordering': ['tipo', 'valor'],
+                'constraints': [models.UniqueConstraint(fields=('tipo', 'valor'), name='dimensao_tarefa_tipo_valor_uniq')],
+            },
+        ),
+    ]
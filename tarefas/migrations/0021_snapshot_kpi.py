@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('importar_csv', '0005_registroimportacao_caminho_arquivo_and_more'),
+        ('tarefas', '0020_tabelas_dimensao'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SnapshotKPI',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data_referencia', models.DateTimeField(db_index=True, help_text='Fim do processamento da importação', verbose_name='Data de Referência')),
+                ('tipo_fila', models.CharField(max_length=50, verbose_name='Fila')),
+                ('nivel_criticidade', models.CharField(max_length=15, verbose_name='Nível de Criticidade')),
+                ('regra_aplicada', models.CharField(max_length=50, verbose_name='Regra Aplicada')),
+                ('faixa_status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('CUMPRIMENTO', 'Cumprimento de exigência'), ('OUTROS', 'Outros')], max_length=20, verbose_name='Faixa de Status')),
+                ('gex', models.CharField(blank=True, max_length=255, verbose_name='GEX')),
+                ('total', models.IntegerField(verbose_name='Total de Tarefas')),
+                ('registro_importacao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='snapshots_kpi', to='importar_csv.registroimportacao', verbose_name='Importação')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de KPI',
+                'verbose_name_plural': 'Snapshots de KPIs',
+                'ordering': ['-data_referencia'],
+                'indexes': [models.Index(fields=['data_referencia', 'tipo_fila'], name='snapshot_kpi_data_fila_idx'), models.Index(fields=['registro_importacao'], name='snapshot_kpi_registro_idx')],
+            },
+        ),
+    ]
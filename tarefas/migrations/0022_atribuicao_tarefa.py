@@ -0,0 +1,52 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:25
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0021_snapshot_kpi'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AtribuicaoTarefa',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('siape', models.CharField(blank=True, max_length=20, null=True, verbose_name='SIAPE')),
+                ('inicio', models.DateTimeField(verbose_name='Início')),
+                ('fim', models.DateTimeField(blank=True, null=True, verbose_name='Fim')),
+            ],
+            options={
+                'verbose_name': 'Atribuição de Tarefa',
+                'verbose_name_plural': 'Atribuições de Tarefas',
+                'ordering': ['tarefa', 'inicio'],
+            },
+        ),
+        migrations.AddField(
+            model_name='tarefa',
+            name='data_atribuicao_atual',
+            field=models.DateTimeField(blank=True, help_text='Importação em que o SIAPE responsável passou a ser o atual', null=True, verbose_name='Com o Responsável Atual desde'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'tipo_fila', 'data_atribuicao_atual', 'numero_protocolo_tarefa'], name='tarefa_fila_atribuicao_idx'),
+        ),
+        migrations.AddField(
+            model_name='atribuicaotarefa',
+            name='tarefa',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='atribuicoes', to='tarefas.tarefa', verbose_name='Tarefa'),
+        ),
+        migrations.AddIndex(
+            model_name='atribuicaotarefa',
+            index=models.Index(fields=['tarefa', 'fim'], name='atribuicao_tarefa_fim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='atribuicaotarefa',
+            index=models.Index(fields=['siape', 'fim'], name='atribuicao_siape_fim_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0022_atribuicao_tarefa'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo', models.CharField(max_length=50, verbose_name='Relatório')),
+                ('filtros', models.JSONField(blank=True, default=dict, verbose_name='Filtros')),
+                ('geracao', models.CharField(help_text='Última importação concluída + data (arquivo válido enquanto não mudar)', max_length=50, verbose_name='Geração dos Dados')),
+                ('chave', models.CharField(db_index=True, max_length=64, verbose_name='Chave')),
+                ('status', models.CharField(choices=[('PENDING', 'Pendente'), ('PROCESSING', 'Processando'), ('COMPLETED', 'Concluída'), ('FAILED', 'Falhou')], db_index=True, default='PENDING', max_length=20, verbose_name='Status')),
+                ('total_linhas', models.PositiveIntegerField(default=0, verbose_name='Total de Linhas')),
+                ('linhas_processadas', models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')),
+                ('caminho_arquivo', models.CharField(blank=True, max_length=500, verbose_name='Arquivo')),
+                ('nome_arquivo', models.CharField(blank=True, max_length=255, verbose_name='Nome para Download')),
+                ('tamanho_bytes', models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')),
+                ('downloads', models.PositiveIntegerField(default=0, verbose_name='Downloads')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Solicitada em')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+                ('expira_em', models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Expira em')),
+                ('mensagem_erro', models.TextField(blank=True, verbose_name='Mensagem de Erro')),
+                ('solicitante', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='exportacoes', to=settings.AUTH_USER_MODEL, verbose_name='Solicitante')),
+            ],
+            options={
+                'verbose_name': 'Exportação',
+                'verbose_name_plural': '📥 Exportações',
+                'ordering': ['-data_criacao'],
+                'indexes': [models.Index(fields=['chave', 'status'], name='exportjob_chave_status_idx')],
+            },
+        ),
+    ]
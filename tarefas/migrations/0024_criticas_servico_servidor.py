@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0023_exportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dimensaoservicoservidor',
+            name='total_criticas',
+            field=models.IntegerField(default=0, verbose_name='Tarefas Críticas'),
+        ),
+    ]
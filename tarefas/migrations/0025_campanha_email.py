@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0024_criticas_servico_servidor'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CampanhaEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filtros', models.JSONField(blank=True, default=dict, verbose_name='Filtros de Destinatários')),
+                ('status', models.CharField(choices=[('PENDENTE', 'Pendente'), ('PROCESSANDO', 'Enviando'), ('CONCLUIDA', 'Concluída'), ('ERRO', 'Falhou')], db_index=True, default='PENDENTE', max_length=20, verbose_name='Status')),
+                ('total_destinatarios', models.PositiveIntegerField(default=0, verbose_name='Destinatários')),
+                ('enviados', models.PositiveIntegerField(default=0, verbose_name='Enviados')),
+                ('erros', models.PositiveIntegerField(default=0, verbose_name='Erros')),
+                ('data_criacao', models.DateTimeField(auto_now_add=True, verbose_name='Criada em')),
+                ('data_conclusao', models.DateTimeField(blank=True, null=True, verbose_name='Concluída em')),
+                ('duracao_segundos', models.FloatField(blank=True, null=True, verbose_name='Duração do Envio (s)')),
+                ('mensagem_erro', models.TextField(blank=True, verbose_name='Mensagem de Erro')),
+                ('criado_por', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='campanhas_email', to=settings.AUTH_USER_MODEL, verbose_name='Criada Por')),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='campanhas', to='tarefas.templateemail', verbose_name='Template')),
+            ],
+            options={
+                'verbose_name': 'Campanha de Email',
+                'verbose_name_plural': '📨 Campanhas de Email',
+                'ordering': ['-data_criacao'],
+            },
+        ),
+        migrations.AddField(
+            model_name='historicoemail',
+            name='campanha',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='tarefas.campanhaemail', verbose_name='Campanha'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0025_campanha_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicoemail',
+            name='proxima_tentativa',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Próxima Tentativa'),
+        ),
+        migrations.AddField(
+            model_name='historicoemail',
+            name='tentativas',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas de Envio'),
+        ),
+        migrations.AddIndex(
+            model_name='historicoemail',
+            index=models.Index(fields=['status', 'proxima_tentativa'], name='idx_email_caixa_saida'),
+        ),
+    ]
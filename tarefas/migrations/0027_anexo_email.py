@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0026_caixa_saida_email'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='historicoemail',
+            name='anexo_csv',
+            field=models.TextField(blank=True, verbose_name='Conteúdo do Anexo (CSV)'),
+        ),
+        migrations.AddField(
+            model_name='historicoemail',
+            name='anexo_nome',
+            field=models.CharField(blank=True, max_length=100, verbose_name='Anexo'),
+        ),
+    ]
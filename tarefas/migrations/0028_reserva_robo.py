@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-19 04:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0027_anexo_email'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloqueioservidor',
+            name='reservado_ate',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reservado Até'),
+        ),
+        migrations.AddField(
+            model_name='bloqueioservidor',
+            name='robo_id',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Robô'),
+        ),
+        migrations.AddField(
+            model_name='solicitacaonotificacao',
+            name='reservado_ate',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Reservado Até'),
+        ),
+        migrations.AddField(
+            model_name='solicitacaonotificacao',
+            name='robo_id',
+            field=models.CharField(blank=True, max_length=50, verbose_name='Robô'),
+        ),
+        migrations.AddIndex(
+            model_name='bloqueioservidor',
+            index=models.Index(fields=['status', 'reservado_ate'], name='idx_bloqueio_reserva'),
+        ),
+        migrations.AddIndex(
+            model_name='solicitacaonotificacao',
+            index=models.Index(fields=['status', 'reservado_ate'], name='idx_notificacao_reserva'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+
+def preencher_estado_bloqueio(apps, schema_editor):
+    """Estado inicial: última ação concluída de cada (servidor, fila)"""
+    BloqueioServidor = apps.get_model('tarefas', 'BloqueioServidor')
+    EstadoBloqueio = apps.get_model('tarefas', 'EstadoBloqueio')
+
+    ultimas = (
+        BloqueioServidor.objects
+        .filter(status='CONCLUIDO', data_conclusao__isnull=False)
+        .annotate(ordem=Window(
+            expression=RowNumber(),
+            partition_by=[F('servidor_id'), F('codigo_fila')],
+            order_by=F('data_conclusao').desc(),
+        ))
+        .filter(ordem=1)
+    )
+    EstadoBloqueio.objects.bulk_create([
+        EstadoBloqueio(servidor_id=b.servidor_id, codigo_fila=b.codigo_fila, bloqueado=b.tipo_acao == 'BLOQUEIO',
+                       ultima_acao_id=b.id, data_alteracao=b.data_conclusao)
+        for b in ultimas
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0028_reserva_robo'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EstadoBloqueio',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('codigo_fila', models.CharField(max_length=20, verbose_name='Código da Fila')),
+                ('bloqueado', models.BooleanField(default=False, verbose_name='Bloqueado')),
+                ('data_alteracao', models.DateTimeField(verbose_name='Data da Alteração')),
+                ('servidor', models.ForeignKey(db_column='siape_servidor', on_delete=django.db.models.deletion.CASCADE, related_name='estados_bloqueio', to=settings.AUTH_USER_MODEL, verbose_name='Servidor (SIAPE)')),
+                ('ultima_acao', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='tarefas.bloqueioservidor', verbose_name='Última Ação')),
+            ],
+            options={
+                'verbose_name': 'Estado de Bloqueio',
+                'verbose_name_plural': '🔒 Estados de Bloqueio',
+                'ordering': ['servidor', 'codigo_fila'],
+                'constraints': [models.UniqueConstraint(fields=('servidor', 'codigo_fila'), name='estado_bloqueio_servidor_fila_uniq')],
+            },
+        ),
+        migrations.RunPython(preencher_estado_bloqueio, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0029_estado_bloqueio'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeracaoDados',
+            fields=[
+                ('nome', models.CharField(max_length=50, primary_key=True, serialize=False, verbose_name='Nome')),
+                ('valor', models.PositiveBigIntegerField(default=0, verbose_name='Geração')),
+                ('data_alteracao', models.DateTimeField(auto_now=True, verbose_name='Alterada em')),
+            ],
+            options={
+                'verbose_name': 'Geração dos Dados',
+                'verbose_name_plural': 'Gerações dos Dados',
+            },
+        ),
+    ]
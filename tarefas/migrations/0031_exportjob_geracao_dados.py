@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0030_geracao_dados'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='exportjob',
+            name='geracao',
+            field=models.CharField(help_text='Geração dos dados das tarefas + data (arquivo válido enquanto não mudar)', max_length=50, verbose_name='Geração dos Dados'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0031_exportjob_geracao_dados'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'tipo_fila', 'tempo_em_pendencia_em_dias', 'numero_protocolo_tarefa'], name='tarefa_fila_pendencia_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'tipo_fila', 'dias_pendente_criticidade_calculado', 'numero_protocolo_tarefa'], name='tarefa_fila_dias_crit_idx'),
+        ),
+    ]
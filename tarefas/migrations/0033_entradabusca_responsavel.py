@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-19 05:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tarefas', '0032_tarefa_indices_ordenacao_fila'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='entradabusca',
+            name='campo',
+            field=models.CharField(choices=[('servico', 'Serviço'), ('servidor', 'Servidor (nome)'), ('gex', 'GEX'), ('responsavel', 'Responsável (nome na tarefa)')], max_length=20, verbose_name='Campo'),
+        ),
+        migrations.AlterField(
+            model_name='entradabusca',
+            name='chave',
+            field=models.CharField(help_text='Valor usado no filtro da tabela principal (nome do serviço, SIAPE, GEX ou nome do responsável)', max_length=255, verbose_name='Chave'),
+        ),
+        migrations.AddIndex(
+            model_name='tarefa',
+            index=models.Index(fields=['ativa', 'nome_profissional_responsavel'], name='tarefa_ativa_responsavel_idx'),
+        ),
+    ]
@@ -161,6 +161,14 @@ class Tarefa(models.Model):
         help_text='Classificação automática da tarefa em filas de trabalho'
     )
 
+    # Início da atribuição atual (mantido pela importação via AtribuicaoTarefa)
+    data_atribuicao_atual = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Com o Responsável Atual desde',
+        help_text='Importação em que o SIAPE responsável passou a ser o atual'
+    )
+
     class Meta:
         ordering = ['-data_distribuicao_tarefa']
         verbose_name = 'Tarefa'
@@ -179,6 +187,32 @@ class Tarefa(models.Model):
             models.Index(fields=['ativa', 'tipo_fila', 'nivel_criticidade_calculado']),  # Estatísticas
             models.Index(fields=['data_processamento_tarefa']),  # Context processor
             models.Index(fields=['ativa', 'siape_responsavel']),  # Filtragem geral
+            # OTIMIZAÇÃO: Paginação por cursor (lista_tarefas e detalhe_fila)
+            models.Index(
+                fields=['ativa', 'pontuacao_criticidade', 'tempo_em_pendencia_em_dias', 'numero_protocolo_tarefa'],
+                name='tarefa_keyset_lista_idx'
+            ),
+            models.Index(
+                fields=['ativa', 'tipo_fila', 'pontuacao_criticidade', 'tempo_em_pendencia_em_dias', 'numero_protocolo_tarefa'],
+                name='tarefa_keyset_fila_idx'
+            ),
+            # Demais ordenações aceitas por ?ordem= no detalhe_fila (ORDENACOES_PERMITIDAS)
+            models.Index(
+                fields=['ativa', 'tipo_fila', 'tempo_em_pendencia_em_dias', 'numero_protocolo_tarefa'],
+                name='tarefa_fila_pendencia_idx'
+            ),
+            models.Index(
+                fields=['ativa', 'tipo_fila', 'dias_pendente_criticidade_calculado', 'numero_protocolo_tarefa'],
+                name='tarefa_fila_dias_crit_idx'
+            ),
+            # OTIMIZAÇÃO: Busca por serviço resolvida pelo índice de busca (IN em vez de LIKE '%x%')
+            models.Index(fields=['ativa', 'nome_servico'], name='tarefa_ativa_servico_idx'),
+            models.Index(fields=['ativa', 'nome_profissional_responsavel'], name='tarefa_ativa_responsavel_idx'),
+            # OTIMIZAÇÃO: Ordenação/filtro por tempo com o responsável atual (detalhe_fila)
+            models.Index(
+                fields=['ativa', 'tipo_fila', 'data_atribuicao_atual', 'numero_protocolo_tarefa'],
+                name='tarefa_fila_atribuicao_idx'
+            ),
         ]
 
     def __str__(self):
@@ -198,6 +232,17 @@ class Tarefa(models.Model):
             return 0
         return self.tempo_ate_ultima_distribuicao_tarefa_em_dias - self.tempo_em_pendencia_em_dias
 
+    @property
+    def dias_com_responsavel_atual(self):
+        """
+        Dias desde que o SIAPE responsável atual assumiu a tarefa, segundo as
+        importações (AtribuicaoTarefa). None se ainda não rastreada.
+        """
+        from django.utils import timezone
+        if self.data_atribuicao_atual is None:
+            return None
+        return (timezone.now() - self.data_atribuicao_atual).days
+
     @property
     def tem_subtarefa_pendente(self):
         """Verifica se possui subtarefa pendente (não deve gerar alerta)"""
@@ -1326,20 +1371,25 @@ class BloqueioServidor(models.Model):
     resposta_robo = models.TextField(blank=True, verbose_name='Resposta do Robô')
     mensagem_erro = models.TextField(blank=True, verbose_name='Mensagem de Erro')
     observacoes = models.TextField(blank=True, verbose_name='Observações')
+    # Reserva (lease) do robô que pegou a solicitação; vencida, volta a ser reservável
+    robo_id = models.CharField(max_length=50, blank=True, verbose_name='Robô')
+    reservado_ate = models.DateTimeField(null=True, blank=True, verbose_name='Reservado Até')
 
     class Meta:
         verbose_name = 'Bloqueio de Servidor'
         verbose_name_plural = '🔒 Bloqueios de Servidores'
         ordering = ['-data_solicitacao']
+        indexes = [
+            models.Index(fields=['status', 'reservado_ate'], name='idx_bloqueio_reserva'),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_acao_display()} - {self.servidor.siape} - Fila {self.codigo_fila}"
 
     @classmethod
     def servidor_esta_bloqueado(cls, siape, codigo_fila):
-        ultimo_bloqueio = cls.objects.filter(servidor__siape=siape, codigo_fila=codigo_fila,
-                                               status=cls.STATUS_CONCLUIDO).order_by('-data_conclusao').first()
-        return ultimo_bloqueio and ultimo_bloqueio.tipo_acao == cls.TIPO_BLOQUEIO
+        # OTIMIZAÇÃO: lê o estado materializado em vez da última ação concluída
+        return EstadoBloqueio.objects.filter(servidor__siape=siape, codigo_fila=codigo_fila, bloqueado=True).exists()
 
     def marcar_como_processando(self):
         from django.utils import timezone
@@ -1352,6 +1402,7 @@ class BloqueioServidor(models.Model):
         self.status = self.STATUS_CONCLUIDO
         self.data_conclusao = timezone.now()
         self.resposta_robo = resposta_robo
+        self.reservado_ate = None
         self.save()
 
     def marcar_como_erro(self, mensagem_erro=''):
@@ -1359,9 +1410,100 @@ class BloqueioServidor(models.Model):
         self.status = self.STATUS_ERRO
         self.data_conclusao = timezone.now()
         self.mensagem_erro = mensagem_erro
+        self.reservado_ate = None
         self.save()
 
 
+class EstadoBloqueio(models.Model):
+    """
+    Estado atual de bloqueio de cada (servidor, fila).
+
+    Materializa a última ação CONCLUÍDA de BloqueioServidor: é gravado na
+    mesma transação em que o robô conclui a ação (AcoesService), então a
+    pergunta "está bloqueado?" vira uma busca pela chave única.
+    """
+
+    servidor = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE,
+                                  related_name='estados_bloqueio',
+                                  db_column='siape_servidor', verbose_name='Servidor (SIAPE)')
+    codigo_fila = models.CharField(max_length=20, verbose_name='Código da Fila')
+    bloqueado = models.BooleanField(default=False, verbose_name='Bloqueado')
+    ultima_acao = models.ForeignKey(BloqueioServidor, on_delete=models.SET_NULL, null=True, blank=True,
+                                     related_name='+', verbose_name='Última Ação')
+    data_alteracao = models.DateTimeField(verbose_name='Data da Alteração')
+
+    class Meta:
+        verbose_name = 'Estado de Bloqueio'
+        verbose_name_plural = '🔒 Estados de Bloqueio'
+        ordering = ['servidor', 'codigo_fila']
+        constraints = [
+            models.UniqueConstraint(fields=['servidor', 'codigo_fila'], name='estado_bloqueio_servidor_fila_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.servidor_id} - Fila {self.codigo_fila}: {'bloqueado' if self.bloqueado else 'desbloqueado'}"
+
+    @classmethod
+    def _de_acao(cls, bloqueio):
+        return cls(
+            servidor_id=bloqueio.servidor_id,
+            codigo_fila=bloqueio.codigo_fila,
+            bloqueado=bloqueio.tipo_acao == BloqueioServidor.TIPO_BLOQUEIO,
+            ultima_acao=bloqueio,
+            data_alteracao=bloqueio.data_conclusao,
+        )
+
+    @classmethod
+    def aplicar(cls, bloqueios):
+        """
+        Registra ações recém-concluídas (upsert por servidor e fila; com
+        várias ações para o mesmo par vale a última da lista). Chamar na
+        transação que conclui as ações.
+        """
+        from django.db import connection
+
+        estados = {(b.servidor_id, b.codigo_fila): cls._de_acao(b) for b in bloqueios}
+        # MySQL (ON DUPLICATE KEY UPDATE) não aceita alvo: usa a própria
+        # estado_bloqueio_servidor_fila_uniq e recusa unique_fields
+        alvo = (
+            {'unique_fields': ['servidor', 'codigo_fila']}
+            if connection.features.supports_update_conflicts_with_target else {}
+        )
+        cls.objects.bulk_create(
+            estados.values(),
+            update_conflicts=True,
+            update_fields=['bloqueado', 'ultima_acao', 'data_alteracao'],
+            **alvo,
+        )
+
+    @classmethod
+    def recalcular(cls, **filtros):
+        """
+        Reconstrói o estado a partir das ações concluídas: todas, ou só as de
+        `filtros` (ex.: servidor=..., codigo_fila=...).
+
+        Returns:
+            int: Estados gravados
+        """
+        from django.db import transaction
+        from django.db.models import F, Window
+        from django.db.models.functions import RowNumber
+
+        ultimas = (
+            BloqueioServidor.objects
+            .filter(status=BloqueioServidor.STATUS_CONCLUIDO, data_conclusao__isnull=False, **filtros)
+            .annotate(ordem=Window(
+                expression=RowNumber(),
+                partition_by=[F('servidor_id'), F('codigo_fila')],
+                order_by=F('data_conclusao').desc(),
+            ))
+            .filter(ordem=1)
+        )
+        with transaction.atomic():
+            cls.objects.filter(**filtros).delete()
+            return len(cls.objects.bulk_create([cls._de_acao(b) for b in ultimas], batch_size=1000))
+
+
 class SolicitacaoNotificacao(models.Model):
     """Solicitações de criação de tarefas PGB (notificações)."""
 
@@ -1395,11 +1537,17 @@ class SolicitacaoNotificacao(models.Model):
     resposta_robo = models.TextField(blank=True, verbose_name='Resposta do Robô')
     mensagem_erro = models.TextField(blank=True, verbose_name='Mensagem de Erro')
     observacoes = models.TextField(blank=True, verbose_name='Observações')
+    # Reserva (lease) do robô que pegou a solicitação; vencida, volta a ser reservável
+    robo_id = models.CharField(max_length=50, blank=True, verbose_name='Robô')
+    reservado_ate = models.DateTimeField(null=True, blank=True, verbose_name='Reservado Até')
 
     class Meta:
         verbose_name = 'Solicitação de Notificação PGB'
         verbose_name_plural = '📋 Solicitações de Notificações PGB'
         ordering = ['-data_solicitacao']
+        indexes = [
+            models.Index(fields=['status', 'reservado_ate'], name='idx_notificacao_reserva'),
+        ]
 
     def __str__(self):
         return f"{self.get_tipo_notificacao_display()} - {self.servidor.siape}"
@@ -1420,6 +1568,7 @@ class SolicitacaoNotificacao(models.Model):
         self.data_conclusao = timezone.now()
         self.numero_protocolo_criado = numero_protocolo
         self.resposta_robo = resposta_robo
+        self.reservado_ate = None
         self.save()
 
     def marcar_como_erro(self, mensagem_erro=''):
@@ -1427,6 +1576,7 @@ class SolicitacaoNotificacao(models.Model):
         self.status = self.STATUS_ERRO
         self.data_conclusao = timezone.now()
         self.mensagem_erro = mensagem_erro
+        self.reservado_ate = None
         self.save()
 
 
@@ -1485,7 +1635,13 @@ class HistoricoNotificacao(models.Model):
 
 
 class HistoricoEmail(models.Model):
-    """Histórico de todos os emails enviados pelo sistema."""
+    """
+    Histórico de todos os emails enviados pelo sistema.
+
+    Também é a caixa de saída (tarefas/caixa_saida.py): as views gravam o
+    email PENDENTE com proxima_tentativa e o worker envia em lotes,
+    reagendando falhas temporárias com backoff exponencial.
+    """
 
     STATUS_PENDENTE = 'PENDENTE'
     STATUS_ENVIADO = 'ENVIADO'
@@ -1507,28 +1663,53 @@ class HistoricoEmail(models.Model):
                                       verbose_name='Enviado Por')
     resposta_api = models.TextField(blank=True, verbose_name='Resposta da API Microsoft Graph')
     mensagem_erro = models.TextField(blank=True, verbose_name='Mensagem de Erro')
+    campanha = models.ForeignKey('CampanhaEmail', on_delete=models.SET_NULL, null=True, blank=True,
+                                 related_name='emails', verbose_name='Campanha')
+    anexo_nome = models.CharField(max_length=100, blank=True, verbose_name='Anexo')
+    anexo_csv = models.TextField(blank=True, verbose_name='Conteúdo do Anexo (CSV)')
+    tentativas = models.PositiveSmallIntegerField(default=0, verbose_name='Tentativas de Envio')
+    # Quando o worker pode (re)tentar o envio; nulo = fora da caixa de saída
+    proxima_tentativa = models.DateTimeField(null=True, blank=True, verbose_name='Próxima Tentativa')
 
     class Meta:
         verbose_name = 'Histórico de Email'
         verbose_name_plural = '📧 Histórico de Emails'
         ordering = ['-data_solicitacao']
+        indexes = [
+            models.Index(fields=['status', 'proxima_tentativa'], name='idx_email_caixa_saida'),
+        ]
 
     def __str__(self):
         return f"Email para {self.servidor.siape} - {self.assunto[:50]}"
 
-    def marcar_como_enviado(self, resposta_api=''):
+    def marcar_como_enviado(self, resposta_api='', salvar=True):
         from django.utils import timezone
         self.status = self.STATUS_ENVIADO
         self.data_envio = timezone.now()
         self.resposta_api = resposta_api
-        self.save()
+        self.proxima_tentativa = None
+        if salvar:
+            self.save()
 
-    def marcar_como_erro(self, mensagem_erro=''):
+    def marcar_como_erro(self, mensagem_erro='', salvar=True, temporario=False):
+        """
+        Registra a falha. Falhas temporárias (429/5xx/conexão) voltam para a
+        caixa de saída com backoff exponencial até EMAIL_MAX_TENTATIVAS.
+        """
+        from datetime import timedelta
         from django.utils import timezone
-        self.status = self.STATUS_ERRO
-        self.data_envio = timezone.now()
         self.mensagem_erro = mensagem_erro
-        self.save()
+        max_tentativas = getattr(settings, 'EMAIL_MAX_TENTATIVAS', 5)
+        if temporario and self.tentativas < max_tentativas:
+            backoff = getattr(settings, 'EMAIL_BACKOFF_SEGUNDOS', 60) * 2 ** max(self.tentativas - 1, 0)
+            self.status = self.STATUS_PENDENTE
+            self.proxima_tentativa = timezone.now() + timedelta(seconds=min(backoff, 6 * 3600))
+        else:
+            self.status = self.STATUS_ERRO
+            self.data_envio = timezone.now()
+            self.proxima_tentativa = None
+        if salvar:
+            self.save()
 
 
 class TemplateEmail(models.Model):
@@ -1554,6 +1735,50 @@ class TemplateEmail(models.Model):
         return self.nome
 
 
+class CampanhaEmail(models.Model):
+    """
+    Envio de um template para vários servidores selecionados por filtro.
+
+    O worker seleciona os destinatários, grava os emails renderizados como
+    HistoricoEmail (campanha=self) e envia em lotes JSON $batch
+    (tarefas/campanhas.py).
+    """
+
+    STATUS_PENDENTE = 'PENDENTE'
+    STATUS_PROCESSANDO = 'PROCESSANDO'
+    STATUS_CONCLUIDA = 'CONCLUIDA'
+    STATUS_ERRO = 'ERRO'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_PROCESSANDO, 'Enviando'),
+        (STATUS_CONCLUIDA, 'Concluída'),
+        (STATUS_ERRO, 'Falhou'),
+    ]
+
+    template = models.ForeignKey(TemplateEmail, on_delete=models.PROTECT, related_name='campanhas',
+                                 verbose_name='Template')
+    filtros = models.JSONField(default=dict, blank=True, verbose_name='Filtros de Destinatários')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE,
+                              db_index=True, verbose_name='Status')
+    total_destinatarios = models.PositiveIntegerField(default=0, verbose_name='Destinatários')
+    enviados = models.PositiveIntegerField(default=0, verbose_name='Enviados')
+    erros = models.PositiveIntegerField(default=0, verbose_name='Erros')
+    criado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                                   related_name='campanhas_email', verbose_name='Criada Por')
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name='Criada em')
+    data_conclusao = models.DateTimeField(null=True, blank=True, verbose_name='Concluída em')
+    duracao_segundos = models.FloatField(null=True, blank=True, verbose_name='Duração do Envio (s)')
+    mensagem_erro = models.TextField(blank=True, verbose_name='Mensagem de Erro')
+
+    class Meta:
+        verbose_name = 'Campanha de Email'
+        verbose_name_plural = '📨 Campanhas de Email'
+        ordering = ['-data_criacao']
+
+    def __str__(self):
+        return f"{self.template.nome} #{self.pk} ({self.get_status_display()})"
+
+
 class HistoricoAcaoLote(models.Model):
     """Histórico de geração de arquivos CSV para ações em lote."""
 
@@ -1640,3 +1865,367 @@ class HistoricoAcaoLote(models.Model):
 
     def __str__(self):
         return f"{self.get_tipo_acao_display()} - {self.servidor.siape} - {self.data_geracao.strftime('%d/%m/%Y %H:%M')}"
+
+
+# ============================================
+# ÍNDICE DE BUSCA POR SUBSTRING
+# ============================================
+
+class EntradaBusca(models.Model):
+    """
+    Valor distinto pesquisável (serviço, servidor, GEX ou responsável da tarefa).
+
+    O texto é guardado normalizado (minúsculo, sem acentos) e decomposto em
+    trigramas (TrigramaBusca). A busca por substring consulta os trigramas
+    pelo índice e devolve as chaves, que filtram as tabelas principais com IN.
+    Mantido ao final de cada importação (tarefas/busca.py).
+    """
+
+    CAMPO_SERVICO = 'servico'
+    CAMPO_SERVIDOR = 'servidor'
+    CAMPO_GEX = 'gex'
+    CAMPO_RESPONSAVEL = 'responsavel'
+    CAMPOS = [
+        (CAMPO_SERVICO, 'Serviço'),
+        (CAMPO_SERVIDOR, 'Servidor (nome)'),
+        (CAMPO_GEX, 'GEX'),
+        (CAMPO_RESPONSAVEL, 'Responsável (nome na tarefa)'),
+    ]
+
+    campo = models.CharField(max_length=20, choices=CAMPOS, verbose_name='Campo')
+    chave = models.CharField(
+        max_length=255,
+        verbose_name='Chave',
+        help_text='Valor usado no filtro da tabela principal (nome do serviço, SIAPE, GEX ou nome do responsável)'
+    )
+    texto_normalizado = models.CharField(max_length=255, verbose_name='Texto Normalizado')
+
+    class Meta:
+        verbose_name = 'Entrada do Índice de Busca'
+        verbose_name_plural = 'Entradas do Índice de Busca'
+        constraints = [
+            models.UniqueConstraint(fields=['campo', 'chave'], name='entrada_busca_campo_chave_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.campo}: {self.chave}"
+
+
+class TrigramaBusca(models.Model):
+    """Trigrama de uma EntradaBusca (lista invertida trigrama → entradas)."""
+
+    entrada = models.ForeignKey(
+        EntradaBusca,
+        on_delete=models.CASCADE,
+        related_name='trigramas',
+        verbose_name='Entrada'
+    )
+    trigrama = models.CharField(max_length=3, verbose_name='Trigrama')
+
+    class Meta:
+        verbose_name = 'Trigrama de Busca'
+        verbose_name_plural = 'Trigramas de Busca'
+        indexes = [
+            models.Index(fields=['trigrama', 'entrada'], name='trigrama_busca_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.trigrama} → {self.entrada_id}"
+
+
+# ============================================
+# TABELAS DE DIMENSÃO (OPÇÕES DE FILTRO)
+# ============================================
+
+class DimensaoTarefa(models.Model):
+    """
+    Valores distintos das tarefas ativas com a respectiva contagem.
+
+    Alimenta dropdowns e filtros do admin sem DISTINCT sobre a tabela de
+    tarefas a cada requisição. Recalculada ao final de cada importação
+    (tarefas/dimensoes.py).
+    """
+
+    TIPO_STATUS = 'status'
+    TIPO_SERVICO = 'servico'
+    TIPO_GEX = 'gex'
+    TIPO_UNIDADE = 'unidade'
+    TIPOS = [
+        (TIPO_STATUS, 'Status'),
+        (TIPO_SERVICO, 'Serviço'),
+        (TIPO_GEX, 'GEX'),
+        (TIPO_UNIDADE, 'Unidade'),
+    ]
+
+    tipo = models.CharField(max_length=20, choices=TIPOS, verbose_name='Tipo')
+    valor = models.CharField(max_length=255, verbose_name='Valor')
+    total_ativas = models.IntegerField(default=0, verbose_name='Tarefas Ativas')
+    data_atualizacao = models.DateTimeField(auto_now=True, verbose_name='Atualizado em')
+
+    class Meta:
+        verbose_name = 'Dimensão de Tarefa'
+        verbose_name_plural = 'Dimensões de Tarefas'
+        ordering = ['tipo', 'valor']
+        constraints = [
+            models.UniqueConstraint(fields=['tipo', 'valor'], name='dimensao_tarefa_tipo_valor_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()}: {self.valor} ({self.total_ativas})"
+
+
+class DimensaoServicoServidor(models.Model):
+    """
+    Serviços distintos por servidor e fila (tarefas ativas), com contagem.
+
+    Usado no modal de ações em lote (obter_servicos_servidor_fila) e, somado
+    por servidor, como carga de cada um no planejador de rebalanceamento.
+    """
+
+    siape = models.CharField(max_length=15, verbose_name='SIAPE')
+    tipo_fila = models.CharField(max_length=50, verbose_name='Fila')
+    nome_servico = models.CharField(max_length=255, verbose_name='Serviço')
+    total_ativas = models.IntegerField(default=0, verbose_name='Tarefas Ativas')
+    total_criticas = models.IntegerField(default=0, verbose_name='Tarefas Críticas')
+
+    class Meta:
+        verbose_name = 'Serviço por Servidor e Fila'
+        verbose_name_plural = 'Serviços por Servidor e Fila'
+        indexes = [
+            models.Index(fields=['siape', 'tipo_fila', 'nome_servico'], name='dim_servico_servidor_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.siape} / {self.tipo_fila}: {self.nome_servico} ({self.total_ativas})"
+
+
+# ============================================
+# SÉRIE HISTÓRICA DE KPIs (UM SNAPSHOT POR IMPORTAÇÃO)
+# ============================================
+
+class SnapshotKPI(models.Model):
+    """
+    Contagem de tarefas ativas ao final de uma importação, por combinação de
+    fila, nível, regra, faixa de status e GEX.
+
+    Gravado por tarefas/snapshots.py ao final de processar_importacao_async.
+    Gráficos de tendência somam poucas centenas de linhas por importação em
+    vez de reconstruir o estado a partir do HistoricoTarefa.
+    """
+
+    STATUS_PENDENTE = 'PENDENTE'
+    STATUS_CUMPRIMENTO = 'CUMPRIMENTO'
+    STATUS_OUTROS = 'OUTROS'
+    FAIXAS_STATUS = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_CUMPRIMENTO, 'Cumprimento de exigência'),
+        (STATUS_OUTROS, 'Outros'),
+    ]
+
+    registro_importacao = models.ForeignKey(
+        'importar_csv.RegistroImportacao',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='snapshots_kpi',
+        verbose_name='Importação'
+    )
+    data_referencia = models.DateTimeField(
+        db_index=True,
+        verbose_name='Data de Referência',
+        help_text='Fim do processamento da importação'
+    )
+    tipo_fila = models.CharField(max_length=50, verbose_name='Fila')
+    nivel_criticidade = models.CharField(max_length=15, verbose_name='Nível de Criticidade')
+    regra_aplicada = models.CharField(max_length=50, verbose_name='Regra Aplicada')
+    faixa_status = models.CharField(max_length=20, choices=FAIXAS_STATUS, verbose_name='Faixa de Status')
+    gex = models.CharField(max_length=255, blank=True, verbose_name='GEX')
+    total = models.IntegerField(verbose_name='Total de Tarefas')
+
+    class Meta:
+        verbose_name = 'Snapshot de KPI'
+        verbose_name_plural = 'Snapshots de KPIs'
+        ordering = ['-data_referencia']
+        indexes = [
+            models.Index(fields=['data_referencia', 'tipo_fila'], name='snapshot_kpi_data_fila_idx'),
+            models.Index(fields=['registro_importacao'], name='snapshot_kpi_registro_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.data_referencia:%d/%m/%Y %H:%M} - {self.tipo_fila}/{self.nivel_criticidade}: {self.total}"
+
+
+# ============================================
+# ATRIBUIÇÕES (TEMPO COM O RESPONSÁVEL ATUAL)
+# ============================================
+
+class AtribuicaoTarefa(models.Model):
+    """
+    Período em que uma tarefa ficou com um mesmo SIAPE responsável.
+
+    Uma linha nova só é criada quando a importação traz um responsável
+    diferente do anterior (tarefas/atribuicoes.py); o período aberto tem
+    fim nulo e seu início é copiado para Tarefa.data_atribuicao_atual.
+    siape nulo = período sem responsável.
+    """
+
+    tarefa = models.ForeignKey(
+        Tarefa,
+        on_delete=models.CASCADE,
+        related_name='atribuicoes',
+        verbose_name='Tarefa'
+    )
+    siape = models.CharField(max_length=20, null=True, blank=True, verbose_name='SIAPE')
+    inicio = models.DateTimeField(verbose_name='Início')
+    fim = models.DateTimeField(null=True, blank=True, verbose_name='Fim')
+
+    class Meta:
+        verbose_name = 'Atribuição de Tarefa'
+        verbose_name_plural = 'Atribuições de Tarefas'
+        ordering = ['tarefa', 'inicio']
+        indexes = [
+            models.Index(fields=['tarefa', 'fim'], name='atribuicao_tarefa_fim_idx'),
+            models.Index(fields=['siape', 'fim'], name='atribuicao_siape_fim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tarefa_id} → {self.siape or 'sem responsável'} desde {self.inicio:%d/%m/%Y}"
+
+
+# ============================================
+# EXPORTAÇÕES EM SEGUNDO PLANO
+# ============================================
+
+class ExportJob(models.Model):
+    """
+    Exportação de relatório gerada pelo worker (tarefas/tasks.py).
+
+    `chave` identifica (tipo, filtros, geração dos dados): a mesma exportação
+    pedida de novo após a mesma importação reaproveita o arquivo já gerado.
+    """
+
+    STATUS_PENDENTE = 'PENDING'
+    STATUS_PROCESSANDO = 'PROCESSING'
+    STATUS_CONCLUIDO = 'COMPLETED'
+    STATUS_ERRO = 'FAILED'
+    STATUS_CHOICES = [
+        (STATUS_PENDENTE, 'Pendente'),
+        (STATUS_PROCESSANDO, 'Processando'),
+        (STATUS_CONCLUIDO, 'Concluída'),
+        (STATUS_ERRO, 'Falhou'),
+    ]
+
+    tipo = models.CharField(max_length=50, verbose_name='Relatório')
+    filtros = models.JSONField(default=dict, blank=True, verbose_name='Filtros')
+    geracao = models.CharField(
+        max_length=50,
+        verbose_name='Geração dos Dados',
+        help_text='Geração dos dados das tarefas + data (arquivo válido enquanto não mudar)'
+    )
+    chave = models.CharField(max_length=64, db_index=True, verbose_name='Chave')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDENTE,
+                              db_index=True, verbose_name='Status')
+    solicitante = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL,
+                                    null=True, blank=True, related_name='exportacoes',
+                                    verbose_name='Solicitante')
+    total_linhas = models.PositiveIntegerField(default=0, verbose_name='Total de Linhas')
+    linhas_processadas = models.PositiveIntegerField(default=0, verbose_name='Linhas Processadas')
+    caminho_arquivo = models.CharField(max_length=500, blank=True, verbose_name='Arquivo')
+    nome_arquivo = models.CharField(max_length=255, blank=True, verbose_name='Nome para Download')
+    tamanho_bytes = models.PositiveBigIntegerField(default=0, verbose_name='Tamanho (bytes)')
+    downloads = models.PositiveIntegerField(default=0, verbose_name='Downloads')
+    data_criacao = models.DateTimeField(auto_now_add=True, verbose_name='Solicitada em')
+    data_conclusao = models.DateTimeField(null=True, blank=True, verbose_name='Concluída em')
+    expira_em = models.DateTimeField(null=True, blank=True, db_index=True, verbose_name='Expira em')
+    mensagem_erro = models.TextField(blank=True, verbose_name='Mensagem de Erro')
+
+    class Meta:
+        verbose_name = 'Exportação'
+        verbose_name_plural = '📥 Exportações'
+        ordering = ['-data_criacao']
+        indexes = [
+            models.Index(fields=['chave', 'status'], name='exportjob_chave_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_display()} #{self.pk} ({self.get_status_display()})"
+
+    def get_tipo_display(self):
+        from tarefas.exportacao import RELATORIOS
+        relatorio = RELATORIOS.get(self.tipo)
+        return relatorio['nome'] if relatorio else self.tipo
+
+    @property
+    def progresso_percentual(self):
+        if self.status == self.STATUS_CONCLUIDO:
+            return 100
+        if not self.total_linhas:
+            return 0
+        return min(99, int(self.linhas_processadas * 100 / self.total_linhas))
+
+    def arquivo_existe(self):
+        import os
+        return bool(self.caminho_arquivo) and os.path.exists(self.caminho_arquivo)
+
+    @classmethod
+    def marcar_abandonadas(cls, agora=None):
+        """
+        Marca como FAILED as exportações paradas em PENDING/PROCESSING há mais
+        de EXPORTACAO_ABANDONADA_HORAS (worker morto no meio), para que um novo
+        pedido agende outra em vez de reaproveitar a travada.
+
+        Returns:
+            int: Exportações marcadas
+        """
+        from datetime import timedelta
+        from django.utils import timezone
+
+        agora = agora or timezone.now()
+        corte = agora - timedelta(hours=getattr(settings, 'EXPORTACAO_ABANDONADA_HORAS', 2))
+        return cls.objects.filter(
+            status__in=[cls.STATUS_PENDENTE, cls.STATUS_PROCESSANDO], data_criacao__lt=corte
+        ).update(
+            status=cls.STATUS_ERRO,
+            mensagem_erro='Exportação abandonada: não concluiu dentro do prazo',
+            data_conclusao=agora,
+        )
+
+
+class GeracaoDados(models.Model):
+    """
+    Contador de geração dos dados das tarefas, guardado no banco.
+
+    Incrementado a cada importação, recálculo de criticidade e justificativa:
+    tudo que muda o que /api/tarefas/estado/ (ETag) e as exportações
+    (tarefas/exportacao.py) devolvem. No banco, e não no cache, para nunca
+    voltar a um valor já usado (eviction, cache fora do ar).
+    """
+
+    DADOS_TAREFAS = 'dados_tarefas'
+
+    nome = models.CharField(max_length=50, primary_key=True, verbose_name='Nome')
+    valor = models.PositiveBigIntegerField(default=0, verbose_name='Geração')
+    data_alteracao = models.DateTimeField(auto_now=True, verbose_name='Alterada em')
+
+    class Meta:
+        verbose_name = 'Geração dos Dados'
+        verbose_name_plural = 'Gerações dos Dados'
+
+    def __str__(self):
+        return f"{self.nome}: {self.valor}"
+
+    @classmethod
+    def atual(cls, nome=DADOS_TAREFAS):
+        """Geração atual (0 se nunca incrementada)"""
+        return cls.objects.filter(pk=nome).values_list('valor', flat=True).first() or 0
+
+    @classmethod
+    def incrementar(cls, nome=DADOS_TAREFAS):
+        """Avança a geração (UPDATE atômico; cria a linha na primeira vez)"""
+        from django.db.models import F
+        from django.utils import timezone
+
+        atualizar = {'valor': F('valor') + 1, 'data_alteracao': timezone.now()}
+        if not cls.objects.filter(pk=nome).update(**atualizar):
+            cls.objects.get_or_create(pk=nome)
+            cls.objects.filter(pk=nome).update(**atualizar)
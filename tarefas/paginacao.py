@@ -0,0 +1,284 @@
+"""
+Paginação por cursor (keyset / seek) para listagens grandes de tarefas.
+
+O Paginator do Django usa OFFSET + COUNT(*): páginas profundas varrem todas as
+linhas anteriores e cada clique refaz a contagem da tabela inteira.
+
+Aqui a página seguinte é buscada a partir dos valores da última linha exibida
+(WHERE (chaves) < (valores) ORDER BY chaves LIMIT n), usando o índice da
+ordenação. A página N custa o mesmo que a página 1.
+
+Os tokens de navegação são opacos (assinados com a SECRET_KEY) e carregam os
+valores das chaves de ordenação, a direção e o número da página para exibição.
+
+Uso:
+    pagina = paginar_keyset(
+        tarefas,
+        ordenacao=ORDENACAO_CRITICIDADE,
+        cursor=request.GET.get('cursor'),
+        tamanho=50,
+        total=stats['total'],   # contagem já calculada pelos KPIs
+    )
+"""
+import math
+from datetime import date, datetime
+
+from django.core import signing
+from django.db import connection
+from django.db.models import Q
+
+# Ordenação padrão das listagens: criticidade, tempo em pendência e protocolo
+# (todas descendentes → o índice composto pode ser percorrido em ordem reversa)
+ORDENACAO_CRITICIDADE = [
+    '-pontuacao_criticidade',
+    '-tempo_em_pendencia_em_dias',
+    '-numero_protocolo_tarefa',
+]
+
+# Ordenações aceitas via GET (?ordem=) nas listagens paginadas por cursor; cada
+# uma tem índice composto com o desempate por protocolo (Tarefa.Meta.indexes)
+ORDENACOES_PERMITIDAS = {
+    '-pontuacao_criticidade': ORDENACAO_CRITICIDADE,
+    '-tempo_em_pendencia_em_dias': [
+        '-tempo_em_pendencia_em_dias',
+        '-numero_protocolo_tarefa',
+    ],
+    '-dias_pendente_criticidade_calculado': [
+        '-dias_pendente_criticidade_calculado',
+        '-numero_protocolo_tarefa',
+    ],
+}
+
+# detalhe_fila aceita também o tempo com o responsável atual (mais antigo
+# primeiro); a coluna é nula em tarefas ainda não rastreadas, que a view exclui
+ORDENACAO_TEMPO_RESPONSAVEL = ['data_atribuicao_atual', 'numero_protocolo_tarefa']
+ORDENACOES_FILA = {
+    **ORDENACOES_PERMITIDAS,
+    'data_atribuicao_atual': ORDENACAO_TEMPO_RESPONSAVEL,
+}
+
+_SALT_CURSOR = 'tarefas.paginacao.cursor'
+
+
+class PaginaKeyset:
+    """
+    Página de resultados obtida por cursor.
+
+    Expõe a mesma interface usada pelos templates com o Paginator do Django
+    (has_next, has_previous, has_other_pages, number, iteração) mais os
+    tokens cursor_proximo / cursor_anterior.
+    """
+
+    def __init__(self, object_list, number, tamanho, total_aproximado,
+                 has_next, has_previous, cursor_proximo, cursor_anterior):
+        self.object_list = object_list
+        self.number = number
+        self.tamanho = tamanho
+        self.total_aproximado = total_aproximado
+        self._has_next = has_next
+        self._has_previous = has_previous
+        self.cursor_proximo = cursor_proximo
+        self.cursor_anterior = cursor_anterior
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, indice):
+        return self.object_list[indice]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self._has_next or self._has_previous
+
+    @property
+    def num_pages(self):
+        """Total aproximado de páginas (baseado na contagem aproximada)"""
+        if not self.total_aproximado:
+            return self.number
+        return max(self.number, math.ceil(self.total_aproximado / self.tamanho))
+
+
+def _campo_e_direcao(campo):
+    """'-pontuacao' → ('pontuacao', True)"""
+    if campo.startswith('-'):
+        return campo[1:], True
+    return campo, False
+
+
+def _serializar_valor(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    return valor
+
+
+def codificar_cursor(valores, direcao, numero_pagina):
+    """
+    Gera token opaco para navegação.
+
+    Args:
+        valores (list): Valores das chaves de ordenação da linha de referência
+        direcao (str): 'n' (próxima) ou 'p' (anterior)
+        numero_pagina (int): Número da página de destino (apenas exibição)
+    """
+    return signing.dumps(
+        {'v': [_serializar_valor(v) for v in valores], 'd': direcao, 'n': numero_pagina},
+        salt=_SALT_CURSOR,
+        compress=True,
+    )
+
+
+def decodificar_cursor(token, quantidade_chaves):
+    """
+    Decodifica token de navegação.
+
+    Returns:
+        dict or None: {'v': [...], 'd': 'n'|'p', 'n': int} ou None se inválido
+    """
+    if not token:
+        return None
+    try:
+        dados = signing.loads(token, salt=_SALT_CURSOR)
+    except signing.BadSignature:
+        return None
+
+    if (
+        not isinstance(dados, dict)
+        or dados.get('d') not in ('n', 'p')
+        or len(dados.get('v') or []) != quantidade_chaves
+    ):
+        return None
+    return dados
+
+
+def _filtro_seek(ordenacao, valores, para_tras=False):
+    """
+    Monta o filtro "depois da linha de referência" na ordenação informada.
+
+    Para chaves (a DESC, b DESC, c DESC) e valores (x, y, z):
+        a <= x AND (a < x OR (a = x AND b < y) OR (a = x AND b = y AND c < z))
+
+    O primeiro termo (a <= x) é redundante, mas permite ao otimizador usar
+    um range no índice em vez de avaliar o OR linha a linha.
+    """
+    chaves = [_campo_e_direcao(c) for c in ordenacao]
+    if para_tras:
+        chaves = [(campo, not desc) for campo, desc in chaves]
+
+    condicao = Q()
+    prefixo_igual = {}
+    for (campo, desc), valor in zip(chaves, valores):
+        lookup = 'lt' if desc else 'gt'
+        condicao |= Q(**prefixo_igual, **{f'{campo}__{lookup}': valor})
+        prefixo_igual[campo] = valor
+
+    primeiro_campo, primeiro_desc = chaves[0]
+    faixa = Q(**{f"{primeiro_campo}__{'lte' if primeiro_desc else 'gte'}": valores[0]})
+    return faixa & condicao
+
+
+def _valores_linha(obj, ordenacao):
+    return [getattr(obj, _campo_e_direcao(c)[0]) for c in ordenacao]
+
+
+def contagem_aproximada(queryset):
+    """
+    Retorna a contagem aproximada de linhas do queryset.
+
+    Sem filtros, usa as estatísticas da tabela (MySQL information_schema /
+    PostgreSQL pg_class), que não varrem a tabela. Com filtros, recorre ao
+    COUNT(*) normal.
+    """
+    if not queryset.query.where:
+        tabela = queryset.model._meta.db_table
+        try:
+            with connection.cursor() as cursor:
+                if connection.vendor == 'mysql':
+                    cursor.execute(
+                        "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                        [tabela]
+                    )
+                    linha = cursor.fetchone()
+                    if linha and linha[0] is not None:
+                        return int(linha[0])
+                elif connection.vendor == 'postgresql':
+                    cursor.execute("SELECT reltuples FROM pg_class WHERE relname = %s", [tabela])
+                    linha = cursor.fetchone()
+                    if linha and linha[0] is not None and linha[0] >= 0:
+                        return int(linha[0])
+        except Exception:
+            pass
+
+    return queryset.count()
+
+
+def paginar_keyset(queryset, ordenacao, cursor=None, tamanho=50, total=None):
+    """
+    Retorna uma PaginaKeyset do queryset na ordenação informada.
+
+    Args:
+        queryset (QuerySet): Consulta já filtrada (sem order_by obrigatório)
+        ordenacao (list): Campos de ordenação; o último deve ser único (pk)
+        cursor (str): Token recebido via GET (None = primeira página)
+        tamanho (int): Itens por página
+        total (int): Contagem já conhecida (evita novo COUNT); se None,
+                     usa contagem_aproximada()
+
+    Returns:
+        PaginaKeyset
+    """
+    dados = decodificar_cursor(cursor, len(ordenacao))
+    para_tras = bool(dados) and dados['d'] == 'p'
+    numero = dados['n'] if dados else 1
+
+    if para_tras:
+        ordem_consulta = [c[1:] if c.startswith('-') else f'-{c}' for c in ordenacao]
+    else:
+        ordem_consulta = list(ordenacao)
+
+    consulta = queryset.order_by(*ordem_consulta)
+    if dados:
+        consulta = consulta.filter(_filtro_seek(ordenacao, dados['v'], para_tras=para_tras))
+
+    # Busca uma linha a mais para saber se existe outra página na mesma direção
+    linhas = list(consulta[:tamanho + 1])
+    tem_mais = len(linhas) > tamanho
+    linhas = linhas[:tamanho]
+
+    if para_tras:
+        linhas.reverse()
+        has_previous = tem_mais
+        has_next = True
+    else:
+        has_previous = dados is not None
+        has_next = tem_mais
+
+    cursor_proximo = None
+    cursor_anterior = None
+    if linhas:
+        if has_next:
+            cursor_proximo = codificar_cursor(_valores_linha(linhas[-1], ordenacao), 'n', numero + 1)
+        if has_previous:
+            cursor_anterior = codificar_cursor(_valores_linha(linhas[0], ordenacao), 'p', max(numero - 1, 1))
+
+    if total is None:
+        total = contagem_aproximada(queryset)
+
+    return PaginaKeyset(
+        object_list=linhas,
+        number=numero,
+        tamanho=tamanho,
+        total_aproximado=total,
+        has_next=has_next and cursor_proximo is not None,
+        has_previous=has_previous and cursor_anterior is not None,
+        cursor_proximo=cursor_proximo,
+        cursor_anterior=cursor_anterior,
+    )
@@ -0,0 +1,210 @@
+"""
+Planejador de rebalanceamento de carga de uma fila.
+
+Dado uma fila e um conjunto de servidores receptores, calcula quantas
+tarefas sair de cada servidor sobrecarregado para cada receptor de modo a
+nivelar primeiro as tarefas CRÍTICAS e depois o total:
+
+    - as cargas vêm de DimensaoServicoServidor (cargas_servidores_fila), sem
+      ler as tarefas;
+    - o plano é um guloso com dois heaps (doador mais carregado x receptor
+      menos carregado), movendo blocos limitados pelo próximo de cada heap —
+      o resultado é o mesmo de mover uma tarefa por vez, com muito menos
+      iterações;
+    - só na geração do arquivo as tarefas dos doadores são lidas, uma vez,
+      com values_list(...).iterator(), escolhendo as de prazo mais próximo.
+
+O arquivo gerado é o TRANSFERIR (Tipo 12) do robô, com um HistoricoAcaoLote
+por doador. O Tipo 12 leva só protocolo, UO de destino e despacho: as
+tarefas vão para a UO, não para um servidor. Os receptores definem apenas
+QUANTAS tarefas saem de cada doador; a distribuição entre eles é feita na
+UO de destino (a página do planejador avisa isso).
+
+Uso:
+    plano = planejar_rebalanceamento('PGB', ['1111111', '2222222'])
+    resumo = escrever_arquivo_rebalanceamento(destino, plano, uo_destino, despacho, usuario)
+"""
+import heapq
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.db.models import F
+
+from tarefas.acoes_lote import TAMANHO_LOTE, cabecalho_arquivo, linha_arquivo
+from tarefas.dimensoes import cargas_servidores_fila
+from tarefas.models import HistoricoAcaoLote, Tarefa
+
+
+def _equilibrar(cargas, disponiveis, receptores):
+    """
+    Distribui unidades dos doadores (disponiveis: {siape: n}) para os
+    receptores até a diferença entre o doador mais carregado e o receptor
+    menos carregado ser no máximo 1. Atualiza `cargas` no lugar.
+
+    Returns:
+        dict: {(doador, receptor): quantidade}
+    """
+    doadores = [(-cargas[siape], siape) for siape, n in disponiveis.items() if n > 0]
+    fila_receptores = [(cargas[siape], siape) for siape in receptores]
+    heapq.heapify(doadores)
+    heapq.heapify(fila_receptores)
+
+    movimentos = {}
+    while doadores and fila_receptores:
+        carga_doador, doador = -doadores[0][0], doadores[0][1]
+        carga_receptor, receptor = fila_receptores[0]
+        diferenca = carga_doador - carga_receptor
+        if diferenca <= 1:
+            break
+
+        # Bloco que não ultrapassa o segundo de cada heap nem o disponível
+        bloco = min(diferenca // 2, disponiveis[doador])
+        if len(doadores) > 1:
+            bloco = min(bloco, carga_doador - _segundo(doadores, negativo=True))
+        if len(fila_receptores) > 1:
+            bloco = min(bloco, _segundo(fila_receptores) - carga_receptor)
+        bloco = max(bloco, 1)
+
+        cargas[doador] -= bloco
+        cargas[receptor] += bloco
+        disponiveis[doador] -= bloco
+        movimentos[(doador, receptor)] = movimentos.get((doador, receptor), 0) + bloco
+
+        if disponiveis[doador] > 0:
+            heapq.heapreplace(doadores, (-cargas[doador], doador))
+        else:
+            heapq.heappop(doadores)
+        heapq.heapreplace(fila_receptores, (cargas[receptor], receptor))
+
+    return movimentos
+
+
+def _segundo(heap, negativo=False):
+    """Menor chave entre os filhos da raiz (o próximo a ser atendido)"""
+    candidatos = [heap[i][0] for i in (1, 2) if i < len(heap)]
+    valor = min(candidatos)
+    return -valor if negativo else valor
+
+
+def planejar_rebalanceamento(tipo_fila, receptores, cargas=None):
+    """
+    Calcula o plano de transferências da fila para os receptores.
+
+    Args:
+        tipo_fila (str): Código da fila
+        receptores (list): SIAPEs que recebem tarefas
+        cargas (dict): Opcional, {siape: (críticas, total)}; padrão
+            cargas_servidores_fila(tipo_fila)
+
+    Returns:
+        dict: {
+            'fila', 'receptores',
+            'movimentos': [{'doador', 'receptor', 'criticas', 'demais'}],
+            'servidores': [{'siape', 'receptor', 'criticas_antes', 'total_antes',
+                            'criticas_depois', 'total_depois'}],
+            'total_criticas', 'total_demais',
+        }
+    """
+    cargas = dict(cargas if cargas is not None else cargas_servidores_fila(tipo_fila))
+    receptores = [siape for siape in dict.fromkeys(receptores) if siape]
+    for siape in receptores:
+        cargas.setdefault(siape, (0, 0))
+    doadores = [siape for siape in cargas if siape not in set(receptores)]
+
+    # 1ª fase: críticas
+    criticas = {siape: c for siape, (c, _) in cargas.items()}
+    mov_criticas = _equilibrar(criticas, {s: cargas[s][0] for s in doadores}, receptores)
+
+    # 2ª fase: total, movendo apenas tarefas não críticas
+    totais = {siape: t for siape, (_, t) in cargas.items()}
+    for (doador, receptor), quantidade in mov_criticas.items():
+        totais[doador] -= quantidade
+        totais[receptor] += quantidade
+    mov_demais = _equilibrar(totais, {s: cargas[s][1] - cargas[s][0] for s in doadores}, receptores)
+
+    pares = sorted(set(mov_criticas) | set(mov_demais))
+    movimentos = [
+        {'doador': doador, 'receptor': receptor,
+         'criticas': mov_criticas.get((doador, receptor), 0), 'demais': mov_demais.get((doador, receptor), 0)}
+        for doador, receptor in pares
+    ]
+
+    servidores = sorted(
+        (
+            {'siape': siape, 'receptor': siape in receptores,
+             'criticas_antes': cargas[siape][0], 'total_antes': cargas[siape][1],
+             'criticas_depois': criticas[siape], 'total_depois': totais[siape]}
+            for siape in cargas
+        ),
+        key=lambda s: (-s['total_antes'], s['siape']),
+    )
+
+    return {
+        'fila': tipo_fila,
+        'receptores': receptores,
+        'movimentos': movimentos,
+        'servidores': servidores,
+        'total_criticas': sum(m['criticas'] for m in movimentos),
+        'total_demais': sum(m['demais'] for m in movimentos),
+    }
+
+
+def escrever_arquivo_rebalanceamento(destino, plano, uo_destino, despacho, usuario=None):
+    """
+    Grava o arquivo TRANSFERIR do plano, em uma única passada pelas tarefas
+    dos doadores (prazo mais próximo primeiro), e registra o histórico.
+
+    Args:
+        destino: Arquivo binário aberto para escrita
+        plano (dict): Saída de planejar_rebalanceamento
+
+    Returns:
+        dict: {'tarefas': n, 'nome_arquivo': str}
+    """
+    cotas = {}
+    for movimento in plano['movimentos']:
+        cota = cotas.setdefault(movimento['doador'], [0, 0])
+        cota[0] += movimento['criticas']
+        cota[1] += movimento['demais']
+
+    nome_arquivo = (
+        f"acao_lote_transferir_rebalanceamento_{plano['fila']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    )
+
+    tarefas = (
+        Tarefa.objects.filter(tipo_fila=plano['fila'], ativa=True, siape_responsavel_id__in=list(cotas))
+        .order_by('siape_responsavel_id', F('data_prazo').asc(nulls_last=True), 'numero_protocolo_tarefa')
+        .values_list('numero_protocolo_tarefa', 'siape_responsavel_id', 'nivel_criticidade_calculado')
+    )
+
+    destino.write(cabecalho_arquivo('TRANSFERIR').encode('utf-8'))
+    protocolos = {siape: [] for siape in cotas}
+    for protocolo, siape, nivel in tarefas.iterator(chunk_size=TAMANHO_LOTE):
+        indice = 0 if nivel == 'CRÍTICA' else 1
+        if cotas[siape][indice] <= 0:
+            continue
+        cotas[siape][indice] -= 1
+        protocolos[siape].append(protocolo)
+        destino.write(linha_arquivo('TRANSFERIR', protocolo, uo_destino, despacho).encode('utf-8'))
+
+    ids_usuarios = dict(
+        get_user_model().objects.filter(siape__in=list(protocolos)).values_list('siape', 'id')
+    )
+    HistoricoAcaoLote.objects.bulk_create([
+        HistoricoAcaoLote(
+            servidor_id=ids_usuarios[siape],
+            codigo_fila=plano['fila'],
+            tipo_acao=HistoricoAcaoLote.TIPO_TRANSFERIR,
+            criterio_selecao='REBALANCEAMENTO',
+            quantidade_tarefas=len(lista),
+            uo_destino=uo_destino,
+            despacho=despacho,
+            gerado_por=usuario,
+            nome_arquivo=nome_arquivo,
+            protocolos_incluidos=','.join(lista),
+        )
+        for siape, lista in protocolos.items()
+        if lista and siape in ids_usuarios
+    ], batch_size=TAMANHO_LOTE)
+
+    return {'tarefas': sum(len(lista) for lista in protocolos.values()), 'nome_arquivo': nome_arquivo}
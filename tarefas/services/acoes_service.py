@@ -4,20 +4,41 @@ Serviço para gerenciar ações de bloqueio e notificações.
 Centraliza a lógica de negócio para criação e gerenciamento
 de solicitações de ações automatizadas.
 """
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection, transaction
+from django.db.models import Count, Max, Q
 from django.utils import timezone
+from tarefas.cache import NAMESPACE_FILA_BLOQUEIOS, NAMESPACE_FILA_NOTIFICACOES, invalidar_namespace
+from tarefas.filas import ORDEM_FILAS, SERVICOS_REVISAO_OFICIO
 from tarefas.models import (
     BloqueioServidor,
+    EstadoBloqueio,
     SolicitacaoNotificacao,
     HistoricoBloqueio,
-    HistoricoNotificacao
+    HistoricoNotificacao,
+    Tarefa
 )
 
 
+class ReservaPerdida(Exception):
+    """Resposta de um robô para uma solicitação reservada por outro robô"""
+
+
 class AcoesService:
     """
     Serviço para gerenciar ações de bloqueio, desbloqueio e notificações.
     """
 
+    @staticmethod
+    def avisar_robo(namespace):
+        """
+        Incrementa a geração da fila do robô após o commit, acordando os
+        long-polls da API (ver tarefas.cache.aguardar_nova_versao).
+        """
+        transaction.on_commit(lambda: invalidar_namespace(namespace))
+
     @staticmethod
     def solicitar_bloqueio(servidor, codigo_fila, solicitado_por, observacoes=''):
         """
@@ -51,6 +72,7 @@ class AcoesService:
             executado_por=solicitado_por,
             detalhes=f"Solicitação de bloqueio criada. {observacoes}"
         )
+        AcoesService.avisar_robo(NAMESPACE_FILA_BLOQUEIOS)
 
         return bloqueio
 
@@ -87,9 +109,116 @@ class AcoesService:
             executado_por=solicitado_por,
             detalhes=f"Solicitação de desbloqueio criada. {observacoes}"
         )
+        AcoesService.avisar_robo(NAMESPACE_FILA_BLOQUEIOS)
 
         return desbloqueio
 
+    @staticmethod
+    def solicitar_bloqueios_em_lote(siapes, codigos_fila, tipo_acao, solicitado_por, observacoes=''):
+        """
+        Cria solicitações de bloqueio ou desbloqueio para vários servidores e
+        filas de uma vez (cada SIAPE x cada fila).
+
+        OTIMIZAÇÃO: os alvos são validados contra o EstadoBloqueio e as
+        solicitações em aberto com uma consulta cada, e as solicitações e o
+        histórico são gravados com bulk_create em uma única transação.
+        Ficam de fora os pares que já estão no estado pedido (bloquear quem
+        já está bloqueado, desbloquear quem não está) ou que já têm
+        solicitação PENDENTE/PROCESSANDO.
+
+        Args:
+            siapes (list): SIAPEs dos servidores
+            codigos_fila (list): Códigos das filas
+            tipo_acao (str): BloqueioServidor.TIPO_BLOQUEIO ou TIPO_DESBLOQUEIO
+            solicitado_por (CustomUser): Usuário que está solicitando
+            observacoes (str): Observações adicionais
+
+        Returns:
+            dict: {'solicitacoes': [BloqueioServidor criados],
+                   'ja_no_estado': [(siape, fila)], 'ja_pendentes': [(siape, fila)],
+                   'nao_encontrados': [siape]}
+        """
+        if tipo_acao not in (BloqueioServidor.TIPO_BLOQUEIO, BloqueioServidor.TIPO_DESBLOQUEIO):
+            raise ValueError(f"Tipo de ação inválido: {tipo_acao}")
+        bloquear = tipo_acao == BloqueioServidor.TIPO_BLOQUEIO
+        siapes = list(dict.fromkeys(str(siape).strip() for siape in siapes if str(siape).strip()))
+        codigos_fila = list(dict.fromkeys(fila for fila in codigos_fila if fila))
+
+        servidores = {
+            servidor.siape: servidor
+            for servidor in get_user_model().objects.filter(siape__in=siapes).only('id', 'siape')
+        }
+        resumo = {
+            'solicitacoes': [],
+            'ja_no_estado': [],
+            'ja_pendentes': [],
+            'nao_encontrados': [siape for siape in siapes if siape not in servidores],
+        }
+        if not servidores or not codigos_fila:
+            return resumo
+
+        ids_servidores = [servidor.id for servidor in servidores.values()]
+        bloqueados = set(
+            EstadoBloqueio.objects
+            .filter(servidor_id__in=ids_servidores, codigo_fila__in=codigos_fila, bloqueado=True)
+            .values_list('servidor_id', 'codigo_fila')
+        )
+        pendentes = set(
+            BloqueioServidor.objects
+            .filter(servidor_id__in=ids_servidores, codigo_fila__in=codigos_fila, tipo_acao=tipo_acao,
+                    status__in=[BloqueioServidor.STATUS_PENDENTE, BloqueioServidor.STATUS_PROCESSANDO])
+            .values_list('servidor_id', 'codigo_fila')
+        )
+
+        novos = []
+        for siape, servidor in servidores.items():
+            for codigo_fila in codigos_fila:
+                par = (servidor.id, codigo_fila)
+                if (par in bloqueados) == bloquear:
+                    resumo['ja_no_estado'].append((siape, codigo_fila))
+                elif par in pendentes:
+                    resumo['ja_pendentes'].append((siape, codigo_fila))
+                else:
+                    novos.append(BloqueioServidor(
+                        servidor_id=servidor.id,
+                        codigo_fila=codigo_fila,
+                        tipo_acao=tipo_acao,
+                        solicitado_por=solicitado_por,
+                        observacoes=observacoes
+                    ))
+        if not novos:
+            return resumo
+
+        tipo = 'bloqueio' if bloquear else 'desbloqueio'
+        with transaction.atomic():
+            ultimo_id = None
+            if not connection.features.can_return_rows_from_bulk_insert:
+                ultimo_id = BloqueioServidor.objects.aggregate(ultimo=Max('id'))['ultimo'] or 0
+            novos = BloqueioServidor.objects.bulk_create(novos, batch_size=500)
+            if ultimo_id is not None:
+                # MySQL não devolve os ids do bulk_create: relê as linhas recém-criadas
+                novos = list(BloqueioServidor.objects.filter(
+                    id__gt=ultimo_id, servidor_id__in=ids_servidores, codigo_fila__in=codigos_fila,
+                    tipo_acao=tipo_acao, solicitado_por=solicitado_por, status=BloqueioServidor.STATUS_PENDENTE
+                ).order_by('id'))
+
+            HistoricoBloqueio.objects.bulk_create([
+                HistoricoBloqueio(
+                    bloqueio=bloqueio,
+                    servidor_id=bloqueio.servidor_id,
+                    codigo_fila=bloqueio.codigo_fila,
+                    tipo_acao=tipo_acao,
+                    status=BloqueioServidor.STATUS_PENDENTE,
+                    executado_por=solicitado_por,
+                    detalhes=f"Solicitação de {tipo} criada (em lote). {observacoes}"
+                )
+                for bloqueio in novos
+            ], batch_size=500)
+            AcoesService.avisar_robo(NAMESPACE_FILA_BLOQUEIOS)
+
+        resumo['solicitacoes'] = novos
+        return resumo
+
     @staticmethod
     def solicitar_notificacao_pgb(servidor, tipo_notificacao, solicitado_por, observacoes=''):
         """
@@ -129,82 +258,342 @@ class AcoesService:
             executado_por=solicitado_por,
             detalhes=f"Solicitação de notificação criada. {observacoes}"
         )
+        AcoesService.avisar_robo(NAMESPACE_FILA_NOTIFICACOES)
 
         return notificacao
 
     @staticmethod
-    def obter_solicitacoes_bloqueio_pendentes():
+    def obter_solicitacoes_bloqueio_pendentes(desde_id=None):
         """
         Retorna todas as solicitações de bloqueio/desbloqueio pendentes.
 
+        Args:
+            desde_id (int): Cursor; só solicitações com id maior
+
         Returns:
             QuerySet: Solicitações pendentes
         """
-        return BloqueioServidor.objects.filter(
-            status=BloqueioServidor.STATUS_PENDENTE
-        ).select_related('servidor', 'solicitado_por').order_by('data_solicitacao')
+        solicitacoes = BloqueioServidor.objects.filter(status=BloqueioServidor.STATUS_PENDENTE)
+        if desde_id:
+            return solicitacoes.filter(id__gt=desde_id).select_related('servidor', 'solicitado_por').order_by('id')
+        return solicitacoes.select_related('servidor', 'solicitado_por').order_by('data_solicitacao')
 
     @staticmethod
-    def obter_solicitacoes_notificacao_pendentes():
+    def obter_solicitacoes_notificacao_pendentes(desde_id=None):
         """
         Retorna todas as solicitações de notificação PGB pendentes.
 
+        Args:
+            desde_id (int): Cursor; só solicitações com id maior
+
         Returns:
             QuerySet: Solicitações pendentes
         """
-        return SolicitacaoNotificacao.objects.filter(
-            status=SolicitacaoNotificacao.STATUS_PENDENTE
-        ).select_related('servidor', 'solicitado_por').order_by('data_solicitacao')
+        solicitacoes = SolicitacaoNotificacao.objects.filter(status=SolicitacaoNotificacao.STATUS_PENDENTE)
+        if desde_id:
+            return solicitacoes.filter(id__gt=desde_id).select_related('servidor', 'solicitado_por').order_by('id')
+        return solicitacoes.select_related('servidor', 'solicitado_por').order_by('data_solicitacao')
 
     @staticmethod
-    def processar_resposta_bloqueio(bloqueio_id, sucesso, resposta_robo='', mensagem_erro=''):
+    def _reservar(modelo, robo_id, limite, ttl_segundos):
         """
-        Processa a resposta do robô para uma solicitação de bloqueio.
-
-        Args:
-            bloqueio_id (int): ID da solicitação
-            sucesso (bool): Se a operação foi bem-sucedida
-            resposta_robo (str): Resposta técnica do robô
-            mensagem_erro (str): Mensagem de erro (se houver)
+        Reserva até `limite` solicitações PENDENTE (ou PROCESSANDO com reserva
+        vencida) para o robô: SELECT ... FOR UPDATE SKIP LOCKED, então robôs
+        em paralelo nunca recebem a mesma solicitação.
 
         Returns:
-            BloqueioServidor: Solicitação atualizada
+            list: ids reservados, em ordem de solicitação
         """
-        bloqueio = BloqueioServidor.objects.get(pk=bloqueio_id)
+        agora = timezone.now()
+        disponiveis = modelo.objects.filter(
+            Q(status=modelo.STATUS_PENDENTE)
+            | Q(status=modelo.STATUS_PROCESSANDO, reservado_ate__lt=agora)
+        )
+        with transaction.atomic():
+            ids = list(
+                disponiveis.select_for_update(skip_locked=True)
+                .order_by('data_solicitacao', 'id')
+                .values_list('id', flat=True)[:limite]
+            )
+            if ids:
+                modelo.objects.filter(id__in=ids).update(
+                    status=modelo.STATUS_PROCESSANDO,
+                    robo_id=robo_id,
+                    reservado_ate=agora + timedelta(seconds=ttl_segundos),
+                    data_processamento=agora,
+                )
+        return ids
 
-        if sucesso:
-            bloqueio.marcar_como_concluido(resposta_robo=resposta_robo)
+    @staticmethod
+    def reservar_bloqueios(robo_id, limite=50, ttl_segundos=300):
+        """
+        Reserva solicitações de bloqueio/desbloqueio para um robô.
+
+        Args:
+            robo_id (str): Identificador da instância do robô
+            limite (int): Máximo de solicitações
+            ttl_segundos (int): Validade da reserva; vencida, a solicitação
+                volta a ser entregue a qualquer robô
 
-            # Registrar no histórico
-            HistoricoBloqueio.objects.create(
+        Returns:
+            QuerySet: Solicitações reservadas (PROCESSANDO)
+        """
+        ids = AcoesService._reservar(BloqueioServidor, robo_id, limite, ttl_segundos)
+        solicitacoes = BloqueioServidor.objects.filter(id__in=ids).select_related('servidor', 'solicitado_por')
+        HistoricoBloqueio.objects.bulk_create([
+            HistoricoBloqueio(
                 bloqueio=bloqueio,
                 servidor=bloqueio.servidor,
                 codigo_fila=bloqueio.codigo_fila,
                 tipo_acao=bloqueio.tipo_acao,
-                status=BloqueioServidor.STATUS_CONCLUIDO,
+                status=BloqueioServidor.STATUS_PROCESSANDO,
                 executado_por=None,  # Robô
-                detalhes="Ação concluída com sucesso pelo robô.",
-                resposta_robo=resposta_robo
+                detalhes=f"Reservada pelo robô {robo_id} até {bloqueio.reservado_ate:%d/%m/%Y %H:%M:%S}.",
             )
-        else:
-            bloqueio.marcar_como_erro(mensagem_erro=mensagem_erro)
+            for bloqueio in solicitacoes
+        ])
+        return solicitacoes.order_by('data_solicitacao', 'id')
 
-            # Registrar no histórico
-            HistoricoBloqueio.objects.create(
-                bloqueio=bloqueio,
-                servidor=bloqueio.servidor,
-                codigo_fila=bloqueio.codigo_fila,
-                tipo_acao=bloqueio.tipo_acao,
-                status=BloqueioServidor.STATUS_ERRO,
+    @staticmethod
+    def reservar_notificacoes(robo_id, limite=50, ttl_segundos=300):
+        """
+        Reserva solicitações de notificação PGB para um robô
+        (mesmas regras de reservar_bloqueios).
+
+        Returns:
+            QuerySet: Solicitações reservadas (PROCESSANDO)
+        """
+        ids = AcoesService._reservar(SolicitacaoNotificacao, robo_id, limite, ttl_segundos)
+        solicitacoes = SolicitacaoNotificacao.objects.filter(id__in=ids).select_related('servidor', 'solicitado_por')
+        HistoricoNotificacao.objects.bulk_create([
+            HistoricoNotificacao(
+                notificacao=notificacao,
+                servidor=notificacao.servidor,
+                tipo_notificacao=notificacao.tipo_notificacao,
+                status=SolicitacaoNotificacao.STATUS_PROCESSANDO,
                 executado_por=None,  # Robô
-                detalhes=f"Erro ao processar ação: {mensagem_erro}",
-                resposta_robo=resposta_robo
+                detalhes=f"Reservada pelo robô {robo_id} até {notificacao.reservado_ate:%d/%m/%Y %H:%M:%S}.",
+            )
+            for notificacao in solicitacoes
+        ])
+        return solicitacoes.order_by('data_solicitacao', 'id')
+
+    # Status finais: respostas repetidas (reenvio do robô) não geram novo histórico
+    STATUS_FINAIS = ('CONCLUIDO', 'ERRO', 'CANCELADO')
+
+    @staticmethod
+    def _reserva_perdida(solicitacao, robo_id):
+        """
+        Indica se a solicitação está reservada para outro robô (a reserva do
+        `robo_id` venceu e foi entregue a outro). Respostas sem robo_id
+        (robôs que usam /pendentes/) não são verificadas.
+        """
+        return bool(robo_id and solicitacao.robo_id and solicitacao.robo_id != robo_id)
+
+    @staticmethod
+    def _travar_para_resposta(modelo, respostas, campo_id):
+        """
+        Trava (SELECT ... FOR UPDATE) as solicitações das respostas e separa
+        as que podem ser aplicadas. Deve rodar dentro de transaction.atomic.
+
+        Returns:
+            tuple: ([(resultado, solicitação)] por item, [(solicitação, resposta)] a aplicar)
+        """
+        ids = [resposta[campo_id] for resposta in respostas]
+        solicitacoes = modelo.objects.select_for_update().in_bulk(ids)
+
+        itens, aplicar, vistos = [], [], set()
+        for resposta in respostas:
+            solicitacao_id = resposta[campo_id]
+            solicitacao = solicitacoes.get(solicitacao_id)
+            if solicitacao is None:
+                resultado = 'NAO_ENCONTRADO'
+            elif solicitacao_id in vistos:
+                resultado = 'DUPLICADO'
+            elif solicitacao.status in AcoesService.STATUS_FINAIS:
+                resultado = 'JA_FINALIZADO'
+            elif AcoesService._reserva_perdida(solicitacao, resposta.get('robo_id')):
+                resultado = 'RESERVA_PERDIDA'
+            else:
+                resultado = 'APLICADA'
+                aplicar.append((solicitacao, resposta))
+            vistos.add(solicitacao_id)
+            itens.append(({campo_id: solicitacao_id, 'resultado': resultado}, solicitacao))
+        return itens, aplicar
+
+    @staticmethod
+    def _resultados(itens):
+        """Resultados por item com o status final de cada solicitação"""
+        return [
+            {**resultado, 'status': solicitacao.status if solicitacao else None}
+            for resultado, solicitacao in itens
+        ]
+
+    @staticmethod
+    def processar_respostas_bloqueio(respostas):
+        """
+        Aplica várias respostas do robô de uma vez (uma transação,
+        bulk_update nas solicitações e bulk_create no histórico).
+
+        Args:
+            respostas (list): dicts com bloqueio_id, sucesso, resposta_robo, mensagem_erro
+                e, opcional, robo_id
+
+        Returns:
+            list: por item, {'bloqueio_id', 'resultado', 'status'}; resultado é
+            APLICADA, NAO_ENCONTRADO, DUPLICADO, JA_FINALIZADO ou RESERVA_PERDIDA
+        """
+        agora = timezone.now()
+        with transaction.atomic():
+            itens, aplicar = AcoesService._travar_para_resposta(BloqueioServidor, respostas, 'bloqueio_id')
+            historicos = []
+            for bloqueio, resposta in aplicar:
+                resposta_robo = resposta.get('resposta_robo', '')
+                mensagem_erro = resposta.get('mensagem_erro', '')
+                bloqueio.status = BloqueioServidor.STATUS_CONCLUIDO if resposta['sucesso'] else BloqueioServidor.STATUS_ERRO
+                bloqueio.data_conclusao = agora
+                bloqueio.reservado_ate = None
+                if resposta['sucesso']:
+                    bloqueio.resposta_robo = resposta_robo
+                else:
+                    bloqueio.mensagem_erro = mensagem_erro
+                historicos.append(HistoricoBloqueio(
+                    bloqueio=bloqueio,
+                    servidor_id=bloqueio.servidor_id,
+                    codigo_fila=bloqueio.codigo_fila,
+                    tipo_acao=bloqueio.tipo_acao,
+                    status=bloqueio.status,
+                    executado_por=None,  # Robô
+                    detalhes=(
+                        "Ação concluída com sucesso pelo robô." if resposta['sucesso']
+                        else f"Erro ao processar ação: {mensagem_erro}"
+                    ),
+                    resposta_robo=resposta_robo
+                ))
+            BloqueioServidor.objects.bulk_update(
+                [bloqueio for bloqueio, _ in aplicar],
+                ['status', 'data_conclusao', 'reservado_ate', 'resposta_robo', 'mensagem_erro'],
+                batch_size=500
+            )
+            HistoricoBloqueio.objects.bulk_create(historicos, batch_size=500)
+            EstadoBloqueio.aplicar([bloqueio for bloqueio, resposta in aplicar if resposta['sucesso']])
+        return AcoesService._resultados(itens)
+
+    @staticmethod
+    def processar_respostas_notificacao(respostas):
+        """
+        Aplica várias respostas do robô sobre notificações de uma vez
+        (mesmas regras de processar_respostas_bloqueio).
+
+        Args:
+            respostas (list): dicts com notificacao_id, sucesso, numero_protocolo,
+                resposta_robo, mensagem_erro e, opcional, robo_id
+
+        Returns:
+            list: por item, {'notificacao_id', 'resultado', 'status'}
+        """
+        agora = timezone.now()
+        with transaction.atomic():
+            itens, aplicar = AcoesService._travar_para_resposta(
+                SolicitacaoNotificacao, respostas, 'notificacao_id'
             )
+            historicos = []
+            for notificacao, resposta in aplicar:
+                resposta_robo = resposta.get('resposta_robo', '')
+                mensagem_erro = resposta.get('mensagem_erro', '')
+                numero_protocolo = resposta.get('numero_protocolo', '') if resposta['sucesso'] else ''
+                notificacao.status = (
+                    SolicitacaoNotificacao.STATUS_CONCLUIDO if resposta['sucesso']
+                    else SolicitacaoNotificacao.STATUS_ERRO
+                )
+                notificacao.data_conclusao = agora
+                notificacao.reservado_ate = None
+                if resposta['sucesso']:
+                    notificacao.numero_protocolo_criado = numero_protocolo
+                    notificacao.resposta_robo = resposta_robo
+                else:
+                    notificacao.mensagem_erro = mensagem_erro
+                historicos.append(HistoricoNotificacao(
+                    notificacao=notificacao,
+                    servidor_id=notificacao.servidor_id,
+                    tipo_notificacao=notificacao.tipo_notificacao,
+                    status=notificacao.status,
+                    executado_por=None,  # Robô
+                    detalhes=(
+                        "Notificação criada com sucesso pelo robô." if resposta['sucesso']
+                        else f"Erro ao processar notificação: {mensagem_erro}"
+                    ),
+                    numero_protocolo=numero_protocolo,
+                    resposta_robo=resposta_robo
+                ))
+            SolicitacaoNotificacao.objects.bulk_update(
+                [notificacao for notificacao, _ in aplicar],
+                ['status', 'data_conclusao', 'reservado_ate', 'numero_protocolo_criado', 'resposta_robo',
+                 'mensagem_erro'],
+                batch_size=500
+            )
+            HistoricoNotificacao.objects.bulk_create(historicos, batch_size=500)
+        return AcoesService._resultados(itens)
+
+    @staticmethod
+    def processar_resposta_bloqueio(bloqueio_id, sucesso, resposta_robo='', mensagem_erro='', robo_id=''):
+        """
+        Processa a resposta do robô para uma solicitação de bloqueio.
+
+        Args:
+            bloqueio_id (int): ID da solicitação
+            sucesso (bool): Se a operação foi bem-sucedida
+            resposta_robo (str): Resposta técnica do robô
+            mensagem_erro (str): Mensagem de erro (se houver)
+            robo_id (str): Robô que reservou a solicitação (opcional)
+
+        Returns:
+            BloqueioServidor: Solicitação atualizada
+
+        Raises:
+            ReservaPerdida: A solicitação está reservada para outro robô
+        """
+        # Ação e estado materializado (EstadoBloqueio) na mesma transação
+        with transaction.atomic():
+            bloqueio = BloqueioServidor.objects.select_for_update().get(pk=bloqueio_id)
+            if AcoesService._reserva_perdida(bloqueio, robo_id):
+                raise ReservaPerdida(f"Reservada para o robô {bloqueio.robo_id}")
+
+            if sucesso:
+                bloqueio.marcar_como_concluido(resposta_robo=resposta_robo)
+                EstadoBloqueio.aplicar([bloqueio])
+
+                # Registrar no histórico
+                HistoricoBloqueio.objects.create(
+                    bloqueio=bloqueio,
+                    servidor=bloqueio.servidor,
+                    codigo_fila=bloqueio.codigo_fila,
+                    tipo_acao=bloqueio.tipo_acao,
+                    status=BloqueioServidor.STATUS_CONCLUIDO,
+                    executado_por=None,  # Robô
+                    detalhes="Ação concluída com sucesso pelo robô.",
+                    resposta_robo=resposta_robo
+                )
+            else:
+                bloqueio.marcar_como_erro(mensagem_erro=mensagem_erro)
+
+                # Registrar no histórico
+                HistoricoBloqueio.objects.create(
+                    bloqueio=bloqueio,
+                    servidor=bloqueio.servidor,
+                    codigo_fila=bloqueio.codigo_fila,
+                    tipo_acao=bloqueio.tipo_acao,
+                    status=BloqueioServidor.STATUS_ERRO,
+                    executado_por=None,  # Robô
+                    detalhes=f"Erro ao processar ação: {mensagem_erro}",
+                    resposta_robo=resposta_robo
+                )
 
         return bloqueio
 
     @staticmethod
-    def processar_resposta_notificacao(notificacao_id, sucesso, numero_protocolo='', resposta_robo='', mensagem_erro=''):
+    def processar_resposta_notificacao(notificacao_id, sucesso, numero_protocolo='', resposta_robo='', mensagem_erro='',
+                                       robo_id=''):
         """
         Processa a resposta do robô para uma solicitação de notificação.
 
@@ -214,42 +603,49 @@ class AcoesService:
             numero_protocolo (str): Protocolo da tarefa criada
             resposta_robo (str): Resposta técnica do robô
             mensagem_erro (str): Mensagem de erro (se houver)
+            robo_id (str): Robô que reservou a solicitação (opcional)
 
         Returns:
             SolicitacaoNotificacao: Solicitação atualizada
-        """
-        notificacao = SolicitacaoNotificacao.objects.get(pk=notificacao_id)
-
-        if sucesso:
-            notificacao.marcar_como_concluido(
-                numero_protocolo=numero_protocolo,
-                resposta_robo=resposta_robo
-            )
 
-            # Registrar no histórico
-            HistoricoNotificacao.objects.create(
-                notificacao=notificacao,
-                servidor=notificacao.servidor,
-                tipo_notificacao=notificacao.tipo_notificacao,
-                status=SolicitacaoNotificacao.STATUS_CONCLUIDO,
-                executado_por=None,  # Robô
-                detalhes="Notificação criada com sucesso pelo robô.",
-                numero_protocolo=numero_protocolo,
-                resposta_robo=resposta_robo
-            )
-        else:
-            notificacao.marcar_como_erro(mensagem_erro=mensagem_erro)
-
-            # Registrar no histórico
-            HistoricoNotificacao.objects.create(
-                notificacao=notificacao,
-                servidor=notificacao.servidor,
-                tipo_notificacao=notificacao.tipo_notificacao,
-                status=SolicitacaoNotificacao.STATUS_ERRO,
-                executado_por=None,  # Robô
-                detalhes=f"Erro ao processar notificação: {mensagem_erro}",
-                resposta_robo=resposta_robo
-            )
+        Raises:
+            ReservaPerdida: A solicitação está reservada para outro robô
+        """
+        with transaction.atomic():
+            notificacao = SolicitacaoNotificacao.objects.select_for_update().get(pk=notificacao_id)
+            if AcoesService._reserva_perdida(notificacao, robo_id):
+                raise ReservaPerdida(f"Reservada para o robô {notificacao.robo_id}")
+
+            if sucesso:
+                notificacao.marcar_como_concluido(
+                    numero_protocolo=numero_protocolo,
+                    resposta_robo=resposta_robo
+                )
+
+                # Registrar no histórico
+                HistoricoNotificacao.objects.create(
+                    notificacao=notificacao,
+                    servidor=notificacao.servidor,
+                    tipo_notificacao=notificacao.tipo_notificacao,
+                    status=SolicitacaoNotificacao.STATUS_CONCLUIDO,
+                    executado_por=None,  # Robô
+                    detalhes="Notificação criada com sucesso pelo robô.",
+                    numero_protocolo=numero_protocolo,
+                    resposta_robo=resposta_robo
+                )
+            else:
+                notificacao.marcar_como_erro(mensagem_erro=mensagem_erro)
+
+                # Registrar no histórico
+                HistoricoNotificacao.objects.create(
+                    notificacao=notificacao,
+                    servidor=notificacao.servidor,
+                    tipo_notificacao=notificacao.tipo_notificacao,
+                    status=SolicitacaoNotificacao.STATUS_ERRO,
+                    executado_por=None,  # Robô
+                    detalhes=f"Erro ao processar notificação: {mensagem_erro}",
+                    resposta_robo=resposta_robo
+                )
 
         return notificacao
 
@@ -285,3 +681,102 @@ class AcoesService:
             resultado['ultima_solicitacao'] = solicitacao_pendente
 
         return resultado
+
+    @staticmethod
+    def verificar_status_servidores(siapes, codigo_fila=''):
+        """
+        Status completo de vários servidores em número fixo de consultas.
+
+        Substitui a sequência por servidor (um servidor_esta_bloqueado por
+        fila + pendências + notificação + revisão de ofício + contagem) por
+        quatro consultas agrupadas, independentemente da quantidade de SIAPEs:
+
+            1. Filas bloqueadas (estado materializado em EstadoBloqueio)
+            2. Solicitações pendentes/processando por (servidor, fila)
+            3. Servidores com notificação PGB concluída
+            4. Tarefas ativas por (servidor, fila) com contagem de revisão de ofício
+
+        Args:
+            siapes (list): SIAPEs dos servidores
+            codigo_fila (str): Fila específica para 'bloqueado' e 'total_tarefas'
+
+        Returns:
+            dict: {siape: {'bloqueado', 'filas_bloqueadas', 'tem_solicitacao_pendente',
+                           'tem_notificacao', 'tem_revisao_oficio',
+                           'total_revisao_oficio', 'total_tarefas', 'tarefas_por_fila'}}
+        """
+        siapes = list(dict.fromkeys(str(s) for s in siapes if s))
+        status = {
+            siape: {
+                'bloqueado': False,
+                'filas_bloqueadas': [],
+                'tem_solicitacao_pendente': False,
+                'tem_notificacao': False,
+                'tem_revisao_oficio': False,
+                'total_revisao_oficio': 0,
+                'total_tarefas': 0,
+                'tarefas_por_fila': {},
+            }
+            for siape in siapes
+        }
+        if not siapes:
+            return status
+
+        # 1. Estado atual de bloqueio (uma linha por servidor e fila bloqueada)
+        filas_bloqueadas = (
+            EstadoBloqueio.objects
+            .filter(servidor__siape__in=siapes, bloqueado=True)
+            .values_list('servidor__siape', 'codigo_fila')
+        )
+        for siape, fila in filas_bloqueadas:
+            if fila == codigo_fila:
+                status[siape]['bloqueado'] = True
+            if fila in ORDEM_FILAS:
+                status[siape]['filas_bloqueadas'].append(fila)
+        for dados in status.values():
+            dados['filas_bloqueadas'].sort(key=ORDEM_FILAS.index)
+
+        # 2. Solicitações aguardando o robô (qualquer fila)
+        pendentes = (
+            BloqueioServidor.objects
+            .filter(
+                servidor__siape__in=siapes,
+                status__in=[BloqueioServidor.STATUS_PENDENTE, BloqueioServidor.STATUS_PROCESSANDO]
+            )
+            .values_list('servidor__siape', flat=True)
+            .distinct()
+        )
+        for siape in pendentes:
+            status[siape]['tem_solicitacao_pendente'] = True
+
+        # 3. Notificações PGB concluídas
+        com_notificacao = (
+            SolicitacaoNotificacao.objects
+            .filter(servidor__siape__in=siapes, status=SolicitacaoNotificacao.STATUS_CONCLUIDO)
+            .values_list('servidor__siape', flat=True)
+            .distinct()
+        )
+        for siape in com_notificacao:
+            status[siape]['tem_notificacao'] = True
+
+        # 4. Tarefas ativas por fila, com revisão de ofício no mesmo GROUP BY
+        contagens = (
+            Tarefa.objects
+            .filter(ativa=True, siape_responsavel_id__in=siapes)
+            .values('siape_responsavel_id', 'tipo_fila')
+            .annotate(
+                total=Count('numero_protocolo_tarefa'),
+                revisao=Count('numero_protocolo_tarefa', filter=Q(nome_servico__in=SERVICOS_REVISAO_OFICIO)),
+            )
+            .order_by()
+        )
+        for linha in contagens:
+            dados = status[linha['siape_responsavel_id']]
+            dados['tarefas_por_fila'][linha['tipo_fila']] = linha['total']
+            dados['total_revisao_oficio'] += linha['revisao']
+            if linha['tipo_fila'] == codigo_fila:
+                dados['total_tarefas'] = linha['total']
+        for dados in status.values():
+            dados['tem_revisao_oficio'] = dados['total_revisao_oficio'] > 0
+
+        return status
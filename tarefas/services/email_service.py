@@ -3,16 +3,217 @@ Serviço de envio de emails usando Microsoft Graph API.
 
 Integração com Azure AD para envio de emails automatizados
 usando credenciais de aplicação.
+
+OTIMIZAÇÃO: o app MSAL e a sessão HTTP são únicos por processo.
+    - O ConfidentialClientApplication guarda o token no cache em memória
+      e só volta ao Azure AD quando ele está para expirar (MSAL >= 1.23).
+    - A requests.Session mantém um pool de conexões keep-alive (sem novo
+      handshake TLS por email) e repete as chamadas que recebem 429/5xx
+      com backoff, respeitando o Retry-After.
+
+Envio em massa (enviar_em_lote, usado pelas campanhas): as mensagens vão
+em requisições JSON $batch do Graph com até 20 envios cada, disparadas por
+um pool de threads e limitadas por um LimitadorTaxa global que também
+respeita o Retry-After das respostas 429. O resultado volta ao
+HistoricoEmail com um único bulk_update.
+
+Renderização: os TemplateEmail compilados ficam em cache por processo,
+identificados por (id, data_alteracao), e a tabela de tarefas é um template
+compilado (templates/emails/lista_tarefas.html) sobre linhas de
+values_list. O corpo lista até LIMITE_TAREFAS_EMAIL tarefas; a lista
+completa vai em um CSV anexo.
+
+Configuração (settings): GRAPH_API_URL, GRAPH_HTTP_TIMEOUT,
+GRAPH_HTTP_TENTATIVAS, GRAPH_HTTP_BACKOFF, GRAPH_HTTP_POOL,
+GRAPH_LOTE_THREADS e GRAPH_REQUISICOES_POR_SEGUNDO.
 """
+import base64
+import csv
+import io
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
 import requests
 import msal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from django.conf import settings
+from django.db.models import QuerySet
 from django.template import Template, Context
+from django.template.loader import get_template
 from django.utils import timezone
 from tarefas.models import HistoricoEmail, TemplateEmail
 
 
+# Respostas do Graph/Azure AD que valem nova tentativa
+STATUS_RETENTATIVA = (429, 500, 502, 503, 504)
+# Repetidos já na sessão HTTP: o Graph recusou antes de processar (o POST pode
+# ser reenviado sem risco de e-mail duplicado). Os demais ficam para enviar_em_lote.
+STATUS_RETENTATIVA_SESSAO = (429, 503)
+# Lote não enviado por enviar_em_lote(prazo=...)
+PRAZO_ESGOTADO = 'prazo'
+
+# Limite de requisições por chamada JSON $batch do Graph
+TAMANHO_LOTE_GRAPH = 20
+
+# Tarefas listadas no corpo do email; com mais que isso a lista completa
+# (até LIMITE_TAREFAS_ANEXO) segue em CSV anexo
+LIMITE_TAREFAS_EMAIL = 20
+LIMITE_TAREFAS_ANEXO = 5000
+
+CAMPOS_LISTA_EMAIL = [
+    'numero_protocolo_tarefa', 'nome_servico', 'data_prazo',
+    'dias_pendente_criticidade_calculado', 'nivel_criticidade_calculado',
+]
+
+_lock = threading.Lock()
+_sessao_http = None
+_aplicacoes_msal = {}
+_limitador = None
+# id do TemplateEmail -> (data_alteracao, assunto compilado, corpo compilado)
+_templates_compilados = {}
+
+
+class LimitadorTaxa:
+    """
+    Limita as requisições ao Graph por segundo, entre todas as threads.
+
+    pausar() empurra a próxima liberação (Retry-After), valendo para todos.
+    """
+
+    def __init__(self, por_segundo):
+        self.intervalo = 1.0 / por_segundo if por_segundo else 0.0
+        self._proxima = 0.0
+        self._lock = threading.Lock()
+
+    def aguardar(self):
+        with self._lock:
+            agora = time.monotonic()
+            liberacao = max(agora, self._proxima)
+            self._proxima = liberacao + self.intervalo
+        if liberacao > agora:
+            time.sleep(liberacao - agora)
+
+    def pausar(self, segundos):
+        with self._lock:
+            self._proxima = max(self._proxima, time.monotonic() + segundos)
+
+
+def obter_limitador():
+    """Limitador de taxa do processo (GRAPH_REQUISICOES_POR_SEGUNDO)"""
+    global _limitador
+    with _lock:
+        if _limitador is None:
+            _limitador = LimitadorTaxa(getattr(settings, 'GRAPH_REQUISICOES_POR_SEGUNDO', 4))
+        return _limitador
+
+
+def obter_sessao_http():
+    """
+    Sessão HTTP do processo, com pool keep-alive e novas tentativas.
+
+    Só repete o que não chegou a ser processado: falha de conexão e
+    STATUS_RETENTATIVA_SESSAO. Timeout de leitura e 5xx de um POST podem
+    ter enviado o e-mail, então não são repetidos aqui (read=0).
+    """
+    global _sessao_http
+    with _lock:
+        if _sessao_http is None:
+            tentativas = Retry(
+                total=getattr(settings, 'GRAPH_HTTP_TENTATIVAS', 3),
+                read=0,
+                backoff_factor=getattr(settings, 'GRAPH_HTTP_BACKOFF', 1.0),
+                status_forcelist=STATUS_RETENTATIVA_SESSAO,
+                allowed_methods=frozenset({'GET', 'POST'}),
+                respect_retry_after_header=True,
+                raise_on_status=False,
+            )
+            tamanho_pool = getattr(settings, 'GRAPH_HTTP_POOL', 10)
+            adaptador = HTTPAdapter(pool_connections=tamanho_pool, pool_maxsize=tamanho_pool, max_retries=tentativas)
+            sessao = requests.Session()
+            sessao.mount('https://', adaptador)
+            sessao.mount('http://', adaptador)
+            _sessao_http = sessao
+        return _sessao_http
+
+
+def obter_aplicacao_msal(client_id, client_secret, authority):
+    """App MSAL do processo para as credenciais (o cache de token fica nele)"""
+    chave = (client_id, client_secret, authority)
+    with _lock:
+        aplicacao = _aplicacoes_msal.get(chave)
+    if aplicacao is None:
+        aplicacao = msal.ConfidentialClientApplication(
+            client_id=client_id,
+            client_credential=client_secret,
+            authority=authority,
+            http_client=obter_sessao_http(),
+        )
+        with _lock:
+            aplicacao = _aplicacoes_msal.setdefault(chave, aplicacao)
+    return aplicacao
+
+
+def redefinir_clientes():
+    """Descarta sessão, apps MSAL e limitador (troca de credenciais/configuração e testes)"""
+    global _sessao_http, _limitador
+    with _lock:
+        if _sessao_http is not None:
+            _sessao_http.close()
+        _sessao_http = None
+        _limitador = None
+        _aplicacoes_msal.clear()
+        _templates_compilados.clear()
+
+
+def obter_templates_compilados(template_email):
+    """
+    Assunto e corpo compilados do TemplateEmail, reaproveitados enquanto
+    data_alteracao não mudar.
+
+    Returns:
+        tuple: (Template do assunto, Template do corpo)
+    """
+    em_cache = _templates_compilados.get(template_email.pk)
+    if em_cache is None or em_cache[0] != template_email.data_alteracao:
+        em_cache = (template_email.data_alteracao, Template(template_email.assunto),
+                    Template(template_email.corpo_html))
+        with _lock:
+            _templates_compilados[template_email.pk] = em_cache
+    return em_cache[1], em_cache[2]
+
+
+def obter_templates_por_nome(template_nome):
+    """
+    Como obter_templates_compilados, a partir do nome de um template ativo.
+    Com o template em cache só (id, data_alteracao) são lidos do banco.
+
+    Raises:
+        TemplateEmail.DoesNotExist
+    """
+    linha = (
+        TemplateEmail.objects.filter(nome=template_nome, ativo=True)
+        .values_list('id', 'data_alteracao').first()
+    )
+    if linha is None:
+        raise TemplateEmail.DoesNotExist(template_nome)
+    em_cache = _templates_compilados.get(linha[0])
+    if em_cache is not None and em_cache[0] == linha[1]:
+        return em_cache[1], em_cache[2]
+    return obter_templates_compilados(TemplateEmail.objects.get(id=linha[0]))
+
+
+def _segundos_retry_after(cabecalhos):
+    valor = {chave.lower(): v for chave, v in (cabecalhos or {}).items()}.get('retry-after')
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return 0.0
+
+
 class EmailService:
     """
     Serviço para envio de emails via Microsoft Graph API.
@@ -27,10 +228,13 @@ class EmailService:
 
         self.authority = f"https://login.microsoftonline.com/{self.tenant_id}"
         self.scope = ["https://graph.microsoft.com/.default"]
+        self.graph_url = getattr(settings, 'GRAPH_API_URL', 'https://graph.microsoft.com/v1.0').rstrip('/')
+        self.timeout = getattr(settings, 'GRAPH_HTTP_TIMEOUT', 30)
 
     def get_access_token(self):
         """
-        Obtém o token de acesso para o aplicativo.
+        Obtém o token de acesso para o aplicativo (do cache do app MSAL
+        enquanto válido).
 
         Returns:
             str: Token de acesso
@@ -38,11 +242,7 @@ class EmailService:
         Raises:
             Exception: Se falhar ao obter o token
         """
-        app = msal.ConfidentialClientApplication(
-            client_id=self.client_id,
-            client_credential=self.client_secret,
-            authority=self.authority
-        )
+        app = obter_aplicacao_msal(self.client_id, self.client_secret, self.authority)
 
         result = app.acquire_token_for_client(scopes=self.scope)
 
@@ -52,7 +252,7 @@ class EmailService:
             error_description = result.get("error_description", "Sem detalhes.")
             raise Exception(f"Falha ao obter token de acesso: {error_description}")
 
-    def enviar_email(self, destinatario_email, assunto, corpo_html, servidor, enviado_por):
+    def enviar_email(self, destinatario_email, assunto, corpo_html, servidor, enviado_por, anexo=None):
         """
         Envia um email usando o Microsoft Graph API.
 
@@ -62,6 +262,7 @@ class EmailService:
             corpo_html (str): Corpo do email em HTML
             servidor (CustomUser): Objeto do servidor destinatário
             enviado_por (CustomUser): Usuário que está enviando o email
+            anexo (tuple): Opcional, (nome, conteúdo) do CSV anexo
 
         Returns:
             tuple: (sucesso: bool, historico: HistoricoEmail)
@@ -73,7 +274,8 @@ class EmailService:
             assunto=assunto,
             corpo_email=corpo_html,
             enviado_por=enviado_por,
-            status=HistoricoEmail.STATUS_PENDENTE
+            status=HistoricoEmail.STATUS_PENDENTE,
+            **self.campos_anexo(anexo),
         )
 
         try:
@@ -81,24 +283,17 @@ class EmailService:
             access_token = self.get_access_token()
 
             # Preparar requisição
-            url = f"https://graph.microsoft.com/v1.0/users/{self.sender_email}/sendMail"
-
-            email_msg = {
-                "message": {
-                    "subject": assunto,
-                    "body": {"contentType": "HTML", "content": corpo_html},
-                    "toRecipients": [{"emailAddress": {"address": destinatario_email}}]
-                },
-                "saveToSentItems": "true"
-            }
+            url = f"{self.graph_url}/users/{self.sender_email}/sendMail"
+            email_msg = self.mensagem_graph(destinatario_email, assunto, corpo_html,
+                                            historico.anexo_nome, historico.anexo_csv)
 
             headers = {
                 'Authorization': f'Bearer {access_token}',
                 'Content-Type': 'application/json'
             }
 
-            # Enviar email
-            response = requests.post(url, headers=headers, json=email_msg)
+            # Enviar email (conexão do pool; 429/5xx repetidos pela sessão)
+            response = obter_sessao_http().post(url, headers=headers, json=email_msg, timeout=self.timeout)
 
             if response.status_code == 202:
                 # Sucesso
@@ -115,7 +310,177 @@ class EmailService:
             historico.marcar_como_erro(mensagem_erro=str(e))
             return False, historico
 
-    def enviar_email_por_template(self, template_nome, servidor, enviado_por, contexto_extra=None):
+    def enfileirar_email(self, destinatario_email, assunto, corpo_html, servidor, enviado_por, anexo=None):
+        """
+        Grava o email na caixa de saída; o worker envia (tarefas/caixa_saida.py).
+
+        Returns:
+            HistoricoEmail: registro PENDENTE
+        """
+        return HistoricoEmail.objects.create(
+            servidor=servidor,
+            email_destinatario=destinatario_email,
+            assunto=assunto,
+            corpo_email=corpo_html,
+            enviado_por=enviado_por,
+            status=HistoricoEmail.STATUS_PENDENTE,
+            proxima_tentativa=timezone.now(),
+            **self.campos_anexo(anexo),
+        )
+
+    @staticmethod
+    def campos_anexo(anexo):
+        """Campos de HistoricoEmail para o anexo (nome, conteúdo) ou None"""
+        nome, conteudo = anexo or ('', '')
+        return {'anexo_nome': nome, 'anexo_csv': conteudo}
+
+    @staticmethod
+    def contexto_base(servidor):
+        """Variáveis disponíveis em todos os templates de email"""
+        return {
+            'nome_servidor': servidor.nome_completo,
+            'siape': servidor.siape,
+            'email': servidor.email,
+            'data_hoje': timezone.now().strftime('%d/%m/%Y'),
+        }
+
+    @staticmethod
+    def mensagem_graph(destinatario_email, assunto, corpo_html, anexo_nome='', anexo_csv=''):
+        """Corpo do sendMail do Graph (com o CSV anexo, se houver)"""
+        mensagem = {
+            "subject": assunto,
+            "body": {"contentType": "HTML", "content": corpo_html},
+            "toRecipients": [{"emailAddress": {"address": destinatario_email}}]
+        }
+        if anexo_nome:
+            mensagem["attachments"] = [{
+                "@odata.type": "#microsoft.graph.fileAttachment",
+                "name": anexo_nome,
+                "contentType": "text/csv",
+                "contentBytes": base64.b64encode(anexo_csv.encode('utf-8-sig')).decode('ascii'),
+            }]
+        return {"message": mensagem, "saveToSentItems": "true"}
+
+    def enviar_em_lote(self, historicos, max_threads=None, prazo=None):
+        """
+        Envia emails já registrados (HistoricoEmail PENDENTE) via JSON $batch.
+
+        As mensagens são agrupadas de 20 em 20 e os lotes enviados por um
+        pool de threads, sob o limitador de taxa global. Envios recusados com
+        429/5xx voltam para uma nova rodada (até GRAPH_HTTP_TENTATIVAS) depois
+        do Retry-After; se ainda falharem, voltam para a caixa de saída com
+        backoff (HistoricoEmail.marcar_como_erro). Os históricos são
+        atualizados em memória e gravados com um único bulk_update no final.
+
+        Com `prazo`, nenhum $batch começa depois dele (nem nova rodada): os
+        emails restantes voltam para a caixa de saída na hora, sem contar a
+        tentativa (a reserva da caixa de saída não vence com o envio em curso).
+
+        Args:
+            historicos (iterable): HistoricoEmail a enviar (com `tentativas`)
+            max_threads (int): Threads simultâneas (padrão GRAPH_LOTE_THREADS)
+            prazo (float): Opcional, instante limite em time.monotonic()
+
+        Returns:
+            dict: {'enviados': n, 'erros': n, 'reagendados': n}
+        """
+        historicos = list(historicos)
+        max_threads = max_threads or getattr(settings, 'GRAPH_LOTE_THREADS', 4)
+        tentativas = getattr(settings, 'GRAPH_HTTP_TENTATIVAS', 3)
+        limitador = obter_limitador()
+
+        pendentes = historicos
+        for rodada in range(tentativas + 1):
+            if not pendentes:
+                break
+            lotes = [pendentes[i:i + TAMANHO_LOTE_GRAPH] for i in range(0, len(pendentes), TAMANHO_LOTE_GRAPH)]
+            with ThreadPoolExecutor(max_workers=max_threads) as pool:
+                resultados = list(pool.map(lambda lote: self._enviar_lote_graph(lote, prazo), lotes))
+
+            repetir = []
+            for historico, status, detalhe, espera in (item for lote in resultados for item in lote):
+                if status == 202:
+                    historico.marcar_como_enviado(resposta_api=f"Status: {status} ($batch)", salvar=False)
+                elif status == PRAZO_ESGOTADO:
+                    historico.tentativas = max(historico.tentativas - 1, 0)
+                    historico.proxima_tentativa = timezone.now()
+                elif (status is None or status in STATUS_RETENTATIVA) and rodada < tentativas and (
+                        prazo is None or time.monotonic() < prazo):
+                    repetir.append(historico)
+                    if espera:
+                        limitador.pausar(espera)
+                else:
+                    historico.marcar_como_erro(mensagem_erro=f"Status: {status} - {detalhe}", salvar=False,
+                                               temporario=status is None or status in STATUS_RETENTATIVA)
+            pendentes = repetir
+
+        HistoricoEmail.objects.bulk_update(
+            historicos, ['status', 'tentativas', 'data_envio', 'resposta_api', 'mensagem_erro', 'proxima_tentativa'],
+            batch_size=500
+        )
+        contagem = {'enviados': 0, 'erros': 0, 'reagendados': 0}
+        chaves = {HistoricoEmail.STATUS_ENVIADO: 'enviados', HistoricoEmail.STATUS_ERRO: 'erros',
+                  HistoricoEmail.STATUS_PENDENTE: 'reagendados'}
+        for historico in historicos:
+            contagem[chaves[historico.status]] += 1
+        return contagem
+
+    def _enviar_lote_graph(self, lote, prazo=None):
+        """
+        Uma requisição $batch (até 20 sendMail).
+
+        Returns:
+            list: [(historico, status, detalhe, segundos Retry-After)]; status
+            None indica falha de conexão (nova tentativa) e PRAZO_ESGOTADO que
+            o lote não foi enviado
+        """
+        requisicoes = {
+            str(indice): historico for indice, historico in enumerate(lote)
+        }
+        corpo = {
+            "requests": [
+                {
+                    "id": indice,
+                    "method": "POST",
+                    "url": f"/users/{self.sender_email}/sendMail",
+                    "headers": {"Content-Type": "application/json"},
+                    "body": self.mensagem_graph(historico.email_destinatario, historico.assunto,
+                                                historico.corpo_email, historico.anexo_nome,
+                                                historico.anexo_csv),
+                }
+                for indice, historico in requisicoes.items()
+            ]
+        }
+
+        obter_limitador().aguardar()
+        if prazo is not None and time.monotonic() >= prazo:
+            return [(historico, PRAZO_ESGOTADO, 'Prazo da reserva esgotado', 0) for historico in lote]
+        try:
+            response = obter_sessao_http().post(
+                f"{self.graph_url}/$batch",
+                headers={'Authorization': f'Bearer {self.get_access_token()}'},
+                json=corpo,
+                timeout=self.timeout,
+            )
+        except Exception as e:
+            return [(historico, None, str(e), 0) for historico in lote]
+
+        if response.status_code != 200:
+            espera = _segundos_retry_after(response.headers)
+            return [(historico, response.status_code, response.text[:500], espera) for historico in lote]
+
+        resultados = []
+        for resposta in response.json().get('responses', []):
+            historico = requisicoes.pop(str(resposta.get('id')), None)
+            if historico is not None:
+                resultados.append((historico, resposta.get('status'), str(resposta.get('body', ''))[:500],
+                                   _segundos_retry_after(resposta.get('headers'))))
+        # Requisições sem resposta no lote: nova tentativa
+        resultados.extend((historico, None, 'Sem resposta no $batch', 0) for historico in requisicoes.values())
+        return resultados
+
+    def enviar_email_por_template(self, template_nome, servidor, enviado_por, contexto_extra=None,
+                                  enfileirar=False, anexo=None):
         """
         Envia email usando um template configurado no Django Admin.
 
@@ -124,69 +489,101 @@ class EmailService:
             servidor (CustomUser): Servidor destinatário
             enviado_por (CustomUser): Usuário que está enviando
             contexto_extra (dict): Dados adicionais para o template
+            enfileirar (bool): Só grava na caixa de saída (envio pelo worker)
+            anexo (tuple): Opcional, (nome, conteúdo) do CSV anexo
 
         Returns:
             tuple: (sucesso: bool, historico: HistoricoEmail)
         """
         try:
-            # Buscar template
-            template_email = TemplateEmail.objects.get(nome=template_nome, ativo=True)
+            # Templates compilados (cache por id + data_alteracao)
+            template_assunto, template_corpo = obter_templates_por_nome(template_nome)
         except TemplateEmail.DoesNotExist:
             raise ValueError(f"Template '{template_nome}' não encontrado ou inativo.")
 
         # Preparar contexto base
-        contexto = {
-            'nome_servidor': servidor.get_full_name() or servidor.username,
-            'siape': servidor.siape,
-            'email': servidor.email,
-            'data_hoje': timezone.now().strftime('%d/%m/%Y'),
-        }
+        contexto = self.contexto_base(servidor)
 
         # Adicionar contexto extra
         if contexto_extra:
             contexto.update(contexto_extra)
 
         # Renderizar template
-        template_assunto = Template(template_email.assunto)
-        template_corpo = Template(template_email.corpo_html)
-
         assunto_renderizado = template_assunto.render(Context(contexto))
         corpo_renderizado = template_corpo.render(Context(contexto))
 
+        if enfileirar:
+            return True, self.enfileirar_email(servidor.email, assunto_renderizado, corpo_renderizado,
+                                               servidor, enviado_por, anexo)
+
         # Enviar email
         return self.enviar_email(
             destinatario_email=servidor.email,
             assunto=assunto_renderizado,
             corpo_html=corpo_renderizado,
             servidor=servidor,
-            enviado_por=enviado_por
+            enviado_por=enviado_por,
+            anexo=anexo,
         )
 
-    def criar_lista_tarefas_html(self, tarefas):
+    def criar_lista_tarefas_html(self, tarefas, total=None):
         """
-        Cria uma lista HTML formatada com as tarefas.
+        Cria a tabela HTML das tarefas (templates/emails/lista_tarefas.html).
 
         Args:
-            tarefas (QuerySet): QuerySet de tarefas
+            tarefas: QuerySet de tarefas (lido com values_list) ou linhas com
+                os campos de CAMPOS_LISTA_EMAIL; só as LIMITE_TAREFAS_EMAIL
+                primeiras entram na tabela
+            total (int): Total de tarefas do servidor, para o aviso de que a
+                lista completa segue em anexo
 
         Returns:
             str: HTML formatado com a lista de tarefas
         """
-        html = '<table border="1" cellpadding="8" cellspacing="0" style="border-collapse: collapse; width: 100%;">'
-        html += '<thead><tr style="background-color: #007bff; color: white;">'
-        html += '<th>Protocolo</th><th>Serviço</th><th>Prazo</th><th>Dias Pendente</th><th>Criticidade</th>'
-        html += '</tr></thead><tbody>'
+        if isinstance(tarefas, QuerySet):
+            tarefas = tarefas.values_list(*CAMPOS_LISTA_EMAIL, named=True)[:LIMITE_TAREFAS_EMAIL]
+        linhas = list(islice(tarefas, LIMITE_TAREFAS_EMAIL))
+        return get_template('emails/lista_tarefas.html').render({
+            'tarefas': linhas,
+            'restantes': max((total or 0) - len(linhas), 0),
+        })
+
+    @staticmethod
+    def criar_anexo_tarefas_csv(tarefas, siape):
+        """
+        CSV com a lista completa de tarefas do servidor (até LIMITE_TAREFAS_ANEXO).
 
-        for tarefa in tarefas:
-            cor_linha = '#ffcccc' if tarefa.nivel_criticidade_calculado == 'CRÍTICA' else '#ffffff'
+        Args:
+            tarefas: linhas com os campos de CAMPOS_LISTA_EMAIL
+            siape (str): SIAPE do servidor (nome do arquivo)
 
-            html += f'<tr style="background-color: {cor_linha};">'
-            html += f'<td>{tarefa.numero_protocolo_tarefa}</td>'
-            html += f'<td>{tarefa.nome_servico}</td>'
-            html += f'<td>{tarefa.data_prazo.strftime("%d/%m/%Y") if tarefa.data_prazo else "-"}</td>'
-            html += f'<td style="text-align: center;">{tarefa.dias_pendente_criticidade_calculado}</td>'
-            html += f'<td style="text-align: center;">{tarefa.nivel_criticidade_calculado}</td>'
-            html += '</tr>'
+        Returns:
+            tuple: (nome, conteúdo)
+        """
+        destino = io.StringIO()
+        writer = csv.writer(destino)
+        writer.writerow(['Protocolo', 'Serviço', 'Prazo', 'Dias Pendente', 'Criticidade'])
+        for tarefa in islice(tarefas, LIMITE_TAREFAS_ANEXO):
+            writer.writerow([
+                tarefa.numero_protocolo_tarefa,
+                tarefa.nome_servico,
+                tarefa.data_prazo.strftime('%d/%m/%Y') if tarefa.data_prazo else '',
+                tarefa.dias_pendente_criticidade_calculado,
+                tarefa.nivel_criticidade_calculado,
+            ])
+        return f'tarefas_{siape}.csv', destino.getvalue()
+
+    def tarefas_para_email(self, tarefas, siape, total):
+        """
+        Tabela do corpo e, se o servidor tiver mais tarefas do que cabem
+        nela, o CSV anexo com a lista completa.
+
+        Args:
+            tarefas: linhas (CAMPOS_LISTA_EMAIL) já ordenadas, até LIMITE_TAREFAS_ANEXO
+            total (int): Total de tarefas do servidor
 
-        html += '</tbody></table>'
-        return html
+        Returns:
+            tuple: (lista_tarefas HTML, anexo ou None)
+        """
+        anexo = self.criar_anexo_tarefas_csv(tarefas, siape) if total > LIMITE_TAREFAS_EMAIL else None
+        return self.criar_lista_tarefas_html(tarefas, total if anexo else None), anexo
@@ -0,0 +1,122 @@
+"""
+Servidor HTTP local que imita os endpoints de email do Microsoft Graph.
+
+Usado pelos testes e pelo benchmark_emails para exercitar EmailService sem
+rede: atende POST /v1.0/users/<remetente>/sendMail (202) e POST /v1.0/$batch
+(uma resposta por requisição interna), conta conexões TCP, requisições e
+mensagens, e pode simular latência e recusas (429 com Retry-After, ou outro
+`status_falha`).
+
+Uso:
+    with ServidorGraphLocal(latencia=0.05) as graph:
+        settings.GRAPH_API_URL = graph.url
+        ...
+        graph.mensagens
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.conexoes += 1
+
+    def _responder(self, status, corpo=None, cabecalhos=None):
+        dados = json.dumps(corpo).encode('utf-8') if corpo is not None else b''
+        self.send_response(status)
+        for chave, valor in (cabecalhos or {}).items():
+            self.send_header(chave, valor)
+        if corpo is not None:
+            self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _recusar(self):
+        """Consome uma das `falhas` programadas (status_falha, com Retry-After)"""
+        with self.server.lock:
+            if self.server.falhas > 0:
+                self.server.falhas -= 1
+                return True
+        return False
+
+    def do_POST(self):
+        corpo = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        with self.server.lock:
+            self.server.requisicoes += 1
+            self.server.chamadas.append((self.path, self.headers.get('Authorization'), corpo))
+        if self.server.latencia:
+            time.sleep(self.server.latencia)
+
+        if self.path.endswith('/$batch'):
+            respostas = []
+            for requisicao in corpo.get('requests', []):
+                if self._recusar():
+                    respostas.append({'id': requisicao['id'], 'status': self.server.status_falha,
+                                      'headers': {'Retry-After': str(self.server.retry_after)},
+                                      'body': {'error': {'code': 'TooManyRequests'}}})
+                else:
+                    with self.server.lock:
+                        self.server.mensagens += 1
+                    respostas.append({'id': requisicao['id'], 'status': 202, 'body': None})
+            self._responder(200, {'responses': respostas})
+        elif self.path.endswith('/sendMail'):
+            if self._recusar():
+                self._responder(self.server.status_falha,
+                                cabecalhos={'Retry-After': str(self.server.retry_after)})
+            else:
+                with self.server.lock:
+                    self.server.mensagens += 1
+                self._responder(202)
+        else:
+            self._responder(404, {'error': {'code': 'NotFound'}})
+
+    def log_message(self, *args):
+        pass
+
+
+class ServidorGraphLocal:
+    """Sobe o servidor em uma thread; `url` vai em GRAPH_API_URL"""
+
+    def __init__(self, latencia=0.0, falhas=0, retry_after=0, status_falha=429):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Manipulador)
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.latencia = latencia
+        self.httpd.falhas = falhas
+        self.httpd.retry_after = retry_after
+        self.httpd.status_falha = status_falha
+        self.httpd.conexoes = 0
+        self.httpd.requisicoes = 0
+        self.httpd.mensagens = 0
+        self.httpd.chamadas = []
+        self.url = f'http://127.0.0.1:{self.httpd.server_port}/v1.0'
+
+    def __getattr__(self, nome):
+        return getattr(self.__dict__['httpd'], nome)
+
+    def __setattr__(self, nome, valor):
+        if nome in ('httpd', 'url'):
+            super().__setattr__(nome, valor)
+        else:
+            setattr(self.httpd, nome, valor)
+
+    def iniciar(self):
+        threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        return self
+
+    def parar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.parar()
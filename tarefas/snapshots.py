@@ -0,0 +1,174 @@
+"""
+Série histórica de KPIs: um snapshot agregado por importação.
+
+Ao final de cada importação, o estado das tarefas ativas é resumido em uma
+única consulta agrupada (fila × nível × regra × faixa de status × GEX) e
+gravado em SnapshotKPI. Os gráficos de tendência do dashboard somam essas
+linhas por data, sem tocar em Tarefa nem em HistoricoTarefa.
+
+Uso:
+    registrar_snapshot_kpi(registro)                       # importação
+    serie_kpi('fila', dias=90, filtros={'nivel': 'CRÍTICA'})  # gráfico
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, CharField, Count, Sum, Value, When
+from django.utils import timezone
+
+from tarefas.filas import ORDEM_FILAS
+from tarefas.models import SnapshotKPI, Tarefa
+
+# Dimensões disponíveis nos gráficos → campo em SnapshotKPI
+DIMENSOES_SNAPSHOT = {
+    'fila': 'tipo_fila',
+    'nivel': 'nivel_criticidade',
+    'regra': 'regra_aplicada',
+    'status': 'faixa_status',
+    'gex': 'gex',
+}
+
+DIAS_PADRAO = 90
+DIAS_MAXIMO = 730
+
+
+def _faixa_status():
+    """Mesma classificação usada nos gráficos de status (detalhe_fila)"""
+    return Case(
+        When(status_tarefa='Pendente', then=Value(SnapshotKPI.STATUS_PENDENTE)),
+        When(status_tarefa='Cumprimento de exigência', then=Value(SnapshotKPI.STATUS_CUMPRIMENTO)),
+        default=Value(SnapshotKPI.STATUS_OUTROS),
+        output_field=CharField(),
+    )
+
+
+def registrar_snapshot_kpi(registro=None, data_referencia=None):
+    """
+    Grava o snapshot das tarefas ativas (substitui o snapshot anterior da
+    mesma importação, se existir).
+
+    Args:
+        registro (RegistroImportacao): Importação de origem (opcional)
+        data_referencia (datetime): Padrão: fim do processamento ou agora
+
+    Returns:
+        int: Quantidade de linhas gravadas
+    """
+    if data_referencia is None:
+        data_referencia = (registro and registro.data_fim_processamento) or timezone.now()
+
+    linhas = (
+        Tarefa.objects.filter(ativa=True)
+        .annotate(faixa_status=_faixa_status())
+        .values(
+            'tipo_fila',
+            'nivel_criticidade_calculado',
+            'regra_aplicada_calculado',
+            'faixa_status',
+            'nome_gex_responsavel',
+        )
+        .annotate(total=Count('numero_protocolo_tarefa'))
+        .order_by()
+    )
+
+    snapshots = [
+        SnapshotKPI(
+            registro_importacao=registro,
+            data_referencia=data_referencia,
+            tipo_fila=linha['tipo_fila'] or 'OUTROS',
+            nivel_criticidade=linha['nivel_criticidade_calculado'] or '',
+            regra_aplicada=linha['regra_aplicada_calculado'] or '',
+            faixa_status=linha['faixa_status'],
+            gex=(linha['nome_gex_responsavel'] or '')[:255],
+            total=linha['total'],
+        )
+        for linha in linhas
+    ]
+
+    with transaction.atomic():
+        if registro is not None:
+            SnapshotKPI.objects.filter(registro_importacao=registro).delete()
+        SnapshotKPI.objects.bulk_create(snapshots, batch_size=2000)
+
+    return len(snapshots)
+
+
+def _ordenar_series(dimensao, valores):
+    if dimensao == 'fila':
+        return sorted(valores, key=lambda v: (ORDEM_FILAS.index(v) if v in ORDEM_FILAS else len(ORDEM_FILAS), v))
+    return sorted(valores)
+
+
+def serie_kpi(dimensao, dias=DIAS_PADRAO, filtros=None):
+    """
+    Série temporal (uma posição por importação) agrupada pela dimensão.
+
+    Args:
+        dimensao (str): Chave de DIMENSOES_SNAPSHOT
+        dias (int): Janela em dias
+        filtros (dict): {dimensão: valor} aplicados antes da soma
+                        (ex.: {'nivel': 'CRÍTICA'})
+
+    Returns:
+        dict: {'labels': [datas ISO], 'series': [{'nome': valor, 'dados': [...]}]}
+    """
+    campo = DIMENSOES_SNAPSHOT[dimensao]
+    dias = max(1, min(int(dias), DIAS_MAXIMO))
+
+    snapshots = SnapshotKPI.objects.filter(data_referencia__gte=timezone.now() - timedelta(days=dias))
+    for chave, valor in (filtros or {}).items():
+        if chave in DIMENSOES_SNAPSHOT and valor:
+            snapshots = snapshots.filter(**{DIMENSOES_SNAPSHOT[chave]: valor})
+
+    linhas = (
+        snapshots.values('data_referencia', campo)
+        .annotate(soma=Sum('total'))
+        .order_by('data_referencia')
+    )
+
+    datas = []
+    por_valor = {}
+    for linha in linhas:
+        data = linha['data_referencia']
+        if not datas or datas[-1] != data:
+            datas.append(data)
+        por_valor.setdefault(linha[campo], {})[data] = linha['soma']
+
+    return {
+        'labels': [timezone.localtime(d).isoformat() for d in datas],
+        'series': [
+            {'nome': valor, 'dados': [por_valor[valor].get(d, 0) for d in datas]}
+            for valor in _ordenar_series(dimensao, por_valor)
+        ],
+    }
+
+
+def resumo_importacoes(dias=DIAS_PADRAO):
+    """
+    Totais por importação (total, críticas, regulares) para a janela informada.
+
+    Returns:
+        list: [{'data': ISO, 'registro_id': id, 'total': n, 'criticas': n, 'regulares': n}]
+    """
+    dias = max(1, min(int(dias), DIAS_MAXIMO))
+    linhas = (
+        SnapshotKPI.objects
+        .filter(data_referencia__gte=timezone.now() - timedelta(days=dias))
+        .values('data_referencia', 'registro_importacao_id')
+        .annotate(
+            soma_total=Sum('total'),
+            soma_criticas=Sum(Case(When(nivel_criticidade='CRÍTICA', then='total'), default=0)),
+            soma_regulares=Sum(Case(When(nivel_criticidade='REGULAR', then='total'), default=0)),
+        )
+        .order_by('data_referencia')
+    )
+    return [
+        {
+            'data': timezone.localtime(linha['data_referencia']).isoformat(),
+            'registro_id': linha['registro_importacao_id'],
+            'total': linha['soma_total'],
+            'criticas': linha['soma_criticas'],
+            'regulares': linha['soma_regulares'],
+        }
+        for linha in linhas
+    ]
@@ -0,0 +1,68 @@
+"""
+Tarefas assíncronas do app tarefas (django-background-tasks).
+"""
+from background_task import background
+
+
+@background(schedule=0)
+def gerar_exportacao_async(job_id):
+    """
+    Gera o arquivo de um ExportJob em segundo plano.
+
+    Antes de gerar, remove as exportações expiradas.
+
+    Args:
+        job_id: ID do ExportJob
+    """
+    from tarefas.exportacao import gerar_exportacao, limpar_exportacoes_expiradas
+    from tarefas.models import ExportJob
+
+    removidas, liberados = limpar_exportacoes_expiradas()
+    if removidas:
+        print(f"Exportações expiradas removidas: {removidas} ({liberados} bytes)")
+
+    try:
+        job = ExportJob.objects.get(id=job_id)
+    except ExportJob.DoesNotExist:
+        print(f"ExportJob {job_id} não encontrado")
+        return
+    if job.status == ExportJob.STATUS_ERRO:
+        print(f"Exportação #{job.id} abandonada; não será gerada")
+        return
+
+    print(f"\nGerando exportação #{job.id} ({job.tipo}) filtros={job.filtros}")
+    try:
+        gerar_exportacao(job)
+        print(f"Exportação #{job.id} concluída: {job.total_linhas} linhas, {job.tamanho_bytes} bytes")
+    except Exception as e:
+        # Falha já registrada no ExportJob; não reagendar
+        print(f"Exportação #{job.id} falhou: {e}")
+
+
+@background(schedule=0)
+def enviar_campanha_async(campanha_id):
+    """
+    Prepara (destinatários e emails renderizados) e envia os emails de uma
+    CampanhaEmail em lotes ($batch).
+
+    Args:
+        campanha_id: ID da CampanhaEmail
+    """
+    from tarefas.campanhas import executar_campanha
+    from tarefas.models import CampanhaEmail
+
+    try:
+        campanha = CampanhaEmail.objects.select_related('template').get(id=campanha_id)
+    except CampanhaEmail.DoesNotExist:
+        print(f"CampanhaEmail {campanha_id} não encontrada")
+        return
+
+    print(f"\nEnviando campanha #{campanha.id} ({campanha.template.nome})")
+    try:
+        resultado = executar_campanha(campanha)
+        print(f"Campanha #{campanha.id}: {campanha.total_destinatarios} destinatários, "
+              f"{resultado['enviados']} enviados, {resultado['erros']} erros, "
+              f"{resultado['reagendados']} reagendados em {campanha.duracao_segundos}s")
+    except Exception as e:
+        # Falha já registrada na campanha; não reagendar
+        print(f"Campanha #{campanha.id} falhou: {e}")
@@ -0,0 +1,101 @@
+"""
+Testes da geração de arquivos de ação em lote por fila (tarefas/acoes_lote.py)
+"""
+import io
+import shutil
+import tempfile
+import zipfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from tarefas.acoes_lote import escrever_arquivo_acao_lote, normalizar_parametros, resumo_servidores
+from tarefas.exportacao import gerar_exportacao, solicitar_exportacao
+from tarefas.models import HistoricoAcaoLote, Tarefa
+
+User = get_user_model()
+
+
+class AcaoLoteFilaTestCase(TestCase):
+
+    def setUp(self):
+        self.coordenador = User.objects.create_user(siape='9999999', nome_completo='Coordenação')
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A')
+        User.objects.create_user(siape='2222222', nome_completo='Servidor B')
+
+        # A: 3 críticas + 1 regular; B: 1 crítica
+        tarefas = [
+            ('1111111', 'CRÍTICA', 30), ('1111111', 'CRÍTICA', 50), ('1111111', 'CRÍTICA', 10),
+            ('1111111', 'REGULAR', 90), ('2222222', 'CRÍTICA', 70),
+        ]
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'77700{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                siape_responsavel_id=siape,
+                nivel_criticidade_calculado=nivel,
+                dias_pendente_criticidade_calculado=dias,
+                tipo_fila='PGB',
+            )
+            for i, (siape, nivel, dias) in enumerate(tarefas)
+        ])
+
+    def test_criticas_de_servidores_acima_do_limite(self):
+        parametros = normalizar_parametros({
+            'fila': 'PGB', 'tipo_acao': 'REMOVER', 'escopo': 'CRITICAS', 'acima_de': '2', 'por_servidor': '2',
+        })
+        servidores = resumo_servidores(parametros)
+        self.assertEqual(servidores, [('1111111', 2)])
+
+        destino = io.BytesIO()
+        with self.assertNumQueries(3):
+            resumo = escrever_arquivo_acao_lote(destino, parametros, servidores, self.coordenador)
+
+        self.assertEqual(resumo['tarefas'], 2)
+        self.assertEqual(destino.getvalue().decode('utf-8').splitlines(),
+                         ['14', '"Protocolo da Tarefa"', '"777001"', '"777000"'])
+
+        historico = HistoricoAcaoLote.objects.get()
+        self.assertEqual(historico.servidor.siape, '1111111')
+        self.assertEqual(historico.protocolos_incluidos, '777001,777000')
+        self.assertEqual(historico.gerado_por, self.coordenador)
+
+    def test_um_arquivo_por_servidor(self):
+        parametros = normalizar_parametros({
+            'fila': 'PGB', 'tipo_acao': 'TRANSFERIR', 'escopo': 'TODAS', 'por_servidor': '1',
+            'agrupamento': 'POR_SERVIDOR', 'uo_destino': '23150521',
+            'despacho': 'Redistribuição da fila PGB para outra unidade "APS"',
+        })
+        destino = io.BytesIO()
+        resumo = escrever_arquivo_acao_lote(destino, parametros, resumo_servidores(parametros))
+
+        self.assertEqual(resumo, {'servidores': 2, 'tarefas': 2, 'nome_arquivo': resumo['nome_arquivo']})
+        with zipfile.ZipFile(destino) as pacote:
+            nomes = pacote.namelist()
+            self.assertEqual(len(nomes), 2)
+            self.assertIn('1111111', nomes[0])
+            linhas = pacote.read(nomes[0]).decode('utf-8').splitlines()
+        self.assertEqual(linhas[0], '12')
+        self.assertEqual(linhas[2], '"777003;23150521;Redistribuição da fila PGB para outra unidade ""APS"""')
+        self.assertEqual(HistoricoAcaoLote.objects.count(), 2)
+
+    def test_parametros_invalidos(self):
+        with self.assertRaises(ValueError):
+            normalizar_parametros({'fila': 'PGB', 'tipo_acao': 'TRANSFERIR', 'uo_destino': '1', 'despacho': 'curto'})
+        with self.assertRaises(ValueError):
+            normalizar_parametros({'fila': 'PGB', 'tipo_acao': 'REMOVER', 'acima_de': 'x'})
+
+    def test_em_segundo_plano(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        parametros = normalizar_parametros({'fila': 'PGB', 'tipo_acao': 'REMOVER', 'escopo': 'CRITICAS'})
+
+        with override_settings(MEDIA_ROOT=media):
+            job, _ = solicitar_exportacao('acao_lote_csv', parametros, self.coordenador)
+            self.assertEqual(job.filtros['tipo_acao'], 'REMOVER')
+            gerar_exportacao(job)
+
+        self.assertEqual(job.total_linhas, 4)
+        self.assertTrue(job.nome_arquivo.endswith('.csv'))
+        self.assertEqual(HistoricoAcaoLote.objects.filter(gerado_por=self.coordenador).count(), 2)
@@ -0,0 +1,145 @@
+"""
+Testes do feed de alterações por importação (importar_csv/alteracoes.py)
+"""
+import json
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from importar_csv.alteracoes import arquivar_tarefas
+from importar_csv.models import AlteracaoTarefa, RegistroImportacao
+from importar_csv.views import ImportarCSVView
+from tarefas.api import views as api_views
+from tarefas.models import Tarefa
+
+User = get_user_model()
+
+SEGREDO = 'segredo-teste'
+
+
+def linha_csv(protocolo, status='Pendente', siape='1111111', prazo='10032025'):
+    return [
+        protocolo, '0', '23150521', 'Pensão por Morte', status, '', siape, '', 'Servidor A', '', '',
+        '01022025', '05022025', prazo, '', '', '0', '', '3', '0', '1', '',
+    ]
+
+
+class AlteracoesTarefasTestCase(TestCase):
+
+    def setUp(self):
+        api_views.API_SECRET_HASH = SEGREDO
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A')
+        User.objects.create_user(siape='2222222', nome_completo='Servidor B')
+        self.view = ImportarCSVView()
+
+    def importar(self, *linhas, status='COMPLETED'):
+        registro = RegistroImportacao.objects.create(nome_arquivo='x.csv', status=status)
+        self.view.processar_lote({linha[0]: linha for linha in linhas}, registro)
+        return registro
+
+    def feed(self, desde=None):
+        parametros = {} if desde is None else {'desde': desde}
+        resposta = self.client.get('/api/tarefas/alteracoes/', parametros, HTTP_X_API_SECRET_HASH=SEGREDO)
+        self.assertEqual(resposta.status_code, 200)
+        corpo = b''.join(resposta.streaming_content).decode('utf-8')
+        return int(resposta['X-Ultimo-Registro']), [json.loads(linha) for linha in corpo.splitlines()]
+
+    def test_registra_somente_o_que_mudou(self):
+        primeira = self.importar(linha_csv('900001'), linha_csv('900002'))
+        segunda = self.importar(
+            linha_csv('900001'),
+            linha_csv('900002', status='Exigência', siape='2222222'),
+            linha_csv('900003'),
+        )
+
+        self.assertEqual(
+            sorted(primeira.alteracoes.values_list('numero_protocolo_tarefa', 'tipo')),
+            [('900001', 'CRIADA'), ('900002', 'CRIADA')],
+        )
+        alteracoes = {a.numero_protocolo_tarefa: a for a in segunda.alteracoes.all()}
+        self.assertEqual(set(alteracoes), {'900002', '900003'})
+        self.assertEqual(alteracoes['900003'].tipo, AlteracaoTarefa.TIPO_CRIADA)
+        self.assertEqual(alteracoes['900002'].campos, {
+            'status_tarefa': ['Pendente', 'Exigência'],
+            'siape_responsavel': ['1111111', '2222222'],
+        })
+
+    def test_ignora_campos_que_mudam_a_cada_extracao(self):
+        self.importar(linha_csv('900001'))
+        linha = linha_csv('900001')
+        linha[18], linha[20], linha[21] = '4', '2', '20250206031500000000'
+        segunda = self.importar(linha)
+
+        self.assertFalse(segunda.alteracoes.exists())
+
+    def test_arquivamento_e_reativacao(self):
+        self.importar(linha_csv('900001'), linha_csv('900002'))
+        registro = RegistroImportacao.objects.create(nome_arquivo='y.csv', status='COMPLETED')
+
+        ausentes = Tarefa.objects.filter(ativa=True).exclude(numero_protocolo_tarefa='900001')
+        arquivadas = arquivar_tarefas(registro, ausentes)
+
+        self.assertEqual(arquivadas, 1)
+        self.assertFalse(Tarefa.objects.get(pk='900002').ativa)
+        self.assertEqual(list(registro.alteracoes.values_list('numero_protocolo_tarefa', 'tipo')),
+                         [('900002', 'ARQUIVADA')])
+
+        volta = self.importar(linha_csv('900002', prazo='20032025'))
+        self.assertEqual(volta.alteracoes.get().campos, {
+            'data_prazo': ['2025-03-10', '2025-03-20'],
+            'ativa': [False, True],
+        })
+
+    def test_feed_ndjson_por_cursor(self):
+        primeira = self.importar(linha_csv('900001'))
+        segunda = self.importar(linha_csv('900001', status='Exigência'))
+        self.importar(linha_csv('900002'), status='PROCESSING')
+        posterior = self.importar(linha_csv('900003'))
+
+        ultimo, linhas = self.feed()
+        self.assertEqual(ultimo, segunda.id)
+        self.assertEqual(linhas, [
+            {'registro': primeira.id, 'protocolo': '900001', 'tipo': 'CRIADA', 'campos': None},
+            {'registro': segunda.id, 'protocolo': '900001', 'tipo': 'ALTERADA',
+             'campos': {'status_tarefa': ['Pendente', 'Exigência']}},
+        ])
+
+        self.assertEqual(self.feed(desde=segunda.id), (segunda.id, []))
+
+        RegistroImportacao.objects.exclude(status='COMPLETED').update(status='COMPLETED')
+        ultimo, linhas = self.feed(desde=segunda.id)
+        self.assertEqual(ultimo, posterior.id)
+        self.assertEqual([linha['protocolo'] for linha in linhas], ['900002', '900003'])
+
+    def test_importacao_abandonada_nao_trava_o_feed(self):
+        parada = self.importar(linha_csv('900001'), status='PROCESSING')
+        posterior = self.importar(linha_csv('900002'))
+        self.assertEqual(self.feed(), (0, []))
+
+        RegistroImportacao.objects.filter(pk=parada.pk).update(
+            data_inicio_processamento=timezone.now() - timedelta(hours=7)
+        )
+        ultimo, linhas = self.feed()
+
+        self.assertEqual(ultimo, posterior.id)
+        self.assertEqual([linha['protocolo'] for linha in linhas], ['900001', '900002'])
+        parada.refresh_from_db()
+        self.assertEqual(parada.status, 'FAILED')
+
+    def test_feed_em_varios_lotes(self):
+        self.importar(*[linha_csv(f'9{i:05d}') for i in range(5)])
+        original = api_views.LOTE_ALTERACOES
+        api_views.LOTE_ALTERACOES = 2
+        self.addCleanup(setattr, api_views, 'LOTE_ALTERACOES', original)
+
+        _, linhas = self.feed()
+
+        self.assertEqual([linha['protocolo'] for linha in linhas], [f'9{i:05d}' for i in range(5)])
+
+    def test_feed_valida_parametros(self):
+        resposta = self.client.get('/api/tarefas/alteracoes/', {'desde': 'x'}, HTTP_X_API_SECRET_HASH=SEGREDO)
+        self.assertEqual(resposta.status_code, 400)
+        resposta = self.client.get('/api/tarefas/alteracoes/')
+        self.assertEqual(resposta.status_code, 401)
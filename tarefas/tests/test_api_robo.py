@@ -0,0 +1,275 @@
+"""
+Testes da API do robô: reserva (lease), respostas em lote, long-poll de pendentes e estado de tarefas
+"""
+import json
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tarefas import cache as cache_app
+from tarefas.api import views as api_views
+from tarefas.models import (
+    BloqueioServidor, GeracaoDados, HistoricoBloqueio, HistoricoNotificacao, SolicitacaoNotificacao, Tarefa
+)
+from tarefas.services.acoes_service import AcoesService
+
+User = get_user_model()
+
+SEGREDO = 'segredo-teste'
+
+
+class ReservaRoboTestCase(TestCase):
+
+    def setUp(self):
+        original = api_views.API_SECRET_HASH
+        api_views.API_SECRET_HASH = SEGREDO
+        self.addCleanup(setattr, api_views, 'API_SECRET_HASH', original)
+
+        self.servidor = User.objects.create_user(siape='1111111', nome_completo='Servidor A',
+                                                 email='a@inss.gov.br')
+        BloqueioServidor.objects.bulk_create([
+            BloqueioServidor(servidor=self.servidor, codigo_fila=f'F{i}', tipo_acao=BloqueioServidor.TIPO_BLOQUEIO)
+            for i in range(5)
+        ])
+
+    def _reservar(self, url='/api/solicitacoes/bloqueios/reservar/', **corpo):
+        return self.client.post(url, corpo, content_type='application/json', HTTP_X_API_SECRET_HASH=SEGREDO)
+
+    def test_robos_recebem_solicitacoes_distintas(self):
+        primeiro = self._reservar(robo_id='robo-1', limite=3).json()
+        segundo = self._reservar(robo_id='robo-2', limite=3).json()
+        terceiro = self._reservar(robo_id='robo-3').json()
+
+        ids_primeiro = {s['id'] for s in primeiro['solicitacoes']}
+        ids_segundo = {s['id'] for s in segundo['solicitacoes']}
+        self.assertEqual((len(ids_primeiro), len(ids_segundo), terceiro['total']), (3, 2, 0))
+        self.assertFalse(ids_primeiro & ids_segundo)
+        self.assertEqual(primeiro['solicitacoes'][0]['nome_servidor'], 'Servidor A')
+        self.assertEqual(primeiro['solicitacoes'][0]['status'], BloqueioServidor.STATUS_PROCESSANDO)
+        self.assertEqual(
+            BloqueioServidor.objects.filter(robo_id='robo-1', status=BloqueioServidor.STATUS_PROCESSANDO).count(), 3
+        )
+        self.assertEqual(HistoricoBloqueio.objects.filter(status=BloqueioServidor.STATUS_PROCESSANDO).count(), 5)
+
+    def test_reserva_vencida_volta_para_a_fila(self):
+        self._reservar(robo_id='robo-1')
+        BloqueioServidor.objects.filter(codigo_fila='F0').update(reservado_ate=timezone.now() - timedelta(seconds=1))
+
+        resposta = self._reservar(robo_id='robo-2').json()
+
+        self.assertEqual([s['codigo_fila'] for s in resposta['solicitacoes']], ['F0'])
+        self.assertEqual(BloqueioServidor.objects.get(codigo_fila='F0').robo_id, 'robo-2')
+
+    def test_resposta_libera_reserva(self):
+        bloqueio_id = self._reservar(robo_id='robo-1', limite=1).json()['solicitacoes'][0]['id']
+        resposta = self.client.post('/api/solicitacoes/bloqueios/resposta/',
+                                    {'bloqueio_id': bloqueio_id, 'sucesso': True},
+                                    content_type='application/json', HTTP_X_API_SECRET_HASH=SEGREDO)
+        self.assertEqual(resposta.status_code, 200)
+        bloqueio = BloqueioServidor.objects.get(id=bloqueio_id)
+        self.assertEqual(bloqueio.status, BloqueioServidor.STATUS_CONCLUIDO)
+        self.assertIsNone(bloqueio.reservado_ate)
+
+    def test_resposta_de_reserva_perdida(self):
+        self._reservar(robo_id='robo-1')
+        BloqueioServidor.objects.filter(codigo_fila='F0').update(reservado_ate=timezone.now() - timedelta(seconds=1))
+        bloqueio_id = self._reservar(robo_id='robo-2').json()['solicitacoes'][0]['id']
+        outro_id = BloqueioServidor.objects.get(codigo_fila='F1').id
+
+        atrasada = self.client.post('/api/solicitacoes/bloqueios/resposta/',
+                                    {'bloqueio_id': bloqueio_id, 'sucesso': False, 'robo_id': 'robo-1'},
+                                    content_type='application/json', HTTP_X_API_SECRET_HASH=SEGREDO)
+        self.assertEqual(atrasada.status_code, 409)
+        self.assertEqual(BloqueioServidor.objects.get(id=bloqueio_id).status, BloqueioServidor.STATUS_PROCESSANDO)
+
+        lote = self._reservar('/api/solicitacoes/bloqueios/respostas/', respostas=[
+            {'bloqueio_id': bloqueio_id, 'sucesso': True, 'robo_id': 'robo-1'},
+            {'bloqueio_id': outro_id, 'sucesso': True, 'robo_id': 'robo-1'},
+        ]).json()
+        self.assertEqual([item['resultado'] for item in lote['resultados']], ['RESERVA_PERDIDA', 'APLICADA'])
+
+        dono = self._reservar('/api/solicitacoes/bloqueios/respostas/', respostas=[
+            {'bloqueio_id': bloqueio_id, 'sucesso': True, 'robo_id': 'robo-2'},
+        ]).json()
+        self.assertEqual(dono['aplicadas'], 1)
+
+    def test_notificacoes_e_validacao(self):
+        SolicitacaoNotificacao.objects.create(servidor=self.servidor,
+                                              tipo_notificacao=SolicitacaoNotificacao.TIPO_PRIMEIRA)
+        resposta = self._reservar('/api/solicitacoes/notificacoes/reservar/', robo_id='robo-1')
+        self.assertEqual(resposta.json()['total'], 1)
+
+        self.assertEqual(self._reservar(robo_id='robo-1', limite=0).status_code, 400)
+        sem_autenticacao = self.client.post('/api/solicitacoes/bloqueios/reservar/', {'robo_id': 'x'},
+                                            content_type='application/json')
+        self.assertEqual(sem_autenticacao.status_code, 401)
+
+    def test_respostas_em_lote(self):
+        ids = list(BloqueioServidor.objects.order_by('id').values_list('id', flat=True))
+        BloqueioServidor.objects.filter(id=ids[4]).update(status=BloqueioServidor.STATUS_CONCLUIDO)
+        respostas = [
+            {'bloqueio_id': ids[0], 'sucesso': True, 'resposta_robo': 'OK'},
+            {'bloqueio_id': ids[1], 'sucesso': False, 'mensagem_erro': 'Timeout'},
+            {'bloqueio_id': ids[0], 'sucesso': False},
+            {'bloqueio_id': ids[4], 'sucesso': True},
+            {'bloqueio_id': 999999, 'sucesso': True},
+        ]
+
+        with self.assertNumQueries(6):  # savepoint, select for update, bulk_update, bulk_create, estado, release
+            resposta = self._reservar('/api/solicitacoes/bloqueios/respostas/', respostas=respostas).json()
+
+        self.assertEqual((resposta['total'], resposta['aplicadas']), (5, 2))
+        self.assertEqual(
+            [(item['resultado'], item['status']) for item in resposta['resultados']],
+            [('APLICADA', 'CONCLUIDO'), ('APLICADA', 'ERRO'), ('DUPLICADO', 'CONCLUIDO'),
+             ('JA_FINALIZADO', 'CONCLUIDO'), ('NAO_ENCONTRADO', None)]
+        )
+        bloqueio = BloqueioServidor.objects.get(id=ids[1])
+        self.assertEqual((bloqueio.status, bloqueio.mensagem_erro), (BloqueioServidor.STATUS_ERRO, 'Timeout'))
+        self.assertIsNotNone(bloqueio.data_conclusao)
+        self.assertEqual(HistoricoBloqueio.objects.count(), 2)
+
+    def test_respostas_em_lote_notificacao_e_validacao(self):
+        notificacao = SolicitacaoNotificacao.objects.create(servidor=self.servidor,
+                                                            tipo_notificacao=SolicitacaoNotificacao.TIPO_PRIMEIRA)
+        resposta = self.client.post(
+            '/api/solicitacoes/notificacoes/respostas/',
+            [{'notificacao_id': notificacao.id, 'sucesso': True, 'numero_protocolo': '123456'}],
+            content_type='application/json', HTTP_X_API_SECRET_HASH=SEGREDO
+        )
+        self.assertEqual(resposta.json()['aplicadas'], 1)
+        notificacao.refresh_from_db()
+        self.assertEqual(notificacao.numero_protocolo_criado, '123456')
+        self.assertEqual(HistoricoNotificacao.objects.filter(notificacao=notificacao).count(), 1)
+
+        invalido = self._reservar('/api/solicitacoes/bloqueios/respostas/', respostas=[{'bloqueio_id': 'x'}])
+        self.assertEqual(invalido.status_code, 400)
+        self.assertEqual(BloqueioServidor.objects.filter(status=BloqueioServidor.STATUS_PENDENTE).count(), 5)
+
+
+@override_settings(
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}},
+    API_ROBO_AGUARDAR_INTERVALO=0.01,
+)
+class PendentesLongPollTestCase(TestCase):
+
+    def setUp(self):
+        original = api_views.API_SECRET_HASH
+        api_views.API_SECRET_HASH = SEGREDO
+        self.addCleanup(setattr, api_views, 'API_SECRET_HASH', original)
+
+        self.servidor = User.objects.create_user(siape='1111111', nome_completo='Servidor A',
+                                                 email='a@inss.gov.br')
+        for fila in ('F0', 'F1'):
+            AcoesService.solicitar_bloqueio(self.servidor, fila, None)
+        # LocMemCache (um processo só) fazendo o papel do Redis
+        for modulo in (cache_app, api_views):
+            disponivel = mock.patch.object(modulo, 'long_poll_disponivel', return_value=True)
+            disponivel.start()
+            self.addCleanup(disponivel.stop)
+
+    def _pendentes(self, **parametros):
+        return self.client.get('/api/solicitacoes/bloqueios/pendentes/', parametros,
+                               HTTP_X_API_SECRET_HASH=SEGREDO).json()
+
+    def test_cursor(self):
+        primeira = self._pendentes()
+        self.assertEqual(primeira['total'], 2)
+        self.assertEqual(primeira['cursor'], max(s['id'] for s in primeira['solicitacoes']))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            novo = AcoesService.solicitar_bloqueio(self.servidor, 'F2', None)
+        segunda = self._pendentes(desde_id=primeira['cursor'])
+        self.assertEqual([s['id'] for s in segunda['solicitacoes']], [novo.id])
+        self.assertEqual(self._pendentes(desde_id=segunda['cursor'])['cursor'], segunda['cursor'])
+
+    def test_espera_ociosa_nao_consulta_o_banco(self):
+        cursor = self._pendentes()['cursor']
+        with self.assertNumQueries(1):
+            resposta = self._pendentes(desde_id=cursor, aguardar=1)
+        self.assertEqual((resposta['total'], resposta['cursor']), (0, cursor))
+
+    def test_nova_solicitacao_acorda_a_espera(self):
+        cursor = self._pendentes()['cursor']
+
+        def criar_durante_a_espera(segundos):
+            with self.captureOnCommitCallbacks(execute=True):
+                AcoesService.solicitar_desbloqueio(self.servidor, 'F0', None)
+
+        with mock.patch.object(cache_app.time, 'sleep', side_effect=criar_durante_a_espera) as sleep:
+            resposta = self._pendentes(desde_id=cursor, aguardar=30)
+
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual([s['tipo_acao'] for s in resposta['solicitacoes']], [BloqueioServidor.TIPO_DESBLOQUEIO])
+
+    def test_sem_cache_compartilhado_nao_espera(self):
+        cursor = self._pendentes()['cursor']
+        with mock.patch.object(api_views, 'long_poll_disponivel', return_value=False), \
+                mock.patch.object(cache_app.time, 'sleep') as sleep, self.assertNumQueries(1):
+            resposta = self._pendentes(desde_id=cursor, aguardar=30)
+
+        sleep.assert_not_called()
+        self.assertEqual((resposta['total'], resposta['cursor']), (0, cursor))
+
+    def test_cache_fora_do_ar_nao_espera(self):
+        with mock.patch.object(cache_app.time, 'sleep') as sleep:
+            self.assertFalse(cache_app.aguardar_nova_versao('fila_bloqueios', None, 30))
+        sleep.assert_not_called()
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class EstadoTarefasTestCase(TestCase):
+
+    def setUp(self):
+        original = api_views.API_SECRET_HASH
+        api_views.API_SECRET_HASH = SEGREDO
+        self.addCleanup(setattr, api_views, 'API_SECRET_HASH', original)
+
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A', email='a@inss.gov.br')
+        Tarefa.objects.bulk_create([
+            Tarefa(numero_protocolo_tarefa=str(protocolo), indicador_subtarefas_pendentes=0,
+                   codigo_unidade_tarefa=23150521, nome_servico='Aposentadoria', status_tarefa='Pendente',
+                   siape_responsavel_id='1111111', tipo_fila='PGB', nivel_criticidade_calculado='CRÍTICA',
+                   data_prazo=date(2026, 1, 31))
+            for protocolo in range(100, 110)
+        ])
+
+    def _estado(self, corpo=None, **cabecalhos):
+        return self.client.post('/api/tarefas/estado/', corpo or {'protocolos': ['101', '100', '999']},
+                                content_type='application/json', HTTP_X_API_SECRET_HASH=SEGREDO, **cabecalhos)
+
+    def test_linhas_compactas_e_etag(self):
+        with self.assertNumQueries(2):
+            resposta = self._estado()
+        dados = resposta.json()
+        self.assertEqual(dados['nao_encontrados'], ['999'])
+        linhas = [dict(zip(dados['campos'], linha)) for linha in dados['tarefas']]
+        self.assertEqual(sorted(linha['numero_protocolo_tarefa'] for linha in linhas), ['100', '101'])
+        self.assertEqual(linhas[0]['siape_responsavel'], '1111111')
+        self.assertEqual(linhas[0]['data_prazo'], '2026-01-31')
+
+        with self.assertNumQueries(1):  # só a geração
+            nao_modificado = self._estado(HTTP_IF_NONE_MATCH=resposta['ETag'])
+        self.assertEqual(nao_modificado.status_code, 304)
+
+        cache.clear()  # a geração não depende do cache
+        self.assertEqual(self._estado(HTTP_IF_NONE_MATCH=resposta['ETag']).status_code, 304)
+
+        GeracaoDados.incrementar()  # nova importação
+        self.assertEqual(self._estado(HTTP_IF_NONE_MATCH=resposta['ETag']).status_code, 200)
+
+    def test_ndjson_e_validacao(self):
+        resposta = self.client.get('/api/tarefas/estado/', {'protocolos': '100,105', 'formato': 'ndjson'},
+                                   HTTP_X_API_SECRET_HASH=SEGREDO)
+        self.assertEqual(resposta['Content-Type'], 'application/x-ndjson; charset=utf-8')
+        linhas = [json.loads(linha) for linha in resposta.content.decode('utf-8').splitlines()]
+        self.assertEqual({linha['numero_protocolo_tarefa'] for linha in linhas}, {'100', '105'})
+        self.assertEqual(linhas[0]['nivel_criticidade_calculado'], 'CRÍTICA')
+
+        self.assertEqual(self._estado(corpo={'protocolos': []}).status_code, 400)
+        self.assertEqual(self.client.post('/api/tarefas/estado/', {'protocolos': ['1']},
+                                          content_type='application/json').status_code, 401)
@@ -0,0 +1,106 @@
+"""
+Testes do tempo com o responsável atual (tarefas/atribuicoes.py)
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from importar_csv.models import HistoricoTarefa, RegistroImportacao
+from tarefas import atribuicoes
+from tarefas.atribuicoes import reconstruir_atribuicoes, registrar_mudancas_responsavel
+from tarefas.models import AtribuicaoTarefa, Tarefa
+
+User = get_user_model()
+
+
+class AtribuicaoTarefaTestCase(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A')
+        User.objects.create_user(siape='2222222', nome_completo='Servidor B')
+        self.tarefa = Tarefa.objects.create(
+            numero_protocolo_tarefa='777001',
+            indicador_subtarefas_pendentes=0,
+            codigo_unidade_tarefa=23150521,
+            nome_servico='Pensão por Morte',
+            status_tarefa='Pendente',
+            siape_responsavel_id='1111111',
+        )
+
+    def test_registra_somente_trocas(self):
+        inicio = timezone.now() - timedelta(days=20)
+        registrar_mudancas_responsavel([self.tarefa], inicio)
+        self.assertEqual(self.tarefa.data_atribuicao_atual, inicio)
+
+        troca = timezone.now() - timedelta(days=5)
+        self.tarefa.siape_responsavel_id = '2222222'
+        registrar_mudancas_responsavel([self.tarefa], troca)
+        self.assertEqual(registrar_mudancas_responsavel([], timezone.now()), 0)
+
+        atribuicoes = list(AtribuicaoTarefa.objects.filter(tarefa=self.tarefa).order_by('inicio'))
+        self.assertEqual([a.siape for a in atribuicoes], ['1111111', '2222222'])
+        self.assertEqual(atribuicoes[0].fim, troca)
+        self.assertIsNone(atribuicoes[1].fim)
+        self.assertEqual(self.tarefa.dias_com_responsavel_atual, 5)
+
+    def test_reconstroi_a_partir_do_historico(self):
+        siapes = ['1111111', '1111111', '2222222', '2222222', '1111111']
+        registros = []
+        for dias, siape in zip([40, 30, 20, 10, 3], siapes):
+            registro = RegistroImportacao.objects.create(nome_arquivo='x.csv', status='COMPLETED')
+            RegistroImportacao.objects.filter(pk=registro.pk).update(
+                data_importacao=timezone.now() - timedelta(days=dias)
+            )
+            registros.append(registro)
+            HistoricoTarefa.objects.create(
+                tarefa_original=self.tarefa, registro_importacao=registro, siape_responsavel=siape
+            )
+
+        resultado = reconstruir_atribuicoes()
+
+        self.assertEqual(resultado, {'tarefas': 1, 'atribuicoes': 3})
+        self.assertEqual(
+            list(AtribuicaoTarefa.objects.order_by('inicio').values_list('siape', flat=True)),
+            ['1111111', '2222222', '1111111']
+        )
+        self.assertEqual(AtribuicaoTarefa.objects.filter(fim__isnull=True).count(), 1)
+        self.tarefa.refresh_from_db()
+        self.assertEqual(self.tarefa.dias_com_responsavel_atual, 3)
+
+    def test_reconstroi_em_lotes_de_tarefas(self):
+        outra = Tarefa.objects.create(
+            numero_protocolo_tarefa='777002', indicador_subtarefas_pendentes=0, codigo_unidade_tarefa=23150521,
+            nome_servico='Pensão por Morte', status_tarefa='Pendente', siape_responsavel_id='2222222',
+            data_atribuicao_atual=timezone.now(),
+        )
+        AtribuicaoTarefa.objects.create(tarefa=outra, siape='2222222', inicio=timezone.now())
+        registro = RegistroImportacao.objects.create(nome_arquivo='x.csv', status='COMPLETED')
+        HistoricoTarefa.objects.create(
+            tarefa_original=self.tarefa, registro_importacao=registro, siape_responsavel='1111111'
+        )
+
+        with mock.patch.object(atribuicoes, 'TAMANHO_LOTE_TAREFAS', 1):
+            resultado = reconstruir_atribuicoes()
+
+        self.assertEqual(resultado, {'tarefas': 1, 'atribuicoes': 1})
+        self.assertEqual(list(AtribuicaoTarefa.objects.values_list('tarefa_id', flat=True)), ['777001'])
+        outra.refresh_from_db()
+        self.assertIsNone(outra.data_atribuicao_atual)
+
+    def test_ordenar_por_tempo_nao_altera_os_kpis(self):
+        Tarefa.objects.filter(pk=self.tarefa.pk).update(tipo_fila='PGB', data_atribuicao_atual=timezone.now())
+        Tarefa.objects.create(
+            numero_protocolo_tarefa='777002', indicador_subtarefas_pendentes=0, codigo_unidade_tarefa=23150521,
+            nome_servico='Pensão por Morte', status_tarefa='Pendente', siape_responsavel_id='2222222',
+            tipo_fila='PGB',
+        )
+        coordenador = User.objects.create_user(siape='9999999', nome_completo='Coordenação', is_staff=True)
+        self.client.force_login(coordenador)
+
+        resposta = self.client.get('/tarefas/fila/PGB/', {'ordem': 'data_atribuicao_atual'})
+
+        self.assertEqual(resposta.context['total'], 2)
+        self.assertEqual([t.pk for t in resposta.context['tarefas']], ['777001'])
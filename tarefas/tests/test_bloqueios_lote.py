@@ -0,0 +1,81 @@
+"""
+Testes das solicitações de bloqueio/desbloqueio em lote (AcoesService.solicitar_bloqueios_em_lote)
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from tarefas.models import BloqueioServidor, EstadoBloqueio, HistoricoBloqueio
+from tarefas.services.acoes_service import AcoesService
+
+User = get_user_model()
+
+
+class BloqueiosEmLoteTestCase(TestCase):
+
+    def setUp(self):
+        self.coordenador = User.objects.create_user(siape='9999999', nome_completo='Coordenação', is_staff=True)
+        self.servidores = [
+            User.objects.create_user(siape=f'{i}000000', nome_completo=f'Servidor {i}') for i in range(1, 5)
+        ]
+        # Servidor 1 já bloqueado na PGB; servidor 2 com bloqueio da PGB aguardando o robô
+        AcoesService.processar_resposta_bloqueio(
+            AcoesService.solicitar_bloqueio(self.servidores[0], 'PGB', self.coordenador).id, True
+        )
+        AcoesService.solicitar_bloqueio(self.servidores[1], 'PGB', self.coordenador)
+
+    def test_valida_e_grava_em_numero_fixo_de_consultas(self):
+        siapes = [s.siape for s in self.servidores] + ['0000000']
+
+        # servidores, estado, pendentes, savepoint, bulk_create x2, release
+        with self.assertNumQueries(7):
+            resumo = AcoesService.solicitar_bloqueios_em_lote(
+                siapes, ['PGB', 'OUTROS'], BloqueioServidor.TIPO_BLOQUEIO, self.coordenador, 'Fim do mês'
+            )
+
+        self.assertEqual(len(resumo['solicitacoes']), 6)
+        self.assertEqual(resumo['ja_no_estado'], [('1000000', 'PGB')])
+        self.assertEqual(resumo['ja_pendentes'], [('2000000', 'PGB')])
+        self.assertEqual(resumo['nao_encontrados'], ['0000000'])
+        historicos = HistoricoBloqueio.objects.filter(bloqueio__in=resumo['solicitacoes'])
+        self.assertEqual(historicos.count(), 6)
+        self.assertTrue(all(h.status == BloqueioServidor.STATUS_PENDENTE for h in historicos))
+
+    def test_banco_sem_retorno_de_ids_no_bulk_create(self):
+        # Como no MySQL: os ids são relidos para gravar o histórico
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert',
+                               new_callable=mock.PropertyMock, return_value=False):
+            resumo = AcoesService.solicitar_bloqueios_em_lote(
+                ['3000000', '4000000'], ['PGB'], BloqueioServidor.TIPO_BLOQUEIO, self.coordenador
+            )
+        self.assertTrue(all(b.pk for b in resumo['solicitacoes']))
+        self.assertEqual(HistoricoBloqueio.objects.filter(bloqueio__in=resumo['solicitacoes']).count(), 2)
+
+    def test_desbloqueio_so_para_quem_esta_bloqueado(self):
+        resumo = AcoesService.solicitar_bloqueios_em_lote(
+            ['1000000', '3000000'], ['PGB'], BloqueioServidor.TIPO_DESBLOQUEIO, self.coordenador
+        )
+        self.assertEqual([b.servidor.siape for b in resumo['solicitacoes']], ['1000000'])
+        self.assertEqual(resumo['ja_no_estado'], [('3000000', 'PGB')])
+        self.assertTrue(EstadoBloqueio.objects.get(servidor=self.servidores[0], codigo_fila='PGB').bloqueado)
+
+        with self.assertRaises(ValueError):
+            AcoesService.solicitar_bloqueios_em_lote(['1000000'], ['PGB'], 'OUTRA', self.coordenador)
+
+    def test_tela_de_bloqueios_em_lote(self):
+        self.client.force_login(self.coordenador)
+        self.assertEqual(self.client.get('/tarefas/servidores/bloqueios/lote/').status_code, 200)
+
+        resposta = self.client.post('/tarefas/servidores/bloqueios/lote/', {
+            'siapes': '3000000, 4000000\n1000000', 'filas': ['PGB'], 'tipo_acao': 'BLOQUEIO',
+            'observacoes': 'Fim do mês',
+        }, follow=True)
+
+        mensagens = [str(m) for m in resposta.context['messages']]
+        self.assertIn('2 solicitação(ões) de bloqueio criada(s).', mensagens)
+        self.assertTrue(any('1000000/PGB' in m for m in mensagens))
+        self.assertEqual(
+            BloqueioServidor.objects.filter(servidor__siape__in=['3000000', '4000000'], codigo_fila='PGB').count(), 2
+        )
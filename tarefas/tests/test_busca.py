@@ -0,0 +1,91 @@
+"""
+Testes do índice de busca por substring (tarefas/busca.py)
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from tarefas.busca import (
+    atualizar_indice_busca,
+    buscar_chaves,
+    filtrar_por_busca,
+    filtro_prefixo,
+    normalizar_texto,
+)
+from tarefas.models import EntradaBusca, Tarefa
+
+User = get_user_model()
+
+
+class IndiceBuscaTestCase(TestCase):
+    """Compara a busca pelo índice com o icontains que ela substitui"""
+
+    def setUp(self):
+        User.objects.create_user(siape='1111111', nome_completo='JOÃO DA SILVA', gex='GEX Belém')
+        User.objects.create_user(siape='2222222', nome_completo='Maria Souza', gex='GEX Manaus')
+        servicos = ['Aposentadoria por Idade', 'Pensão por Morte', 'Revisão de Ofício Identificada']
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'12345{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                nome_servico=servico,
+                status_tarefa='Pendente',
+            )
+            for i, servico in enumerate(servicos)
+        ])
+
+    def test_normalizacao_remove_acentos_e_caixa(self):
+        self.assertEqual(normalizar_texto('  Pensão   POR Morte '), 'pensao por morte')
+
+    def test_indice_vazio_usa_icontains(self):
+        """Sem índice construído, a busca devolve None (fallback)"""
+        self.assertIsNone(buscar_chaves(EntradaBusca.CAMPO_SERVICO, 'idade'))
+        qs = filtrar_por_busca(Tarefa.objects.all(), 'nome_servico', EntradaBusca.CAMPO_SERVICO, 'Idade')
+        self.assertEqual(qs.count(), 1)
+
+    def test_busca_por_substring(self):
+        atualizar_indice_busca()
+
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_SERVICO, 'revisao de of'),
+                         ['Revisão de Ofício Identificada'])
+        self.assertEqual(len(buscar_chaves(EntradaBusca.CAMPO_SERVICO, 'por')), 2)
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_SERVICO, 'xyz'), [])
+        # Termo curto (menos de 3 caracteres)
+        self.assertEqual(len(buscar_chaves(EntradaBusca.CAMPO_SERVICO, 'o')), 3)
+
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_SERVIDOR, 'joao'), ['1111111'])
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_GEX, 'belem'), ['GEX Belém'])
+
+    def test_nome_do_responsavel_sem_usuario_cadastrado(self):
+        """O nome do CSV é indexado à parte: alcança tarefas de SIAPE sem usuário"""
+        Tarefa.objects.filter(numero_protocolo_tarefa='123450').update(
+            siape_responsavel_id='1111111', nome_profissional_responsavel='JOÃO DA SILVA'
+        )
+        Tarefa.objects.filter(numero_protocolo_tarefa='123451').update(nome_profissional_responsavel='Ana Pereira')
+        atualizar_indice_busca()
+
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_RESPONSAVEL, 'pereira'), ['Ana Pereira'])
+        qs = filtrar_por_busca(Tarefa.objects.all(), 'nome_profissional_responsavel',
+                               EntradaBusca.CAMPO_RESPONSAVEL, 'pereira')
+        self.assertEqual(list(qs.values_list('numero_protocolo_tarefa', flat=True)), ['123451'])
+        qs = filtrar_por_busca(Tarefa.objects.all(), 'nome_profissional_responsavel',
+                               EntradaBusca.CAMPO_RESPONSAVEL, 'joao')
+        self.assertEqual(list(qs.values_list('numero_protocolo_tarefa', flat=True)), ['123450'])
+
+    def test_atualizacao_incremental(self):
+        atualizar_indice_busca()
+        Tarefa.objects.filter(nome_servico='Pensão por Morte').update(ativa=False)
+        User.objects.filter(siape='2222222').update(nome_completo='Maria Souza Lima')
+
+        resultado = atualizar_indice_busca()
+
+        self.assertEqual(resultado[EntradaBusca.CAMPO_SERVICO]['removidas'], 1)
+        self.assertEqual(resultado[EntradaBusca.CAMPO_SERVIDOR]['inseridas'], 1)
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_SERVICO, 'pensao'), [])
+        self.assertEqual(buscar_chaves(EntradaBusca.CAMPO_SERVIDOR, 'lima'), ['2222222'])
+
+    def test_filtro_prefixo(self):
+        qs = Tarefa.objects.filter(filtro_prefixo('numero_protocolo_tarefa', '123451'))
+        self.assertEqual(list(qs.values_list('numero_protocolo_tarefa', flat=True)), ['123451'])
+        self.assertEqual(Tarefa.objects.filter(filtro_prefixo('numero_protocolo_tarefa', '1234')).count(), 3)
@@ -0,0 +1,93 @@
+"""
+Testes dos helpers de cache compartilhado (tarefas/cache.py)
+"""
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from tarefas import cache as cache_helpers
+
+from tarefas.cache import (
+    chave_versionada,
+    estatisticas_namespace,
+    invalidar_namespace,
+    obter_ou_calcular,
+    versao_namespace,
+    zerar_estatisticas,
+)
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CacheNamespaceTestCase(TestCase):
+    """Valida versionamento de chaves e contadores de acerto"""
+
+    def setUp(self):
+        cache.clear()
+        self.namespace = 'teste'
+
+    def test_chave_inclui_versao(self):
+        """A chave muda quando o namespace é invalidado"""
+        with mock.patch.object(cache_helpers, '_versao_inicial', return_value=1000):
+            chave_antes = chave_versionada(self.namespace, 'info', 1)
+            invalidar_namespace(self.namespace)
+            chave_depois = chave_versionada(self.namespace, 'info', 1)
+
+        self.assertEqual(chave_antes, 'teste:v1000:info:1')
+        self.assertEqual(chave_depois, 'teste:v1001:info:1')
+        self.assertEqual(versao_namespace(self.namespace), 1001)
+
+    def test_versao_removida_nao_volta_a_valores_antigos(self):
+        """Sem a chave de versão (cull/eviction) o namespace não reaproveita versões"""
+        with mock.patch.object(cache_helpers, '_versao_inicial', return_value=1000):
+            obter_ou_calcular(self.namespace, ['x'], lambda: 'antigo')
+        cache.delete('ns:teste:versao')
+
+        with mock.patch.object(cache_helpers, '_versao_inicial', return_value=2000):
+            self.assertEqual(obter_ou_calcular(self.namespace, ['x'], lambda: 'novo'), 'novo')
+            self.assertEqual(versao_namespace(self.namespace), 2000)
+
+    def test_cache_indisponivel(self):
+        """Sem cache não há versão: obter cai no default e definir é ignorado"""
+        with mock.patch.object(cache_helpers.cache, 'get', side_effect=ConnectionError('fora do ar')):
+            self.assertIsNone(versao_namespace(self.namespace))
+            self.assertEqual(obter_ou_calcular(self.namespace, ['x'], lambda: 'calculado'), 'calculado')
+
+    def test_partes_com_espaco_viram_hash(self):
+        """Partes com espaço são convertidas em hash (compatível com Memcached)"""
+        chave = chave_versionada(self.namespace, 'Aposentadoria por Idade')
+        self.assertNotIn(' ', chave)
+
+    def test_contadores_desligados_por_padrao(self):
+        """Sem CACHE_ESTATISTICAS a leitura não grava contadores"""
+        obter_ou_calcular(self.namespace, ['x'], lambda: 1)
+        obter_ou_calcular(self.namespace, ['x'], lambda: 1)
+        self.assertEqual(estatisticas_namespace(self.namespace)['hits'], 0)
+        self.assertIsNone(cache.get('ns:teste:misses'))
+
+    @override_settings(CACHE_ESTATISTICAS=True)
+    def test_obter_ou_calcular_registra_acertos(self):
+        """Primeira chamada calcula (erro), segunda usa cache (acerto)"""
+        chamadas = []
+
+        def calcular():
+            chamadas.append(1)
+            return {'valor': 42}
+
+        self.assertEqual(obter_ou_calcular(self.namespace, ['x'], calcular), {'valor': 42})
+        self.assertEqual(obter_ou_calcular(self.namespace, ['x'], calcular), {'valor': 42})
+        self.assertEqual(len(chamadas), 1)
+
+        stats = estatisticas_namespace(self.namespace)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['taxa_acerto'], 50.0)
+
+        zerar_estatisticas(self.namespace)
+        self.assertEqual(estatisticas_namespace(self.namespace)['hits'], 0)
+
+    def test_invalidacao_forca_recalculo(self):
+        """Após invalidar, o valor é recalculado"""
+        obter_ou_calcular(self.namespace, ['x'], lambda: 'antigo')
+        invalidar_namespace(self.namespace)
+        self.assertEqual(obter_ou_calcular(self.namespace, ['x'], lambda: 'novo'), 'novo')
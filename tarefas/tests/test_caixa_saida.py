@@ -0,0 +1,112 @@
+"""
+Testes da caixa de saída de emails (tarefas/caixa_saida.py)
+"""
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tarefas.caixa_saida import metricas_caixa_saida, processar_pendentes, reservar_lote
+from tarefas.models import HistoricoEmail
+from tarefas.services import email_service
+from tarefas.services.email_service import EmailService
+from tarefas.services.graph_local import ServidorGraphLocal
+
+User = get_user_model()
+
+
+class CaixaSaidaTestCase(TestCase):
+
+    def setUp(self):
+        self.graph = ServidorGraphLocal().iniciar()
+        self.addCleanup(self.graph.parar)
+
+        override = override_settings(
+            GRAPH_API_URL=self.graph.url,
+            GRAPH_HTTP_BACKOFF=0,
+            GRAPH_HTTP_TENTATIVAS=0,
+            GRAPH_REQUISICOES_POR_SEGUNDO=0,
+            SENDER_EMAIL='robo@inss.gov.br',
+            EMAIL_MAX_TENTATIVAS=2,
+            EMAIL_BACKOFF_SEGUNDOS=60,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        email_service.redefinir_clientes()
+        self.addCleanup(email_service.redefinir_clientes)
+        patcher = mock.patch.object(EmailService, 'get_access_token', return_value='token-teste')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.servidor = User.objects.create_user(siape='1111111', nome_completo='Servidor A',
+                                                 email='a@inss.gov.br')
+
+    def _enfileirar(self, quantidade):
+        return [
+            EmailService().enfileirar_email(f'a{i}@inss.gov.br', 'Assunto', '<p>Corpo</p>', self.servidor, None)
+            for i in range(quantidade)
+        ]
+
+    def test_enfileirar_nao_chama_graph(self):
+        self._enfileirar(3)
+        self.assertEqual(self.graph.requisicoes, 0)
+        self.assertEqual(metricas_caixa_saida()['prontos'], 3)
+
+        resultado = processar_pendentes()
+
+        self.assertEqual(resultado, {'reservados': 3, 'enviados': 3, 'erros': 0, 'reagendados': 0})
+        self.assertEqual(self.graph.requisicoes, 1)
+        metricas = metricas_caixa_saida()
+        self.assertEqual((metricas['pendentes'], metricas['enviados_ultima_hora']), (0, 3))
+        self.assertIsNotNone(metricas['latencia_p95_segundos'])
+
+    def test_reserva_nao_entrega_duas_vezes(self):
+        self._enfileirar(3)
+        self.assertEqual(len(reservar_lote(limite=2)), 2)
+        self.assertEqual(len(reservar_lote()), 1)
+        self.assertEqual(reservar_lote(), [])
+        self.assertEqual(metricas_caixa_saida()['aguardando'], 3)
+
+    def test_backoff_e_maximo_de_tentativas(self):
+        historico, = self._enfileirar(1)
+        self.graph.falhas = 10
+
+        inicio = timezone.now()
+        self.assertEqual(processar_pendentes()['reagendados'], 1)
+        historico.refresh_from_db()
+        self.assertEqual((historico.status, historico.tentativas), (HistoricoEmail.STATUS_PENDENTE, 1))
+        self.assertGreaterEqual(historico.proxima_tentativa, inicio + timedelta(seconds=60))
+        self.assertIn('429', historico.mensagem_erro)
+        self.assertEqual(processar_pendentes()['reservados'], 0)  # ainda em backoff
+
+        HistoricoEmail.objects.filter(id=historico.id).update(proxima_tentativa=timezone.now())
+        self.assertEqual(processar_pendentes()['erros'], 1)
+        historico.refresh_from_db()
+        self.assertEqual((historico.status, historico.tentativas), (HistoricoEmail.STATUS_ERRO, 2))
+        self.assertIsNone(historico.proxima_tentativa)
+
+    @override_settings(EMAIL_RESERVA_SEGUNDOS=600, GRAPH_HTTP_TIMEOUT=600)
+    def test_nao_envia_depois_do_prazo_da_reserva(self):
+        # Reserva menor que o pior caso de uma requisição: nenhum $batch começa
+        historicos = self._enfileirar(3)
+
+        inicio = timezone.now()
+        resultado = processar_pendentes(max_lotes=1)
+
+        self.assertEqual(resultado, {'reservados': 3, 'enviados': 0, 'erros': 0, 'reagendados': 3})
+        self.assertEqual(self.graph.requisicoes, 0)
+        for historico in historicos:
+            historico.refresh_from_db()
+            self.assertEqual((historico.status, historico.tentativas), (HistoricoEmail.STATUS_PENDENTE, 0))
+            self.assertLessEqual(historico.proxima_tentativa, timezone.now())
+            self.assertGreaterEqual(historico.proxima_tentativa, inicio)
+
+    @override_settings(EMAIL_RESERVA_SEGUNDOS=900)
+    def test_reserva_configuravel(self):
+        historico, = self._enfileirar(1)
+        inicio = timezone.now()
+        reservar_lote()
+        historico.refresh_from_db()
+        self.assertGreaterEqual(historico.proxima_tentativa, inicio + timedelta(seconds=900))
@@ -0,0 +1,93 @@
+"""
+Testes das campanhas de email (tarefas/campanhas.py)
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from tarefas.campanhas import criar_campanha, executar_campanha, preparar_campanha
+from tarefas.models import CampanhaEmail, HistoricoEmail, Tarefa, TemplateEmail
+from tarefas.services import email_service
+from tarefas.services.graph_local import ServidorGraphLocal
+
+User = get_user_model()
+
+
+class CampanhaEmailTestCase(TestCase):
+
+    def setUp(self):
+        self.graph = ServidorGraphLocal().iniciar()
+        self.addCleanup(self.graph.parar)
+
+        override = override_settings(
+            GRAPH_API_URL=self.graph.url,
+            GRAPH_HTTP_BACKOFF=0,
+            GRAPH_REQUISICOES_POR_SEGUNDO=0,
+            SENDER_EMAIL='robo@inss.gov.br',
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        email_service.redefinir_clientes()
+        self.addCleanup(email_service.redefinir_clientes)
+        patcher = mock.patch.object(email_service.EmailService, 'get_access_token', return_value='token-teste')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A', email='a@inss.gov.br')
+        User.objects.create_user(siape='2222222', nome_completo='Servidor B', email='b@inss.gov.br')
+        User.objects.create_user(siape='3333333', nome_completo='Servidor C', email='sem.email.3333333@x')
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'77700{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                siape_responsavel_id=siape,
+                nivel_criticidade_calculado='CRÍTICA' if i % 2 == 0 else 'REGULAR',
+                tipo_fila='PGB',
+            )
+            for i, siape in enumerate(['1111111', '1111111', '1111111', '2222222', '2222222', '3333333'])
+        ])
+        self.template = TemplateEmail.objects.create(
+            nome='Criticas', assunto='{{ nome_servidor }}: {{ tarefas_criticas }} crítica(s)',
+            corpo_html='<p>{{ total_tarefas }}</p>{{ lista_tarefas }}',
+        )
+
+    def test_cria_e_envia(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            campanha = criar_campanha(self.template, {'fila': 'PGB', 'minimo_criticas': '1'})
+
+        self.assertEqual(len(callbacks), 1)
+        # A requisição só grava a campanha: destinatários e emails ficam para o worker
+        self.assertEqual((campanha.status, campanha.total_destinatarios), (CampanhaEmail.STATUS_PENDENTE, 0))
+        self.assertFalse(campanha.emails.exists())
+
+        self.assertEqual(preparar_campanha(campanha), 2)
+        self.assertEqual(campanha.total_destinatarios, 2)  # sem email real fica de fora
+        emails = {h.email_destinatario: h for h in campanha.emails.all()}
+        self.assertEqual(emails['a@inss.gov.br'].assunto, 'Servidor A: 2 crítica(s)')
+        self.assertIn('<p>3</p>', emails['a@inss.gov.br'].corpo_email)
+        self.assertIn('777000', emails['a@inss.gov.br'].corpo_email)
+        self.assertEqual(emails['b@inss.gov.br'].assunto, 'Servidor B: 1 crítica(s)')
+
+        # Já preparada (worker repetindo a tarefa): não grava os emails de novo
+        resultado = executar_campanha(campanha)
+
+        self.assertEqual(campanha.emails.count(), 2)
+        self.assertEqual(resultado, {'reservados': 2, 'enviados': 2, 'erros': 0, 'reagendados': 0})
+        self.assertEqual(len(self.graph.chamadas), 1)
+        self.assertTrue(self.graph.chamadas[0][0].endswith('/$batch'))
+        campanha.refresh_from_db()
+        self.assertEqual(campanha.status, CampanhaEmail.STATUS_CONCLUIDA)
+        self.assertEqual((campanha.enviados, campanha.erros), (2, 0))
+        self.assertFalse(HistoricoEmail.objects.filter(status=HistoricoEmail.STATUS_PENDENTE).exists())
+
+    def test_sem_destinatarios(self):
+        campanha = criar_campanha(self.template, {'minimo_criticas': 5})
+        resultado = executar_campanha(campanha)
+
+        self.assertEqual(resultado['reservados'], 0)
+        campanha.refresh_from_db()
+        self.assertEqual(campanha.total_destinatarios, 0)
+        self.assertEqual(campanha.status, CampanhaEmail.STATUS_CONCLUIDA)
+        self.assertIsNotNone(campanha.data_conclusao)
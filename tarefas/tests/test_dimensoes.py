@@ -0,0 +1,51 @@
+"""
+Testes das tabelas de dimensão (tarefas/dimensoes.py)
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from tarefas.dimensoes import atualizar_dimensoes, opcoes_dimensao, servicos_servidor_fila
+from tarefas.models import DimensaoTarefa, Tarefa
+
+User = get_user_model()
+
+
+class DimensoesTestCase(TestCase):
+
+    def setUp(self):
+        self.servidor = User.objects.create_user(siape='1111111', nome_completo='Servidor Teste')
+        dados = [
+            ('1', 'Pendente', 'Aposentadoria', True),
+            ('2', 'Pendente', 'Pensão', True),
+            ('3', 'Exigência cumprida', 'Pensão', True),
+            ('4', 'Cancelada', 'BPC', False),
+        ]
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=protocolo,
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                nome_servico=servico,
+                status_tarefa=status,
+                ativa=ativa,
+                siape_responsavel=self.servidor,
+                tipo_fila='PGB',
+            )
+            for protocolo, status, servico, ativa in dados
+        ])
+
+    def test_opcoes_antes_e_depois_da_atualizacao(self):
+        """Sem dimensões calculadas a leitura cai na consulta direta; depois usa a tabela"""
+        esperado = [('Exigência cumprida', 1), ('Pendente', 2)]
+        self.assertEqual(opcoes_dimensao(DimensaoTarefa.TIPO_STATUS, com_contagem=True), esperado)
+
+        resultado = atualizar_dimensoes()
+        self.assertEqual(resultado[DimensaoTarefa.TIPO_STATUS], 2)
+        self.assertEqual(opcoes_dimensao(DimensaoTarefa.TIPO_STATUS, com_contagem=True), esperado)
+        self.assertEqual(opcoes_dimensao(DimensaoTarefa.TIPO_UNIDADE), ['23150521'])
+
+    def test_servicos_por_servidor_e_fila(self):
+        atualizar_dimensoes()
+        self.assertEqual(servicos_servidor_fila('1111111', 'PGB'), ['Aposentadoria', 'Pensão'])
+        self.assertEqual(servicos_servidor_fila('1111111', 'OUTROS'), [])
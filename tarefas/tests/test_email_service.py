@@ -0,0 +1,156 @@
+"""
+Testes do EmailService contra um servidor Graph local (stub HTTP)
+"""
+from collections import namedtuple
+from datetime import date
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.template import Context
+from django.test import TestCase, override_settings
+
+from tarefas.models import HistoricoEmail, TemplateEmail
+from tarefas.services import email_service
+from tarefas.services.email_service import EmailService
+from tarefas.services.graph_local import ServidorGraphLocal
+
+User = get_user_model()
+
+
+class _AppMsalFalso:
+    instancias = 0
+
+    def __init__(self, **kwargs):
+        _AppMsalFalso.instancias += 1
+
+    def acquire_token_for_client(self, scopes):
+        return {'access_token': 'token-teste'}
+
+
+class EmailServiceGraphTestCase(TestCase):
+
+    def setUp(self):
+        self.graph = ServidorGraphLocal().iniciar()
+        self.addCleanup(self.graph.parar)
+
+        override = override_settings(
+            GRAPH_API_URL=self.graph.url,
+            GRAPH_HTTP_BACKOFF=0,
+            GRAPH_REQUISICOES_POR_SEGUNDO=0,
+            SENDER_EMAIL='robo@inss.gov.br',
+            AZURE_AD_CLIENT_ID='cliente',
+            AZURE_AD_CLIENT_SECRET='segredo',
+            AZURE_AD_TENANT_ID='tenant',
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+        email_service.redefinir_clientes()
+        self.addCleanup(email_service.redefinir_clientes)
+        _AppMsalFalso.instancias = 0
+        patcher = mock.patch.object(email_service.msal, 'ConfidentialClientApplication', _AppMsalFalso)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.servidor = User.objects.create_user(siape='1111111', nome_completo='Servidor A',
+                                                 email='a@inss.gov.br')
+
+    def test_reaproveita_app_msal_e_conexao(self):
+        for _ in range(5):
+            sucesso, historico = EmailService().enviar_email(
+                'a@inss.gov.br', 'Assunto', '<p>Corpo</p>', self.servidor, None
+            )
+            self.assertTrue(sucesso)
+
+        self.assertEqual(_AppMsalFalso.instancias, 1)
+        self.assertEqual(self.graph.conexoes, 1)
+        self.assertEqual(len(self.graph.chamadas), 5)
+        caminho, autorizacao, corpo = self.graph.chamadas[0]
+        self.assertEqual(caminho, '/v1.0/users/robo@inss.gov.br/sendMail')
+        self.assertEqual(autorizacao, 'Bearer token-teste')
+        self.assertEqual(corpo['message']['toRecipients'][0]['emailAddress']['address'], 'a@inss.gov.br')
+        self.assertEqual(HistoricoEmail.objects.filter(status=HistoricoEmail.STATUS_ENVIADO).count(), 5)
+
+    def test_repete_em_429(self):
+        self.graph.falhas = 2
+        sucesso, _ = EmailService().enviar_email('a@inss.gov.br', 'Assunto', '<p>Corpo</p>', self.servidor, None)
+        self.assertTrue(sucesso)
+        self.assertEqual(len(self.graph.chamadas), 3)
+
+    def test_nao_repete_post_com_erro_do_servidor(self):
+        # Um 500 pode ter enviado o e-mail: a sessão não reenvia o POST
+        self.graph.falhas, self.graph.status_falha = 1, 500
+        sucesso, historico = EmailService().enviar_email(
+            'a@inss.gov.br', 'Assunto', '<p>Corpo</p>', self.servidor, None
+        )
+        self.assertFalse(sucesso)
+        self.assertIn('500', historico.mensagem_erro)
+        self.assertEqual(len(self.graph.chamadas), 1)
+
+    @override_settings(GRAPH_HTTP_TENTATIVAS=1)
+    def test_esgota_tentativas(self):
+        self.graph.falhas = 5
+        sucesso, historico = EmailService().enviar_email(
+            'a@inss.gov.br', 'Assunto', '<p>Corpo</p>', self.servidor, None
+        )
+        self.assertFalse(sucesso)
+        self.assertIn('429', historico.mensagem_erro)
+        self.assertEqual(len(self.graph.chamadas), 2)
+
+    def test_envio_em_lote_com_batch(self):
+        historicos = HistoricoEmail.objects.bulk_create([
+            HistoricoEmail(servidor=self.servidor, email_destinatario=f'a{i}@inss.gov.br',
+                           assunto='Assunto', corpo_email='<p>Corpo</p>')
+            for i in range(45)
+        ])
+        self.graph.falhas = 3
+
+        resultado = EmailService().enviar_em_lote(historicos, max_threads=3)
+
+        self.assertEqual(resultado, {'enviados': 45, 'erros': 0, 'reagendados': 0})
+        self.assertEqual(self.graph.mensagens, 45)
+        lotes = [corpo for caminho, _, corpo in self.graph.chamadas if caminho.endswith('/$batch')]
+        self.assertEqual(sorted((len(lote['requests']) for lote in lotes[:3]), reverse=True), [20, 20, 5])
+        self.assertEqual(len(lotes), 4)  # 3 recusas (429) reenviadas numa segunda rodada
+        self.assertEqual(lotes[0]['requests'][0]['url'], '/users/robo@inss.gov.br/sendMail')
+        self.assertEqual(HistoricoEmail.objects.filter(status=HistoricoEmail.STATUS_ENVIADO).count(), 45)
+
+
+class TemplatesEmailTestCase(TestCase):
+
+    def setUp(self):
+        email_service.redefinir_clientes()
+        self.addCleanup(email_service.redefinir_clientes)
+
+    def test_cache_por_data_alteracao(self):
+        template_email = TemplateEmail.objects.create(nome='Aviso', assunto='Olá {{ nome_servidor }}',
+                                                      corpo_html='<p>{{ lista_tarefas }}</p>')
+        primeiro = email_service.obter_templates_por_nome('Aviso')
+        with self.assertNumQueries(1):
+            self.assertIs(email_service.obter_templates_por_nome('Aviso')[1], primeiro[1])
+
+        template_email.assunto = 'Oi {{ nome_servidor }}'
+        template_email.save()
+        assunto, _ = email_service.obter_templates_por_nome('Aviso')
+        self.assertIsNot(assunto, primeiro[0])
+        self.assertEqual(assunto.render(Context({'nome_servidor': 'Ana'})), 'Oi Ana')
+
+    def test_lista_com_anexo(self):
+        Linha = namedtuple('Linha', email_service.CAMPOS_LISTA_EMAIL)
+        linhas = [Linha(f'{i:09d}', 'Serviço <A&B>', date(2025, 1, 2), i, 'CRÍTICA' if i == 0 else 'REGULAR')
+                  for i in range(25)]
+
+        html, anexo = EmailService().tarefas_para_email(linhas, '1111111', 25)
+
+        self.assertEqual(html.count('<td>0000'), 20)
+        self.assertIn('Serviço &lt;A&amp;B&gt;', html)
+        self.assertIn('02/01/2025', html)
+        self.assertIn('E mais 5 tarefa(s)', html)
+        nome, conteudo = anexo
+        self.assertEqual(nome, 'tarefas_1111111.csv')
+        self.assertEqual(len(conteudo.splitlines()), 26)
+
+        html, anexo = EmailService().tarefas_para_email(linhas[:3], '1111111', 3)
+        self.assertIsNone(anexo)
+        self.assertNotIn('E mais', html)
+        self.assertIn('#ffcccc', html)
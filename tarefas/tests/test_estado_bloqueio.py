@@ -0,0 +1,74 @@
+"""
+Testes do estado de bloqueio materializado (EstadoBloqueio)
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+
+from tarefas.models import BloqueioServidor, EstadoBloqueio
+from tarefas.services.acoes_service import AcoesService
+
+User = get_user_model()
+
+
+class EstadoBloqueioTestCase(TestCase):
+
+    def setUp(self):
+        self.servidor = User.objects.create_user(siape='1111111', nome_completo='Servidor A',
+                                                 email='a@inss.gov.br')
+
+    def _concluir(self, bloqueio, sucesso=True):
+        return AcoesService.processar_resposta_bloqueio(bloqueio.id, sucesso)
+
+    def test_resposta_do_robo_atualiza_estado(self):
+        bloqueio = AcoesService.solicitar_bloqueio(self.servidor, 'PGB', None)
+        self.assertFalse(BloqueioServidor.servidor_esta_bloqueado('1111111', 'PGB'))
+
+        self._concluir(bloqueio)
+        with self.assertNumQueries(1):
+            self.assertTrue(BloqueioServidor.servidor_esta_bloqueado('1111111', 'PGB'))
+
+        falha = AcoesService.solicitar_desbloqueio(self.servidor, 'PGB', None)
+        self._concluir(falha, sucesso=False)
+        self.assertTrue(BloqueioServidor.servidor_esta_bloqueado('1111111', 'PGB'))
+
+        self._concluir(AcoesService.solicitar_desbloqueio(self.servidor, 'PGB', None))
+        estado = EstadoBloqueio.objects.get(servidor=self.servidor, codigo_fila='PGB')
+        self.assertFalse(estado.bloqueado)
+        self.assertEqual(estado.ultima_acao.tipo_acao, BloqueioServidor.TIPO_DESBLOQUEIO)
+        self.assertEqual(EstadoBloqueio.objects.count(), 1)
+
+    def test_respostas_em_lote_e_recalculo(self):
+        bloqueios = [AcoesService.solicitar_bloqueio(self.servidor, fila, None) for fila in ('PGB', 'OUTROS', 'X')]
+        AcoesService.processar_respostas_bloqueio([
+            {'bloqueio_id': bloqueios[0].id, 'sucesso': True},
+            {'bloqueio_id': bloqueios[1].id, 'sucesso': True},
+            {'bloqueio_id': bloqueios[2].id, 'sucesso': False},
+        ])
+
+        def estados():
+            return set(EstadoBloqueio.objects.values_list('codigo_fila', 'bloqueado', 'ultima_acao_id'))
+
+        self.assertEqual(estados(), {('PGB', True, bloqueios[0].id), ('OUTROS', True, bloqueios[1].id)})
+        status = AcoesService.verificar_status_servidores(['1111111'], 'OUTROS')['1111111']
+        self.assertTrue(status['bloqueado'])
+
+        antes = estados()
+        EstadoBloqueio.objects.all().delete()
+        self.assertEqual(EstadoBloqueio.recalcular(), 2)
+        self.assertEqual(estados(), antes)
+
+    def test_upsert_sem_alvo_como_no_mysql(self):
+        # MySQL recusa unique_fields no bulk_create(update_conflicts=True)
+        bloqueio = AcoesService.solicitar_bloqueio(self.servidor, 'PGB', None)
+        with mock.patch.object(type(connection.features), 'supports_update_conflicts_with_target',
+                               new_callable=mock.PropertyMock, return_value=False), \
+                mock.patch.object(EstadoBloqueio.objects, 'bulk_create',
+                                  wraps=EstadoBloqueio.objects.bulk_create) as bulk_create:
+            self._concluir(bloqueio)
+
+        self.assertNotIn('unique_fields', bulk_create.call_args.kwargs)
+        self.assertTrue(bulk_create.call_args.kwargs['update_conflicts'])
+        self.assertTrue(BloqueioServidor.servidor_esta_bloqueado('1111111', 'PGB'))
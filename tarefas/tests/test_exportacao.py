@@ -0,0 +1,94 @@
+"""
+Testes da exportação de tarefas em Excel e CSV (tarefas/exportacao.py)
+"""
+import csv
+import io
+from datetime import date, timedelta
+from unittest import mock
+
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase
+from openpyxl import load_workbook
+
+from tarefas import exportacao
+from tarefas.exportacao import COLUNAS_CSV_PRAZO_VENCIDO, gerar_planilha_tarefas, resposta_csv_streaming
+from tarefas.models import ExportJob, Tarefa
+
+User = get_user_model()
+
+
+class PlanilhaTarefasTestCase(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A')
+        niveis = ['CRÍTICA', 'CRÍTICA', 'REGULAR', 'JUSTIFICADA']
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'66600{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                nome_servico='Pensão por Morte',
+                status_tarefa='Pendente',
+                siape_responsavel_id='1111111',
+                nivel_criticidade_calculado=nivel,
+                tipo_fila='PGB',
+            )
+            for i, nivel in enumerate(niveis)
+        ])
+
+    def test_planilha_streaming(self):
+        tarefas = Tarefa.objects.order_by('numero_protocolo_tarefa')
+        with self.assertNumQueries(1):
+            arquivo, totais = gerar_planilha_tarefas(tarefas, 'TÍTULO', 'Servidor A', incluir_fila=True)
+
+        self.assertEqual(totais, {'total': 4, 'criticas': 2, 'regulares': 1})
+
+        ws = load_workbook(arquivo).active
+        arquivo.close()
+        self.assertEqual(ws['A1'].value, 'TÍTULO')
+        self.assertEqual(ws['A5'].value, 'Protocolo')
+        self.assertEqual(ws['N5'].value, 'Fila')
+        self.assertEqual(ws['A6'].value, '666000')
+        self.assertEqual(ws['L6'].value, 'Servidor A (1111111)')
+        self.assertEqual(ws['A6'].fill.start_color.rgb[-6:], 'FFE6E6')
+        self.assertEqual(ws['A11'].value, 'TOTAL DE TAREFAS: 4 | CRÍTICAS: 2 | REGULARES: 1')
+        self.assertIn('A11:N11', {str(r) for r in ws.merged_cells.ranges})
+
+    def test_csv_streaming_conta_linhas_no_envio(self):
+        Tarefa.objects.filter(numero_protocolo_tarefa__in=['666000', '666001']).update(
+            data_prazo=date.today() - timedelta(days=3)
+        )
+        vencidas = Tarefa.objects.filter(data_prazo__lt=date.today()).order_by('numero_protocolo_tarefa')
+        totais = []
+
+        response = resposta_csv_streaming(vencidas, COLUNAS_CSV_PRAZO_VENCIDO, 'vencidas.csv',
+                                          ao_concluir=totais.append)
+        self.assertEqual(totais, [])
+        with self.assertNumQueries(1):
+            conteudo = b''.join(response.streaming_content).decode('utf-8')
+
+        linhas = list(csv.reader(io.StringIO(conteudo)))
+        self.assertEqual(linhas[0][0], 'Protocolo')
+        self.assertEqual([linha[0] for linha in linhas[1:]], ['666000', '666001'])
+        self.assertEqual(linhas[1][6], '3')
+        self.assertEqual(totais, [2])
+        self.assertIn('vencidas.csv', response['Content-Disposition'])
+
+    def test_acao_do_admin_acima_do_limite_vira_exportjob(self):
+        model_admin = admin.site._registry[Tarefa]
+        request = RequestFactory().post('/admin/tarefas/tarefa/')
+        request.user = User.objects.get(siape='1111111')
+
+        with mock.patch.object(model_admin, 'message_user'):
+            response = model_admin.exportar_tarefas_criticas(request, Tarefa.objects.all())
+            self.assertIn('tarefas_criticas.csv', response['Content-Disposition'])
+            self.assertFalse(ExportJob.objects.exists())
+
+            with mock.patch.object(exportacao, 'LIMITE_EXPORTACAO_DIRETA', 1):
+                response = model_admin.exportar_tarefas_criticas(request, Tarefa.objects.all())
+
+        self.assertIsNone(response)
+        job = ExportJob.objects.get()
+        self.assertEqual(job.tipo, 'criticas_csv')
+        self.assertEqual(job.filtros, {'protocolos': ['666000', '666001']})
@@ -0,0 +1,82 @@
+"""
+Testes das exportações em segundo plano (ExportJob)
+"""
+import shutil
+import tempfile
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tarefas.exportacao import gerar_exportacao, limpar_exportacoes_expiradas, solicitar_exportacao
+from tarefas.models import ExportJob, GeracaoDados, Tarefa
+
+
+class ExportJobTestCase(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        override = override_settings(MEDIA_ROOT=self.media)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'44400{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                nome_servico='Pensão por Morte',
+                status_tarefa='Pendente',
+                nivel_criticidade_calculado=nivel,
+                tipo_fila='PGB',
+            )
+            for i, nivel in enumerate(['CRÍTICA', 'CRÍTICA', 'REGULAR'])
+        ])
+
+    def test_reaproveita_arquivo_da_mesma_geracao(self):
+        job, reaproveitado = solicitar_exportacao('criticas_csv', {'fila': 'PGB', 'servidor': ''})
+        self.assertFalse(reaproveitado)
+        self.assertEqual(job.filtros, {'fila': 'PGB'})
+
+        gerar_exportacao(job)
+        self.assertEqual(job.status, ExportJob.STATUS_CONCLUIDO)
+        self.assertEqual(job.total_linhas, 2)
+        with open(job.caminho_arquivo, encoding='utf-8') as arquivo:
+            self.assertEqual(len(arquivo.read().splitlines()), 3)
+
+        # Mesmo pedido, mesmos dados: arquivo pronto
+        mesmo, reaproveitado = solicitar_exportacao('criticas_csv', {'fila': 'PGB'})
+        self.assertTrue(reaproveitado)
+        self.assertEqual(mesmo.pk, job.pk)
+
+        # Dados alterados (importação, recálculo, justificativa): nova geração
+        GeracaoDados.incrementar()
+        novo, reaproveitado = solicitar_exportacao('criticas_csv', {'fila': 'PGB'})
+        self.assertFalse(reaproveitado)
+
+    def test_job_travado_nao_e_reaproveitado(self):
+        travado, _ = solicitar_exportacao('criticas_csv', {})
+        mesmo, reaproveitado = solicitar_exportacao('criticas_csv', {})
+        self.assertEqual((mesmo.pk, reaproveitado), (travado.pk, True))
+
+        ExportJob.objects.filter(pk=travado.pk).update(
+            status=ExportJob.STATUS_PROCESSANDO, data_criacao=timezone.now() - timedelta(hours=3)
+        )
+        novo, reaproveitado = solicitar_exportacao('criticas_csv', {})
+
+        self.assertFalse(reaproveitado)
+        self.assertNotEqual(novo.pk, travado.pk)
+        travado.refresh_from_db()
+        self.assertEqual(travado.status, ExportJob.STATUS_ERRO)
+
+    def test_excel_e_limpeza_de_expiradas(self):
+        job, _ = solicitar_exportacao('tarefas_xlsx', {})
+        gerar_exportacao(job)
+        self.assertTrue(job.arquivo_existe())
+        self.assertGreater(job.tamanho_bytes, 0)
+
+        removidas, liberados = limpar_exportacoes_expiradas(agora=timezone.now() + timedelta(days=2))
+        self.assertEqual((removidas, liberados), (1, job.tamanho_bytes))
+        self.assertFalse(job.arquivo_existe())
+        self.assertFalse(ExportJob.objects.exists())
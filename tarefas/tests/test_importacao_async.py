@@ -0,0 +1,49 @@
+"""
+Testes da importação assíncrona (importar_csv/tasks.py)
+"""
+import os
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+
+from importar_csv import tasks
+from importar_csv.models import RegistroImportacao
+from tarefas.models import GeracaoDados, Tarefa
+
+User = get_user_model()
+
+LINHA = [
+    '900001', '0', '23150521', 'Pensão por Morte', 'Pendente', '', '1111111', '', 'Servidor A', '', '',
+    '01022025', '05022025', '10032025', '', '', '0', '', '3', '0', '1', '',
+]
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class ImportacaoAsyncTestCase(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A')
+        descritor, caminho = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(descritor, 'w', encoding='latin-1') as arquivo:
+            arquivo.write('cabecalho\n' + ','.join(f'"{campo}"' for campo in LINHA) + '\n')
+        self.addCleanup(os.remove, caminho)
+        self.registro = RegistroImportacao.objects.create(nome_arquivo='x.csv', caminho_arquivo=caminho)
+
+    def test_falha_em_etapa_pos_importacao_nao_derruba_a_importacao(self):
+        geracao = GeracaoDados.atual()
+        executadas = []
+
+        def falhar(registro):
+            raise RuntimeError('dimensões indisponíveis')
+
+        etapas = [falhar, lambda registro: executadas.append(registro.id) or 'ok']
+        with mock.patch.object(tasks, 'ETAPAS_POS_IMPORTACAO', etapas):
+            tasks.processar_importacao_async.now(self.registro.id)
+
+        self.registro.refresh_from_db()
+        self.assertEqual(self.registro.status, 'COMPLETED')
+        self.assertTrue(Tarefa.objects.filter(pk='900001', ativa=True).exists())
+        self.assertEqual(executadas, [self.registro.id])
+        self.assertEqual(GeracaoDados.atual(), geracao + 1)
@@ -0,0 +1,52 @@
+"""
+Testes da linha do tempo da tarefa (tarefas/linha_tempo.py)
+"""
+from django.test import TestCase
+
+from importar_csv.models import HistoricoTarefa, RegistroImportacao
+from tarefas.linha_tempo import linha_do_tempo
+from tarefas.models import Tarefa
+
+
+class LinhaDoTempoTestCase(TestCase):
+
+    def setUp(self):
+        self.tarefa = Tarefa.objects.create(
+            numero_protocolo_tarefa='555001',
+            indicador_subtarefas_pendentes=0,
+            codigo_unidade_tarefa=23150521,
+            nome_servico='Pensão por Morte',
+            status_tarefa='Pendente',
+        )
+        estados = [
+            ('Pendente', '1111111'),
+            ('Pendente', '1111111'),
+            ('Cumprimento de exigência', '1111111'),
+            ('Pendente', '2222222'),
+            ('Pendente', '2222222'),
+        ]
+        for dias, (status, siape) in enumerate(estados):
+            registro = RegistroImportacao.objects.create(nome_arquivo='x.csv', status='COMPLETED')
+            HistoricoTarefa.objects.create(
+                tarefa_original=self.tarefa,
+                registro_importacao=registro,
+                status_tarefa=status,
+                siape_responsavel=siape,
+                tempo_em_pendencia_em_dias=dias,
+            )
+
+    def test_colapsa_retratos_iguais(self):
+        with self.assertNumQueries(2):
+            periodos = linha_do_tempo('555001')
+
+        self.assertEqual([p['importacoes'] for p in periodos], [2, 1, 2])
+        self.assertEqual([p['status_tarefa'] for p in periodos],
+                         ['Pendente', 'Cumprimento de exigência', 'Pendente'])
+        self.assertEqual(periodos[0]['mudancas'], [])
+        self.assertEqual(periodos[1]['mudancas'], ['Status'])
+        self.assertEqual(periodos[2]['mudancas'], ['Status', 'Responsável'])
+        # Tempo do último retrato do período
+        self.assertEqual(periodos[-1]['tempo_em_pendencia_em_dias'], 4)
+
+    def test_tarefa_sem_historico(self):
+        self.assertEqual(linha_do_tempo('000000'), [])
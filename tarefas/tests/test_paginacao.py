@@ -0,0 +1,77 @@
+"""
+Testes da paginação por cursor (tarefas/paginacao.py)
+"""
+
+from django.test import TestCase
+
+from tarefas.models import Tarefa
+from tarefas.paginacao import (
+    ORDENACAO_CRITICIDADE,
+    decodificar_cursor,
+    paginar_keyset,
+)
+
+
+class PaginacaoKeysetTestCase(TestCase):
+    """Percorre as páginas nos dois sentidos e compara com a ordenação completa"""
+
+    def setUp(self):
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'{1000000000 + i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                nome_servico='Serviço Teste',
+                status_tarefa='Pendente',
+                pontuacao_criticidade=5 if i % 3 == 0 else 2,
+                tempo_em_pendencia_em_dias=i % 4,
+            )
+            for i in range(23)
+        ])
+        self.queryset = Tarefa.objects.filter(ativa=True)
+        self.esperado = list(
+            self.queryset.order_by(*ORDENACAO_CRITICIDADE).values_list('numero_protocolo_tarefa', flat=True)
+        )
+
+    def protocolos(self, pagina):
+        return [t.numero_protocolo_tarefa for t in pagina]
+
+    def test_avancar_percorre_todas_as_linhas(self):
+        """Avançando página a página, todas as linhas aparecem uma vez, em ordem"""
+        vistos = []
+        pagina = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, tamanho=5)
+        self.assertFalse(pagina.has_previous())
+        self.assertEqual(pagina.num_pages, 5)
+
+        while True:
+            vistos.extend(self.protocolos(pagina))
+            if not pagina.has_next():
+                break
+            pagina = paginar_keyset(
+                self.queryset, ORDENACAO_CRITICIDADE, cursor=pagina.cursor_proximo, tamanho=5
+            )
+
+        self.assertEqual(vistos, self.esperado)
+        self.assertEqual(pagina.number, 5)
+
+    def test_voltar_retorna_pagina_anterior(self):
+        """O cursor 'anterior' devolve exatamente a página anterior"""
+        pagina1 = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, tamanho=5)
+        pagina2 = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, cursor=pagina1.cursor_proximo, tamanho=5)
+        pagina3 = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, cursor=pagina2.cursor_proximo, tamanho=5)
+
+        voltou2 = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, cursor=pagina3.cursor_anterior, tamanho=5)
+        self.assertEqual(self.protocolos(voltou2), self.protocolos(pagina2))
+        self.assertEqual(voltou2.number, 2)
+        self.assertTrue(voltou2.has_next())
+        self.assertTrue(voltou2.has_previous())
+
+        voltou1 = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, cursor=voltou2.cursor_anterior, tamanho=5)
+        self.assertEqual(self.protocolos(voltou1), self.esperado[:5])
+        self.assertFalse(voltou1.has_previous())
+
+    def test_cursor_invalido_volta_para_primeira_pagina(self):
+        """Token adulterado é ignorado"""
+        self.assertIsNone(decodificar_cursor('lixo', 3))
+        pagina = paginar_keyset(self.queryset, ORDENACAO_CRITICIDADE, cursor='lixo', tamanho=5)
+        self.assertEqual(self.protocolos(pagina), self.esperado[:5])
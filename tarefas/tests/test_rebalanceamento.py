@@ -0,0 +1,75 @@
+"""
+Testes do planejador de rebalanceamento (tarefas/rebalanceamento.py)
+"""
+import io
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase
+
+from tarefas.dimensoes import atualizar_dimensoes, cargas_servidores_fila
+from tarefas.models import HistoricoAcaoLote, Tarefa
+from tarefas.rebalanceamento import escrever_arquivo_rebalanceamento, planejar_rebalanceamento
+
+User = get_user_model()
+
+
+class PlanoRebalanceamentoTestCase(SimpleTestCase):
+
+    def test_nivela_criticas_e_depois_total(self):
+        cargas = {'A': (10, 40), 'B': (2, 30), 'C': (0, 5)}
+        plano = planejar_rebalanceamento('PGB', ['C', 'D'], cargas)
+
+        depois = {s['siape']: (s['criticas_depois'], s['total_depois']) for s in plano['servidores']}
+        self.assertEqual(sum(c for c, _ in depois.values()), 12)
+        self.assertEqual(sum(t for _, t in depois.values()), 75)
+        # Doadores nunca terminam abaixo dos receptores por mais de uma tarefa
+        self.assertLessEqual(depois['A'][0] - min(depois['C'][0], depois['D'][0]), 1)
+        self.assertLessEqual(max(depois['A'][1], depois['B'][1]) - min(depois['C'][1], depois['D'][1]), 1)
+        self.assertEqual(plano['total_criticas'], 10 - depois['A'][0] + 2 - depois['B'][0])
+
+    def test_muitos_servidores(self):
+        cargas = {f'{i:07d}': (i % 40, 100 + i % 400) for i in range(400)}
+        receptores = [f'9{i:06d}' for i in range(50)]
+        plano = planejar_rebalanceamento('PGB', receptores, cargas)
+
+        depois = {s['siape']: s['total_depois'] for s in plano['servidores']}
+        self.assertLessEqual(
+            max(depois[s] for s in cargas) - min(depois[s] for s in receptores), 1
+        )
+
+
+class ArquivoRebalanceamentoTestCase(TestCase):
+
+    def setUp(self):
+        User.objects.create_user(siape='1111111', nome_completo='Servidor A')
+        User.objects.create_user(siape='2222222', nome_completo='Servidor B')
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'88800{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                siape_responsavel_id='1111111',
+                nivel_criticidade_calculado='CRÍTICA' if i < 2 else 'REGULAR',
+                tipo_fila='PGB',
+            )
+            for i in range(4)
+        ])
+        atualizar_dimensoes()
+
+    def test_gera_transferir_com_historico(self):
+        self.assertEqual(cargas_servidores_fila('PGB'), {'1111111': (2, 4)})
+
+        plano = planejar_rebalanceamento('PGB', ['2222222'])
+        self.assertEqual(plano['movimentos'],
+                         [{'doador': '1111111', 'receptor': '2222222', 'criticas': 1, 'demais': 1}])
+
+        destino = io.BytesIO()
+        resumo = escrever_arquivo_rebalanceamento(destino, plano, '23150521', 'Despacho de redistribuição da fila PGB')
+
+        linhas = destino.getvalue().decode('utf-8').splitlines()
+        self.assertEqual(resumo['tarefas'], 2)
+        self.assertEqual(linhas[0], '12')
+        self.assertEqual(len(linhas), 4)
+        historico = HistoricoAcaoLote.objects.get()
+        self.assertEqual(historico.criterio_selecao, 'REBALANCEAMENTO')
+        self.assertEqual(historico.quantidade_tarefas, 2)
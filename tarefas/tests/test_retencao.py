@@ -0,0 +1,98 @@
+"""
+Testes da retenção do histórico de importações (importar_csv/retencao.py)
+"""
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from importar_csv.models import (
+    AlteracaoTarefa,
+    ExecucaoRetencao,
+    HistoricoTarefa,
+    PoliticaRetencao,
+    RegistroImportacao,
+    ResumoMensalHistorico,
+)
+from importar_csv.retencao import aplicar_retencao
+from tarefas.models import Tarefa
+
+
+class RetencaoHistoricoTestCase(TestCase):
+
+    def setUp(self):
+        Tarefa.objects.bulk_create([
+            Tarefa(
+                numero_protocolo_tarefa=f'99900{i}',
+                indicador_subtarefas_pendentes=0,
+                codigo_unidade_tarefa=23150521,
+                nome_servico='Aposentadoria por Idade',
+                status_tarefa='Pendente',
+            )
+            for i in range(3)
+        ])
+        self.politica = PoliticaRetencao.objects.create(dias_detalhe=180, tamanho_lote=2, dias_arquivo_csv=None)
+
+        # Duas importações antigas no mesmo mês e uma recente
+        base = (timezone.now() - timedelta(days=400)).replace(day=10)
+        self.antigas = [self._importacao(base), self._importacao(base + timedelta(days=1))]
+        self.recente = self._importacao(timezone.now() - timedelta(days=5))
+
+    def _importacao(self, data):
+        registro = RegistroImportacao.objects.create(nome_arquivo='x.csv', status='COMPLETED')
+        RegistroImportacao.objects.filter(pk=registro.pk).update(data_importacao=data)
+        registro.refresh_from_db()
+        HistoricoTarefa.objects.bulk_create([
+            HistoricoTarefa(
+                tarefa_original=tarefa,
+                registro_importacao=registro,
+                status_tarefa='Pendente',
+                tempo_em_pendencia_em_dias=n,
+            )
+            for n, tarefa in enumerate(Tarefa.objects.order_by('pk'))
+        ])
+        AlteracaoTarefa.objects.bulk_create([
+            AlteracaoTarefa(registro_importacao=registro, numero_protocolo_tarefa=tarefa.pk,
+                            tipo=AlteracaoTarefa.TIPO_ALTERADA, campos={'status_tarefa': ['Pendente', 'Exigência']})
+            for tarefa in Tarefa.objects.order_by('pk')
+        ])
+        return registro
+
+    def test_simulacao_nao_remove(self):
+        execucao = aplicar_retencao(ExecucaoRetencao.objects.create(politica=self.politica, simulacao=True))
+
+        self.assertEqual(execucao.status, 'COMPLETED')
+        self.assertEqual(execucao.linhas_removidas, 6)
+        self.assertEqual(HistoricoTarefa.objects.count(), 9)
+        self.assertEqual(execucao.alteracoes_removidas, 6)
+        self.assertEqual(AlteracaoTarefa.objects.count(), 9)
+        self.assertFalse(ResumoMensalHistorico.objects.exists())
+
+    def test_expurgo_com_resumo_mensal(self):
+        execucao = aplicar_retencao(ExecucaoRetencao.objects.create(politica=self.politica))
+
+        self.assertEqual(execucao.status, 'COMPLETED')
+        self.assertEqual(execucao.importacoes_expurgadas, 2)
+        self.assertEqual(execucao.linhas_removidas, 6)
+        self.assertEqual(
+            set(HistoricoTarefa.objects.values_list('registro_importacao_id', flat=True)),
+            {self.recente.id}
+        )
+        self.assertEqual(execucao.alteracoes_removidas, 6)
+        self.assertEqual(
+            set(AlteracaoTarefa.objects.values_list('registro_importacao_id', flat=True)),
+            {self.recente.id}
+        )
+
+        resumos = ResumoMensalHistorico.objects.all()
+        self.assertEqual(resumos.count(), 3)
+        self.assertEqual({r.quantidade_importacoes for r in resumos}, {2})
+        self.assertEqual(resumos.get(numero_protocolo_tarefa='999002').tempo_em_pendencia_max, 2)
+
+        for registro in self.antigas:
+            registro.refresh_from_db()
+            self.assertIsNotNone(registro.historico_expurgado_em)
+
+        # Nova execução não encontra nada a expurgar
+        segunda = aplicar_retencao(ExecucaoRetencao.objects.create(politica=self.politica))
+        self.assertEqual(segunda.importacoes_expurgadas, 0)
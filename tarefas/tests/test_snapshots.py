@@ -0,0 +1,51 @@
+"""
+Testes da série histórica de KPIs (tarefas/snapshots.py)
+"""
+
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from tarefas.models import SnapshotKPI, Tarefa
+from tarefas.snapshots import registrar_snapshot_kpi, resumo_importacoes, serie_kpi
+
+
+class SnapshotKPITestCase(TestCase):
+
+    def criar_tarefa(self, protocolo, fila, nivel, status='Pendente', ativa=True):
+        return Tarefa(
+            numero_protocolo_tarefa=protocolo,
+            indicador_subtarefas_pendentes=0,
+            codigo_unidade_tarefa=23150521,
+            nome_servico='Serviço',
+            status_tarefa=status,
+            tipo_fila=fila,
+            nivel_criticidade_calculado=nivel,
+            ativa=ativa,
+        )
+
+    def test_snapshot_e_serie(self):
+        Tarefa.objects.bulk_create([
+            self.criar_tarefa('1', 'PGB', 'CRÍTICA'),
+            self.criar_tarefa('2', 'PGB', 'CRÍTICA', status='Cumprimento de exigência'),
+            self.criar_tarefa('3', 'OUTROS', 'REGULAR'),
+            self.criar_tarefa('4', 'OUTROS', 'CRÍTICA', ativa=False),
+        ])
+        ontem = timezone.now() - timedelta(days=1)
+        registrar_snapshot_kpi(data_referencia=ontem)
+
+        Tarefa.objects.filter(numero_protocolo_tarefa='3').update(nivel_criticidade_calculado='CRÍTICA')
+        registrar_snapshot_kpi()
+
+        self.assertEqual(SnapshotKPI.objects.filter(faixa_status=SnapshotKPI.STATUS_CUMPRIMENTO).count(), 2)
+
+        serie = serie_kpi('fila', dias=90, filtros={'nivel': 'CRÍTICA'})
+        self.assertEqual(len(serie['labels']), 2)
+        self.assertEqual(serie['series'], [
+            {'nome': 'PGB', 'dados': [2, 2]},
+            {'nome': 'OUTROS', 'dados': [0, 1]},
+        ])
+
+        resumo = resumo_importacoes()
+        self.assertEqual([(r['total'], r['criticas'], r['regulares']) for r in resumo], [(3, 2, 1), (3, 3, 0)])
@@ -0,0 +1,85 @@
+"""
+Testes do status consolidado de servidores (AcoesService.verificar_status_servidores)
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+
+from tarefas.models import BloqueioServidor, EstadoBloqueio, SolicitacaoNotificacao, Tarefa
+from tarefas.services.acoes_service import AcoesService
+
+User = get_user_model()
+
+
+class StatusServidoresLoteTestCase(TestCase):
+
+    def setUp(self):
+        self.servidores = [
+            User.objects.create_user(siape=f'{i}000000', nome_completo=f'Servidor {i}')
+            for i in range(1, 4)
+        ]
+        s1, s2, _ = self.servidores
+        agora = timezone.now()
+
+        # s1: bloqueado na PGB (bloqueio mais recente), desbloqueado na OUTROS
+        BloqueioServidor.objects.bulk_create([
+            BloqueioServidor(servidor=s1, codigo_fila='PGB', tipo_acao=BloqueioServidor.TIPO_DESBLOQUEIO,
+                             status=BloqueioServidor.STATUS_CONCLUIDO,
+                             data_conclusao=agora - timezone.timedelta(days=2)),
+            BloqueioServidor(servidor=s1, codigo_fila='PGB', tipo_acao=BloqueioServidor.TIPO_BLOQUEIO,
+                             status=BloqueioServidor.STATUS_CONCLUIDO,
+                             data_conclusao=agora - timezone.timedelta(days=1)),
+            BloqueioServidor(servidor=s1, codigo_fila='OUTROS', tipo_acao=BloqueioServidor.TIPO_BLOQUEIO,
+                             status=BloqueioServidor.STATUS_CONCLUIDO,
+                             data_conclusao=agora - timezone.timedelta(days=3)),
+            BloqueioServidor(servidor=s1, codigo_fila='OUTROS', tipo_acao=BloqueioServidor.TIPO_DESBLOQUEIO,
+                             status=BloqueioServidor.STATUS_CONCLUIDO,
+                             data_conclusao=agora),
+            BloqueioServidor(servidor=s2, codigo_fila='PGB', tipo_acao=BloqueioServidor.TIPO_BLOQUEIO,
+                             status=BloqueioServidor.STATUS_PENDENTE),
+        ])
+        EstadoBloqueio.recalcular()  # bulk_create não passa pelo AcoesService
+        SolicitacaoNotificacao.objects.create(
+            servidor=s2, tipo_notificacao=SolicitacaoNotificacao.TIPO_PRIMEIRA,
+            status=SolicitacaoNotificacao.STATUS_CONCLUIDO
+        )
+        Tarefa.objects.bulk_create([
+            Tarefa(numero_protocolo_tarefa=protocolo, indicador_subtarefas_pendentes=0,
+                   codigo_unidade_tarefa=23150003, nome_servico=servico, status_tarefa='Pendente',
+                   siape_responsavel=s2, tipo_fila='PGB')
+            for protocolo, servico in [
+                ('1', 'Revisão de Ofício Identificada'),
+                ('2', 'Aposentadoria'),
+                ('3', 'Revisão de Ofício - Benefício por Incapacidade'),
+            ]
+        ])
+
+    def test_status_em_numero_fixo_de_consultas(self):
+        siapes = [s.siape for s in self.servidores]
+
+        with self.assertNumQueries(4):
+            status = AcoesService.verificar_status_servidores(siapes, 'PGB')
+
+        s1, s2, s3 = siapes
+        self.assertTrue(status[s1]['bloqueado'])
+        self.assertEqual(status[s1]['filas_bloqueadas'], ['PGB'])
+        self.assertFalse(status[s1]['tem_solicitacao_pendente'])
+
+        self.assertFalse(status[s2]['bloqueado'])
+        self.assertTrue(status[s2]['tem_solicitacao_pendente'])
+        self.assertTrue(status[s2]['tem_notificacao'])
+        self.assertEqual(status[s2]['total_revisao_oficio'], 2)
+        self.assertEqual(status[s2]['total_tarefas'], 3)
+        self.assertEqual(status[s2]['tarefas_por_fila'], {'PGB': 3})
+
+        self.assertFalse(status[s3]['tem_revisao_oficio'])
+        self.assertEqual(status[s3]['filas_bloqueadas'], [])
+
+    def test_consistente_com_verificacao_individual(self):
+        status = AcoesService.verificar_status_servidores([s.siape for s in self.servidores], 'OUTROS')
+        for servidor in self.servidores:
+            self.assertEqual(
+                status[servidor.siape]['bloqueado'],
+                bool(BloqueioServidor.servidor_esta_bloqueado(servidor.siape, 'OUTROS'))
+            )
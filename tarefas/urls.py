@@ -35,6 +35,10 @@ urlpatterns = [
 
     # Exportação de relatório Excel de tarefas por fila/servidor
     path('fila/<str:codigo_fila>/exportar-excel/', views.exportar_tarefas_fila_servidor_excel, name='exportar_tarefas_fila_servidor_excel'),
+    path('exportacoes/', views.exportacoes, name='exportacoes'),
+    path('exportacoes/solicitar/', views.solicitar_exportacao_view, name='solicitar_exportacao'),
+    path('exportacoes/status/', views.status_exportacoes, name='status_exportacoes'),
+    path('exportacoes/<int:job_id>/baixar/', views.baixar_exportacao, name='baixar_exportacao'),
 
     # ============================================
     # LISTAGENS (PÁGINAS SEPARADAS)
@@ -44,6 +48,7 @@ urlpatterns = [
 
     # Lista de servidores (com filtros)
     path('servidores/lista/', views.lista_servidores, name='lista_servidores'),
+    path('servidores/status-lote/', views.status_servidores_lote, name='status_servidores_lote'),
 
     # Detalhes de um servidor específico
     path('servidores/<str:siape>/', views.detalhe_servidor, name='detalhe_servidor'),
@@ -52,6 +57,8 @@ urlpatterns = [
     # API JSON (OPCIONAL)
     # ============================================
     path('api/estatisticas/', views.api_estatisticas_json, name='api_estatisticas'),
+    path('api/kpis/serie/', views.api_kpis_serie, name='api_kpis_serie'),
+    path('api/kpis/importacoes/', views.api_kpis_importacoes, name='api_kpis_importacoes'),
     
     # ============================================
     # ADICIONE A URL EM tarefas/urls.py
@@ -174,6 +181,11 @@ urlpatterns = [
         views.solicitar_desbloqueio_servidor,
         name='solicitar_desbloqueio_servidor'
     ),
+    path(
+        'servidores/bloqueios/lote/',
+        views.solicitar_bloqueios_lote,
+        name='solicitar_bloqueios_lote'
+    ),
     path(
         'servidor/<str:siape>/notificacao/solicitar/',
         views.solicitar_notificacao_pgb,
@@ -184,6 +196,16 @@ urlpatterns = [
         views.enviar_email_servidor,
         name='enviar_email_servidor'
     ),
+    path(
+        'emails/campanhas/',
+        views.campanhas_email,
+        name='campanhas_email'
+    ),
+    path(
+        'emails/caixa-saida/',
+        views.metricas_caixa_saida_emails,
+        name='metricas_caixa_saida_emails'
+    ),
     path(
         'servidor/<str:siape>/status/',
         views.verificar_status_servidor,
@@ -203,4 +225,14 @@ urlpatterns = [
         views.gerar_arquivo_acao_lote,
         name='gerar_arquivo_acao_lote'
     ),
+    path(
+        'fila/<str:codigo_fila>/gerar-arquivo-lote/',
+        views.gerar_arquivo_acao_lote_fila,
+        name='gerar_arquivo_acao_lote_fila'
+    ),
+    path(
+        'fila/<str:codigo_fila>/rebalancear/',
+        views.rebalancear_fila,
+        name='rebalancear_fila'
+    ),
 ]
\ No newline at end of file
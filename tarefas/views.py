@@ -17,6 +17,7 @@ Data: 27/10/2025
 
 from datetime import date, timedelta
 import json
+import re
 import sys
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -24,11 +25,14 @@ from django.contrib.auth import get_user_model
 from django.db.models import Q, Count, Case, When, IntegerField, Prefetch, Sum
 from django.core.paginator import Paginator
 from django.http import JsonResponse, HttpResponse
-from tarefas.models import Tarefa
+from tarefas.models import Tarefa, EntradaBusca, DimensaoTarefa, GeracaoDados
 from tarefas.parametros import ParametrosAnalise
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+from tarefas.paginacao import paginar_keyset, ORDENACAO_CRITICIDADE, ORDENACOES_PERMITIDAS, ORDENACOES_FILA
+from tarefas.busca import filtrar_por_busca, filtro_prefixo
+from tarefas.dimensoes import opcoes_dimensao, servicos_servidor_fila
+from tarefas.filas import SERVICOS_REVISAO_OFICIO
+from tarefas.linha_tempo import linha_do_tempo
+from tarefas.exportacao import gerar_planilha_tarefas, resposta_planilha
 
 User = get_user_model()
 
@@ -271,9 +275,21 @@ def detalhe_fila(request, codigo_fila):
     if filtro_servidor and usuario_eh_coordenador(request.user):
         tarefas = tarefas.filter(siape_responsavel__siape=filtro_servidor)
 
-    # Ordenação
+    # Tempo mínimo com o responsável atual (coluna indexada, sem varrer histórico)
+    filtro_dias_responsavel = request.GET.get('dias_responsavel', '')
+    if filtro_dias_responsavel.isdigit():
+        from django.utils import timezone
+        tarefas = tarefas.filter(
+            data_atribuicao_atual__lte=timezone.now() - timedelta(days=int(filtro_dias_responsavel))
+        )
+    else:
+        filtro_dias_responsavel = ''
+
+    # Ordenação (somente ordenações com índice; padrão = criticidade)
     ordenacao = request.GET.get('ordem', '-pontuacao_criticidade')
-    tarefas = tarefas.order_by(ordenacao)
+    if ordenacao not in ORDENACOES_FILA:
+        ordenacao = '-pontuacao_criticidade'
+    tarefas = tarefas.order_by(*ORDENACOES_FILA[ordenacao])
 
     # OTIMIZAÇÃO: Calcular todas as estatísticas em uma única query usando aggregate
     from django.db.models import Sum, Case, When, IntegerField
@@ -284,11 +300,19 @@ def detalhe_fila(request, codigo_fila):
         regulares=Count('numero_protocolo_tarefa', filter=Q(nivel_criticidade_calculado='REGULAR')),
         pendentes=Count('numero_protocolo_tarefa', filter=Q(status_tarefa='Pendente')),
         cumprimento=Count('numero_protocolo_tarefa', filter=Q(status_tarefa='Cumprimento de exigência')),
-        outros=Count('numero_protocolo_tarefa', filter=~Q(status_tarefa__in=['Pendente', 'Cumprimento de exigência']))
+        outros=Count('numero_protocolo_tarefa', filter=~Q(status_tarefa__in=['Pendente', 'Cumprimento de exigência'])),
+        com_atribuicao=Count('numero_protocolo_tarefa', filter=Q(data_atribuicao_atual__isnull=False))
     )
 
     # Extrair valores das estatísticas
     total = stats['total']
+
+    # Ordenar por tempo com o responsável deixa de fora da LISTAGEM (não dos
+    # KPIs acima) as tarefas ainda sem data de atribuição
+    total_listagem = total
+    if ordenacao == 'data_atribuicao_atual':
+        tarefas = tarefas.filter(data_atribuicao_atual__isnull=False)
+        total_listagem = stats['com_atribuicao']
     criticas = stats['criticas']
     regulares = stats['regulares']
 
@@ -332,10 +356,14 @@ def detalhe_fila(request, codigo_fila):
         # Sem paginação - exibir todas as tarefas do servidor
         tarefas_page = tarefas
     else:
-        # Com paginação - quando vendo todos os servidores
-        paginator = Paginator(tarefas, 50)
-        page = request.GET.get('page')
-        tarefas_page = paginator.get_page(page)
+        # OTIMIZAÇÃO: Paginação por cursor (sem OFFSET) reaproveitando o total dos KPIs
+        tarefas_page = paginar_keyset(
+            tarefas,
+            ordenacao=ORDENACOES_FILA[ordenacao],
+            cursor=request.GET.get('cursor'),
+            tamanho=50,
+            total=total_listagem,
+        )
 
     # Lista de servidores para filtro (se coordenador)
     servidores_fila = []
@@ -396,6 +424,7 @@ def detalhe_fila(request, codigo_fila):
         'filtro_status': filtro_status,
         'filtro_servidor': filtro_servidor,
         'servidor_filtrado': servidor_filtrado,
+        'filtro_dias_responsavel': filtro_dias_responsavel,
         'ordenacao': ordenacao,
     }
 
@@ -419,7 +448,8 @@ def lista_tarefas(request):
     # Filtros
     protocolo = request.GET.get('protocolo', '').strip()
     if protocolo:
-        tarefas = tarefas.filter(numero_protocolo_tarefa__icontains=protocolo)
+        # OTIMIZAÇÃO: prefixo do protocolo como faixa no índice da PK
+        tarefas = tarefas.filter(filtro_prefixo('numero_protocolo_tarefa', protocolo))
     
     nivel = request.GET.get('nivel', '')
     if nivel:
@@ -431,14 +461,18 @@ def lista_tarefas(request):
     
     servidor = request.GET.get('servidor', '').strip()
     if servidor:
-        tarefas = tarefas.filter(
-            Q(siape_responsavel__siape__icontains=servidor) |
-            Q(nome_profissional_responsavel__icontains=servidor)
-        )
+        # OTIMIZAÇÃO: SIAPE por prefixo; nome do responsável na tarefa pelo índice
+        # de trigramas (IN nos nomes encontrados)
+        if servidor.isdigit():
+            tarefas = tarefas.filter(filtro_prefixo('siape_responsavel_id', servidor))
+        else:
+            tarefas = filtrar_por_busca(
+                tarefas, 'nome_profissional_responsavel', EntradaBusca.CAMPO_RESPONSAVEL, servidor
+            )
     
     servico = request.GET.get('servico', '').strip()
     if servico:
-        tarefas = tarefas.filter(nome_servico__icontains=servico)
+        tarefas = filtrar_por_busca(tarefas, 'nome_servico', EntradaBusca.CAMPO_SERVICO, servico)
     
     data_inicio = request.GET.get('data_inicio', '')
     if data_inicio:
@@ -448,8 +482,8 @@ def lista_tarefas(request):
     if data_fim:
         tarefas = tarefas.filter(data_distribuicao_tarefa__lte=data_fim)
     
-    # Ordenação (sem alteração, 'pontuacao_criticidade' agora é 100 ou 0)
-    tarefas = tarefas.order_by('-pontuacao_criticidade', '-tempo_em_pendencia_em_dias')
+    # Ordenação por criticidade (desempate pelo protocolo para a paginação por cursor)
+    tarefas = tarefas.order_by(*ORDENACAO_CRITICIDADE)
     
     # Estatísticas (SIMPLIFICADO)
     stats = Tarefa.estatisticas_criticidade(tarefas)
@@ -468,10 +502,15 @@ def lista_tarefas(request):
         'excluidas': excluidas_count,
     }
     
-    # Paginação
-    paginator = Paginator(tarefas, 50)
-    page_number = request.GET.get('page')
-    tarefas_paginadas = paginator.get_page(page_number)
+    # OTIMIZAÇÃO: Paginação por cursor - a página N custa o mesmo que a página 1
+    # e o total vem das estatísticas já calculadas (sem COUNT extra)
+    tarefas_paginadas = paginar_keyset(
+        tarefas,
+        ordenacao=ORDENACAO_CRITICIDADE,
+        cursor=request.GET.get('cursor'),
+        tamanho=50,
+        total=stats['total'],
+    )
     
     context = {
         'tarefas': tarefas_paginadas,
@@ -487,7 +526,8 @@ def lista_tarefas(request):
         },
         # Níveis simplificados para o dropdown
         'niveis_disponiveis': ['CRÍTICA', 'REGULAR'],
-        'status_disponiveis': Tarefa.objects.filter(ativa=True).values_list('status_tarefa', flat=True).distinct(),
+        # OTIMIZAÇÃO: Opções lidas da tabela de dimensão (sem DISTINCT na base)
+        'status_disponiveis': opcoes_dimensao(DimensaoTarefa.TIPO_STATUS),
     }
     
     return render(request, 'tarefas/lista_tarefas.html', context)
@@ -513,27 +553,24 @@ def lista_servidores(request):
     # Filtros
     nome = request.GET.get('nome', '').strip()
     if nome:
-        servidores = servidores.filter(nome_completo__icontains=nome)
+        servidores = filtrar_por_busca(
+            servidores, 'siape', EntradaBusca.CAMPO_SERVIDOR, nome, campo_texto='nome_completo'
+        )
     
     siape_filtro = request.GET.get('siape', '').strip()
     if siape_filtro:
-        servidores = servidores.filter(siape__icontains=siape_filtro)
+        servidores = servidores.filter(filtro_prefixo('siape', siape_filtro))
     
     gex = request.GET.get('gex', '').strip()
     if gex:
-        servidores = servidores.filter(gex__icontains=gex)
+        servidores = filtrar_por_busca(servidores, 'gex', EntradaBusca.CAMPO_GEX, gex)
 
     # Filtro de Revisão de Ofício
     tem_revisao_oficio = request.GET.get('tem_revisao_oficio', '')
     if tem_revisao_oficio == '1':
-        servicos_revisao = [
-            'Revisão de Ofício Identificada',
-            'Revisão de Ofício Identificada - Benefício por Incapacidade',
-            'Revisão de Ofício - Benefício por Incapacidade'
-        ]
         # Filtrar apenas servidores que possuem tarefas de revisão de ofício
         siapes_com_revisao = Tarefa.objects.filter(
-            nome_servico__in=servicos_revisao,
+            nome_servico__in=SERVICOS_REVISAO_OFICIO,
             ativa=True
         ).values_list('siape_responsavel__siape', flat=True).distinct()
         servidores = servidores.filter(siape__in=siapes_com_revisao)
@@ -764,6 +801,7 @@ def detalhe_tarefa(request, protocolo):
         'tempos': tempos,
         'criticidade': criticidade,
         'regra_info': regra_info,
+        'linha_tempo': linha_do_tempo(tarefa.numero_protocolo_tarefa),
     }
     
     return render(request, 'tarefas/detalhe_tarefa.html', context)
@@ -789,6 +827,49 @@ def api_estatisticas_json(request):
     return JsonResponse(stats)
 
 
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+def api_kpis_serie(request):
+    """
+    Série temporal de KPIs (um ponto por importação) para gráficos.
+
+    GET /tarefas/api/kpis/serie/?dimensao=fila&dias=90&nivel=CRÍTICA
+        dimensao: fila, nivel, regra, status ou gex (agrupamento das séries)
+        filtros opcionais: fila, nivel, regra, status, gex
+    """
+    from tarefas.snapshots import DIMENSOES_SNAPSHOT, DIAS_PADRAO, serie_kpi
+
+    dimensao = request.GET.get('dimensao', 'fila')
+    if dimensao not in DIMENSOES_SNAPSHOT:
+        return JsonResponse({
+            'success': False,
+            'error': f"Dimensão inválida. Use: {', '.join(DIMENSOES_SNAPSHOT)}"
+        }, status=400)
+
+    try:
+        dias = int(request.GET.get('dias', DIAS_PADRAO))
+    except ValueError:
+        dias = DIAS_PADRAO
+
+    filtros = {chave: request.GET.get(chave) for chave in DIMENSOES_SNAPSHOT if request.GET.get(chave)}
+
+    return JsonResponse({'success': True, 'dimensao': dimensao, **serie_kpi(dimensao, dias, filtros)})
+
+
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+def api_kpis_importacoes(request):
+    """Totais (total/críticas/regulares) de cada importação. GET ?dias=90"""
+    from tarefas.snapshots import DIAS_PADRAO, resumo_importacoes
+
+    try:
+        dias = int(request.GET.get('dias', DIAS_PADRAO))
+    except ValueError:
+        dias = DIAS_PADRAO
+
+    return JsonResponse({'success': True, 'importacoes': resumo_importacoes(dias)})
+
+
 # ============================================
 # CONFIGURAÇÕES DO SISTEMA
 # ============================================
@@ -890,6 +971,8 @@ def recalcular_criticidades(request):
             if erros > 0:
                 messages.warning(request, f'{erros} tarefas com erro durante o recálculo.')
 
+            GeracaoDados.incrementar()
+
         except Exception as e:
             messages.error(request, f'Erro ao recalcular criticidades: {str(e)}')
 
@@ -972,6 +1055,63 @@ def solicitar_desbloqueio_servidor(request, siape):
     return redirect(request.META.get('HTTP_REFERER', '/'))
 
 
+# Máximo de pares (servidor x fila) por solicitação em lote
+LIMITE_BLOQUEIOS_LOTE = 500
+
+
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+def solicitar_bloqueios_lote(request):
+    """
+    Bloqueio/desbloqueio de caixa para vários servidores e filas de uma vez.
+
+    GET: formulário (SIAPEs separados por vírgula, espaço ou linha; filas; ação).
+    POST: cria as solicitações com AcoesService.solicitar_bloqueios_em_lote
+    (validação e gravação em número fixo de consultas) e resume o resultado.
+    """
+    from tarefas.filas import obter_filas_ordenadas, obter_nome_amigavel
+
+    if request.method == 'POST':
+        siapes = [siape for siape in re.split(r'[\s,;]+', request.POST.get('siapes', '')) if siape]
+        codigos_fila = request.POST.getlist('filas')
+        tipo_acao = request.POST.get('tipo_acao')
+        observacoes = request.POST.get('observacoes', '')
+
+        if not siapes or not codigos_fila:
+            messages.error(request, 'Informe ao menos um SIAPE e uma fila.')
+            return redirect('tarefas:solicitar_bloqueios_lote')
+        if len(set(siapes)) * len(set(codigos_fila)) > LIMITE_BLOQUEIOS_LOTE:
+            messages.error(request, f'Máximo de {LIMITE_BLOQUEIOS_LOTE} combinações servidor x fila por vez.')
+            return redirect('tarefas:solicitar_bloqueios_lote')
+
+        try:
+            resumo = AcoesService.solicitar_bloqueios_em_lote(
+                siapes, codigos_fila, tipo_acao, request.user, observacoes
+            )
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('tarefas:solicitar_bloqueios_lote')
+
+        acao = 'bloqueio' if tipo_acao == BloqueioServidor.TIPO_BLOQUEIO else 'desbloqueio'
+        if resumo['solicitacoes']:
+            messages.success(request, f"{len(resumo['solicitacoes'])} solicitação(ões) de {acao} criada(s).")
+        if resumo['ja_no_estado']:
+            pares = ', '.join(f'{siape}/{fila}' for siape, fila in resumo['ja_no_estado'][:20])
+            estado = 'bloqueados' if acao == 'bloqueio' else 'desbloqueados'
+            messages.info(request, f"{len(resumo['ja_no_estado'])} já {estado} (ignorados): {pares}")
+        if resumo['ja_pendentes']:
+            pares = ', '.join(f'{siape}/{fila}' for siape, fila in resumo['ja_pendentes'][:20])
+            messages.info(request, f"{len(resumo['ja_pendentes'])} já aguardando o robô (ignorados): {pares}")
+        if resumo['nao_encontrados']:
+            messages.warning(request, f"SIAPE(s) não encontrado(s): {', '.join(resumo['nao_encontrados'][:20])}")
+        return redirect('tarefas:solicitar_bloqueios_lote')
+
+    return render(request, 'tarefas/bloqueios_lote.html', {
+        'filas': [(codigo, obter_nome_amigavel(codigo)) for codigo in obter_filas_ordenadas()],
+        'limite': LIMITE_BLOQUEIOS_LOTE,
+    })
+
+
 @login_required
 @user_passes_test(usuario_eh_coordenador)
 @require_POST
@@ -1024,31 +1164,36 @@ def enviar_email_servidor(request, siape):
             return redirect(request.META.get('HTTP_REFERER', '/'))
 
         # Buscar tarefas do servidor para incluir no email
-        tarefas = Tarefa.objects.filter(
-            siape_responsavel=servidor,
-            ativa=True
-        ).order_by('-pontuacao_criticidade')[:20]
+        from tarefas.services.email_service import CAMPOS_LISTA_EMAIL, LIMITE_TAREFAS_ANEXO
+        tarefas_servidor = Tarefa.objects.filter(siape_responsavel=servidor, ativa=True)
+        contagem = tarefas_servidor.aggregate(
+            total_tarefas=Count('numero_protocolo_tarefa'),
+            tarefas_criticas=Count('numero_protocolo_tarefa', filter=Q(nivel_criticidade_calculado='CRÍTICA')),
+        )
+        tarefas = tarefas_servidor.order_by('-pontuacao_criticidade').values_list(
+            *CAMPOS_LISTA_EMAIL, named=True
+        )[:LIMITE_TAREFAS_ANEXO]
 
-        # Preparar contexto adicional
-        contexto_extra = {
-            'total_tarefas': tarefas.count(),
-            'tarefas_criticas': tarefas.filter(nivel_criticidade_calculado='CRÍTICA').count(),
-            'lista_tarefas': EmailService().criar_lista_tarefas_html(tarefas),
-        }
+        # Tabela no corpo; lista completa em CSV anexo se não couber
+        email_service = EmailService()
+        lista_tarefas, anexo = email_service.tarefas_para_email(
+            list(tarefas), servidor.siape, contagem['total_tarefas']
+        )
 
         # Enviar email
-        email_service = EmailService()
         sucesso, historico = email_service.enviar_email_por_template(
             template_nome=template_nome,
             servidor=servidor,
             enviado_por=request.user,
-            contexto_extra=contexto_extra
+            contexto_extra={**contagem, 'lista_tarefas': lista_tarefas},
+            enfileirar=True,
+            anexo=anexo,
         )
 
         if sucesso:
             messages.success(
                 request,
-                f'Email enviado com sucesso para {servidor.email}! '
+                f'Email para {servidor.email} adicionado à fila de envio. '
                 f'ID do histórico: {historico.id}'
             )
         else:
@@ -1065,74 +1210,110 @@ def enviar_email_servidor(request, siape):
     return redirect(request.META.get('HTTP_REFERER', '/'))
 
 
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+def campanhas_email(request):
+    """
+    Campanhas de email (ver tarefas/campanhas.py).
+
+    GET: lista as campanhas recentes.
+    POST: cria uma campanha (template_id, fila, minimo_criticas); a seleção
+    dos destinatários e o envio acontecem no worker, em lotes $batch do Graph.
+    """
+    from tarefas.caixa_saida import metricas_caixa_saida
+    from tarefas.campanhas import criar_campanha
+    from tarefas.filas import obter_filas_ordenadas, obter_nome_amigavel
+    from tarefas.models import CampanhaEmail
+
+    if request.method == 'POST':
+        template_email = TemplateEmail.objects.filter(id=request.POST.get('template_id'), ativo=True).first()
+        if template_email is None:
+            messages.error(request, 'Selecione um template ativo.')
+            return redirect('tarefas:campanhas_email')
+        try:
+            campanha = criar_campanha(template_email, {
+                'fila': request.POST.get('fila'),
+                'minimo_criticas': request.POST.get('minimo_criticas'),
+            }, request.user)
+        except ValueError as e:
+            messages.error(request, str(e))
+            return redirect('tarefas:campanhas_email')
+
+        messages.success(
+            request,
+            f'✓ Campanha #{campanha.id} criada. Os destinatários são selecionados e o envio '
+            f'acontece em segundo plano.'
+        )
+        return redirect('tarefas:campanhas_email')
+
+    campanhas = list(CampanhaEmail.objects.select_related('template', 'criado_por')[:50])
+    return render(request, 'tarefas/campanhas_email.html', {
+        'campanhas': campanhas,
+        'templates_email': TemplateEmail.objects.filter(ativo=True).order_by('nome'),
+        'filas': [(codigo, obter_nome_amigavel(codigo)) for codigo in obter_filas_ordenadas()],
+        'em_andamento': any(c.status in (c.STATUS_PENDENTE, c.STATUS_PROCESSANDO) for c in campanhas),
+        'metricas': metricas_caixa_saida(),
+    })
+
+
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+def metricas_caixa_saida_emails(request):
+    """Profundidade da caixa de saída de emails e latência de envio (JSON)"""
+    from tarefas.caixa_saida import metricas_caixa_saida
+
+    return JsonResponse({'success': True, 'metricas': metricas_caixa_saida()})
+
+
 @login_required
 def verificar_status_servidor(request, siape):
     """Retorna status do servidor (bloqueios, notificações, etc) em JSON."""
     codigo_fila = request.GET.get('codigo_fila', '')
 
     try:
-        # Verificar bloqueio (se codigo_fila específico foi fornecido)
-        if codigo_fila:
-            status_bloqueio = AcoesService.verificar_status_servidor(siape, codigo_fila)
-            bloqueado = status_bloqueio['bloqueado']
-            tem_solicitacao_pendente = status_bloqueio['tem_solicitacao_pendente']
-        else:
-            # Sem fila específica, retornar False (usado em detalhe_servidor)
-            bloqueado = False
-            tem_solicitacao_pendente = False
-
-        # Listar todas as filas bloqueadas (para detalhe_servidor)
-        from tarefas.filas import ORDEM_FILAS
-        filas_bloqueadas = []
-        for fila_cod in ORDEM_FILAS:
-            if BloqueioServidor.servidor_esta_bloqueado(siape, fila_cod):
-                filas_bloqueadas.append(fila_cod)
-
-        # Verificar se há solicitações pendentes (qualquer fila)
-        tem_solicitacao_pendente_geral = BloqueioServidor.objects.filter(
-            servidor__siape=siape,
-            status__in=[BloqueioServidor.STATUS_PENDENTE, BloqueioServidor.STATUS_PROCESSANDO]
-        ).exists()
-
-        # Verificar notificações
-        tem_notificacao = SolicitacaoNotificacao.servidor_tem_notificacao_ativa(siape)
-
-        # Verificar tarefas de revisão de ofício
-        servicos_revisao = [
-            'Revisão de Ofício Identificada',
-            'Revisão de Ofício Identificada - Benefício por Incapacidade',
-            'Revisão de Ofício - Benefício por Incapacidade'
-        ]
-        tem_revisao_oficio = Tarefa.objects.filter(
-            siape_responsavel__siape=siape,
-            nome_servico__in=servicos_revisao,
-            ativa=True
-        ).exists()
+        # OTIMIZAÇÃO: mesmas consultas agrupadas do endpoint em lote
+        status = AcoesService.verificar_status_servidores([siape], codigo_fila)[siape]
+        del status['tarefas_por_fila']
+
+        return JsonResponse({'success': True, **status})
+
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'error': str(e)
+        }, status=500)
+
+
+# Limite de SIAPEs por chamada do endpoint em lote
+LIMITE_STATUS_LOTE = 500
 
-        total_revisao_oficio = Tarefa.objects.filter(
-            siape_responsavel__siape=siape,
-            nome_servico__in=servicos_revisao,
-            ativa=True
-        ).count()
 
-        # Contar total de tarefas na fila específica (se fornecida)
-        total_tarefas = 0
-        if codigo_fila:
-            total_tarefas = Tarefa.objects.filter(
-                siape_responsavel__siape=siape,
-                tipo_fila=codigo_fila,
-                ativa=True
-            ).count()
+@login_required
+def status_servidores_lote(request):
+    """
+    Status de vários servidores em uma única chamada (JSON).
+
+    GET /tarefas/servidores/status-lote/?siapes=111,222,333&codigo_fila=PGB
+
+    Usado pela lista de servidores (uma chamada para a página inteira) e pelo
+    detalhe do servidor. O custo é fixo (quatro consultas) para qualquer
+    quantidade de SIAPEs até LIMITE_STATUS_LOTE.
+    """
+    siapes = [s.strip() for s in request.GET.get('siapes', '').split(',') if s.strip()]
+    codigo_fila = request.GET.get('codigo_fila', '')
 
+    if not siapes:
+        return JsonResponse({'success': False, 'error': 'Informe ao menos um SIAPE'}, status=400)
+    if len(siapes) > LIMITE_STATUS_LOTE:
+        return JsonResponse({
+            'success': False,
+            'error': f'Máximo de {LIMITE_STATUS_LOTE} SIAPEs por chamada'
+        }, status=400)
+
+    try:
         return JsonResponse({
             'success': True,
-            'bloqueado': bloqueado,  # Para fila específica
-            'filas_bloqueadas': filas_bloqueadas,  # Lista de todas as filas bloqueadas
-            'tem_solicitacao_pendente': tem_solicitacao_pendente or tem_solicitacao_pendente_geral,
-            'tem_notificacao': tem_notificacao,
-            'tem_revisao_oficio': tem_revisao_oficio,
-            'total_revisao_oficio': total_revisao_oficio,
-            'total_tarefas': total_tarefas,  # Total de tarefas na fila (para arquivo em lote)
+            'servidores': AcoesService.verificar_status_servidores(siapes, codigo_fila),
         })
 
     except Exception as e:
@@ -1148,199 +1329,149 @@ def verificar_status_servidor(request, siape):
 @login_required
 def exportar_tarefas_fila_servidor_excel(request, codigo_fila):
     """
-    Exporta relatório em Excel com as tarefas de um servidor em uma fila específica.
+    Exporta relatório em Excel com as tarefas de uma fila.
 
     Parâmetros:
     - codigo_fila: Código da fila (ex: PGB, REVISAO, etc)
-    - servidor: SIAPE do servidor (via GET parameter)
+    - servidor: SIAPE do servidor (via GET parameter); sem ele, exporta a
+      fila inteira (somente coordenadores)
 
-    Retorna arquivo Excel com informações detalhadas das tarefas.
+    OTIMIZAÇÃO: planilha em modo streaming (tarefas/exportacao.py).
     """
     from tarefas.filas import obter_info_fila
 
     # Obter SIAPE do servidor do parâmetro GET
     siape_servidor = request.GET.get('servidor')
 
-    if not siape_servidor:
+    if not siape_servidor and not usuario_eh_coordenador(request.user):
         return HttpResponse('SIAPE do servidor não informado', status=400)
 
-    # Buscar informações do servidor
-    try:
-        servidor = User.objects.get(siape=siape_servidor)
-    except User.DoesNotExist:
-        return HttpResponse('Servidor não encontrado', status=404)
-
     # Obter informações da fila
     info_fila = obter_info_fila(codigo_fila)
 
-    # Buscar tarefas do servidor nesta fila
+    # Buscar tarefas da fila
     tarefas = Tarefa.objects.filter(
         tipo_fila=codigo_fila,
-        siape_responsavel__siape=siape_servidor,
         siape_responsavel__isnull=False,
         ativa=True
-    ).select_related('siape_responsavel').order_by('-pontuacao_criticidade', 'data_distribuicao_tarefa')
+    )
+
+    if siape_servidor:
+        # Buscar informações do servidor
+        try:
+            servidor = User.objects.only('siape', 'nome_completo').get(siape=siape_servidor)
+        except User.DoesNotExist:
+            return HttpResponse('Servidor não encontrado', status=404)
+
+        tarefas = tarefas.filter(siape_responsavel_id=siape_servidor)
+        subtitulo = f"Servidor: {servidor.nome_completo} (SIAPE: {servidor.siape})"
+        filename = f"Tarefas_{codigo_fila}_{servidor.siape}_{date.today().strftime('%Y%m%d')}.xlsx"
+    else:
+        subtitulo = "Fila completa (todos os servidores)"
+        filename = f"Tarefas_{codigo_fila}_{date.today().strftime('%Y%m%d')}.xlsx"
+
+    tarefas = tarefas.order_by('-pontuacao_criticidade', 'data_distribuicao_tarefa')
 
     # Verificar se há tarefas
     if not tarefas.exists():
         return HttpResponse('Nenhuma tarefa encontrada para este servidor nesta fila', status=404)
 
-    # Criar workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = f"Tarefas {codigo_fila}"
-
-    # Estilos
-    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=11)
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
+    arquivo, _ = gerar_planilha_tarefas(
+        tarefas,
+        titulo=f"RELATÓRIO DE TAREFAS - {info_fila['nome_completo']}",
+        subtitulo=subtitulo,
+        nome_aba=f"Tarefas {codigo_fila}",
     )
-    center_alignment = Alignment(horizontal='center', vertical='center')
-    wrap_alignment = Alignment(wrap_text=True, vertical='top')
-
-    # Título do relatório
-    ws.merge_cells('A1:M1')
-    title_cell = ws['A1']
-    title_cell.value = f"RELATÓRIO DE TAREFAS - {info_fila['nome_completo']}"
-    title_cell.font = Font(bold=True, size=14, color="366092")
-    title_cell.alignment = center_alignment
-
-    # Informações do servidor
-    ws.merge_cells('A2:M2')
-    info_cell = ws['A2']
-    info_cell.value = f"Servidor: {servidor.nome_completo} (SIAPE: {servidor.siape})"
-    info_cell.font = Font(bold=True, size=11)
-    info_cell.alignment = center_alignment
-
-    # Data de geração
-    ws.merge_cells('A3:M3')
-    date_cell = ws['A3']
-    date_cell.value = f"Data de Geração: {date.today().strftime('%d/%m/%Y')}"
-    date_cell.alignment = center_alignment
-
-    # Linha em branco
-    ws.append([])
-
-    # Cabeçalhos
-    headers = [
-        'Protocolo',
-        'Serviço',
-        'Interessado',
-        'Status',
-        'Data Entrada',
-        'Dias Parado',
-        'Prazo (dias)',
-        'Criticidade',
-        'Pontuação',
-        'Unidade',
-        'Última Movimentação',
-        'Responsável',
-        'Observações'
-    ]
+    return resposta_planilha(arquivo, filename)
+
+
+# ============================================
+# EXPORTAÇÕES EM SEGUNDO PLANO
+# ============================================
+@login_required
+@require_POST
+def solicitar_exportacao_view(request):
+    """
+    Agenda (ou reaproveita) uma exportação em segundo plano.
 
-    ws.append(headers)
-    header_row = ws[5]
+    POST: tipo (chave de RELATORIOS) e filtros opcionais fila, servidor, criticidade.
+    Servidores só podem exportar as próprias tarefas.
+    """
+    from tarefas.exportacao import RELATORIOS, solicitar_exportacao
 
-    for cell in header_row:
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = center_alignment
-        cell.border = border
+    tipo = request.POST.get('tipo')
+    if tipo not in RELATORIOS:
+        messages.error(request, 'Relatório inválido.')
+        return redirect('tarefas:exportacoes')
 
-    # Definir cores por criticidade
-    criticidade_colors = {
-        'CRÍTICA': PatternFill(start_color="FFE6E6", end_color="FFE6E6", fill_type="solid"),
-        'REGULAR': PatternFill(start_color="E6FFE6", end_color="E6FFE6", fill_type="solid"),
+    filtros = {
+        'fila': request.POST.get('fila'),
+        'servidor': request.POST.get('servidor'),
+        'criticidade': request.POST.get('criticidade'),
     }
+    if not usuario_eh_coordenador(request.user):
+        filtros['servidor'] = request.user.siape
 
-    # Adicionar dados das tarefas
-    for tarefa in tarefas:
-        row_data = [
-            tarefa.numero_protocolo_tarefa or '',
-            tarefa.nome_servico or '',
-            '',  # Interessado (campo removido)
-            tarefa.status_tarefa or '',
-            tarefa.data_distribuicao_tarefa.strftime('%d/%m/%Y') if tarefa.data_distribuicao_tarefa else '',
-            tarefa.tempo_em_pendencia_em_dias or 0,
-            tarefa.prazo_limite_criticidade_calculado or 0,
-            tarefa.nivel_criticidade_calculado or '',
-            tarefa.pontuacao_criticidade or 0,
-            tarefa.codigo_unidade_tarefa or '',
-            tarefa.data_ultima_atualizacao.strftime('%d/%m/%Y') if tarefa.data_ultima_atualizacao else '',
-            f"{tarefa.siape_responsavel.nome_completo} ({tarefa.siape_responsavel.siape})" if tarefa.siape_responsavel else '',
-            ''  # Observações (campo removido)
-        ]
-        ws.append(row_data)
+    job, reaproveitado = solicitar_exportacao(tipo, filtros, request.user)
+    if reaproveitado and job.status == job.STATUS_CONCLUIDO:
+        messages.success(request, f'✓ "{job.get_tipo_display()}" já estava pronta para os dados atuais.')
+    elif reaproveitado:
+        messages.info(request, f'"{job.get_tipo_display()}" já está sendo gerada.')
+    else:
+        messages.success(request, f'✓ "{job.get_tipo_display()}" agendada. O arquivo aparecerá abaixo quando pronto.')
+    return redirect('tarefas:exportacoes')
 
-        # Aplicar estilos na linha
-        current_row = ws.max_row
-        criticidade = tarefa.nivel_criticidade_calculado or 'REGULAR'
-        fill = criticidade_colors.get(criticidade, PatternFill())
 
-        for col_num in range(1, len(headers) + 1):
-            cell = ws.cell(row=current_row, column=col_num)
-            cell.border = border
-            cell.fill = fill
+@login_required
+def exportacoes(request):
+    """Página de downloads: exportações do usuário (coordenadores veem todas)"""
+    from tarefas.models import ExportJob
 
-            # Alinhamento específico por coluna
-            if col_num in [1, 4, 5, 6, 7, 8, 9, 10, 11]:  # Colunas centralizadas
-                cell.alignment = center_alignment
-            else:
-                cell.alignment = wrap_alignment
-
-    # Ajustar largura das colunas
-    column_widths = {
-        'A': 18,  # Protocolo
-        'B': 40,  # Serviço
-        'C': 30,  # Interessado
-        'D': 20,  # Status
-        'E': 12,  # Data Entrada
-        'F': 12,  # Dias Parado
-        'G': 12,  # Prazo
-        'H': 12,  # Criticidade
-        'I': 12,  # Pontuação
-        'J': 12,  # Unidade
-        'K': 15,  # Última Movimentação
-        'L': 30,  # Responsável
-        'M': 40,  # Observações
-    }
+    jobs = ExportJob.objects.select_related('solicitante')
+    if not usuario_eh_coordenador(request.user):
+        jobs = jobs.filter(solicitante=request.user)
+    jobs = list(jobs[:50])
 
-    for col_letter, width in column_widths.items():
-        ws.column_dimensions[col_letter].width = width
+    return render(request, 'tarefas/exportacoes.html', {
+        'jobs': jobs,
+        'em_andamento': any(job.status in (job.STATUS_PENDENTE, job.STATUS_PROCESSANDO) for job in jobs),
+    })
 
-    # Congelar painéis (cabeçalho)
-    ws.freeze_panes = 'A6'
 
-    # Adicionar rodapé com estatísticas
-    ws.append([])
-    stats_row = ws.max_row + 1
+@login_required
+def status_exportacoes(request):
+    """Progresso das exportações informadas em ?ids=1,2,3 (polling da página de downloads)"""
+    from tarefas.models import ExportJob
 
-    total_tarefas = tarefas.count()
-    criticas = tarefas.filter(nivel_criticidade_calculado='CRÍTICA').count()
-    regulares = tarefas.filter(nivel_criticidade_calculado='REGULAR').count()
+    ids = [int(i) for i in request.GET.get('ids', '').split(',') if i.isdigit()][:50]
+    jobs = ExportJob.objects.filter(id__in=ids)
+    if not usuario_eh_coordenador(request.user):
+        jobs = jobs.filter(solicitante=request.user)
 
-    ws.merge_cells(f'A{stats_row}:M{stats_row}')
-    stats_cell = ws[f'A{stats_row}']
-    stats_cell.value = f"TOTAL DE TAREFAS: {total_tarefas} | CRÍTICAS: {criticas} | REGULARES: {regulares}"
-    stats_cell.font = Font(bold=True, size=11)
-    stats_cell.alignment = center_alignment
-    stats_cell.fill = PatternFill(start_color="E0E0E0", end_color="E0E0E0", fill_type="solid")
+    return JsonResponse({
+        'success': True,
+        'exportacoes': {
+            job.id: {'status': job.status, 'progresso': job.progresso_percentual}
+            for job in jobs.only('id', 'status', 'total_linhas', 'linhas_processadas')
+        },
+    })
 
-    # Preparar response
-    response = HttpResponse(
-        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-    )
-    filename = f"Tarefas_{codigo_fila}_{servidor.siape}_{date.today().strftime('%Y%m%d')}.xlsx"
-    response['Content-Disposition'] = f'attachment; filename="{filename}"'
 
-    # Salvar workbook no response
-    wb.save(response)
+@login_required
+def baixar_exportacao(request, job_id):
+    """Envia o arquivo de uma exportação concluída"""
+    from django.db.models import F
+    from django.http import FileResponse, Http404
+    from tarefas.models import ExportJob
+
+    job = get_object_or_404(ExportJob, id=job_id, status=ExportJob.STATUS_CONCLUIDO)
+    if job.solicitante_id != request.user.pk and not usuario_eh_coordenador(request.user):
+        raise Http404
+    if not job.arquivo_existe():
+        raise Http404('Arquivo expirado')
 
-    return response
+    ExportJob.objects.filter(id=job.id).update(downloads=F('downloads') + 1)
+    return FileResponse(open(job.caminho_arquivo, 'rb'), as_attachment=True, filename=job.nome_arquivo)
 
 
 # ============================================
@@ -1357,12 +1488,8 @@ def obter_servicos_servidor_fila(request, siape, codigo_fila):
     try:
         servidor = get_object_or_404(User, siape=siape)
 
-        # Buscar serviços distintos
-        servicos = Tarefa.objects.filter(
-            siape_responsavel=servidor,
-            tipo_fila=codigo_fila,
-            ativa=True
-        ).values_list('nome_servico', flat=True).distinct().order_by('nome_servico')
+        # Serviços distintos (tabela de dimensão atualizada na importação)
+        servicos = servicos_servidor_fila(servidor.siape, codigo_fila)
 
         return JsonResponse({
             'success': True,
@@ -1387,8 +1514,8 @@ def gerar_arquivo_acao_lote(request, siape, codigo_fila):
     - Tipo 12: Transferir Tarefa em Lote
     """
     from tarefas.models import HistoricoAcaoLote
+    from tarefas.acoes_lote import TIPOS_ACAO, cabecalho_arquivo, linha_arquivo
     from datetime import datetime
-    import csv
     from io import StringIO
 
     if request.method != 'POST':
@@ -1477,42 +1604,23 @@ def gerar_arquivo_acao_lote(request, siape, codigo_fila):
             if not despacho or len(despacho) < 30:
                 return JsonResponse({'success': False, 'error': 'Despacho deve ter no mínimo 30 caracteres'}, status=400)
 
-        # Gerar arquivo CSV
-        output = StringIO()
-
-        if tipo_acao == 'REMOVER':
-            # Tipo 14: Remover Responsável em Lote
-            output.write('14\n')
-            output.write('"Protocolo da Tarefa"\n')
-
-            for tarefa in tarefas:
-                output.write(f'"{tarefa.numero_protocolo_tarefa}"\n')
-
-            tipo_arquivo = 'remover'
-            tipo_codigo = '14'
-
-        else:  # TRANSFERIR
-            # Tipo 12: Transferir Tarefa em Lote
-            output.write('12\n')
-            output.write('"Protocolo da Tarefa;UO de Destino da Tarefa;Despacho"\n')
+        # Gerar arquivo CSV (mesma lista usada no histórico)
+        protocolos_lista = list(tarefas.values_list('numero_protocolo_tarefa', flat=True))
 
-            for tarefa in tarefas:
-                # Escapar aspas duplas no despacho (duplicando-as)
-                despacho_escapado = despacho.replace('"', '""')
-                output.write(f'"{tarefa.numero_protocolo_tarefa};{uo_destino};{despacho_escapado}"\n')
+        output = StringIO()
+        output.write(cabecalho_arquivo(tipo_acao))
+        for protocolo in protocolos_lista:
+            output.write(linha_arquivo(tipo_acao, protocolo, uo_destino, despacho))
 
-            tipo_arquivo = 'transferir'
-            tipo_codigo = '12'
+        tipo_arquivo = TIPOS_ACAO[tipo_acao][2]
 
         # Registrar no histórico
-        protocolos_lista = list(tarefas.values_list('numero_protocolo_tarefa', flat=True))
-
         nome_arquivo = f'acao_lote_{tipo_arquivo}_{siape}_{codigo_fila}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
 
         historico = HistoricoAcaoLote.objects.create(
             servidor=servidor,
             codigo_fila=codigo_fila,
-            tipo_acao='REMOVER_RESPONSAVEL' if tipo_acao == 'REMOVER' else 'TRANSFERIR_TAREFA',
+            tipo_acao=TIPOS_ACAO[tipo_acao][0],
             criterio_selecao=criterio_selecao,
             servico_selecionado=servico_selecionado,
             quantidade_tarefas=len(protocolos_lista),
@@ -1539,3 +1647,126 @@ def gerar_arquivo_acao_lote(request, siape, codigo_fila):
             'success': False,
             'error': f'Erro ao gerar arquivo: {str(e)}'
         }, status=500)
+
+
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+@require_POST
+def gerar_arquivo_acao_lote_fila(request, codigo_fila):
+    """
+    Gera, em uma única requisição, o arquivo do robô para vários servidores
+    da fila, selecionados por política (ver tarefas/acoes_lote.py).
+
+    POST: tipo_acao, escopo (CRITICAS/TODAS), acima_de, por_servidor,
+    agrupamento (COMBINADO/POR_SERVIDOR), uo_destino e despacho (transferência).
+
+    Seleções acima de LIMITE_ACAO_LOTE_DIRETA tarefas viram ExportJob.
+    """
+    from django.http import FileResponse
+    from tarefas.acoes_lote import (
+        AGRUPAMENTOS, LIMITE_ACAO_LOTE_DIRETA, escrever_arquivo_acao_lote,
+        normalizar_parametros, resumo_servidores,
+    )
+    from tarefas.exportacao import solicitar_exportacao
+    import tempfile
+
+    try:
+        parametros = normalizar_parametros({**request.POST.dict(), 'fila': codigo_fila})
+    except ValueError as e:
+        messages.error(request, str(e))
+        return redirect('tarefas:detalhe_fila', codigo_fila=codigo_fila)
+
+    servidores = resumo_servidores(parametros)
+    total = sum(quantidade for _, quantidade in servidores)
+    if not total:
+        messages.warning(request, 'Nenhuma tarefa encontrada com os critérios informados.')
+        return redirect('tarefas:detalhe_fila', codigo_fila=codigo_fila)
+
+    if total > LIMITE_ACAO_LOTE_DIRETA:
+        job, reaproveitado = solicitar_exportacao(AGRUPAMENTOS[parametros['agrupamento']], parametros, request.user)
+        messages.success(
+            request,
+            f'{total} tarefas de {len(servidores)} servidores: arquivo #{job.id} '
+            f'{"já disponível" if reaproveitado else "agendado"} em segundo plano.'
+        )
+        return redirect('tarefas:exportacoes')
+
+    arquivo = tempfile.TemporaryFile()
+    try:
+        resumo = escrever_arquivo_acao_lote(arquivo, parametros, servidores, request.user)
+    except Exception:
+        arquivo.close()
+        raise
+    arquivo.seek(0)
+    return FileResponse(arquivo, as_attachment=True, filename=resumo['nome_arquivo'])
+
+
+@login_required
+@user_passes_test(usuario_eh_coordenador)
+def rebalancear_fila(request, codigo_fila):
+    """
+    Planejador de rebalanceamento da fila (ver tarefas/rebalanceamento.py).
+
+    GET com receptores: mostra o plano (cargas antes/depois e transferências).
+    POST: gera o arquivo TRANSFERIR do plano (uo_destino e despacho obrigatórios);
+    o arquivo só leva a UO de destino, os receptores definem as quantidades.
+    """
+    import tempfile
+    from django.http import FileResponse
+    from tarefas.acoes_lote import TAMANHO_MINIMO_DESPACHO
+    from tarefas.dimensoes import cargas_servidores_fila
+    from tarefas.filas import obter_info_fila
+    from tarefas.rebalanceamento import escrever_arquivo_rebalanceamento, planejar_rebalanceamento
+
+    dados = request.POST if request.method == 'POST' else request.GET
+    receptores = dados.getlist('receptores')
+    receptores += re.split(r'[,\s]+', dados.get('receptores_extras', '').strip())
+    receptores = [siape for siape in dict.fromkeys(receptores) if siape]
+
+    cargas = cargas_servidores_fila(codigo_fila)
+    plano = planejar_rebalanceamento(codigo_fila, receptores, cargas) if receptores else None
+
+    if request.method == 'POST':
+        uo_destino = dados.get('uo_destino', '').strip()
+        despacho = dados.get('despacho', '').strip()
+        if not plano or not plano['movimentos']:
+            messages.warning(request, 'O plano não tem transferências a gerar.')
+        elif not uo_destino:
+            messages.error(request, 'UO de destino é obrigatória para transferência.')
+        elif len(despacho) < TAMANHO_MINIMO_DESPACHO:
+            messages.error(request, f'Despacho deve ter no mínimo {TAMANHO_MINIMO_DESPACHO} caracteres.')
+        else:
+            arquivo = tempfile.TemporaryFile()
+            try:
+                resumo = escrever_arquivo_rebalanceamento(arquivo, plano, uo_destino, despacho, request.user)
+            except Exception:
+                arquivo.close()
+                raise
+            arquivo.seek(0)
+            return FileResponse(arquivo, as_attachment=True, filename=resumo['nome_arquivo'])
+
+    nomes = dict(
+        User.objects.filter(siape__in=set(cargas) | set(receptores)).values_list('siape', 'nome_completo')
+    )
+    servidores = [
+        {'siape': siape, 'nome': nomes.get(siape, siape), 'criticas': criticas, 'total': total,
+         'receptor': siape in receptores}
+        for siape, (criticas, total) in sorted(cargas.items(), key=lambda item: (-item[1][1], item[0]))
+    ]
+    if plano:
+        for linha in plano['servidores']:
+            linha['nome'] = nomes.get(linha['siape'], linha['siape'])
+        for movimento in plano['movimentos']:
+            movimento['nome_doador'] = nomes.get(movimento['doador'], movimento['doador'])
+            movimento['nome_receptor'] = nomes.get(movimento['receptor'], movimento['receptor'])
+
+    return render(request, 'tarefas/rebalanceamento.html', {
+        'codigo_fila': codigo_fila,
+        'info_fila': obter_info_fila(codigo_fila),
+        'servidores': servidores,
+        'receptores': receptores,
+        'receptores_extras': ' '.join(siape for siape in receptores if siape not in cargas),
+        'plano': plano,
+        'uo_destino': dados.get('uo_destino', ''),
+        'despacho': dados.get('despacho', ''),
+    })
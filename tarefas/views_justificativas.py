@@ -10,7 +10,7 @@ from django.db.models import Q, Count, Case, When, IntegerField
 from django.utils import timezone
 from django.core.paginator import Paginator
 
-from .models import Tarefa, Justificativa, SolicitacaoAjuda, TipoJustificativa
+from .models import GeracaoDados, Tarefa, Justificativa, SolicitacaoAjuda, TipoJustificativa
 from .forms import (
     JustificativaForm, 
     AvaliacaoJustificativaForm,
@@ -79,6 +79,7 @@ def submeter_justificativa(request, protocolo):
             from .analisador import aplicar_analise_criticidade
             aplicar_analise_criticidade(tarefa)
             tarefa.save()
+            GeracaoDados.incrementar()
             
             messages.success(
                 request,
@@ -418,6 +419,7 @@ def avaliar_justificativa(request, justificativa_id):
             from .analisador import aplicar_analise_criticidade
             aplicar_analise_criticidade(tarefa)
             tarefa.save()
+            GeracaoDados.incrementar()
             
             return redirect('tarefas:lista_justificativas_analise')
     else: